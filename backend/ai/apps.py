@@ -8,6 +8,20 @@ class AiConfig(AppConfig):
 
     def ready(self):
         """Pre-load OCR models when Django starts."""
+        # OCR process-pool replicas load their own models
+        if os.environ.get("OCR_PROCESS_REPLICA"):
+            return
+
+        from ai.model_registry import AI_PRELOAD_MODELS, is_server_process
+
+        if AI_PRELOAD_MODELS and is_server_process():
+            # Load synchronously, before gunicorn --preload / Celery prefork
+            # fork their workers, so workers share the weights.
+            from ai.model_registry import model_registry
+
+            model_registry.preload(AI_PRELOAD_MODELS)
+            return
+
         # Only run in the main process (not in management commands or migrations)
         run_main = os.environ.get("RUN_MAIN")
         if run_main != "true":
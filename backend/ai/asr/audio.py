@@ -0,0 +1,163 @@
+"""
+Audio decoding for ASR - in memory, window by window
+
+PhoWhisper expects 16kHz mono float32 samples. Uploads are decoded straight
+from a path, bytes or a file-like object without a temp-file round trip:
+
+- soundfile (libsndfile) for wav/flac/ogg, read block by block, and
+- ffmpeg piping raw f32le samples to stdout for everything else (mp3/m4a/webm).
+
+`iter_audio_windows()` yields fixed-length overlapping windows as they are
+decoded, so a 40-minute recording never has to sit in memory as one array.
+"""
+
+import io
+import logging
+import subprocess
+import threading
+from typing import BinaryIO, Iterator, Tuple, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+
+AudioSource = Union[str, bytes, bytearray, BinaryIO]
+
+# Decode granularity; windows are assembled from these blocks
+BLOCK_SECONDS = 10
+
+
+def _open_for_soundfile(source: AudioSource):
+    if isinstance(source, (bytes, bytearray)):
+        return io.BytesIO(source)
+    if hasattr(source, "seek"):
+        source.seek(0)
+    return source
+
+
+def _soundfile_blocks(
+    source: AudioSource, block_seconds: float
+) -> Iterator[np.ndarray]:
+    import soundfile as sf
+
+    with sf.SoundFile(_open_for_soundfile(source)) as f:
+        native_rate = f.samplerate
+        for block in f.blocks(
+            blocksize=int(block_seconds * native_rate), dtype="float32", always_2d=True
+        ):
+            mono = block.mean(axis=1)
+            if native_rate != SAMPLE_RATE:
+                import librosa
+
+                mono = librosa.resample(
+                    mono, orig_sr=native_rate, target_sr=SAMPLE_RATE
+                )
+            yield mono.astype(np.float32, copy=False)
+
+
+def _ffmpeg_blocks(source: AudioSource, block_seconds: float) -> Iterator[np.ndarray]:
+    from_path = isinstance(source, str)
+    args = ["ffmpeg", "-loglevel", "error"]
+    args += ["-nostdin", "-i", source] if from_path else ["-i", "pipe:0"]
+    args += ["-f", "f32le", "-ac", "1", "-ar", str(SAMPLE_RATE), "pipe:1"]
+
+    proc = subprocess.Popen(
+        args,
+        stdin=None if from_path else subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+
+    writer = None
+    if not from_path:
+        if isinstance(source, (bytes, bytearray)):
+            data = source
+        else:
+            # A failed soundfile probe leaves the file part-way through
+            source.seek(0)
+            data = source.read()
+
+        def _feed():
+            try:
+                proc.stdin.write(data)
+            except BrokenPipeError:
+                pass
+            finally:
+                proc.stdin.close()
+
+        # Feed stdin from a thread so reading stdout can't deadlock
+        writer = threading.Thread(target=_feed, daemon=True)
+        writer.start()
+
+    block_bytes = int(block_seconds * SAMPLE_RATE) * 4
+    try:
+        while True:
+            chunk = proc.stdout.read(block_bytes)
+            if not chunk:
+                break
+            usable = len(chunk) - len(chunk) % 4
+            yield np.frombuffer(chunk[:usable], dtype=np.float32)
+    finally:
+        proc.stdout.close()
+        if writer is not None:
+            writer.join(timeout=5)
+        stderr = proc.stderr.read().decode("utf-8", errors="replace").strip()
+        proc.stderr.close()
+        if proc.wait() != 0:
+            raise ValueError(f"ffmpeg could not decode audio: {stderr}")
+
+
+def iter_audio_blocks(
+    source: AudioSource, block_seconds: float = BLOCK_SECONDS
+) -> Iterator[np.ndarray]:
+    """Yield 16kHz mono float32 blocks of ~block_seconds each."""
+    try:
+        import soundfile as sf
+
+        # Probe the container first so a format libsndfile can't read falls
+        # back to ffmpeg before any block was yielded.
+        sf.info(_open_for_soundfile(source))
+    except Exception:
+        yield from _ffmpeg_blocks(source, block_seconds)
+        return
+
+    yield from _soundfile_blocks(source, block_seconds)
+
+
+def iter_audio_windows(
+    source: AudioSource, window_seconds: float, overlap_seconds: float
+) -> Iterator[Tuple[float, np.ndarray]]:
+    """
+    Yield (start_seconds, samples) windows of `window_seconds`, each
+    overlapping the previous one by `overlap_seconds`.
+    """
+    window = int(window_seconds * SAMPLE_RATE)
+    step = window - int(overlap_seconds * SAMPLE_RATE)
+    if step <= 0:
+        raise ValueError("overlap must be shorter than the window")
+
+    buffer = np.zeros(0, dtype=np.float32)
+    offset = 0  # Sample index of buffer[0]
+    emitted = False
+
+    for block in iter_audio_blocks(source):
+        buffer = np.concatenate([buffer, block])
+        while len(buffer) >= window:
+            yield offset / SAMPLE_RATE, buffer[:window]
+            emitted = True
+            buffer = buffer[step:]
+            offset += step
+
+    # Tail: skip it if it is entirely inside the previous window's overlap
+    if len(buffer) and (not emitted or len(buffer) > window - step):
+        yield offset / SAMPLE_RATE, buffer
+
+
+def decode_audio(source: AudioSource) -> np.ndarray:
+    """Decode a whole clip to 16kHz mono float32 (for short clips)."""
+    blocks = list(iter_audio_blocks(source))
+    if not blocks:
+        return np.zeros(0, dtype=np.float32)
+    return np.concatenate(blocks)
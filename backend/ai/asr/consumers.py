@@ -0,0 +1,106 @@
+"""
+WebSocket Consumer for streaming ASR transcription
+
+Long recordings are transcribed window by window; each finished window is
+pushed to the client as soon as it is ready instead of after the whole file.
+
+Usage:
+    Frontend connects to: ws://host/ws/asr/{job_id}/
+    Receives JSON messages:
+        {"type": "partial", "index": 0, "start": 0.0, "end": 30.0, "text": "..."}
+        {"type": "complete", "status": "done", "text": "..."}
+        {"type": "error", "status": "failed", "error": "..."}
+"""
+
+import logging
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+logger = logging.getLogger(__name__)
+
+
+class ASRProgressConsumer(AsyncJsonWebsocketConsumer):
+    """
+    WebSocket consumer for streaming transcription jobs.
+
+    Groups are named by job_id so Celery tasks can send partial text
+    to the clients watching that job.
+    """
+
+    async def connect(self):
+        """Called when client connects to WebSocket."""
+        self.job_id = self.scope["url_route"]["kwargs"]["job_id"]
+        self.group_name = f"asr_{self.job_id}"
+
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+
+        await self.accept()
+        logger.info(f"WebSocket connected for ASR job: {self.job_id}")
+
+        await self.send_json(
+            {
+                "type": "connected",
+                "job_id": self.job_id,
+                "message": "Listening for transcription updates",
+            }
+        )
+
+    async def disconnect(self, close_code):
+        """Called when client disconnects."""
+        await self.channel_layer.group_discard(self.group_name, self.channel_name)
+        logger.info(f"WebSocket disconnected for ASR job: {self.job_id}")
+
+    async def asr_partial(self, event):
+        """Handler for 'asr.partial' messages (one transcribed window)."""
+        await self.send_json({"type": "partial", **event.get("data", {})})
+
+    async def asr_complete(self, event):
+        """Handler for 'asr.complete' messages when the job finishes."""
+        await self.send_json(
+            {"type": "complete", "status": "done", **event.get("data", {})}
+        )
+
+    async def asr_error(self, event):
+        """Handler for 'asr.error' messages on failure."""
+        await self.send_json(
+            {
+                "type": "error",
+                "status": "failed",
+                "error": event.get("error", "Unknown error"),
+            }
+        )
+
+
+def _group_send(job_id: str, message: dict):
+    from channels.layers import get_channel_layer
+    from asgiref.sync import async_to_sync
+
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        logger.warning("Channel layer not available - WebSocket updates disabled")
+        return
+
+    try:
+        async_to_sync(channel_layer.group_send)(f"asr_{job_id}", message)
+    except Exception as e:
+        logger.warning(f"Failed to send ASR WebSocket update: {e}")
+
+
+# Helper functions for Celery tasks
+def send_asr_partial(job_id: str, chunk: dict):
+    """
+    Push one transcribed window.
+
+    Example:
+        send_asr_partial(job_id, {"index": 2, "start": 50.0, "end": 80.0, "text": "..."})
+    """
+    _group_send(job_id, {"type": "asr.partial", "data": chunk})
+
+
+def send_asr_complete(job_id: str, text: str):
+    """Send the final transcript."""
+    _group_send(job_id, {"type": "asr.complete", "data": {"text": text}})
+
+
+def send_asr_error(job_id: str, error: str):
+    """Send a failure notification."""
+    _group_send(job_id, {"type": "asr.error", "error": error})
@@ -0,0 +1,12 @@
+"""
+WebSocket routing for ASR module.
+"""
+
+from django.urls import re_path
+from . import consumers
+
+websocket_urlpatterns = [
+    re_path(
+        r"ws/asr/(?P<job_id>[a-f0-9-]+)/$", consumers.ASRProgressConsumer.as_asgi()
+    ),
+]
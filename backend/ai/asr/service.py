@@ -1,12 +1,26 @@
 """
 ASR Service - Automatic Speech Recognition
 Supports Vietnamese using PhoWhisper model from VinAI Research
+
+Long recordings can be transcribed incrementally with transcribe_stream():
+audio is decoded in ASR_STREAM_WINDOW_S windows overlapping by
+ASR_STREAM_OVERLAP_S, each window is transcribed as soon as it is decoded,
+and the partial text is pushed to the `asr_{job_id}` WebSocket group.
+
+Clips of at most one window (and every streaming window) go through a shared
+micro-batching queue: concurrent requests in the same process are coalesced
+into one batched pipeline call of up to ASR_BATCH_MAX_SIZE clips, waiting at
+most ASR_BATCH_MAX_LATENCY_MS for a batch to fill.
 """
 
 import os
+import re
 import logging
 from pathlib import Path
-from typing import Optional, Dict, Any, Union, TYPE_CHECKING
+from typing import Optional, Dict, Any, Union, Iterator, TYPE_CHECKING
+from ai.batching import MicroBatchQueue
+from ai.model_registry import model_registry
+from .audio import SAMPLE_RATE, AudioSource, decode_audio, iter_audio_windows
 
 logger = logging.getLogger(__name__)
 
@@ -15,6 +29,42 @@ ASR_ENABLED = os.environ.get("ASR_ENABLED", "true").lower() in ("true", "1", "ye
 if not ASR_ENABLED:
     logger.info("ASR service disabled via ASR_ENABLED=false")
 
+# Streaming windows: Whisper's encoder sees at most 30s, so each window is a
+# single forward pass; the overlap keeps words cut at a boundary intact.
+ASR_STREAM_WINDOW_S = float(os.environ.get("ASR_STREAM_WINDOW_S", "30"))
+ASR_STREAM_OVERLAP_S = float(os.environ.get("ASR_STREAM_OVERLAP_S", "5"))
+
+# Cross-request batching of short clips / streaming windows
+ASR_BATCHING = os.environ.get("ASR_BATCHING", "true").lower() in ("true", "1", "yes")
+ASR_BATCH_MAX_SIZE = int(os.environ.get("ASR_BATCH_MAX_SIZE", "8"))
+ASR_BATCH_MAX_LATENCY_MS = float(os.environ.get("ASR_BATCH_MAX_LATENCY_MS", "100"))
+
+# Longest repeated word run removed when joining overlapping windows
+MAX_OVERLAP_WORDS = 30
+
+
+def _words_key(text: str):
+    return [re.sub(r"[^\w]", "", w.lower()) for w in text.split()]
+
+
+def merge_overlap(previous: str, new: str) -> str:
+    """
+    Drop the start of `new` that repeats the end of `previous`.
+
+    Consecutive windows share ASR_STREAM_OVERLAP_S seconds of audio, so the
+    words spoken in the overlap are usually transcribed twice.
+    """
+    prev_words = _words_key(previous)
+    new_words = new.split()
+    new_keys = _words_key(new)
+
+    limit = min(MAX_OVERLAP_WORDS, len(prev_words), len(new_keys))
+    for size in range(limit, 1, -1):
+        if prev_words[-size:] == new_keys[:size]:
+            return " ".join(new_words[size:])
+    return new.strip()
+
+
 # Heavy ML libraries are imported lazily when ASR is first used.
 DEPENDENCIES_AVAILABLE = None
 torch = None  # type: ignore
@@ -61,6 +111,7 @@ class ASRService:
     _model = None
     _device = None
     _initialized = False  # Track if init has been attempted
+    _batch_queue = None  # Cross-request batching queue
 
     def __new__(cls):
         """Singleton pattern to load model only once"""
@@ -126,13 +177,14 @@ class ASRService:
             os.environ["TRANSFORMERS_CACHE"] = cache_dir
             os.environ["HF_HOME"] = cache_dir
 
-            self._model = pipeline(  # type: ignore
-                "automatic-speech-recognition",
-                model="vinai/PhoWhisper-medium",
-                device=0 if self._device == "cuda" else -1,
-                chunk_length_s=30,  # Process audio in 30-second chunks
-                stride_length_s=5,  # 5-second overlap between chunks
-            )
+            with model_registry.loading("asr.phowhisper"):
+                self._model = pipeline(  # type: ignore
+                    "automatic-speech-recognition",
+                    model="vinai/PhoWhisper-medium",
+                    device=0 if self._device == "cuda" else -1,
+                    chunk_length_s=30,  # Process audio in 30-second chunks
+                    stride_length_s=5,  # 5-second overlap between chunks
+                )
 
             logger.info("ASR model initialized successfully")
             logger.info(f"Model device: {self._device}")
@@ -194,48 +246,9 @@ class ASRService:
 
         try:
             logger.info(f"Transcribing audio file: {audio_file_path}")
-
-            # Configure transcription parameters
-            generate_kwargs = {
-                "language": language,
-                "task": "transcribe",
-            }
-
-            # Transcribe audio
-            result = self._model(  # type: ignore
-                audio_file_path,
-                generate_kwargs=generate_kwargs,
-                return_timestamps=return_timestamps,
-            )
-
-            # Extract text - handle both dict and list responses
-            if isinstance(result, dict):
-                text = result.get("text", "")
-            elif isinstance(result, list) and len(result) > 0:
-                text = (
-                    result[0].get("text", "")
-                    if isinstance(result[0], dict)
-                    else str(result)
-                )
-            else:
-                text = str(result)
-
-            response: Dict[str, Any] = {
-                "text": text.strip(),
-                "language": language,
-                "success": True,
-                "error": None,
-            }
-
-            # Add timestamps if requested
-            if return_timestamps:
-                if isinstance(result, dict) and "chunks" in result:
-                    response["chunks"] = result["chunks"]  # type: ignore
-                elif isinstance(result, list):
-                    response["chunks"] = result
-
-            logger.info(f"Transcription successful: {len(text)} characters")
-            return response
+            if ASR_BATCHING and not return_timestamps:
+                return self._transcribe_decoded(decode_audio(audio_file_path), language)
+            return self._run_pipeline(audio_file_path, language, return_timestamps)
 
         except Exception as e:
             logger.error(f"Transcription failed: {str(e)}", exc_info=True)
@@ -246,14 +259,118 @@ class ASRService:
                 "error": f"Transcription error: {str(e)}",
             }
 
+    def _run_pipeline(
+        self, inputs: Any, language: str, return_timestamps: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Run PhoWhisper on a file path or {"raw": samples, "sampling_rate": sr}
+        and normalize the pipeline output into the transcribe() response.
+        """
+        # Configure transcription parameters
+        generate_kwargs = {
+            "language": language,
+            "task": "transcribe",
+        }
+
+        # Transcribe audio
+        result = self._model(  # type: ignore
+            inputs,
+            generate_kwargs=generate_kwargs,
+            return_timestamps=return_timestamps,
+        )
+        return self._format_result(result, language, return_timestamps)
+
+    def _format_result(
+        self, result: Any, language: str, return_timestamps: bool = False
+    ) -> Dict[str, Any]:
+        """Build the transcribe() response from one pipeline output."""
+        # Extract text - handle both dict and list responses
+        if isinstance(result, dict):
+            text = result.get("text", "")
+        elif isinstance(result, list) and len(result) > 0:
+            text = (
+                result[0].get("text", "")
+                if isinstance(result[0], dict)
+                else str(result)
+            )
+        else:
+            text = str(result)
+
+        response: Dict[str, Any] = {
+            "text": text.strip(),
+            "language": language,
+            "success": True,
+            "error": None,
+        }
+
+        # Add timestamps if requested
+        if return_timestamps:
+            if isinstance(result, dict) and "chunks" in result:
+                response["chunks"] = result["chunks"]  # type: ignore
+            elif isinstance(result, list):
+                response["chunks"] = result
+
+        logger.info(f"Transcription successful: {len(text)} characters")
+        return response
+
+    def _get_batch_queue(self) -> MicroBatchQueue:
+        """Lazy init the shared batching queue (one per process)."""
+        if ASRService._batch_queue is None:
+            ASRService._batch_queue = MicroBatchQueue(
+                self._transcribe_batch,
+                max_batch_size=ASR_BATCH_MAX_SIZE,
+                max_wait_ms=ASR_BATCH_MAX_LATENCY_MS,
+                # generate_kwargs are per call, so only batch same-language clips
+                bucket_fn=lambda item: item[1],
+                name="phowhisper",
+            )
+        return ASRService._batch_queue
+
+    def _transcribe_batch(self, items):
+        """Batch fn for the queue: [(samples, language)] -> [text]."""
+        language = items[0][1]
+        results = self._model(  # type: ignore
+            [{"raw": samples, "sampling_rate": SAMPLE_RATE} for samples, _ in items],
+            batch_size=len(items),
+            generate_kwargs={"language": language, "task": "transcribe"},
+        )
+        return [self._format_result(result, language)["text"] for result in results]
+
+    def _transcribe_window(self, samples, language: str) -> str:
+        """Transcribe at most one window of samples, batched when enabled."""
+        if ASR_BATCHING:
+            return self._get_batch_queue().submit((samples, language)).result()
+        inputs = {"raw": samples, "sampling_rate": SAMPLE_RATE}
+        return self._run_pipeline(inputs, language)["text"]
+
+    def _transcribe_decoded(self, samples, language: str) -> Dict[str, Any]:
+        """transcribe() response for decoded audio (no timestamps)."""
+        if len(samples) <= ASR_STREAM_WINDOW_S * SAMPLE_RATE:
+            text = self._transcribe_window(samples, language)
+        else:
+            # Longer than one window: the pipeline's own chunking handles it
+            inputs = {"raw": samples, "sampling_rate": SAMPLE_RATE}
+            return self._run_pipeline(inputs, language)
+
+        return {
+            "text": text,
+            "language": language,
+            "success": True,
+            "error": None,
+        }
+
     def transcribe_bytes(
-        self, audio_bytes: bytes, language: str = "vi", return_timestamps: bool = False
+        self,
+        audio_bytes: Union[bytes, AudioSource],
+        language: str = "vi",
+        return_timestamps: bool = False,
     ) -> Dict[str, Any]:
         """
         Transcribe audio from bytes
 
         Args:
-            audio_bytes: Audio data as bytes
+            audio_bytes: Audio data as bytes (or a file-like object); decoded
+                         in memory, no temp file is written
             language: Language code (default: "vi" for Vietnamese)
             return_timestamps: Whether to return word-level timestamps
 
@@ -271,26 +388,15 @@ class ASRService:
             }
 
         try:
-            # Save bytes to temporary file
-            import tempfile
-
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp_file:
-                tmp_file.write(audio_bytes)
-                tmp_path = tmp_file.name
-
-            # Transcribe
-            result = self.transcribe(
-                tmp_path, language=language, return_timestamps=return_timestamps
+            samples = decode_audio(audio_bytes)
+            if ASR_BATCHING and not return_timestamps:
+                return self._transcribe_decoded(samples, language)
+            return self._run_pipeline(
+                {"raw": samples, "sampling_rate": SAMPLE_RATE},
+                language,
+                return_timestamps,
             )
 
-            # Clean up
-            try:
-                os.unlink(tmp_path)
-            except:
-                pass
-
-            return result
-
         except Exception as e:
             logger.error(f"Transcription from bytes failed: {str(e)}")
             return {
@@ -300,6 +406,54 @@ class ASRService:
                 "error": f"Transcription error: {str(e)}",
             }
 
+    def transcribe_stream(
+        self,
+        source: AudioSource,
+        language: str = "vi",
+        job_id: Optional[str] = None,
+        window_seconds: float = ASR_STREAM_WINDOW_S,
+        overlap_seconds: float = ASR_STREAM_OVERLAP_S,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Transcribe long audio window by window.
+
+        Audio is decoded incrementally (path, bytes or file-like), so memory
+        stays bounded by one window regardless of recording length. If job_id
+        is given, every chunk is also pushed to the `asr_{job_id}` WebSocket
+        group as it finishes.
+
+        Yields:
+            {"index": int, "start": float, "end": float, "text": str}
+            where text has the words repeated from the previous window's
+            overlap removed
+
+        Raises:
+            RuntimeError: If the model is not available
+            ValueError: If the audio cannot be decoded
+        """
+        from .consumers import send_asr_partial
+
+        self._ensure_model_loaded()  # Lazy load
+        if not self._model:
+            raise RuntimeError("ASR service not available. Model failed to initialize.")
+
+        previous_text = ""
+        windows = iter_audio_windows(source, window_seconds, overlap_seconds)
+        for index, (start, samples) in enumerate(windows):
+            window_text = self._transcribe_window(samples, language)
+            text = merge_overlap(previous_text, window_text)
+            previous_text = window_text
+
+            chunk = {
+                "index": index,
+                "start": round(start, 2),
+                "end": round(start + len(samples) / SAMPLE_RATE, 2),
+                "text": text,
+            }
+            if job_id:
+                send_asr_partial(job_id, chunk)
+            yield chunk
+
     def get_model_info(self) -> Dict[str, Any]:
         """Get information about the loaded model"""
         return {
@@ -309,8 +463,13 @@ class ASRService:
             "device": self._device if self._model else None,
             "language_support": ["vi", "en"],
             "description": "Vietnamese-optimized speech recognition using VinAI PhoWhisper",
+            "load": model_registry.stats().get("asr.phowhisper"),
+            "batch_queue": self._batch_queue.stats() if self._batch_queue else None,
         }
 
 
 # Global instance - but model won't load until first use!
 asr_service = ASRService()
+
+if ASR_ENABLED:
+    model_registry.register("asr.phowhisper", asr_service._ensure_model_loaded)
@@ -0,0 +1,37 @@
+from celery import shared_task
+import os
+
+
+@shared_task(bind=True)
+def transcribe_stream_task(self, file_path, language="vi"):
+    """
+    Async Celery task for long recordings.
+
+    Audio is transcribed window by window and each window's text is pushed
+    to the `asr_{task_id}` WebSocket group as soon as it is ready.
+    """
+    from .service import asr_service
+    from .consumers import send_asr_complete, send_asr_error
+
+    try:
+        chunks = list(
+            asr_service.transcribe_stream(
+                file_path, language=language, job_id=self.request.id
+            )
+        )
+        text = " ".join(chunk["text"] for chunk in chunks if chunk["text"]).strip()
+        send_asr_complete(self.request.id, text)
+
+        return {
+            "status": "done",
+            "text": text,
+            "language": language,
+            "chunks": chunks,
+        }
+    except Exception as e:
+        send_asr_error(self.request.id, str(e))
+        return {"status": "failed", "error": str(e)}
+    finally:
+        # Clean up the uploaded recording
+        if os.path.exists(file_path) and "tmp" in file_path:
+            os.remove(file_path)
@@ -11,4 +11,5 @@ urlpatterns = [
     path("status/", views.asr_status, name="asr-status"),
     path("transcribe/", views.transcribe_audio, name="transcribe"),
     path("languages/", views.supported_languages, name="languages"),
+    path("jobs/<str:job_id>/", views.asr_job_status, name="job-status"),
 ]
@@ -2,7 +2,12 @@
 ASR API Views
 """
 
+import os
+import uuid
 import logging
+from celery.result import AsyncResult
+from django.conf import settings
+from django.core.files.storage import default_storage
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
@@ -44,6 +49,8 @@ def transcribe_audio(request):
         - audio: Audio file (required)
         - language: Language code (optional, default: "vi")
         - return_timestamps: Boolean (optional, default: false)
+        - stream: Boolean (optional, default: false) - transcribe in the
+          background and push partial text to ws/asr/{job_id}/
 
     Response:
         {
@@ -53,6 +60,9 @@ def transcribe_audio(request):
             "error": null,
             "chunks": [...] (if return_timestamps=true)
         }
+
+    Response (stream=true, 202):
+        {"job_id": "...", "status": "queued", "websocket": "/ws/asr/{job_id}/"}
     """
     try:
         # Check if ASR is available
@@ -77,26 +87,45 @@ def transcribe_audio(request):
         return_timestamps = (
             request.data.get("return_timestamps", "false").lower() == "true"
         )
+        stream = str(request.data.get("stream", "false")).lower() == "true"
 
-        # Validate file size (max 50MB)
-        max_size = 50 * 1024 * 1024  # 50MB
-        if audio_file.size > max_size:
+        # Validate file size (max 50MB, 200MB for streamed long recordings)
+        max_mb = 200 if stream else 50
+        if audio_file.size > max_mb * 1024 * 1024:
             return Response(
-                {"error": "Audio file too large. Maximum size is 50MB."},
+                {"error": f"Audio file too large. Maximum size is {max_mb}MB."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
+        if stream:
+            # Long recording: transcribe window by window in the background
+            from .tasks import transcribe_stream_task
+
+            ext = os.path.splitext(audio_file.name)[1]
+            file_path = default_storage.save(
+                f"tmp/asr_temp_{uuid.uuid4()}{ext}", audio_file
+            )
+            task = transcribe_stream_task.delay(
+                os.path.join(settings.MEDIA_ROOT, file_path), language
+            )
+            return Response(
+                {
+                    "job_id": task.id,
+                    "status": "queued",
+                    "websocket": f"/ws/asr/{task.id}/",
+                },
+                status=status.HTTP_202_ACCEPTED,
+            )
+
         # Process audio file
         logger.info(
             f"Transcribing audio file: {audio_file.name} ({audio_file.size} bytes)"
         )
 
-        # Save to temporary location if needed
         if isinstance(audio_file, InMemoryUploadedFile):
-            # Read file content for in-memory files
-            audio_bytes = audio_file.read()
+            # Decode in-memory uploads directly (no temp file)
             result = asr_service.transcribe_bytes(
-                audio_bytes, language=language, return_timestamps=return_timestamps
+                audio_file.file, language=language, return_timestamps=return_timestamps
             )
         else:
             # Use file path for temporary uploaded files
@@ -139,3 +168,25 @@ def supported_languages(request):
     ]
 
     return Response({"languages": languages}, status=status.HTTP_200_OK)
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def asr_job_status(request, job_id):
+    """
+    Check status of a streaming transcription job
+
+    GET /api/asr/jobs/{job_id}/
+    """
+    result = AsyncResult(job_id)
+
+    if result.state == "PENDING":
+        return Response({"status": "queued"})
+    elif result.state == "STARTED":
+        return Response({"status": "running"})
+    elif result.state == "SUCCESS":
+        return Response(result.result or {"status": "done"})
+    elif result.state == "FAILURE":
+        return Response({"status": "failed", "error": str(result.result)})
+
+    return Response({"status": result.state})
@@ -0,0 +1,166 @@
+"""
+Micro-batching queue shared by the AI services.
+
+Model calls on CPU are much cheaper per item when run as one batched forward
+pass. Requests from concurrent pages/jobs/users are collected into a queue and
+a single worker thread flushes them to `batch_fn` when either:
+- a bucket reaches `max_batch_size` items, or
+- the oldest item in a bucket has waited `max_wait_ms`.
+
+Items are grouped by `bucket_fn(item)` so a batch only contains items of
+compatible shape (e.g. text-line crops of similar width).
+
+Usage:
+    queue = MicroBatchQueue(lambda items: model(items), max_batch_size=32)
+    results = queue.map(items)  # blocks until every item is processed
+"""
+
+import time
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class _Request:
+    __slots__ = ("item", "future", "enqueued_at")
+
+    def __init__(self, item):
+        self.item = item
+        self.future = Future()
+        self.enqueued_at = time.monotonic()
+
+
+class MicroBatchQueue:
+    """
+    Thread-safe queue that coalesces single-item requests into batched calls.
+
+    `batch_fn` is only ever called from the queue's worker thread, so it may
+    use a model that is not safe to share between threads.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[Any]], List[Any]],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 20,
+        bucket_fn: Optional[Callable[[Any], Any]] = None,
+        name: str = "batch",
+    ):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.bucket_fn = bucket_fn
+        self.name = name
+
+        self._cond = threading.Condition()
+        self._pending: Dict[Any, List[_Request]] = {}
+        self._depth = 0
+        self._worker: Optional[threading.Thread] = None
+
+        # Metrics
+        self._batches = 0
+        self._items = 0
+        self._errors = 0
+        self._latencies_ms = deque(maxlen=1000)
+        self._batch_sizes = deque(maxlen=1000)
+
+    def submit(self, item: Any) -> Future:
+        """Enqueue one item; the returned Future resolves to its result."""
+        request = _Request(item)
+        bucket = self.bucket_fn(item) if self.bucket_fn else None
+
+        with self._cond:
+            self._ensure_worker()
+            self._pending.setdefault(bucket, []).append(request)
+            self._depth += 1
+            self._cond.notify()
+        return request.future
+
+    def map(self, items: List[Any], timeout: Optional[float] = None) -> List[Any]:
+        """Submit every item and block until all results are available."""
+        futures = [self.submit(item) for item in items]
+        return [future.result(timeout=timeout) for future in futures]
+
+    def _ensure_worker(self):
+        # Caller holds self._cond
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(
+                target=self._run, name=f"{self.name}-batcher", daemon=True
+            )
+            self._worker.start()
+
+    def _next_batch(self) -> List[_Request]:
+        """Block until a bucket is full or its oldest item timed out."""
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                next_deadline = None
+
+                for bucket, requests in self._pending.items():
+                    deadline = requests[0].enqueued_at + self.max_wait
+                    if len(requests) >= self.max_batch_size or now >= deadline:
+                        batch = requests[: self.max_batch_size]
+                        remaining = requests[self.max_batch_size :]
+                        if remaining:
+                            self._pending[bucket] = remaining
+                        else:
+                            del self._pending[bucket]
+                        self._depth -= len(batch)
+                        return batch
+                    if next_deadline is None or deadline < next_deadline:
+                        next_deadline = deadline
+
+                timeout = None if next_deadline is None else next_deadline - now
+                self._cond.wait(timeout)
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                results = self.batch_fn([request.item for request in batch])
+                if len(results) != len(batch):
+                    raise RuntimeError(
+                        f"{self.name}: batch_fn returned {len(results)} results "
+                        f"for {len(batch)} items"
+                    )
+            except Exception as e:
+                logger.error(f"{self.name} batch of {len(batch)} failed: {e}")
+                self._errors += 1
+                for request in batch:
+                    request.future.set_exception(e)
+                continue
+
+            done_at = time.monotonic()
+            for request, result in zip(batch, results):
+                request.future.set_result(result)
+                self._latencies_ms.append((done_at - request.enqueued_at) * 1000)
+
+            self._batches += 1
+            self._items += len(batch)
+            self._batch_sizes.append(len(batch))
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, batch sizes and per-item latency percentiles."""
+        latencies = sorted(self._latencies_ms)
+
+        def _pct(p):
+            if not latencies:
+                return 0.0
+            return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))], 1)
+
+        sizes = list(self._batch_sizes)
+        return {
+            "name": self.name,
+            "queue_depth": self._depth,
+            "batches": self._batches,
+            "items": self._items,
+            "errors": self._errors,
+            "avg_batch_size": round(sum(sizes) / len(sizes), 2) if sizes else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "latency_ms": {"p50": _pct(0.5), "p95": _pct(0.95), "p99": _pct(0.99)},
+        }
@@ -0,0 +1,182 @@
+"""
+Model registry shared by the AI services.
+
+Every heavy model (DocTR, VietOCR, PaddleOCR, Vietnamese SBERT, PhoWhisper)
+registers a loader here. The registry:
+
+- records load time / status per model, whether the model was loaded at
+  startup or lazily by a first request (`loading()` context manager), and
+- preloads a set of models synchronously at Django startup when
+  AI_PRELOAD_MODELS is set and the process is a server entry point
+  (gunicorn / uvicorn / daphne, or a Celery worker; see AiConfig.ready()).
+  Management commands, Celery beat and spawned helper processes never
+  preload.
+
+Preloading in the parent process is what makes worker cold-start cheap: with
+`gunicorn --preload` or Celery's prefork pool, Django is set up in the parent
+before workers are forked, so every worker inherits the already-loaded
+weights copy-on-write instead of loading (and holding) its own copy. After
+preloading, `gc.freeze()` moves the loaded objects out of the GC's tracked
+generations so collections in the children don't touch (and un-share) them.
+
+Models registered with fork_safe=False (the OCR process pool: its
+executor's management thread does not survive fork()) are never loaded
+before a fork; they start lazily on first use in the worker.
+
+Settings (env vars):
+    AI_PRELOAD_MODELS - comma-separated model names or prefixes to load at
+                        startup, e.g. "ocr,heading_matcher" or "all"
+                        (default: "" = lazy loading only)
+"""
+
+import gc
+import os
+import sys
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+AI_PRELOAD_MODELS = [
+    name.strip()
+    for name in os.environ.get("AI_PRELOAD_MODELS", "").split(",")
+    if name.strip()
+]
+
+# Processes that load models once and then fork (or serve) workers
+SERVER_ENTRY_POINTS = ("gunicorn", "uvicorn", "daphne")
+
+# Modules whose import registers model loaders
+MODEL_MODULES = (
+    "ai.ocr.ocr_service",
+    "ai.ocr.heading_matcher",
+    "ai.asr.service",
+)
+
+
+class ModelRegistry:
+    """
+    Named model loaders plus per-process load metrics.
+    """
+
+    def __init__(self):
+        self._loaders: Dict[str, Callable[[], Any]] = {}
+        self._fork_unsafe: set = set()
+        self._info: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, loader: Callable[[], Any], fork_safe: bool = True):
+        """
+        Register `loader` under `name` (e.g. "ocr.vietocr").
+
+        The loader must be idempotent: it is called by preload() and returns
+        the service's cached model on later calls. Pass fork_safe=False for
+        models that hold threads or child processes a fork would break.
+        """
+        with self._lock:
+            self._loaders[name] = loader
+            if not fork_safe:
+                self._fork_unsafe.add(name)
+            self._info.setdefault(name, {"status": "not_loaded"})
+
+    @contextmanager
+    def loading(self, name: str):
+        """Wrap the actual model construction to record its timing."""
+        start = time.time()
+        self._update(name, status="loading")
+        try:
+            yield
+        except Exception as e:
+            self._update(
+                name,
+                status="failed",
+                error=str(e),
+                load_seconds=round(time.time() - start, 2),
+            )
+            raise
+
+        elapsed = time.time() - start
+        self._update(
+            name,
+            status="loaded",
+            error=None,
+            load_seconds=round(elapsed, 2),
+            loaded_at=datetime.now(timezone.utc).isoformat(),
+            pid=os.getpid(),
+        )
+        logger.info(f"Model {name} loaded in {elapsed:.1f}s")
+
+    def _update(self, name, **fields):
+        with self._lock:
+            self._info.setdefault(name, {}).update(fields)
+
+    def _matching(self, names: List[str]) -> List[str]:
+        if "all" in names:
+            return list(self._loaders)
+        return [
+            registered
+            for registered in self._loaders
+            if any(
+                registered == name or registered.startswith(f"{name}.")
+                for name in names
+            )
+        ]
+
+    def preload(self, names: Optional[List[str]] = None, before_fork: bool = True):
+        """
+        Load the given models (names or prefixes) now, in this process.
+
+        With before_fork, fork-unsafe models are skipped and the loaded
+        objects are gc.freeze()-ed for the workers about to be forked.
+        Failures are logged and recorded; they never stop the other models
+        (or Django startup) from loading.
+
+        Returns:
+            Dict of name -> load status
+        """
+        for module in MODEL_MODULES:
+            try:
+                __import__(module)
+            except Exception as e:
+                logger.warning(f"Model registry: could not import {module}: {e}")
+
+        start = time.time()
+        selected = self._matching(names if names is not None else AI_PRELOAD_MODELS)
+        if before_fork:
+            # Started lazily in each worker instead
+            selected = [name for name in selected if name not in self._fork_unsafe]
+        for name in selected:
+            try:
+                self._loaders[name]()
+            except Exception as e:
+                logger.error(f"Preloading model {name} failed: {e}")
+
+        if before_fork and selected:
+            # Keep preloaded objects shared with forked workers
+            gc.collect()
+            gc.freeze()
+
+        logger.info(f"Preloaded {len(selected)} models in {time.time() - start:.1f}s")
+        return {name: self._info[name]["status"] for name in selected}
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Load status and timings for every registered model (this process)."""
+        with self._lock:
+            return {name: dict(info) for name, info in self._info.items()}
+
+
+def is_server_process() -> bool:
+    """True in a web server or Celery worker process, where preloading pays off."""
+    program = os.path.basename(sys.argv[0]) if sys.argv else ""
+    if program.startswith(SERVER_ENTRY_POINTS):
+        return True
+    # `celery -A ... worker` / `python -m celery ... worker`, not beat
+    return "celery" in sys.argv[0] and "worker" in sys.argv[1:]
+
+
+# Singleton instance
+model_registry = ModelRegistry()
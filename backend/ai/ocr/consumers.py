@@ -7,6 +7,7 @@ replacing HTTP polling with push-based notifications.
 Usage:
     Frontend connects to: ws://host/ws/ocr/{job_id}/
     Receives JSON messages: {"page": 1, "total": 10, "status": "processing"}
+    In streaming mode each message also carries the finished page: {"result": {...}}
 """
 
 import json
@@ -80,11 +81,19 @@ class OCRProgressConsumer(AsyncJsonWebsocketConsumer):
 
 
 # Helper function for Celery tasks to send progress updates
-def send_ocr_progress(job_id: str, page: int, total: int, status: str = "processing"):
+def send_ocr_progress(
+    job_id: str,
+    page: int,
+    total: int,
+    status: str = "processing",
+    result: dict = None,
+):
     """
     Send OCR progress update via WebSocket.
 
-    Call this from Celery tasks to push real-time updates.
+    Call this from Celery tasks to push real-time updates. When `result` is
+    given (streaming mode), the finished page payload is included so the
+    frontend can render text before the whole document is done.
 
     Example:
         send_ocr_progress(self.request.id, page=3, total=10, status="processing")
@@ -97,17 +106,21 @@ def send_ocr_progress(job_id: str, page: int, total: int, status: str = "process
         logger.warning("Channel layer not available - WebSocket updates disabled")
         return
 
+    data = {
+        "page": page,
+        "total": total,
+        "status": status,
+        "progress_percent": round((page / total) * 100) if total > 0 else 0,
+    }
+    if result is not None:
+        data["result"] = result
+
     try:
         async_to_sync(channel_layer.group_send)(
             f"ocr_{job_id}",
             {
                 "type": "ocr.progress",
-                "data": {
-                    "page": page,
-                    "total": total,
-                    "status": status,
-                    "progress_percent": round((page / total) * 100) if total > 0 else 0,
-                },
+                "data": data,
             },
         )
     except Exception as e:
@@ -8,18 +8,55 @@ Usage:
     matcher = HeadingMatcher()
     field, confidence = matcher.match_heading("Họ và tên")
     # Returns: ("patient_name", 0.95)
+
+Embeddings are cached so the model is only touched for unseen headings:
+- Field embedding matrix: `{HEADING_CACHE_DIR}/{model}-fields-{hash}.npy`,
+  keyed on the model name and a hash of FIELD_MAPPINGS, memory-mapped on load.
+- Heading embeddings: in-memory LRU (HEADING_EMBEDDING_LRU_SIZE) backed by
+  `{model}-headings.npy` + `.json` on disk, shared across restarts/processes.
+All vectors are stored L2-normalized, so cosine similarity is a dot product.
+
+Matching is tiered; SBERT is the last resort:
+1. exact  - diacritic/case-insensitive lookup of the heading in FIELD_MAPPINGS
+2. fuzzy  - trigram candidates ranked by edit-distance ratio, accepted when
+            the best field clearly beats the runner-up
+3. sbert  - semantic similarity for whatever is left (or ambiguous)
 """
 
+import os
 import re
+import json
+import uuid
+import hashlib
 import logging
+import threading
+import unicodedata
+from difflib import SequenceMatcher
+from collections import Counter, OrderedDict, defaultdict
 from typing import Dict, List, Tuple, Optional, Any
 import numpy as np
+from ai.model_registry import model_registry
+from cases.search.normalize import unaccent
 
 logger = logging.getLogger(__name__)
 
 # Lazy imports to avoid loading heavy models at module import
 _matcher_instance = None
 
+SBERT_MODEL_NAME = "keepitreal/vietnamese-sbert"
+
+HEADING_CACHE_DIR = os.environ.get(
+    "HEADING_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "heading_cache"),
+)
+HEADING_EMBEDDING_LRU_SIZE = int(os.environ.get("HEADING_EMBEDDING_LRU_SIZE", "1024"))
+
+# Fuzzy tier: accept when the edit-distance ratio is at least MIN_RATIO and
+# beats the best candidate of any other field by MARGIN; otherwise SBERT.
+HEADING_FUZZY_MIN_RATIO = float(os.environ.get("HEADING_FUZZY_MIN_RATIO", "0.85"))
+HEADING_FUZZY_MARGIN = float(os.environ.get("HEADING_FUZZY_MARGIN", "0.05"))
+FUZZY_MAX_CANDIDATES = 20
+
 
 # Field mappings: template_field -> list of Vietnamese heading variations
 FIELD_MAPPINGS: Dict[str, List[str]] = {
@@ -181,6 +218,147 @@ FIELD_MAPPINGS: Dict[str, List[str]] = {
 }
 
 
+def normalize_heading(heading: str) -> str:
+    """Canonical form used as the embedding cache key (and model input)."""
+    heading = unicodedata.normalize("NFC", heading)
+    return " ".join(heading.split()).strip(" :.-")
+
+
+def fold_heading(heading: str) -> str:
+    """Diacritic- and case-insensitive key for the exact/fuzzy tiers."""
+    return unaccent(normalize_heading(heading))
+
+
+def _trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def _unit_rows(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalize each row (cosine similarity becomes a dot product)."""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+def _save_npy(path: str, matrix: np.ndarray):
+    """Write an .npy atomically so concurrent readers never see a partial file."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp.npy"
+    np.save(tmp_path, matrix)
+    os.replace(tmp_path, path)
+
+
+class HeadingEmbeddingCache:
+    """
+    Normalized heading -> unit embedding.
+
+    Hot headings live in an in-memory LRU; everything seen so far is also
+    persisted as one memory-mapped matrix plus a JSON key index, so a new
+    process starts with the embeddings of every heading already seen.
+    """
+
+    def __init__(self, path_prefix: str, max_items: int = HEADING_EMBEDDING_LRU_SIZE):
+        self.matrix_path = f"{path_prefix}.npy"
+        self.index_path = f"{path_prefix}.json"
+        self.max_items = max_items
+        self._lru: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._disk_index: Optional[Dict[str, int]] = None
+        self._disk_matrix = None
+        self._pending: Dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _load_disk(self):
+        # Caller holds self._lock
+        if self._disk_index is not None:
+            return
+        self._disk_index = {}
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                keys = json.load(f)
+            matrix = np.load(self.matrix_path, mmap_mode="r")
+            if len(keys) == matrix.shape[0]:
+                self._disk_index = {key: i for i, key in enumerate(keys)}
+                self._disk_matrix = matrix
+        except (OSError, ValueError):
+            pass
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        """Return the cached embeddings among `keys` (misses are omitted)."""
+        found = {}
+        with self._lock:
+            self._load_disk()
+            for key in keys:
+                vector = self._lru.get(key)
+                if vector is None and key in self._disk_index:
+                    vector = np.array(self._disk_matrix[self._disk_index[key]])
+                if vector is None:
+                    vector = self._pending.get(key)
+                if vector is None:
+                    self.misses += 1
+                    continue
+                self.hits += 1
+                self._remember(key, vector)
+                found[key] = vector
+        return found
+
+    def put_many(self, vectors: Dict[str, np.ndarray]):
+        """Add new embeddings; they are written to disk on flush()."""
+        with self._lock:
+            for key, vector in vectors.items():
+                self._remember(key, vector)
+                self._pending[key] = vector
+
+    def _remember(self, key, vector):
+        # Caller holds self._lock
+        self._lru[key] = vector
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_items:
+            self._lru.popitem(last=False)
+
+    def flush(self):
+        """Append pending embeddings to the on-disk store."""
+        with self._lock:
+            if not self._pending:
+                return
+            self._load_disk()
+            keys = sorted(self._disk_index, key=self._disk_index.get)
+            rows = [self._disk_matrix] if keys else []
+            new_keys = [k for k in self._pending if k not in self._disk_index]
+            if not new_keys:
+                # Another thread or process already wrote them
+                self._pending.clear()
+                return
+            keys.extend(new_keys)
+            rows.append(np.stack([self._pending[k] for k in new_keys]))
+            matrix = np.concatenate(rows) if len(rows) > 1 else rows[0]
+
+            try:
+                _save_npy(self.matrix_path, matrix)
+                tmp_index = f"{self.index_path}.{uuid.uuid4().hex}.tmp"
+                with open(tmp_index, "w", encoding="utf-8") as f:
+                    json.dump(keys, f, ensure_ascii=False)
+                os.replace(tmp_index, self.index_path)
+            except OSError as e:
+                logger.warning(f"Heading embedding cache write failed: {e}")
+                return
+
+            self._pending.clear()
+            self._disk_index = None  # Re-map the new file on next lookup
+            self._disk_matrix = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "lru_size": len(self._lru),
+                "on_disk": len(self._disk_index or {}),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
 class HeadingMatcher:
     """
     Matches OCR-extracted headings to case template fields using
@@ -199,14 +377,35 @@ class HeadingMatcher:
         self._field_embeddings = None
         self._field_names: List[str] = []
         self._heading_texts: List[str] = []
+        model_slug = SBERT_MODEL_NAME.replace("/", "__")
+        self._embedding_cache = HeadingEmbeddingCache(
+            os.path.join(HEADING_CACHE_DIR, f"{model_slug}-headings")
+        )
+        self.tier_counts: Counter = Counter()
+        self._build_lexical_index()
+
+    def _build_lexical_index(self):
+        """Folded variant -> fields (exact tier) and trigram -> variants (fuzzy tier)."""
+        self._exact_index: Dict[str, set] = defaultdict(set)
+        self._trigram_index: Dict[str, set] = defaultdict(set)
+
+        for field_name, headings in FIELD_MAPPINGS.items():
+            for heading in headings:
+                folded = fold_heading(heading)
+                self._exact_index[folded].add(field_name)
+                for gram in _trigrams(folded):
+                    self._trigram_index[gram].add(folded)
 
     def _ensure_model_loaded(self):
+        """Lazy-load the SBERT model and the field embeddings."""
+        self._load_model()
+        self._precompute_embeddings()
+
+    def _load_model(self):
         """Lazy-load the SBERT model."""
         if self._model is not None:
             return
 
-        import os
-
         # Force CPU to avoid CUDA compatibility issues with torch versions
         os.environ["CUDA_VISIBLE_DEVICES"] = ""
 
@@ -226,66 +425,120 @@ class HeadingMatcher:
         logging.getLogger("urllib3").setLevel(logging.WARNING)
         logging.getLogger("huggingface_hub").setLevel(logging.WARNING)
 
-        try:
-            from sentence_transformers import SentenceTransformer
+        with model_registry.loading("heading_matcher"):
+            try:
+                from sentence_transformers import SentenceTransformer
 
-            logger.info("Loading Vietnamese SBERT model (CPU mode)...")
+                logger.info("Loading Vietnamese SBERT model (CPU mode)...")
 
-            # Try local cache first to avoid chatty HuggingFace HEAD probes
-            # on every container restart. Fall back to online download if the
-            # model has not been cached yet (first run after volume init).
-            try:
-                prev_offline = os.environ.get("HF_HUB_OFFLINE")
-                os.environ["HF_HUB_OFFLINE"] = "1"
+                # Try local cache first to avoid chatty HuggingFace HEAD probes
+                # on every container restart. Fall back to online download if the
+                # model has not been cached yet (first run after volume init).
                 try:
+                    prev_offline = os.environ.get("HF_HUB_OFFLINE")
+                    os.environ["HF_HUB_OFFLINE"] = "1"
+                    try:
+                        self._model = SentenceTransformer(
+                            SBERT_MODEL_NAME,
+                            device="cpu",
+                            local_files_only=True,
+                        )
+                    finally:
+                        # Restore env so a subsequent online fallback can work
+                        if prev_offline is None:
+                            os.environ.pop("HF_HUB_OFFLINE", None)
+                        else:
+                            os.environ["HF_HUB_OFFLINE"] = prev_offline
+                    logger.info("Vietnamese SBERT loaded from local cache")
+                except Exception:
+                    logger.info(
+                        "Vietnamese SBERT not cached yet; downloading from HuggingFace..."
+                    )
                     self._model = SentenceTransformer(
-                        "keepitreal/vietnamese-sbert",
+                        SBERT_MODEL_NAME,
                         device="cpu",
-                        local_files_only=True,
                     )
-                finally:
-                    # Restore env so a subsequent online fallback can work
-                    if prev_offline is None:
-                        os.environ.pop("HF_HUB_OFFLINE", None)
-                    else:
-                        os.environ["HF_HUB_OFFLINE"] = prev_offline
-                logger.info("Vietnamese SBERT loaded from local cache")
-            except Exception:
-                logger.info(
-                    "Vietnamese SBERT not cached yet; downloading from HuggingFace..."
-                )
-                self._model = SentenceTransformer(
-                    "keepitreal/vietnamese-sbert",
-                    device="cpu",
-                )
-                logger.info("Vietnamese SBERT loaded on CPU (downloaded)")
-
-            # Pre-compute embeddings for all field headings
-            self._precompute_embeddings()
-
-        except Exception as e:
-            logger.error(f"Failed to load Vietnamese SBERT: {e}")
-            raise
+                    logger.info("Vietnamese SBERT loaded on CPU (downloaded)")
+
+            except Exception as e:
+                logger.error(f"Failed to load Vietnamese SBERT: {e}")
+                raise
+
+    def _field_matrix_path(self) -> str:
+        """Field-embedding file, keyed on model name + FIELD_MAPPINGS content."""
+        fields_hash = hashlib.sha256(
+            json.dumps(FIELD_MAPPINGS, ensure_ascii=False, sort_keys=True).encode(
+                "utf-8"
+            )
+        ).hexdigest()[:16]
+        model_slug = SBERT_MODEL_NAME.replace("/", "__")
+        return os.path.join(HEADING_CACHE_DIR, f"{model_slug}-fields-{fields_hash}.npy")
 
     def _precompute_embeddings(self):
-        """Pre-compute embeddings for all field heading variations."""
-        self._field_names = []
-        self._heading_texts = []
+        """
+        Load (or compute once and save) embeddings for all field heading
+        variations. A cached matrix is memory-mapped, so a fresh process can
+        match known headings without loading SBERT at all.
+        """
+        if self._field_embeddings is not None:
+            return
+
+        field_names = []
+        heading_texts = []
 
         # Flatten the field mappings
         for field_name, headings in FIELD_MAPPINGS.items():
             for heading in headings:
-                self._field_names.append(field_name)
-                self._heading_texts.append(heading)
+                field_names.append(field_name)
+                heading_texts.append(heading)
 
-        # Encode all headings
-        logger.info(
-            f"Pre-computing embeddings for {len(self._heading_texts)} heading variations..."
-        )
-        self._field_embeddings = self._model.encode(
-            self._heading_texts, convert_to_tensor=True, show_progress_bar=False
-        )
-        logger.info("Heading embeddings pre-computed")
+        path = self._field_matrix_path()
+        embeddings = None
+        try:
+            embeddings = np.load(path, mmap_mode="r")
+            if embeddings.shape[0] != len(heading_texts):
+                embeddings = None
+        except (OSError, ValueError):
+            pass
+
+        if embeddings is None:
+            self._load_model()
+            logger.info(
+                f"Pre-computing embeddings for {len(heading_texts)} heading variations..."
+            )
+            embeddings = _unit_rows(
+                self._model.encode(heading_texts, show_progress_bar=False)
+            )
+            try:
+                _save_npy(path, embeddings)
+            except OSError as e:
+                logger.warning(f"Could not cache field embeddings: {e}")
+            logger.info("Heading embeddings pre-computed")
+        else:
+            logger.info(f"Heading embeddings loaded from {path}")
+
+        self._field_names = field_names
+        self._heading_texts = heading_texts
+        self._field_embeddings = embeddings
+
+    def _embed(self, headings: List[str]) -> np.ndarray:
+        """
+        Unit embeddings for `headings`, from the cache where possible.
+        Only unseen headings go through SBERT (in one batch).
+        """
+        keys = [normalize_heading(h) for h in headings]
+        cached = self._embedding_cache.get_many(list(dict.fromkeys(keys)))
+
+        missing = [k for k in dict.fromkeys(keys) if k not in cached]
+        if missing:
+            self._load_model()
+            vectors = _unit_rows(self._model.encode(missing, show_progress_bar=False))
+            new = dict(zip(missing, vectors))
+            self._embedding_cache.put_many(new)
+            self._embedding_cache.flush()
+            cached.update(new)
+
+        return np.stack([cached[k] for k in keys])
 
     def match_heading(self, heading: str) -> Tuple[Optional[str], float]:
         """
@@ -297,26 +550,7 @@ class HeadingMatcher:
         Returns:
             Tuple of (field_name, confidence_score) or (None, 0.0) if no match
         """
-        self._ensure_model_loaded()
-
-        from sentence_transformers import util
-
-        # Encode the input heading
-        heading_embedding = self._model.encode(
-            heading, convert_to_tensor=True, show_progress_bar=False
-        )
-
-        # Compute cosine similarity with all field headings
-        similarities = util.cos_sim(heading_embedding, self._field_embeddings)[0]
-
-        # Find best match
-        best_idx = similarities.argmax().item()
-        best_score = float(similarities[best_idx])
-
-        if best_score >= self.confidence_threshold:
-            return self._field_names[best_idx], best_score
-        else:
-            return None, best_score
+        return self.match_all_headings([heading]).get(heading, (None, 0.0))
 
     def match_all_headings(self, headings: List[str]) -> Dict[str, Tuple[str, float]]:
         """
@@ -328,24 +562,91 @@ class HeadingMatcher:
         Returns:
             Dict mapping heading -> (field_name, confidence)
         """
-        self._ensure_model_loaded()
+        return {
+            heading: (field_name, score)
+            for heading, (field_name, score, _) in self.match_all_headings_tiered(
+                headings
+            ).items()
+        }
 
-        from sentence_transformers import util
+    def match_all_headings_tiered(
+        self, headings: List[str]
+    ) -> Dict[str, Tuple[Optional[str], float, str]]:
+        """
+        Match headings through the exact -> fuzzy -> SBERT tiers.
 
+        Returns:
+            Dict mapping heading -> (field_name, confidence, tier), where
+            tier is "exact", "fuzzy" or "sbert"
+        """
+        results = {}
+        remaining = []
+
+        for heading in dict.fromkeys(headings):
+            match = self._match_exact(heading) or self._match_fuzzy(heading)
+            if match:
+                results[heading] = match
+            else:
+                remaining.append(heading)
+
+        if remaining:
+            for heading, (field_name, score) in self._match_sbert(remaining).items():
+                results[heading] = (field_name, score, "sbert")
+
+        for _, _, tier in results.values():
+            self.tier_counts[tier] += 1
+        return results
+
+    def _match_exact(self, heading: str) -> Optional[Tuple[str, float, str]]:
+        fields = self._exact_index.get(fold_heading(heading))
+        if fields and len(fields) == 1:
+            return next(iter(fields)), 1.0, "exact"
+        return None  # Unknown, or the same variant maps to several fields
+
+    def _match_fuzzy(self, heading: str) -> Optional[Tuple[str, float, str]]:
+        folded = fold_heading(heading)
+        if not folded:
+            return None
+
+        # Candidate variants sharing the most trigrams with the heading
+        shared = Counter()
+        for gram in _trigrams(folded):
+            for variant in self._trigram_index.get(gram, ()):
+                shared[variant] += 1
+        if not shared:
+            return None
+
+        best_by_field: Dict[str, float] = {}
+        for variant, _ in shared.most_common(FUZZY_MAX_CANDIDATES):
+            ratio = SequenceMatcher(None, folded, variant).ratio()
+            for field_name in self._exact_index[variant]:
+                if ratio > best_by_field.get(field_name, 0.0):
+                    best_by_field[field_name] = ratio
+
+        ranked = sorted(best_by_field.items(), key=lambda item: item[1], reverse=True)
+        best_field, best_ratio = ranked[0]
+        runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+        if (
+            best_ratio >= max(HEADING_FUZZY_MIN_RATIO, self.confidence_threshold)
+            and best_ratio - runner_up >= HEADING_FUZZY_MARGIN
+        ):
+            return best_field, best_ratio, "fuzzy"
+        return None
+
+    def _match_sbert(self, headings: List[str]) -> Dict[str, Tuple[str, float]]:
+        """Semantic match of headings the lexical tiers could not settle."""
         if not headings:
             return {}
 
-        # Batch encode all headings
-        heading_embeddings = self._model.encode(
-            headings, convert_to_tensor=True, show_progress_bar=False
-        )
+        self._precompute_embeddings()
 
-        # Compute similarities for all at once
-        similarities = util.cos_sim(heading_embeddings, self._field_embeddings)
+        # Unit vectors on both sides: dot product == cosine similarity.
+        # ~150 field rows, so exact search is cheaper than any ANN index.
+        similarities = self._embed(headings) @ np.asarray(self._field_embeddings).T
 
         results = {}
         for i, heading in enumerate(headings):
-            best_idx = similarities[i].argmax().item()
+            best_idx = int(similarities[i].argmax())
             best_score = float(similarities[i][best_idx])
 
             if best_score >= self.confidence_threshold:
@@ -499,9 +800,10 @@ def autofill_from_ocr(
         logger.warning("No headings extracted from OCR text")
         return {}
 
-    # Match all headings at once (efficient batch processing)
+    # Match all headings at once (efficient batch processing). Most headings
+    # are answered by the exact/fuzzy tiers without touching SBERT.
     headings = [h[0] for h in heading_pairs]
-    matches = _matcher_instance.match_all_headings(headings)
+    matches = _matcher_instance.match_all_headings_tiered(headings)
 
     # Build structured result.
     #
@@ -551,7 +853,7 @@ def autofill_from_ocr(
             )
 
     for heading, content in heading_pairs:
-        field_name, confidence = matches.get(heading, (None, 0.0))
+        field_name, confidence, tier = matches.get(heading, (None, 0.0, None))
 
         if field_name is None:
             continue
@@ -560,6 +862,7 @@ def autofill_from_ocr(
             "value": content,
             "confidence": round(confidence, 3),
             "matched_heading": heading,
+            "match_tier": tier,
         }
 
         # Handle nested fields (e.g., "clinical_history.chief_complaint")
@@ -582,6 +885,10 @@ def prewarm_matcher():
     """Pre-load the matcher model at startup."""
     global _matcher_instance
     logger.info("Pre-warming HeadingMatcher...")
-    _matcher_instance = HeadingMatcher()
+    if _matcher_instance is None:
+        _matcher_instance = HeadingMatcher()
     _matcher_instance._ensure_model_loaded()
     logger.info("HeadingMatcher pre-warmed")
+
+
+model_registry.register("heading_matcher", prewarm_matcher)
@@ -11,15 +11,31 @@ Default is DOCTR for speed. Use PPSTRUCTURE if table extraction is needed.
 """
 
 import os
+import math
 import time
 import logging
 import threading
 import tempfile
+import contextlib
 import numpy as np
 from PIL import Image
 from pdf2image import convert_from_path
 from django.conf import settings
 
+from collections import deque
+from concurrent.futures import Future
+from ai.batching import MicroBatchQueue
+from ai.model_registry import model_registry
+from .result_cache import ocr_result_cache
+from .process_pool import OCR_EXECUTION_MODE, OCR_PROCESS_REPLICAS, OCRProcessPool
+from .page_source import (
+    PageSource,
+    OCR_USE_TEXT_LAYER,
+    OCR_TEXT_LAYER_MIN_CHARS,
+    OCR_HIRES_DPI,
+    OCR_LOW_CONFIDENCE,
+)
+
 # Pillow 10.0+ compatibility fix
 if not hasattr(Image, "ANTIALIAS"):
     Image.ANTIALIAS = Image.Resampling.LANCZOS
@@ -29,10 +45,78 @@ logger = logging.getLogger(__name__)
 # Global lock to prevent concurrent access if needed
 _ocr_lock = threading.Lock()
 
+# Caps concurrent detection passes across all jobs (GPU memory contention)
+_detection_slots = threading.BoundedSemaphore(2)
+
+# Guards one-time startup of the OCR process pool
+_pool_init_lock = threading.Lock()
+
+# Guards one-time startup of the recognition queue (one worker thread only)
+_queue_init_lock = threading.Lock()
+
 # Engine selection: DOCTR (fast, GPU) or PPSTRUCTURE (with tables, CPU)
 OCR_ENGINE = os.environ.get("OCR_ENGINE", "DOCTR").upper()
 logger.info(f"OCR Engine: {OCR_ENGINE}")
 
+# Rasterization resolution for PDF pages.
+# 150 DPI instead of default 200 for faster processing
+# (150 DPI = 75% resolution = ~56% pixels = faster inference)
+PDF_RASTER_DPI = 150
+
+ENGINE_NAMES = {
+    "DOCTR": "DocTR+VietOCR (GPU)",
+    "PPSTRUCTURE": "PPStructure+VietOCR",
+}
+
+# Cross-page / cross-job recognition batching (DocTR engine).
+# Line crops from every in-flight page are queued and recognized in full
+# width-bucketed batches instead of many small per-page batches.
+OCR_RECOGNITION_BATCHING = os.environ.get(
+    "OCR_RECOGNITION_BATCHING", "true"
+).lower() in ("true", "1", "yes")
+OCR_BATCH_MAX_SIZE = int(os.environ.get("OCR_BATCH_MAX_SIZE", "32"))
+OCR_BATCH_MAX_LATENCY_MS = float(os.environ.get("OCR_BATCH_MAX_LATENCY_MS", "50"))
+
+# VietOCR crops are resized to a fixed height, so width is the only batching
+# dimension. Tradeoff: VietOCR's translate() runs the decoder until ALL
+# samples in a batch hit EOS. Bigger buckets mean fewer forward passes but
+# mix short+long lines, wasting decoder steps. 64px was measured as the sweet
+# spot on a 34-line A4 page (6 buckets, ~14s vs 17s@256).
+RECOGNITION_BUCKET_STEP = 64
+
+
+def _width_bucket(recognizer_config, width, height):
+    """
+    Return (resized_width, bucket_width) for a crop of the given size once it
+    is scaled to VietOCR's input height.
+    """
+    dataset = recognizer_config["dataset"]
+    image_height = dataset["image_height"]
+    image_min_width = dataset["image_min_width"]
+    image_max_width = dataset["image_max_width"]
+
+    new_w = int(image_height * float(width) / float(height))
+    # Clamp to model's accepted width range
+    new_w = min(max(new_w, image_min_width), image_max_width)
+    bucket_w = min(
+        image_max_width,
+        max(
+            image_min_width,
+            math.ceil(new_w / RECOGNITION_BUCKET_STEP) * RECOGNITION_BUCKET_STEP,
+        ),
+    )
+    return new_w, bucket_w
+
+
+# Model versions per pipeline. Part of the OCR result cache key — bump when a
+# model or post-processing step changes so stale cached output is not served.
+MODEL_VERSIONS = {
+    "detection": "doctr-db_resnet50" if OCR_ENGINE == "DOCTR" else "paddleocr-det",
+    "recognition": "vietocr-vgg_transformer",
+    "layout": "paddlex-table_recognition",
+    "pipeline": "1",
+}
+
 
 class OCRService:
     """
@@ -46,6 +130,9 @@ class OCRService:
     _det_model = None
     _vietocr_recognizer = None
     _doctr_detector = None  # DocTR detection model
+    _recognition_queue = None  # Cross-page VietOCR batching queue
+    _process_pool = None  # Model replicas for OCR_EXECUTION_MODE=process
+    _process_pool_failed = False
 
     def __new__(cls):
         if cls._instance is None:
@@ -65,117 +152,201 @@ class OCRService:
         """
         if self._layout_engine is None:
             logger.info("Initializing PaddleX Table Recognition Pipeline...")
-            try:
-                # Clear GPU cache before loading
-                import gc
-
-                gc.collect()
+            with model_registry.loading("ocr.layout"):
                 try:
-                    import paddle
+                    # Clear GPU cache before loading
+                    import gc
 
-                    paddle.device.cuda.empty_cache()
-                except:
-                    pass
+                    gc.collect()
+                    try:
+                        import paddle
 
-                from paddlex import create_pipeline
+                        paddle.device.cuda.empty_cache()
+                    except:
+                        pass
 
-                # Use lighter table_recognition pipeline instead of PPStructureV3
-                # This avoids loading PP-Chart2Table (1.4GB) and other heavy models
-                self._layout_engine = create_pipeline(
-                    pipeline="table_recognition",
-                    device="gpu:0",  # Use GPU, fallback to CPU if OOM
-                )
-                logger.info("✅ PaddleX Table Recognition Pipeline Ready")
-            except Exception as e:
-                logger.error(f"Failed to load table recognition pipeline: {e}")
-                # Try CPU fallback
-                try:
-                    logger.info("Trying CPU fallback...")
                     from paddlex import create_pipeline
 
+                    # Use lighter table_recognition pipeline instead of PPStructureV3
+                    # This avoids loading PP-Chart2Table (1.4GB) and other heavy models
                     self._layout_engine = create_pipeline(
                         pipeline="table_recognition",
-                        device="cpu",
+                        device="gpu:0",  # Use GPU, fallback to CPU if OOM
                     )
-                    logger.info("✅ PaddleX Table Recognition Pipeline Ready (CPU)")
-                except Exception as e2:
-                    logger.error(f"CPU fallback also failed: {e2}")
-                    raise
+                    logger.info("✅ PaddleX Table Recognition Pipeline Ready")
+                except Exception as e:
+                    logger.error(f"Failed to load table recognition pipeline: {e}")
+                    # Try CPU fallback
+                    try:
+                        logger.info("Trying CPU fallback...")
+                        from paddlex import create_pipeline
+
+                        self._layout_engine = create_pipeline(
+                            pipeline="table_recognition",
+                            device="cpu",
+                        )
+                        logger.info("✅ PaddleX Table Recognition Pipeline Ready (CPU)")
+                    except Exception as e2:
+                        logger.error(f"CPU fallback also failed: {e2}")
+                        raise
         return self._layout_engine
 
     def _get_detector(self):
         """Lazy init PaddleOCR for line splitting in tall blocks."""
         if self._det_model is None:
             logger.info("Initializing PaddleOCR (Detection)...")
-            try:
-                from paddleocr import PaddleOCR
+            with model_registry.loading("ocr.paddle_detector"):
+                try:
+                    from paddleocr import PaddleOCR
 
-                self._det_model = PaddleOCR(use_textline_orientation=False, lang="en")
-                logger.info("✅ PaddleOCR (Detection) Ready")
-            except Exception as e:
-                logger.error(f"Failed to load PaddleOCR: {e}")
-                raise
+                    self._det_model = PaddleOCR(
+                        use_textline_orientation=False, lang="en"
+                    )
+                    logger.info("✅ PaddleOCR (Detection) Ready")
+                except Exception as e:
+                    logger.error(f"Failed to load PaddleOCR: {e}")
+                    raise
         return self._det_model
 
     def _get_recognizer(self):
         """Lazy init VietOCR for text recognition (GPU-accelerated)."""
         if self._vietocr_recognizer is None:
             logger.info("Initializing VietOCR (Recognition)...")
-            try:
-                from vietocr.tool.predictor import Predictor
-                from vietocr.tool.config import Cfg
-                import torch
-                import multiprocessing
-
-                # On CPU, allow PyTorch to use all available cores.
-                # Docker default was 6/12 — recognition is the bottleneck.
-                if not torch.cuda.is_available():
-                    cpu_count = multiprocessing.cpu_count()
-                    torch.set_num_threads(cpu_count)
-                    logger.info(f"Torch num_threads set to {cpu_count}")
-
-                config = Cfg.load_config_from_name("vgg_transformer")
-                config["cnn"]["pretrained"] = False
-                config["predictor"]["beamsearch"] = False
-
-                # Use GPU if available (ASR is now lazy-loaded, so GPU is free)
-                use_cuda = torch.cuda.is_available()
-                config["device"] = "cuda" if use_cuda else "cpu"
-                logger.info(f"VietOCR device: {'CUDA' if use_cuda else 'CPU'}")
-
-                self._vietocr_recognizer = Predictor(config)
-                # Note: FP16 removed - VietOCR predictor doesn't handle half precision inputs
-
-                logger.info("✅ VietOCR (Recognition) Ready")
-            except Exception as e:
-                logger.error(f"Failed to load VietOCR: {e}")
-                raise
+            with model_registry.loading("ocr.vietocr"):
+                try:
+                    from vietocr.tool.predictor import Predictor
+                    from vietocr.tool.config import Cfg
+                    import torch
+                    import multiprocessing
+
+                    # On CPU, allow PyTorch to use all available cores.
+                    # Docker default was 6/12 — recognition is the bottleneck.
+                    if not torch.cuda.is_available():
+                        cpu_count = multiprocessing.cpu_count()
+                        torch.set_num_threads(cpu_count)
+                        logger.info(f"Torch num_threads set to {cpu_count}")
+
+                    config = Cfg.load_config_from_name("vgg_transformer")
+                    config["cnn"]["pretrained"] = False
+                    config["predictor"]["beamsearch"] = False
+
+                    # Use GPU if available (ASR is now lazy-loaded, so GPU is free)
+                    use_cuda = torch.cuda.is_available()
+                    config["device"] = "cuda" if use_cuda else "cpu"
+                    logger.info(f"VietOCR device: {'CUDA' if use_cuda else 'CPU'}")
+
+                    self._vietocr_recognizer = Predictor(config)
+                    # Note: FP16 removed - VietOCR predictor doesn't handle half precision inputs
+
+                    logger.info("✅ VietOCR (Recognition) Ready")
+                except Exception as e:
+                    logger.error(f"Failed to load VietOCR: {e}")
+                    raise
         return self._vietocr_recognizer
 
     def _get_doctr_detector(self):
         """Lazy init DocTR for fast GPU text detection."""
         if self._doctr_detector is None:
             logger.info("Initializing DocTR (Detection - GPU)...")
-            try:
-                import torch
-                from doctr.models import detection_predictor
+            with model_registry.loading("ocr.doctr_detector"):
+                try:
+                    import torch
+                    from doctr.models import detection_predictor
 
-                # Use db_resnet50 - good balance of speed and accuracy
-                self._doctr_detector = detection_predictor(
-                    arch="db_resnet50", pretrained=True
-                )
+                    # Use db_resnet50 - good balance of speed and accuracy
+                    self._doctr_detector = detection_predictor(
+                        arch="db_resnet50", pretrained=True
+                    )
 
-                # Move to GPU if available
-                if torch.cuda.is_available():
-                    self._doctr_detector = self._doctr_detector.cuda()
-                    logger.info("✅ DocTR (Detection) on GPU")
-                else:
-                    logger.info("✅ DocTR (Detection) on CPU")
-            except Exception as e:
-                logger.error(f"Failed to load DocTR: {e}")
-                raise
+                    # Move to GPU if available
+                    if torch.cuda.is_available():
+                        self._doctr_detector = self._doctr_detector.cuda()
+                        logger.info("✅ DocTR (Detection) on GPU")
+                    else:
+                        logger.info("✅ DocTR (Detection) on CPU")
+                except Exception as e:
+                    logger.error(f"Failed to load DocTR: {e}")
+                    raise
         return self._doctr_detector
 
+    def _get_recognition_queue(self):
+        """
+        Lazy init the shared recognition queue.
+
+        Line crops submitted by every in-flight page (and every concurrent
+        job) are grouped by width bucket and flushed to VietOCR once a bucket
+        holds OCR_BATCH_MAX_SIZE crops or its oldest crop has waited
+        OCR_BATCH_MAX_LATENCY_MS. The queue's single worker thread owns the
+        recognizer, so pages no longer need the global _ocr_lock.
+        """
+        if OCRService._recognition_queue is None:
+            with _queue_init_lock:
+                if OCRService._recognition_queue is None:
+                    recognizer = self._get_recognizer()
+                    OCRService._recognition_queue = MicroBatchQueue(
+                        lambda crops: self._recognize_uniform_batch(
+                            recognizer, crops, max_batch=OCR_BATCH_MAX_SIZE
+                        ),
+                        max_batch_size=OCR_BATCH_MAX_SIZE,
+                        max_wait_ms=OCR_BATCH_MAX_LATENCY_MS,
+                        bucket_fn=lambda crop: _width_bucket(
+                            recognizer.config, *crop.size
+                        )[1],
+                        name="vietocr",
+                    )
+        return OCRService._recognition_queue
+
+    def _uses_recognition_queue(self):
+        return OCR_RECOGNITION_BATCHING and OCR_ENGINE == "DOCTR"
+
+    def _pipeline_lock(self):
+        """
+        Lock held while a page runs through the pipeline.
+
+        With the recognition queue, recognition is serialized by the queue
+        and detection by _detection_slots, so pages from different jobs can
+        overlap and share recognition batches.
+        """
+        if self._uses_recognition_queue():
+            return contextlib.nullcontext()
+        return _ocr_lock
+
+    def _uses_process_pool(self):
+        # Replicas themselves always run in-process
+        return (
+            OCR_EXECUTION_MODE == "process"
+            and not os.environ.get("OCR_PROCESS_REPLICA")
+            and not self._process_pool_failed
+        )
+
+    def _get_process_pool(self):
+        """
+        Lazy init the process pool, or None to fall back to thread mode.
+
+        Pool startup fails e.g. inside a Celery prefork worker (daemonic
+        processes cannot have children); that is logged once and every
+        later request runs in-process.
+        """
+        if not self._uses_process_pool():
+            return None
+        if OCRService._process_pool is None:
+            with _pool_init_lock:
+                if OCRService._process_pool is None:
+                    try:
+                        pool = OCRProcessPool(OCR_PROCESS_REPLICAS)
+                        pool.warm_up()
+                        OCRService._process_pool = pool
+                        logger.info(
+                            f"✅ OCR process pool started ({pool.replicas} replicas)"
+                        )
+                    except Exception as e:
+                        logger.error(
+                            f"OCR process pool unavailable, using threads: {e}"
+                        )
+                        OCRService._process_pool_failed = True
+                        return None
+        return OCRService._process_pool
+
     def has_layout_elements(self, file_path, mime_type=None):
         """
         Quick preprocessing check: Does this document contain tables or images?
@@ -270,32 +441,82 @@ class OCRService:
         start_time = time.time()
 
         try:
-            images = self._convert_to_images(file_path, max_pages)
+            source = self._page_source(file_path, max_pages)
+            num_pages = source.page_count
         except Exception as e:
             logger.error(f"File conversion failed: {e}")
             raise ValueError(f"Could not convert file: {str(e)}")
 
-        full_text = []
-        page_results = []
+        # Serve repeat uploads of the same file straight from the result cache
+        cache_key = ocr_result_cache.key_for_file(
+            file_path, "text", self._cache_config()
+        )
+        if cache_key:
+            try:
+                cached_pages = ocr_result_cache.get_pages(cache_key, num_pages)
+            except Exception as e:
+                logger.warning(f"OCR cache lookup skipped: {e}")
+                cached_pages = None
+            if cached_pages is not None:
+                logger.info(f"OCR cache hit: {len(cached_pages)} pages")
+                result = self.build_result(cached_pages, start_time)
+                result["metadata"]["cache"] = "hit"
+                return result
+
+        # Born-digital pages come straight from the text layer; only the
+        # rest are rasterized and OCR'd.
+        page_results = [source.text_page(n) for n in range(1, num_pages + 1)]
+        ocr_pages = [n for n, page in enumerate(page_results, 1) if page is None]
+        if len(ocr_pages) < num_pages:
+            logger.info(
+                f"Text layer used for {num_pages - len(ocr_pages)}/{num_pages} pages"
+            )
 
-        # Load models based on engine selection
-        recognizer = self._get_recognizer()
+        try:
+            images = [(n, source.render(n)) for n in ocr_pages]
+        except Exception as e:
+            logger.error(f"File conversion failed: {e}")
+            raise ValueError(f"Could not convert file: {str(e)}")
 
-        if OCR_ENGINE == "DOCTR":
-            # Fast GPU-based detection with DocTR
-            detector = self._get_doctr_detector()
-            engine_name = "DocTR+VietOCR (GPU)"
-            process_fn = lambda img, pn: self._process_page_doctr(
-                detector, recognizer, img, pn
+        pool = self._get_process_pool() if images else None
+        if pool is not None:
+            logger.info(
+                f"Processing {len(images)} pages with {OCR_ENGINE} "
+                f"({pool.replicas} process replicas)..."
             )
+            pages = ((n, img, source.refiner(n)) for n, img in images)
+            for page_num, future in pool.map_pages(pages):
+                page_results[page_num - 1] = self._page_result(page_num, future)
+            max_workers = min(pool.replicas, len(images))
+        elif images:
+            ocr_results, max_workers = self._process_in_threads(images, source)
+            for (page_num, _), page_data in zip(images, ocr_results):
+                page_results[page_num - 1] = page_data
         else:
-            # Full layout analysis with PPStructure (includes tables)
-            layout_engine = self._get_layout_engine()
-            det_model = self._get_detector()
-            engine_name = "PPStructure+VietOCR"
-            process_fn = lambda img, pn: self._process_page(
-                layout_engine, det_model, recognizer, img, pn
-            )
+            max_workers = 1
+
+        for page_num, page_data in enumerate(page_results, start=1):
+            self._cache_page(cache_key, page_num, page_data)
+
+        result = self.build_result(
+            page_results,
+            start_time,
+            page_count=num_pages,
+            parallel_workers=max_workers if len(images) > 1 else 1,
+        )
+        result["metadata"]["cache"] = "miss" if cache_key else "disabled"
+        result["metadata"]["text_layer_pages"] = num_pages - len(ocr_pages)
+        return result
+
+    def _process_in_threads(self, images, source):
+        """
+        In-process OCR of [(page_num, img)].
+
+        Returns:
+            (page_results aligned with images, workers used)
+        """
+        # Load models based on engine selection
+        process_fn = self._get_page_processor()
 
         # Parallel page processing for multi-page documents
         # Limited to 2 workers to avoid GPU memory contention
@@ -303,51 +524,153 @@ class OCRService:
 
         num_pages = len(images)
         max_workers = min(2, num_pages)  # Cap at 2 workers for GPU safety
+        page_results = [None] * num_pages
 
-        with _ocr_lock:
+        with self._pipeline_lock():
             if num_pages == 1:
                 # Single page: no threading overhead
+                page_num, img = images[0]
                 logger.info(f"Processing 1 page with {OCR_ENGINE}...")
                 try:
-                    page_data = process_fn(images[0], 1)
-                    page_results.append(page_data)
-                    if page_data.get("plain_text"):
-                        full_text.append(page_data["plain_text"])
+                    page_results[0] = process_fn(
+                        img, page_num, source.refiner(page_num)
+                    )
                 except Exception as e:
-                    logger.error(f"Error processing page 1: {e}", exc_info=True)
+                    logger.error(
+                        f"Error processing page {page_num}: {e}", exc_info=True
+                    )
             else:
                 # Multi-page: parallel processing
                 logger.info(
                     f"Processing {num_pages} pages with {OCR_ENGINE} ({max_workers} workers)..."
                 )
-                page_results = [None] * num_pages
 
                 with ThreadPoolExecutor(max_workers=max_workers) as executor:
                     futures = {
-                        executor.submit(process_fn, img, i + 1): i
-                        for i, img in enumerate(images)
+                        executor.submit(process_fn, img, n, source.refiner(n)): i
+                        for i, (n, img) in enumerate(images)
                     }
 
                     for future in as_completed(futures):
                         idx = futures[future]
+                        page_num = images[idx][0]
                         try:
                             page_data = future.result()
                             page_results[idx] = page_data
-                            logger.info(f"✅ Page {idx+1}/{num_pages} complete")
+                            logger.info(f"✅ Page {page_num} complete")
                         except Exception as e:
                             logger.error(
-                                f"Error processing page {idx+1}: {e}", exc_info=True
+                                f"Error processing page {page_num}: {e}", exc_info=True
                             )
                             page_results[idx] = {
-                                "page_num": idx + 1,
+                                "page_num": page_num,
                                 "plain_text": "",
                                 "error": str(e),
                             }
 
-                # Collect text in page order
-                for page in page_results:
-                    if page and page.get("plain_text"):
-                        full_text.append(page["plain_text"])
+        return page_results, max_workers
+
+    def process_stream(self, file_path, mime_type=None, max_pages=None, job_id=None):
+        """
+        Streaming entry point for OCR processing.
+
+        Rasterizes one page at a time, runs detection + recognition on it and
+        yields the page result as soon as it is done, so peak memory stays flat
+        regardless of document length (process() holds every page in RAM).
+        Pages with a usable PDF text layer are never rasterized.
+
+        If job_id is given, a progress event carrying the page result is pushed
+        to the `ocr_{job_id}` WebSocket group after each page.
+
+        Yields:
+            dict: Page result, same shape as the entries of process()["pages"]
+        """
+        from .consumers import send_ocr_progress
+
+        try:
+            source = self._page_source(file_path, max_pages)
+            total = source.page_count
+        except Exception as e:
+            logger.error(f"File conversion failed: {e}")
+            raise ValueError(f"Could not convert file: {str(e)}")
+
+        cache_key = ocr_result_cache.key_for_file(
+            file_path, "text", self._cache_config()
+        )
+        pool = self._get_process_pool()
+        # With replicas, keep 2 pages per replica in flight so rendering the
+        # next page overlaps OCR of the current ones; otherwise one at a time.
+        window = pool.replicas * 2 if pool is not None else 1
+        logger.info(f"Streaming {total} pages with {OCR_ENGINE}...")
+
+        def _finish(page_num, future, from_cache):
+            page_data = self._page_result(page_num, future)
+            if not from_cache:
+                self._cache_page(cache_key, page_num, page_data)
+
+            logger.info(f"✅ Page {page_num}/{total} complete")
+            if job_id:
+                send_ocr_progress(job_id, page=page_num, total=total, result=page_data)
+            return page_data
+
+        pending = deque()
+        for page_num in range(1, total + 1):
+            pending.append(self._start_page(source, page_num, cache_key, pool))
+            if len(pending) >= window:
+                yield _finish(*pending.popleft())
+        while pending:
+            yield _finish(*pending.popleft())
+
+    def _start_page(self, source, page_num, cache_key, pool=None):
+        """
+        Begin OCR of one page for process_stream().
+
+        Returns:
+            (page_num, Future, from_cache). The future is already resolved
+            for cache hits, text-layer pages and in-process runs; with a pool
+            it resolves when a replica finishes the page.
+        """
+        future = Future()
+        cached = ocr_result_cache.get(cache_key, page_num)
+        if cached is not None:
+            future.set_result(cached)
+            return page_num, future, True
+
+        try:
+            text_page = source.text_page(page_num)
+            if text_page is not None:
+                future.set_result(text_page)
+                return page_num, future, False
+
+            img = source.render(page_num)
+            refiner = source.refiner(page_num)
+            if pool is not None:
+                return page_num, pool.submit_page(img, page_num, refiner), False
+
+            # Models are only loaded once a page actually misses
+            process_fn = self._get_page_processor()
+            # Lock per page (not per document) so a slow consumer of
+            # process_stream() never blocks other OCR requests.
+            with self._pipeline_lock():
+                future.set_result(process_fn(img, page_num, refiner))
+        except Exception as e:
+            future.set_exception(e)
+        return page_num, future, False
+
+    def _page_result(self, page_num, future):
+        """Resolve a page future, turning failures into an error page."""
+        try:
+            return future.result()
+        except Exception as e:
+            logger.error(f"Error processing page {page_num}: {e}", exc_info=True)
+            return {"page_num": page_num, "plain_text": "", "error": str(e)}
+
+    def build_result(
+        self, page_results, start_time, page_count=None, parallel_workers=1
+    ):
+        """Assemble the process() response from per-page results (in page order)."""
+        page_results = [p for p in page_results if p]  # Filter out None
+        full_text = [p["plain_text"] for p in page_results if p.get("plain_text")]
 
         elapsed = int((time.time() - start_time) * 1000)
 
@@ -356,17 +679,59 @@ class OCRService:
 
         return {
             "text": "\n\n".join(full_text),
-            "pages": [p for p in page_results if p],  # Filter out None
+            "pages": page_results,
             "structured": {},
             "hints": hints,  # Hints for table/image presence
             "metadata": {
-                "page_count": len(images),
+                "page_count": (
+                    page_count if page_count is not None else len(page_results)
+                ),
                 "elapsed_ms": elapsed,
-                "engine": engine_name,
-                "parallel_workers": max_workers if num_pages > 1 else 1,
+                "engine": ENGINE_NAMES.get(OCR_ENGINE, ENGINE_NAMES["PPSTRUCTURE"]),
+                "parallel_workers": parallel_workers,
             },
         }
 
+    def _cache_config(self):
+        """Engine settings that change OCR output (part of the cache key)."""
+        return {
+            "engine": OCR_ENGINE,
+            "dpi": PDF_RASTER_DPI,
+            "hires_dpi": OCR_HIRES_DPI,
+            "low_confidence": OCR_LOW_CONFIDENCE,
+            "text_layer": OCR_USE_TEXT_LAYER and OCR_TEXT_LAYER_MIN_CHARS,
+            "models": MODEL_VERSIONS,
+        }
+
+    def _cache_page(self, cache_key, page_num, page_data):
+        """Store a page result unless it failed (errors are never cached)."""
+        if cache_key and page_data and not page_data.get("error"):
+            ocr_result_cache.set(cache_key, page_num, page_data)
+
+    def _get_page_processor(self):
+        """
+        Load models for the selected engine and return a
+        (img, page_num, refiner=None) -> dict fn.
+        """
+        recognizer = self._get_recognizer()
+
+        if OCR_ENGINE == "DOCTR":
+            # Fast GPU-based detection with DocTR
+            detector = self._get_doctr_detector()
+            process_fn = lambda img, pn, refiner=None: self._process_page_doctr(
+                detector, recognizer, img, pn, refiner
+            )
+        else:
+            # Full layout analysis with PPStructure (includes tables)
+            layout_engine = self._get_layout_engine()
+            det_model = self._get_detector()
+            # Layout regions come from the page raster; no hi-res refinement
+            process_fn = lambda img, pn, refiner=None: self._process_page(
+                layout_engine, det_model, recognizer, img, pn
+            )
+
+        return process_fn
+
     def _compute_content_hints(self, page_results):
         """
         Analyze page results to detect if tables or images might be present.
@@ -388,7 +753,7 @@ class OCRService:
             "confidence": "disabled",  # Heuristic disabled
         }
 
-    def _process_page_doctr(self, detector, recognizer, img, page_num=1):
+    def _process_page_doctr(self, detector, recognizer, img, page_num=1, refiner=None):
         """
         Process a single page using DocTR detection + VietOCR recognition.
         This is the fast GPU-accelerated path (no table extraction).
@@ -396,7 +761,9 @@ class OCRService:
         Pipeline:
         1. Run DocTR detection to get text bounding boxes
         2. Sort boxes by reading order (top-to-bottom, left-to-right)
-        3. Crop each box and recognize with VietOCR
+        3. Crop each box (re-rendered at OCR_HIRES_DPI via `refiner` when
+           the detection score is below OCR_LOW_CONFIDENCE) and recognize
+           with VietOCR
         4. Combine into structured output
         """
         import torch
@@ -413,7 +780,7 @@ class OCRService:
         # Run DocTR detection
         # detection_predictor returns list of dicts, each with 'words' array
         # Each word is [x1_rel, y1_rel, x2_rel, y2_rel, confidence]
-        with torch.no_grad():
+        with _detection_slots, torch.no_grad():
             detection_result = detector([img_np])
         _stage_times["detection"] = time.time() - _t_stage
         _t_stage = time.time()
@@ -447,12 +814,14 @@ class OCRService:
                                 "bbox": (x1, y1, x2, y2),
                                 "y_center": (y1 + y2) / 2,
                                 "x_center": (x1 + x2) / 2,
+                                "score": float(box[4]) if len(box) >= 5 else 1.0,
                             }
                         )
 
         # Merge word boxes into lines for faster recognition
         # Group words with similar y_center (within tolerance) into lines
         merged_lines = []
+        line_scores = []  # Lowest word detection score per line
 
         if text_regions:
             # Sort by y_center first, then x_center
@@ -476,6 +845,7 @@ class OCRService:
                         x2 = max(r["bbox"][2] for r in current_line)
                         y2 = max(r["bbox"][3] for r in current_line)
                         merged_lines.append((x1, y1, x2, y2))
+                        line_scores.append(min(r["score"] for r in current_line))
                     current_line = [region]
 
             # Don't forget last line
@@ -485,6 +855,7 @@ class OCRService:
                 x2 = max(r["bbox"][2] for r in current_line)
                 y2 = max(r["bbox"][3] for r in current_line)
                 merged_lines.append((x1, y1, x2, y2))
+                line_scores.append(min(r["score"] for r in current_line))
 
         _stage_times["merge"] = time.time() - _t_stage
         _t_stage = time.time()
@@ -494,12 +865,29 @@ class OCRService:
         )
 
         # Filter out thin/invalid lines and crop all at once
-        valid_lines = [
-            (x1, y1, x2, y2)
-            for x1, y1, x2, y2 in merged_lines
-            if (x2 - x1) >= 10 and (y2 - y1) >= 8
+        valid = [
+            (bbox, score)
+            for bbox, score in zip(merged_lines, line_scores)
+            if (bbox[2] - bbox[0]) >= 10 and (bbox[3] - bbox[1]) >= 8
         ]
+        valid_lines = [bbox for bbox, _ in valid]
         crops = [pil_img.crop(bbox) for bbox in valid_lines]
+
+        # Detection ran at low DPI; re-render only the uncertain lines sharper
+        low_conf = [
+            i for i, (_, score) in enumerate(valid) if score < OCR_LOW_CONFIDENCE
+        ]
+        if refiner is not None and low_conf:
+            try:
+                hires = refiner.crop_many([valid_lines[i] for i in low_conf])
+                for i, crop in zip(low_conf, hires):
+                    crops[i] = crop
+                logger.info(
+                    f"Page {page_num}: {len(low_conf)} low-confidence lines "
+                    f"re-cropped at {refiner.dpi} DPI"
+                )
+            except Exception as e:
+                logger.warning(f"Hi-res crop failed on page {page_num}: {e}")
         _stage_times["crop"] = time.time() - _t_stage
         _t_stage = time.time()
 
@@ -507,12 +895,17 @@ class OCRService:
         # post-resize width (rounded to nearest 10), so lines of varying lengths
         # still land in many small buckets on CPU. We pre-group by width so the
         # number of forward passes stays reasonable — see _recognize_uniform_batch.
+        # With OCR_RECOGNITION_BATCHING the crops join the shared queue and are
+        # batched together with lines from other pages/jobs.
         recognized_lines = []
         regions_data = []
 
         if crops:
             try:
-                texts = self._recognize_uniform_batch(recognizer, crops)
+                if self._uses_recognition_queue():
+                    texts = self._get_recognition_queue().map(crops)
+                else:
+                    texts = self._recognize_uniform_batch(recognizer, crops)
             except Exception as e:
                 logger.error(
                     f"VietOCR uniform batch error: {e}; falling back to predict_batch"
@@ -575,7 +968,7 @@ class OCRService:
         which is nearly as slow as sequential prediction.
 
         This helper groups crops into a small number of coarse width buckets
-        (quantized to 64px) so each bucket contains many crops, reducing the
+        (quantized to RECOGNITION_BUCKET_STEP) so each bucket contains many crops, reducing the
         number of forward passes significantly. Within each bucket, crops are
         right-padded with white to uniform width before a single forward pass.
 
@@ -583,7 +976,6 @@ class OCRService:
         recognition — it's equivalent to trailing blank space at end of line.
         """
         import torch
-        import math
         from collections import defaultdict
 
         if not crops:
@@ -591,35 +983,15 @@ class OCRService:
 
         config = recognizer.config
         image_height = config["dataset"]["image_height"]
-        image_min_width = config["dataset"]["image_min_width"]
-        image_max_width = config["dataset"]["image_max_width"]
 
         # Step 1: resize each crop to (image_height, proportional_width) in RGB
-        resized = []
-        for crop in crops:
+        # Step 2: quantize widths to coarse buckets (RECOGNITION_BUCKET_STEP)
+        buckets: "defaultdict[int, list[tuple[int, np.ndarray]]]" = defaultdict(list)
+        for idx, crop in enumerate(crops):
             img = crop.convert("RGB")
-            w, h = img.size
-            new_w = int(image_height * float(w) / float(h))
-            # Clamp to model's accepted width range
-            new_w = max(new_w, image_min_width)
-            new_w = min(new_w, image_max_width)
+            new_w, bucket_w = _width_bucket(config, *img.size)
             resized_img = img.resize((new_w, image_height), Image.ANTIALIAS)
-            resized.append(np.asarray(resized_img))
-
-        # Step 2: quantize widths to coarse buckets (multiple of 64px).
-        # Tradeoff: VietOCR's translate() runs the decoder until ALL samples
-        # in a batch hit EOS. Bigger buckets mean fewer forward passes but
-        # mix short+long lines, wasting decoder steps. 64px was measured as
-        # the sweet spot on a 34-line A4 page (6 buckets, ~14s vs 17s@256).
-        BUCKET_STEP = 64
-        buckets: "defaultdict[int, list[tuple[int, np.ndarray]]]" = defaultdict(list)
-        for idx, arr in enumerate(resized):
-            bw = arr.shape[1]  # width
-            bucket_w = min(
-                image_max_width,
-                max(image_min_width, math.ceil(bw / BUCKET_STEP) * BUCKET_STEP),
-            )
-            buckets[bucket_w].append((idx, arr))
+            buckets[bucket_w].append((idx, np.asarray(resized_img)))
 
         # Step 3: for each bucket, right-pad crops with white and run one
         # forward pass (chunked by max_batch to bound memory).
@@ -664,16 +1036,18 @@ class OCRService:
         """Convert PDF/Image to PIL Images."""
         ext = os.path.splitext(file_path)[1].lower()
         if ext == ".pdf":
-            # Use 150 DPI instead of default 200 for faster processing
-            # (150 DPI = 75% resolution = ~56% pixels = faster inference)
             return convert_from_path(
-                file_path, dpi=150, first_page=0, last_page=max_pages
+                file_path, dpi=PDF_RASTER_DPI, first_page=0, last_page=max_pages
             )
         elif ext in [".jpg", ".jpeg", ".png", ".bmp", ".tiff"]:
             return [Image.open(file_path).convert("RGB")]
         else:
             raise ValueError(f"Unsupported file type: {ext}")
 
+    def _page_source(self, file_path, max_pages=None):
+        """Per-page access to the upload (text layer, lazy rasterization)."""
+        return PageSource(file_path, max_pages=max_pages, dpi=PDF_RASTER_DPI)
+
     def _process_page(self, layout_engine, det_model, recognizer, img, page_num=1):
         """
         Process a single page using the hybrid pipeline:
@@ -919,12 +1293,22 @@ class OCRService:
         logger.info(f"Extracting tables from: {file_path}")
         tables = []
 
+        cache_key = ocr_result_cache.key_for_file(
+            file_path, "tables", self._cache_config()
+        )
+        cached = ocr_result_cache.get(cache_key, "all", kind="tables")
+        if cached is not None:
+            logger.info(f"OCR cache hit: {len(cached)} tables")
+            return cached
+
         try:
             import tempfile
 
+            failed_pages = 0
+
             # Convert PDF to images if needed
             if file_path.lower().endswith(".pdf") or (mime_type and "pdf" in mime_type):
-                images = convert_from_path(file_path, dpi=150)
+                images = convert_from_path(file_path, dpi=PDF_RASTER_DPI)
             else:
                 images = [Image.open(file_path)]
 
@@ -968,12 +1352,16 @@ class OCRService:
 
                 except Exception as e:
                     logger.warning(f"Table extraction failed for page {page_num}: {e}")
+                    failed_pages += 1
                     continue
                 finally:
                     if os.path.exists(temp_path):
                         os.unlink(temp_path)
 
             logger.info(f"Extracted {len(tables)} tables")
+            # Partial results (a page failed) are not cached so a retry redoes them
+            if not failed_pages:
+                ocr_result_cache.set(cache_key, "all", tables)
             return tables
 
         except Exception as e:
@@ -995,13 +1383,30 @@ class OCRService:
         logger.info(f"Extracting images from: {file_path}")
         extracted_images = []
 
+        cache_key = ocr_result_cache.key_for_file(
+            file_path, "images", self._cache_config()
+        )
+        cached = ocr_result_cache.get(cache_key, "all", kind="images")
+        # Cached entries point at cropped figures under MEDIA_ROOT; only reuse
+        # them while those files still exist.
+        if cached is not None and all(
+            os.path.exists(
+                os.path.join(settings.MEDIA_ROOT, img["url"][len("/media/") :])
+            )
+            for img in cached
+        ):
+            logger.info(f"OCR cache hit: {len(cached)} figures")
+            return cached
+
         try:
             import uuid
             import tempfile
 
+            failed_pages = 0
+
             # Convert PDF to images if needed
             if file_path.lower().endswith(".pdf") or (mime_type and "pdf" in mime_type):
-                images = convert_from_path(file_path, dpi=150)
+                images = convert_from_path(file_path, dpi=PDF_RASTER_DPI)
             else:
                 images = [Image.open(file_path)]
 
@@ -1073,12 +1478,15 @@ class OCRService:
                                     )
                 except Exception as e:
                     logger.warning(f"Image extraction failed for page {page_num}: {e}")
+                    failed_pages += 1
                     continue
                 finally:
                     if os.path.exists(temp_path):
                         os.unlink(temp_path)
 
             logger.info(f"Extracted {len(extracted_images)} figures")
+            if not failed_pages:
+                ocr_result_cache.set(cache_key, "all", extracted_images)
             return extracted_images
 
         except Exception as e:
@@ -1143,6 +1551,22 @@ class OCRService:
 # Singleton instance
 ocr_service = OCRService()
 
+# Startup-loadable models (see ai/model_registry.py). The PaddleX layout
+# pipeline is left out on purpose (memory); it loads on demand.
+if ocr_service._uses_process_pool():
+    # Models live in the replicas; don't load a copy in this process too
+    model_registry.register(
+        "ocr.process_pool", ocr_service._get_process_pool, fork_safe=False
+    )
+elif OCR_ENGINE == "DOCTR":
+    # Fast path: DocTR detection + VietOCR recognition
+    model_registry.register("ocr.doctr_detector", ocr_service._get_doctr_detector)
+    model_registry.register("ocr.vietocr", ocr_service._get_recognizer)
+else:
+    # Full path: PaddleOCR + VietOCR
+    model_registry.register("ocr.paddle_detector", ocr_service._get_detector)
+    model_registry.register("ocr.vietocr", ocr_service._get_recognizer)
+
 
 def prewarm_models():
     """
@@ -1158,29 +1582,12 @@ def prewarm_models():
         logger.info(f"🔥 Pre-warming OCR models (engine={OCR_ENGINE})...")
         start = time.time()
         try:
-            if OCR_ENGINE == "DOCTR":
-                # Fast path: DocTR detection + VietOCR recognition
-                ocr_service._get_doctr_detector()
-                ocr_service._get_recognizer()
-            else:
-                # Full path: PaddleOCR + VietOCR
-                ocr_service._get_detector()
-                ocr_service._get_recognizer()
-
-            # NOTE: PPStructure is NOT preloaded to avoid memory issues
-            # It will be loaded on-demand by the Celery worker
-            # logger.info("⚠️ PPStructure will be loaded on-demand (not prewarmed)")
-
-            # Pre-warm the Vietnamese SBERT heading matcher used by autofill.
-            # Without this, the first autofill request pays ~2s model load on top
-            # of the already-slow OCR extraction. Loaded after VietOCR because
+            # Pre-warm the Vietnamese SBERT heading matcher used by autofill
+            # too. Without this, the first autofill request pays ~2s model
+            # load on top of the already-slow OCR extraction. It is
+            # registered after the OCR models, so it loads after VietOCR:
             # the OCR request arrives first and we don't want to delay it.
-            try:
-                from .heading_matcher import prewarm_matcher
-
-                prewarm_matcher()
-            except Exception as e:
-                logger.warning(f"HeadingMatcher pre-warm skipped: {e}")
+            model_registry.preload(["ocr", "heading_matcher"], before_fork=False)
 
             elapsed = time.time() - start
             logger.info(f"✅ OCR models pre-warmed in {elapsed:.1f}s")
@@ -0,0 +1,235 @@
+"""
+Page Source - per-page, on-demand access to an uploaded PDF/image
+
+OCR used to rasterize the whole PDF at one DPI before looking at any page.
+PageSource decides per page what work is actually needed:
+
+1. Text layer: born-digital pages already carry their text. `pdftotext` is
+   run for the page and, if it yields enough real text, OCR is skipped.
+2. Low-DPI raster: scanned pages are rendered with `pdftoppm` for this page
+   only, at the detection DPI (PDF_RASTER_DPI in ocr_service).
+3. High-DPI crops: text lines whose DocTR detection confidence is low are
+   re-rendered at OCR_HIRES_DPI, cropping just the area around those lines
+   (`pdftoppm -x/-y/-W/-H`), and recognized from the sharper crop.
+
+Settings (env vars):
+    OCR_USE_TEXT_LAYER        - "true" (default) | "false"
+    OCR_TEXT_LAYER_MIN_CHARS  - min non-space chars to trust a text layer (default: 80)
+    OCR_HIRES_DPI             - DPI for low-confidence line crops, 0 disables (default: 300)
+    OCR_LOW_CONFIDENCE        - DocTR box score below which a line is re-cropped (default: 0.5)
+"""
+
+import os
+import logging
+import subprocess
+import tempfile
+from PIL import Image
+from pdf2image import convert_from_path, pdfinfo_from_path
+
+logger = logging.getLogger(__name__)
+
+OCR_USE_TEXT_LAYER = os.environ.get("OCR_USE_TEXT_LAYER", "true").lower() in (
+    "true",
+    "1",
+    "yes",
+)
+OCR_TEXT_LAYER_MIN_CHARS = int(os.environ.get("OCR_TEXT_LAYER_MIN_CHARS", "80"))
+OCR_HIRES_DPI = int(os.environ.get("OCR_HIRES_DPI", "300"))
+OCR_LOW_CONFIDENCE = float(os.environ.get("OCR_LOW_CONFIDENCE", "0.5"))
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".tiff")
+
+# Invisible OCR layers from scanners are often garbage; require mostly
+# letters/digits among the non-space characters before trusting one.
+MIN_TEXT_LAYER_ALNUM_RATIO = 0.6
+
+POPPLER_TIMEOUT = 60  # seconds per pdftotext/pdftoppm call
+
+
+def usable_text_layer(text):
+    """Return stripped text if it looks like a real text layer, else None."""
+    if not text:
+        return None
+    chars = [c for c in text if not c.isspace()]
+    if len(chars) < OCR_TEXT_LAYER_MIN_CHARS:
+        return None
+    if "�" in text:
+        return None
+    alnum = sum(1 for c in chars if c.isalnum())
+    if alnum / len(chars) < MIN_TEXT_LAYER_ALNUM_RATIO:
+        return None
+    return text.strip()
+
+
+class HiResCropper:
+    """
+    Re-renders selected line boxes of one PDF page at a higher DPI.
+
+    Boxes are given in pixels of the low-DPI raster used for detection.
+    Plain attributes only, so it can be sent to OCR process-pool replicas.
+    """
+
+    def __init__(self, file_path, page_num, base_dpi, dpi=OCR_HIRES_DPI):
+        self.file_path = file_path
+        self.page_num = page_num
+        self.base_dpi = base_dpi
+        self.dpi = dpi
+
+    def crop_many(self, bboxes):
+        """
+        Render the union of `bboxes` once and cut each box out of it.
+
+        Returns:
+            List of PIL Images, one per bbox, at self.dpi
+        """
+        if not bboxes:
+            return []
+
+        scale = self.dpi / self.base_dpi
+        ux1 = int(min(b[0] for b in bboxes) * scale)
+        uy1 = int(min(b[1] for b in bboxes) * scale)
+        ux2 = int(max(b[2] for b in bboxes) * scale) + 1
+        uy2 = int(max(b[3] for b in bboxes) * scale) + 1
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            out_root = os.path.join(tmp_dir, "crop")
+            subprocess.run(
+                [
+                    "pdftoppm",
+                    "-f",
+                    str(self.page_num),
+                    "-l",
+                    str(self.page_num),
+                    "-r",
+                    str(self.dpi),
+                    "-x",
+                    str(ux1),
+                    "-y",
+                    str(uy1),
+                    "-W",
+                    str(ux2 - ux1),
+                    "-H",
+                    str(uy2 - uy1),
+                    "-singlefile",
+                    self.file_path,
+                    out_root,
+                ],
+                check=True,
+                capture_output=True,
+                timeout=POPPLER_TIMEOUT,
+            )
+            with Image.open(f"{out_root}.ppm") as band:
+                band = band.convert("RGB")
+
+        crops = []
+        for x1, y1, x2, y2 in bboxes:
+            crops.append(
+                band.crop(
+                    (
+                        int(x1 * scale) - ux1,
+                        int(y1 * scale) - uy1,
+                        int(x2 * scale) - ux1,
+                        int(y2 * scale) - uy1,
+                    )
+                )
+            )
+        return crops
+
+
+class PageSource:
+    """
+    Lazily renders pages of one upload, deciding per page whether OCR is
+    needed and at which resolution.
+    """
+
+    def __init__(self, file_path, max_pages=None, dpi=150):
+        self.file_path = file_path
+        self.max_pages = max_pages
+        self.dpi = dpi
+
+        ext = os.path.splitext(file_path)[1].lower()
+        if ext != ".pdf" and ext not in IMAGE_EXTENSIONS:
+            raise ValueError(f"Unsupported file type: {ext}")
+        self.is_pdf = ext == ".pdf"
+        self._page_count = None
+
+    @property
+    def page_count(self):
+        """Number of pages to process (no rasterization)."""
+        if self._page_count is None:
+            if self.is_pdf:
+                total = int(pdfinfo_from_path(self.file_path)["Pages"])
+                self._page_count = (
+                    min(total, self.max_pages) if self.max_pages else total
+                )
+            else:
+                self._page_count = 1
+        return self._page_count
+
+    def text_page(self, page_num):
+        """
+        Page result built from the PDF's embedded text layer.
+
+        Returns:
+            Page dict (same shape as an OCR page, with "source": "text_layer"),
+            or None when the page has no usable text and must be OCR'd
+        """
+        if not (self.is_pdf and OCR_USE_TEXT_LAYER):
+            return None
+
+        try:
+            completed = subprocess.run(
+                [
+                    "pdftotext",
+                    "-f",
+                    str(page_num),
+                    "-l",
+                    str(page_num),
+                    "-layout",
+                    "-enc",
+                    "UTF-8",
+                    self.file_path,
+                    "-",
+                ],
+                check=True,
+                capture_output=True,
+                timeout=POPPLER_TIMEOUT,
+            )
+        except (OSError, subprocess.SubprocessError) as e:
+            logger.warning(f"pdftotext failed on page {page_num}: {e}")
+            return None
+
+        text = usable_text_layer(completed.stdout.decode("utf-8", errors="replace"))
+        if text is None:
+            return None
+
+        # Collapse the -layout column padding but keep line structure
+        lines = [" ".join(line.split()) for line in text.splitlines()]
+        return {
+            "page_num": page_num,
+            "plain_text": "\n".join(line for line in lines if line),
+            "regions": [],
+            "tables": [],
+            "source": "text_layer",
+        }
+
+    def render(self, page_num, dpi=None):
+        """Rasterize a single page (1-based) to a PIL Image."""
+        if not self.is_pdf:
+            return Image.open(self.file_path).convert("RGB")
+
+        pages = convert_from_path(
+            self.file_path,
+            dpi=dpi or self.dpi,
+            first_page=page_num,
+            last_page=page_num,
+        )
+        if not pages:
+            raise ValueError(f"Could not rasterize page {page_num}")
+        return pages[0].convert("RGB")
+
+    def refiner(self, page_num):
+        """HiResCropper for low-confidence lines of this page, if enabled."""
+        if not self.is_pdf or OCR_HIRES_DPI <= self.dpi:
+            return None
+        return HiResCropper(self.file_path, page_num, self.dpi, OCR_HIRES_DPI)
@@ -0,0 +1,202 @@
+"""
+OCR Process Pool - multi-core OCR for CPU-only deployments
+
+The default OCRService runs every page inside one process, so PyTorch inference
+on a CPU-only box is effectively limited by the GIL and the global OCR lock.
+This opt-in mode keeps N preloaded model replicas in worker processes and
+dispatches pages to them:
+
+- Each replica loads DocTR/PaddleOCR + VietOCR once, in its initializer.
+- Page rasters are copied once into a `multiprocessing.shared_memory` block;
+  the worker maps it as a numpy array in place (no pickling of pixels).
+- Torch intra-op threads are split between replicas to avoid oversubscription.
+
+Memory is bounded by OCR_PROCESS_REPLICAS (one model set per replica) and by
+the in-flight window (2 pages per replica).
+
+Settings (env vars):
+    OCR_EXECUTION_MODE    - "thread" (default) | "process"
+    OCR_PROCESS_REPLICAS  - number of worker processes (default: cores // 2)
+
+Note: Celery's prefork pool runs tasks in daemonic processes, which cannot
+start children. Use this mode in the web process, or run the OCR Celery
+worker with `--pool=threads` / `--pool=solo`. If the pool cannot start,
+OCRService falls back to the in-process thread mode.
+"""
+
+import os
+import time
+import logging
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+OCR_EXECUTION_MODE = os.environ.get("OCR_EXECUTION_MODE", "thread").lower()
+OCR_PROCESS_REPLICAS = int(
+    os.environ.get("OCR_PROCESS_REPLICAS", str(max(1, (os.cpu_count() or 2) // 2)))
+)
+
+# Per-process service instance, set by _init_worker() in each replica
+_worker_service = None
+
+
+def _init_worker(torch_threads):
+    """Replica initializer: set up Django and preload the OCR models once."""
+    global _worker_service
+
+    # Mark the process as a replica before Django starts: AiConfig.ready()
+    # must not prewarm (or start another pool) in here.
+    os.environ["OCR_PROCESS_REPLICA"] = "1"
+    os.environ.pop("RUN_MAIN", None)
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "clinical_case_platform.settings")
+    import django
+
+    django.setup()
+
+    try:
+        import torch
+
+        torch.set_num_threads(torch_threads)
+    except ImportError:
+        pass
+
+    from . import ocr_service as ocr_service_module
+
+    # One page at a time per replica: the cross-job recognition queue would
+    # only add latency here, and the replicas are the parallelism.
+    ocr_service_module.OCR_RECOGNITION_BATCHING = False
+
+    start = time.time()
+    _worker_service = ocr_service_module.OCRService()
+    _worker_service._get_page_processor()
+    logger.info(
+        f"OCR replica {os.getpid()} ready in {time.time() - start:.1f}s "
+        f"(torch threads={torch_threads})"
+    )
+
+
+def _ping():
+    return os.getpid()
+
+
+def _process_shared_page(shm_name, shape, dtype, page_num, refiner=None):
+    """Run one page in a replica, reading the raster from shared memory."""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        img = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+        page_data = _worker_service._get_page_processor()(img, page_num, refiner)
+        del img
+        return page_data
+    finally:
+        try:
+            shm.close()
+        except BufferError:
+            # A view may still be alive until GC; the parent unlinks the block
+            pass
+
+
+class OCRProcessPool:
+    """
+    Pool of OCR model replicas in separate processes.
+    """
+
+    def __init__(self, replicas=OCR_PROCESS_REPLICAS):
+        self.replicas = max(1, replicas)
+        torch_threads = max(1, (os.cpu_count() or 1) // self.replicas)
+
+        # spawn: a fresh interpreter per replica (forking a process that
+        # already holds torch/CUDA state is unsafe)
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.replicas,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(torch_threads,),
+        )
+        self._lock = threading.Lock()
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+
+    def warm_up(self):
+        """Start every replica now so the first request doesn't pay model load."""
+        futures = [self._executor.submit(_ping) for _ in range(self.replicas)]
+        pids = {future.result() for future in futures}
+        logger.info(f"OCR process pool warm: {len(pids)} replicas")
+
+    def submit_page(self, img, page_num, refiner=None):
+        """
+        Dispatch one page to a replica.
+
+        `refiner` (page_source.HiResCropper) is pickled along; it only holds
+        the file path and DPIs, so the replica renders its own hi-res crops.
+
+        Returns:
+            concurrent.futures.Future resolving to the page result dict
+        """
+        arr = np.asarray(img)
+        shm = shared_memory.SharedMemory(create=True, size=max(1, arr.nbytes))
+        shared = np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)
+        shared[:] = arr
+        del shared
+
+        def _release(future):
+            shm.close()
+            shm.unlink()
+            with self._lock:
+                self._completed += 1
+                if future.exception() is not None:
+                    self._failed += 1
+
+        with self._lock:
+            self._submitted += 1
+
+        try:
+            future = self._executor.submit(
+                _process_shared_page,
+                shm.name,
+                arr.shape,
+                arr.dtype.str,
+                page_num,
+                refiner,
+            )
+        except Exception:
+            shm.close()
+            shm.unlink()
+            raise
+        future.add_done_callback(_release)
+        return future
+
+    def map_pages(self, pages):
+        """
+        Process (page_num, img, refiner) tuples across replicas, yielding
+        (page_num, future) in page order. At most 2 pages per replica are in flight, which bounds
+        shared memory regardless of document length.
+        """
+        window = self.replicas * 2
+        pending = deque()
+
+        for page_num, img, refiner in pages:
+            pending.append((page_num, self.submit_page(img, page_num, refiner)))
+            if len(pending) >= window:
+                yield pending.popleft()
+        while pending:
+            yield pending.popleft()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "replicas": self.replicas,
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "failed": self._failed,
+                "in_flight": self._submitted - self._completed,
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
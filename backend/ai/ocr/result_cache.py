@@ -0,0 +1,287 @@
+"""
+OCR Result Cache - content-addressed cache for OCR output
+
+Re-uploads of the same scanned PDF (autofill retries, instructor re-imports)
+used to redo the whole DocTR/PPStructure pipeline. Results are now cached on
+disk, keyed by SHA-256 of the file bytes plus everything that can change the
+output: OCR_ENGINE, rasterization DPI and model versions.
+
+Layout on disk:
+    {OCR_CACHE_DIR}/{key[:2]}/{key}/{part}.json
+
+`part` is the page number for text extraction ("1", "2", ...) or "all" for
+whole-document results (tables / images). Entry directories are evicted in
+least-recently-used order (mtime is bumped on every hit) once the total size
+exceeds OCR_CACHE_MAX_MB, down to 90% of it. Writes keep a running size
+estimate; the directory tree is only rescanned when that estimate passes the
+cap, and every OCR_CACHE_RESCAN_WRITES writes to pick up other processes'
+writes.
+
+Settings (env vars):
+    OCR_CACHE_ENABLED   - "true" (default) | "false"
+    OCR_CACHE_DIR       - cache root (default: <BASE_DIR>/ocr_cache)
+    OCR_CACHE_MAX_MB    - size cap before LRU eviction (default: 512)
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import logging
+import threading
+import uuid
+from collections import Counter
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+OCR_CACHE_ENABLED = os.environ.get("OCR_CACHE_ENABLED", "true").lower() in (
+    "true",
+    "1",
+    "yes",
+)
+OCR_CACHE_DIR = os.environ.get(
+    "OCR_CACHE_DIR", os.path.join(str(settings.BASE_DIR), "ocr_cache")
+)
+OCR_CACHE_MAX_BYTES = int(os.environ.get("OCR_CACHE_MAX_MB", "512")) * 1024 * 1024
+OCR_CACHE_RESCAN_WRITES = 100
+# Evict down to this share of the cap so the next writes don't rescan at once
+OCR_CACHE_EVICT_TO = 0.9
+
+# Shared hit/miss counters (django cache) so stats cover every worker process
+METRICS_KEY_PREFIX = "ocr_result_cache"
+
+
+def _json_default(obj):
+    """Serialize numpy scalars/arrays that leak into page results."""
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    if hasattr(obj, "item"):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class OCRResultCache:
+    """
+    Disk-backed LRU cache for OCR results, keyed on file content + engine config.
+    """
+
+    def __init__(self, root=OCR_CACHE_DIR, max_bytes=OCR_CACHE_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.enabled = OCR_CACHE_ENABLED
+        self._lock = threading.Lock()
+        self._counters = Counter()
+        # Running total of the cache size; None until the first scan
+        self._size = None
+        self._writes = 0
+
+    @staticmethod
+    def file_digest(file_path, chunk_size=1024 * 1024):
+        """SHA-256 of the file bytes, streamed in 1MB chunks."""
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def key_for_file(self, file_path, kind, config):
+        """
+        Build the cache key for `file_path`.
+
+        Args:
+            file_path: Uploaded PDF/image
+            kind: Result type ("text", "tables", "images")
+            config: Dict of engine settings that affect the output
+                    (engine, dpi, model versions)
+
+        Returns:
+            Hex key, or None when the cache is disabled/unreadable
+        """
+        if not self.enabled:
+            return None
+        try:
+            file_hash = self.file_digest(file_path)
+        except OSError as e:
+            logger.warning(f"OCR cache: could not hash {file_path}: {e}")
+            return None
+
+        fingerprint = json.dumps(
+            {"file": file_hash, "kind": kind, **config}, sort_keys=True
+        )
+        return hashlib.sha256(fingerprint.encode("utf-8")).hexdigest()
+
+    def _entry_dir(self, key):
+        return os.path.join(self.root, key[:2], key)
+
+    def get(self, key, part, kind="text"):
+        """Return the cached value for (key, part) or None on miss."""
+        if key is None:
+            return None
+
+        path = os.path.join(self._entry_dir(key), f"{part}.json")
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+        except (OSError, ValueError):
+            self._record(kind, "misses")
+            return None
+
+        # Bump recency for LRU eviction
+        try:
+            os.utime(self._entry_dir(key), None)
+        except OSError:
+            pass
+
+        self._record(kind, "hits")
+        return value
+
+    def get_pages(self, key, page_count, kind="text"):
+        """Return all page results [1..page_count], or None if any is missing."""
+        if key is None:
+            return None
+
+        pages = []
+        for page_num in range(1, page_count + 1):
+            page = self.get(key, page_num, kind=kind)
+            if page is None:
+                return None
+            pages.append(page)
+        return pages
+
+    def set(self, key, part, value):
+        """Store a JSON-serializable value for (key, part)."""
+        if key is None:
+            return
+
+        entry_dir = self._entry_dir(key)
+        path = os.path.join(entry_dir, f"{part}.json")
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            os.makedirs(entry_dir, exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(value, f, ensure_ascii=False, default=_json_default)
+            added = os.path.getsize(tmp_path)
+            try:
+                added -= os.path.getsize(path)
+            except OSError:
+                pass
+            # Atomic publish so concurrent readers never see a partial file
+            os.replace(tmp_path, path)
+            os.utime(entry_dir, None)
+        except (OSError, TypeError) as e:
+            logger.warning(f"OCR cache write failed for {key}/{part}: {e}")
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            return
+
+        self._note_write(added)
+
+    def _note_write(self, added):
+        """Track the cache size; evict once it may exceed max_bytes."""
+        with self._lock:
+            self._writes += 1
+            if self._size is not None and self._writes % OCR_CACHE_RESCAN_WRITES:
+                self._size += added
+                if self._size <= self.max_bytes:
+                    return
+        self._evict()
+
+    def _scan(self):
+        """Return [(mtime, size, entry_dir)] for every cache entry."""
+        entries = []
+        if not os.path.isdir(self.root):
+            return entries
+
+        for shard in os.scandir(self.root):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if not entry.is_dir():
+                    continue
+                try:
+                    size = sum(
+                        f.stat().st_size for f in os.scandir(entry.path) if f.is_file()
+                    )
+                    entries.append((entry.stat().st_mtime, size, entry.path))
+                except OSError:
+                    continue
+        return entries
+
+    def _evict(self):
+        """
+        Drop least-recently-used entries once the cache exceeds max_bytes,
+        down to OCR_CACHE_EVICT_TO of it.
+        """
+        with self._lock:
+            entries = self._scan()
+            total = sum(size for _, size, _ in entries)
+            self._size = total
+            if total <= self.max_bytes:
+                return
+
+            target = self.max_bytes * OCR_CACHE_EVICT_TO
+            for _, size, path in sorted(entries):
+                shutil.rmtree(path, ignore_errors=True)
+                total -= size
+                self._record("all", "evictions")
+                if total <= target:
+                    break
+
+            self._size = total
+            logger.info(f"OCR cache evicted down to {total / 1024 / 1024:.1f}MB")
+
+    def _record(self, kind, event):
+        """Count a hit/miss/eviction in-process and in the shared django cache."""
+        name = f"{kind}_{event}"
+        self._counters[name] += 1
+
+        try:
+            from django.core.cache import cache
+
+            key = f"{METRICS_KEY_PREFIX}:{name}"
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.set(key, 1, None)
+        except Exception:
+            # Metrics must never break OCR
+            pass
+
+    def stats(self):
+        """Hit/miss metrics plus current disk usage."""
+        from django.core.cache import cache
+
+        names = [
+            f"{kind}_{event}"
+            for kind in ("text", "tables", "images")
+            for event in ("hits", "misses")
+        ] + ["all_evictions"]
+
+        try:
+            shared = cache.get_many([f"{METRICS_KEY_PREFIX}:{n}" for n in names])
+        except Exception:
+            shared = {}
+
+        counters = {
+            n: shared.get(f"{METRICS_KEY_PREFIX}:{n}", self._counters[n]) for n in names
+        }
+        for kind in ("text", "tables", "images"):
+            hits = counters[f"{kind}_hits"]
+            lookups = hits + counters[f"{kind}_misses"]
+            counters[f"{kind}_hit_rate"] = round(hits / lookups, 3) if lookups else 0.0
+
+        entries = self._scan()
+        return {
+            "enabled": self.enabled,
+            "entries": len(entries),
+            "size_bytes": sum(size for _, size, _ in entries),
+            "max_bytes": self.max_bytes,
+            "counters": counters,
+        }
+
+
+# Singleton instance
+ocr_result_cache = OCRResultCache()
@@ -1,5 +1,6 @@
 from celery import shared_task
 import os
+import time
 
 
 @shared_task(bind=True)
@@ -7,11 +8,23 @@ def process_ocr_task(self, file_path, mime_type):
     """
     Async Celery task for full OCR processing (text extraction).
     Used for very large files.
+
+    Pages are processed in streaming mode: one page raster in memory at a
+    time, and each finished page is pushed to the `ocr_{task_id}` WebSocket
+    group so the UI can show text while the rest of the document runs.
     """
     try:
         from .ocr_service import ocr_service
-
-        result = ocr_service.process(file_path, mime_type)
+        from .consumers import send_ocr_progress
+
+        start_time = time.time()
+        pages = list(
+            ocr_service.process_stream(file_path, mime_type, job_id=self.request.id)
+        )
+        result = ocr_service.build_result(pages, start_time)
+        send_ocr_progress(
+            self.request.id, page=len(pages), total=len(pages), status="done"
+        )
 
         # Clean up temp file if needed
         if os.path.exists(file_path) and "/tmp/" in file_path:
@@ -43,11 +43,12 @@ def main():
             break
 
         # Get match
-        field, score = matcher.match_heading(heading)
+        field, score, tier = matcher.match_all_headings_tiered([heading])[heading]
 
         print(f'\n📊 Results for: "{heading}"')
         print(f"   Best match: {field or 'NONE'}")
         print(f"   Confidence: {score:.3f} ({score*100:.1f}%)")
+        print(f"   Tier:       {tier}")
         print(
             f"   Decision:   {'✅ MATCHED' if field else '❌ REJECTED (below 0.6 threshold)'}"
         )
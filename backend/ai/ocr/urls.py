@@ -1,8 +1,9 @@
 from django.urls import path
-from .views import OCRExtractView, OCRJobStatusView, OCRAutofillView
+from .views import OCRExtractView, OCRJobStatusView, OCRAutofillView, OCRStatsView
 
 urlpatterns = [
     path("extract/", OCRExtractView.as_view(), name="ocr-extract"),
     path("jobs/<str:job_id>/", OCRJobStatusView.as_view(), name="ocr-job-status"),
     path("autofill/", OCRAutofillView.as_view(), name="ocr-autofill"),
+    path("stats/", OCRStatsView.as_view(), name="ocr-stats"),
 ]
@@ -293,3 +293,40 @@ class OCRAutofillView(views.APIView):
                 {"error": f"Auto-fill failed: {str(e)}"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
+
+
+class OCRStatsView(views.APIView):
+    """
+    Operational metrics for the OCR pipeline (admin only).
+
+    GET /api/ocr/stats/
+    Response: {
+        "result_cache": {"enabled": true, "entries": 12, "counters": {...}},
+        "recognition_queue": {"queue_depth": 0, "avg_batch_size": 27.5, ...},
+        "process_pool": {"replicas": 4, "in_flight": 2, ...},
+        "models": {"ocr.vietocr": {"status": "loaded", "load_seconds": 4.2, ...}}
+    }
+    """
+
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        from .result_cache import ocr_result_cache
+
+        data = {"result_cache": ocr_result_cache.stats()}
+
+        # Only report the queue if it was started; never load models here
+        from .ocr_service import OCRService
+
+        queue = OCRService._recognition_queue
+        data["recognition_queue"] = queue.stats() if queue else None
+
+        pool = OCRService._process_pool
+        data["process_pool"] = pool.stats() if pool else None
+
+        # Load status/timings of every registered model in this process
+        from ai.model_registry import model_registry
+
+        data["models"] = model_registry.stats()
+
+        return Response(data)
@@ -0,0 +1,9 @@
+"""
+Celery task entry point for the ai app.
+
+`app.autodiscover_tasks()` only imports `<app>.tasks`, so the task modules
+of the OCR and ASR subpackages are re-exported here for the worker.
+"""
+
+from .ocr.tasks import process_ocr_task, extract_tables_images_task  # noqa: F401
+from .asr.tasks import transcribe_stream_task  # noqa: F401
@@ -3,6 +3,7 @@ Case Analytics and Metrics System
 Comprehensive analytics for tracking case usage, student engagement, and learning outcomes
 """
 
+from django.contrib.postgres.indexes import BrinIndex
 from django.db import models
 from django.conf import settings
 from django.utils import timezone
@@ -220,12 +221,7 @@ class StudentEngagementMetrics(models.Model):
         from cases.models import Case
 
         # Cases viewed
-        self.total_cases_viewed = (
-            CaseViewLog.objects.filter(user=self.student)
-            .values("case")
-            .distinct()
-            .count()
-        )
+        self.total_cases_viewed = CaseViewer.objects.filter(user=self.student).count()
 
         # Cases submitted
         self.total_cases_submitted = Case.objects.filter(
@@ -304,23 +300,32 @@ class CaseViewLog(models.Model):
     """
     Detailed log of case views for analytics
     Tracks who viewed what and when
+
+    Range-partitioned by month on viewed_at (primary key (id, viewed_at) in
+    the database); filter on viewed_at ranges, not __date, so queries only
+    touch the partitions they need. Old partitions are rolled up into
+    CaseViewDaily by cases.view_log_partitions.
     """
 
+    # (case, viewed_at) / (user, viewed_at) indexes cover FK lookups
     case = models.ForeignKey(
         "cases.Case",
         on_delete=models.CASCADE,
         related_name="view_logs",
+        db_index=False,
         help_text="Ca bệnh được xem",
     )
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
         related_name="case_views",
+        db_index=False,
         help_text="Người xem",
     )
 
     # View Details
-    viewed_at = models.DateTimeField(auto_now_add=True, help_text="Thời gian xem")
+    # Set by the view-event buffer to the time of the view, not of the flush
+    viewed_at = models.DateTimeField(default=timezone.now, help_text="Thời gian xem")
     time_spent_seconds = models.PositiveIntegerField(
         default=0, help_text="Thời gian xem (giây)"
     )
@@ -349,9 +354,13 @@ class CaseViewLog(models.Model):
         verbose_name_plural = "Case View Logs"
         ordering = ["-viewed_at"]
         indexes = [
-            models.Index(fields=["case", "user"]),
-            models.Index(fields=["viewed_at"]),
-            models.Index(fields=["user", "viewed_at"]),
+            models.Index(
+                fields=["case", "viewed_at"], name="cases_caseviewlog_case_viewed"
+            ),
+            models.Index(
+                fields=["user", "viewed_at"], name="cases_caseviewlog_user_viewed"
+            ),
+            BrinIndex(fields=["viewed_at"], name="cases_caseviewlog_viewed_brin"),
         ]
 
     def __str__(self):
@@ -360,6 +369,82 @@ class CaseViewLog(models.Model):
         )
 
 
+class CaseViewDaily(models.Model):
+    """
+    Daily per (case, user) view totals for CaseViewLog partitions that have
+    been compacted; kept for VIEW_LOG_DAILY_RETENTION_DAYS
+    """
+
+    case = models.ForeignKey(
+        "cases.Case",
+        on_delete=models.CASCADE,
+        related_name="daily_views",
+        help_text="Ca bệnh được xem",
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="daily_case_views",
+        help_text="Người xem",
+    )
+    day = models.DateField(help_text="Ngày xem")
+    views = models.PositiveIntegerField(default=0, help_text="Số lượt xem")
+    completed_views = models.PositiveIntegerField(
+        default=0, help_text="Số lượt xem hết"
+    )
+    time_spent_seconds = models.PositiveIntegerField(
+        default=0, help_text="Tổng thời gian xem (giây)"
+    )
+
+    class Meta:
+        db_table = "cases_caseviewdaily"
+        verbose_name = "Case View Daily"
+        verbose_name_plural = "Case View Daily"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["case", "user", "day"], name="unique_case_view_daily"
+            )
+        ]
+        indexes = [models.Index(fields=["user", "day"]), models.Index(fields=["day"])]
+
+    def __str__(self):
+        return f"{self.user_id} viewed case {self.case_id} {self.views}x on {self.day}"
+
+
+class CaseViewer(models.Model):
+    """
+    One row per (case, user) that viewed it; maintained by upsert when view
+    events are flushed, so unique viewer counts never scan CaseViewLog
+    """
+
+    case = models.ForeignKey(
+        "cases.Case",
+        on_delete=models.CASCADE,
+        related_name="viewers",
+        help_text="Ca bệnh được xem",
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="viewed_cases",
+        help_text="Người xem",
+    )
+    first_viewed_at = models.DateTimeField(help_text="Lần xem đầu")
+    last_viewed_at = models.DateTimeField(help_text="Lần xem cuối")
+    view_count = models.PositiveIntegerField(default=0, help_text="Số lượt xem")
+
+    class Meta:
+        db_table = "cases_caseviewer"
+        verbose_name = "Case Viewer"
+        verbose_name_plural = "Case Viewers"
+        constraints = [
+            models.UniqueConstraint(fields=["case", "user"], name="unique_case_viewer")
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} viewed case {self.case_id} {self.view_count}x"
+
+
 class PlatformUsageStatistics(models.Model):
     """
     Platform-wide usage statistics
@@ -515,3 +600,92 @@ class DepartmentAnalytics(models.Model):
 
     def __str__(self):
         return f"Analytics for {self.department.name} ({self.period_start})"
+
+
+class DashboardRollup(models.Model):
+    """
+    Precomputed dashboard figures per day and department
+    (department NULL = whole platform). Read by the dashboard overview,
+    maintained by cases.analytics_rollups.
+    """
+
+    day = models.DateField(help_text="Ngày")
+    department = models.ForeignKey(
+        "cases.Department",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="dashboard_rollups",
+        help_text="Khoa phòng (trống = toàn hệ thống)",
+    )
+
+    # Activity during the day
+    cases_created = models.PositiveIntegerField(
+        default=0, help_text="Số ca bệnh tạo mới"
+    )
+    cases_submitted = models.PositiveIntegerField(
+        default=0, help_text="Số ca bệnh đã nộp"
+    )
+    views = models.PositiveIntegerField(default=0, help_text="Số lượt xem")
+    active_users = models.PositiveIntegerField(
+        default=0, help_text="Số người dùng hoạt động"
+    )
+
+    # Totals as of refreshed_at
+    total_cases = models.PositiveIntegerField(default=0, help_text="Tổng số ca bệnh")
+    approved_cases = models.PositiveIntegerField(
+        default=0, help_text="Số ca bệnh đã duyệt"
+    )
+    total_students = models.PositiveIntegerField(
+        default=0, help_text="Tổng số sinh viên"
+    )
+    total_instructors = models.PositiveIntegerField(
+        default=0, help_text="Tổng số giảng viên"
+    )
+    grade_sum = models.FloatField(default=0.0, help_text="Tổng điểm")
+    grade_count = models.PositiveIntegerField(default=0, help_text="Số bài chấm")
+
+    refreshed_at = models.DateTimeField(
+        default=timezone.now, help_text="Thời gian tính lại"
+    )
+
+    class Meta:
+        db_table = "cases_dashboardrollup"
+        verbose_name = "Dashboard Rollup"
+        verbose_name_plural = "Dashboard Rollups"
+        ordering = ["-day"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["department", "day"], name="unique_dashboard_rollup"
+            ),
+            # NULLs are distinct in the constraint above
+            models.UniqueConstraint(
+                fields=["day"],
+                condition=models.Q(department__isnull=True),
+                name="unique_dashboard_rollup_platform",
+            ),
+        ]
+
+    def __str__(self):
+        scope = self.department.name if self.department else "Platform"
+        return f"Dashboard rollup for {scope} ({self.day})"
+
+
+class AnalyticsRun(models.Model):
+    """
+    Last successful run of a batch analytics job; generate_analytics
+    --incremental recomputes what changed since then
+    """
+
+    name = models.CharField(max_length=100, unique=True, help_text="Tên tác vụ")
+    last_run_at = models.DateTimeField(
+        help_text="Thời điểm bắt đầu lần chạy thành công gần nhất"
+    )
+
+    class Meta:
+        db_table = "cases_analyticsrun"
+        verbose_name = "Analytics Run"
+        verbose_name_plural = "Analytics Runs"
+
+    def __str__(self):
+        return f"{self.name} last ran at {self.last_run_at}"
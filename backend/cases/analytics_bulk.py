@@ -0,0 +1,302 @@
+"""
+Set-based recomputation of CaseAnalytics and StudentEngagementMetrics for
+`manage.py generate_analytics`.
+
+Instead of get_or_create plus several queries and a save() per case and per
+student, ids are processed in chunks: every metric is one GROUP BY query
+per chunk and the rows are written with
+bulk_create(update_conflicts=True). Only the recomputed columns are
+overwritten; view counters maintained by cases.view_events are left alone.
+
+touched_since() narrows a run to the cases and students whose inputs
+changed after a given time (deletions are only picked up by a full run).
+"""
+
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from cases.analytics import (
+    CaseAnalytics,
+    CaseViewer,
+    StudentEngagementMetrics,
+)
+from cases.models import Case, CasePermission
+from cases.view_log_partitions import view_querysets
+
+CHUNK_SIZE = 5000
+PASSING_SCORE = 50
+STREAK_WINDOW_DAYS = 90
+SUBMITTED_STATUSES = ["submitted", "reviewed", "approved"]
+
+CASE_FIELDS = [
+    "total_comments",
+    "total_feedback",
+    "total_shares",
+    "average_grade",
+    "pass_rate",
+    "last_updated_at",
+]
+STUDENT_FIELDS = [
+    "total_cases_viewed",
+    "total_cases_submitted",
+    "last_active_at",
+    "average_grade",
+    "highest_grade",
+    "lowest_grade",
+    "improvement_rate",
+    "current_streak_days",
+    "longest_streak_days",
+    "updated_at",
+]
+
+
+def chunks(ids: Sequence[int], size: int) -> Iterator[List[int]]:
+    for start in range(0, len(ids), size):
+        yield list(ids[start : start + size])
+
+
+def _counts(queryset, key: str, ids: List[int]) -> Dict[int, int]:
+    rows = (
+        queryset.filter(**{f"{key}__in": ids})
+        .values(key)
+        .annotate(count=Count("pk"))
+        .order_by()
+    )
+    return {row[key]: row["count"] for row in rows}
+
+
+# --- Cases -------------------------------------------------------------------
+
+
+def recompute_cases(
+    case_ids: Optional[Iterable[int]] = None, chunk_size: int = CHUNK_SIZE
+) -> int:
+    """
+    Engagement (comments, feedback, shares) and learning (grade, pass rate)
+    metrics for `case_ids` (all cases when None). Returns rows written.
+    """
+    from comments.models import Comment
+    from feedback.models import Feedback
+    from grades.models import Grade
+
+    if case_ids is None:
+        case_ids = Case.objects.order_by("pk").values_list("pk", flat=True)
+    case_ids = sorted(set(case_ids))
+
+    written = 0
+    for chunk in chunks(case_ids, chunk_size):
+        comments = _counts(Comment.objects, "case_id", chunk)
+        feedback = _counts(Feedback.objects, "case_id", chunk)
+        shares = _counts(CasePermission.objects, "case_id", chunk)
+        # One grade per case
+        grades = dict(
+            Grade.objects.filter(case_id__in=chunk, score__isnull=False).values_list(
+                "case_id", "score"
+            )
+        )
+        now = timezone.now()
+
+        rows = []
+        for case_id in chunk:
+            score = grades.get(case_id)
+            rows.append(
+                CaseAnalytics(
+                    case_id=case_id,
+                    total_comments=comments.get(case_id, 0),
+                    total_feedback=feedback.get(case_id, 0),
+                    total_shares=shares.get(case_id, 0),
+                    average_grade=score,
+                    pass_rate=(
+                        100.0 if score is not None and score >= PASSING_SCORE else 0.0
+                    ),
+                    last_updated_at=now,
+                )
+            )
+        CaseAnalytics.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=["case"],
+            update_fields=CASE_FIELDS,
+        )
+        written += len(rows)
+    return written
+
+
+# --- Students ----------------------------------------------------------------
+
+
+def current_streak(view_dates: Sequence[date], today: date) -> int:
+    """
+    Consecutive days with views ending today or yesterday; `view_dates` are
+    distinct and newest first (same rule as StudentEngagementMetrics).
+    """
+    streak = 0
+    check_date = today
+    for view_date in view_dates:
+        if view_date == check_date or view_date == check_date - timedelta(days=1):
+            streak += 1
+            check_date = view_date - timedelta(days=1)
+        else:
+            break
+    return streak
+
+
+def improvement_rate(scores: Sequence[float]) -> Optional[float]:
+    """Second half vs first half of chronological scores, in percent."""
+    if len(scores) < 4:
+        return None
+    mid_point = len(scores) // 2
+    first_half_avg = sum(scores[:mid_point]) / mid_point
+    second_half_avg = sum(scores[mid_point:]) / (len(scores) - mid_point)
+    if first_half_avg <= 0:
+        return None
+    return (second_half_avg - first_half_avg) / first_half_avg * 100
+
+
+def _view_dates(chunk: List[int], today: date) -> Dict[int, List[date]]:
+    """
+    Distinct local view dates per user in the streak window, newest first
+    (raw events, plus CaseViewDaily for compacted months).
+    """
+    raw, daily = view_querysets(today - timedelta(days=STREAK_WINDOW_DAYS), today)
+    rows = (
+        raw.filter(user_id__in=chunk)
+        .values_list("user_id", "viewed_at__date")
+        .union(daily.filter(user_id__in=chunk).values_list("user_id", "day"))
+    )
+    dates = defaultdict(list)
+    for user_id, view_date in rows:
+        dates[user_id].append(view_date)
+    for user_dates in dates.values():
+        user_dates.sort(reverse=True)
+    return dates
+
+
+def recompute_students(
+    student_ids: Optional[Iterable[int]] = None, chunk_size: int = CHUNK_SIZE
+) -> int:
+    """
+    Activity, performance and streak metrics for `student_ids` (all students
+    when None). Returns rows written.
+    """
+    from accounts.models import User
+    from grades.models import Grade
+
+    if student_ids is None:
+        student_ids = User.objects.filter(role="student").values_list("pk", flat=True)
+    student_ids = sorted(set(student_ids))
+    today = timezone.localdate()
+
+    written = 0
+    for chunk in chunks(student_ids, chunk_size):
+        viewed = {
+            row["user_id"]: row
+            for row in CaseViewer.objects.filter(user_id__in=chunk)
+            .values("user_id")
+            .annotate(cases=Count("pk"), last=Max("last_viewed_at"))
+            .order_by()
+        }
+        submitted = _counts(
+            Case.objects.filter(case_status__in=SUBMITTED_STATUSES),
+            "student_id",
+            chunk,
+        )
+        scores = defaultdict(list)
+        for student_id, score in (
+            Grade.objects.filter(case__student_id__in=chunk, score__isnull=False)
+            .order_by("case__student_id", "graded_at")
+            .values_list("case__student_id", "score")
+        ):
+            scores[student_id].append(score)
+        view_dates = _view_dates(chunk, today)
+        existing = {
+            metrics.student_id: metrics
+            for metrics in StudentEngagementMetrics.objects.filter(
+                student_id__in=chunk
+            ).only(
+                "student", "last_active_at", "longest_streak_days", "improvement_rate"
+            )
+        }
+        now = timezone.now()
+
+        rows = []
+        for student_id in chunk:
+            old = existing.get(student_id) or StudentEngagementMetrics()
+            student_scores = scores.get(student_id, [])
+            streak = current_streak(view_dates.get(student_id, []), today)
+            improvement = improvement_rate(student_scores)
+            rows.append(
+                StudentEngagementMetrics(
+                    student_id=student_id,
+                    total_cases_viewed=viewed.get(student_id, {}).get("cases", 0),
+                    total_cases_submitted=submitted.get(student_id, 0),
+                    last_active_at=(
+                        viewed.get(student_id, {}).get("last") or old.last_active_at
+                    ),
+                    average_grade=(
+                        sum(student_scores) / len(student_scores)
+                        if student_scores
+                        else None
+                    ),
+                    highest_grade=max(student_scores, default=None),
+                    lowest_grade=min(student_scores, default=None),
+                    improvement_rate=(
+                        improvement if improvement is not None else old.improvement_rate
+                    ),
+                    current_streak_days=streak,
+                    longest_streak_days=max(streak, old.longest_streak_days),
+                    updated_at=now,
+                )
+            )
+        StudentEngagementMetrics.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=["student"],
+            update_fields=STUDENT_FIELDS,
+        )
+        written += len(rows)
+    return written
+
+
+# --- Incremental runs --------------------------------------------------------
+
+
+def touched_since(since) -> Tuple[Set[int], Set[int]]:
+    """
+    (case ids, student ids) whose metrics may have changed after `since`.
+    Students with a running streak are always included, since a day
+    without views ends it.
+    """
+    from comments.models import Comment
+    from feedback.models import Feedback
+    from grades.models import Grade
+
+    case_ids = set(
+        Case.objects.filter(updated_at__gte=since).values_list("pk", flat=True)
+    )
+    for queryset in (
+        Comment.objects.filter(updated_at__gte=since),
+        Feedback.objects.filter(updated_at__gte=since),
+        CasePermission.objects.filter(granted_at__gte=since),
+        Grade.objects.filter(updated_at__gte=since),
+    ):
+        case_ids.update(queryset.values_list("case_id", flat=True))
+
+    student_ids = set(
+        Case.objects.filter(pk__in=case_ids).values_list("student_id", flat=True)
+    )
+    student_ids.update(
+        CaseViewer.objects.filter(
+            last_viewed_at__gte=since, user__role="student"
+        ).values_list("user_id", flat=True)
+    )
+    student_ids.update(
+        StudentEngagementMetrics.objects.filter(current_streak_days__gt=0).values_list(
+            "student_id", flat=True
+        )
+    )
+    return case_ids, student_ids
@@ -0,0 +1,223 @@
+"""
+Per-day, per-department rollup rows (DashboardRollup) behind the analytics
+dashboard overview.
+
+refresh_days() recomputes whole rows with a handful of GROUP BY queries per
+day; Celery beat runs it for today and yesterday every
+ANALYTICS_ROLLUP_INTERVAL_SECONDS. Between refreshes, new cases and flushed
+view events are added to today's rows as F() deltas, so the overview only
+reads the rows for the last week instead of counting Case, User,
+CaseViewLog and Grade on every load. Views of compacted months come from
+CaseViewDaily.
+
+The department NULL row covers the whole platform. Views and active users
+are platform-wide (as the overview always showed them) and only kept there;
+case and user figures follow the overview's department scoping (a case
+counts for both its student's and its repository's department).
+"""
+
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Dict, Iterable, Optional
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from cases.analytics import DashboardRollup
+from cases.analytics_trends import local_range
+from cases.medical_models import Department
+from cases.models import Case
+from cases.view_log_partitions import distinct_viewers, view_count, view_querysets
+
+PLATFORM = None  # department key of the platform-wide row
+
+FLOW_FIELDS = ("cases_created", "cases_submitted", "views", "active_users")
+TOTAL_FIELDS = (
+    "total_cases",
+    "approved_cases",
+    "total_students",
+    "total_instructors",
+    "grade_sum",
+    "grade_count",
+)
+
+
+def _fold_case_rows(rows, fields, into):
+    """
+    Add grouped Case rows (keyed by student/repository department) to every
+    department they belong to, counting each case once per department.
+    """
+    for row in rows:
+        departments = {PLATFORM}
+        for key in ("student__department", "repository__department"):
+            if row[key] is not None:
+                departments.add(row[key])
+        for department in departments:
+            for field in fields:
+                into[department][field] += row[field]
+
+
+def _compute_totals(into):
+    from accounts.models import User
+    from grades.models import Grade
+
+    rows = (
+        Case.objects.values("student__department", "repository__department")
+        .annotate(
+            total_cases=Count("pk"),
+            approved_cases=Count("pk", filter=Q(case_status="approved")),
+        )
+        .order_by()
+    )
+    _fold_case_rows(rows, ("total_cases", "approved_cases"), into)
+
+    users = (
+        User.objects.filter(role__in=["student", "instructor"])
+        .values("department", "role")
+        .annotate(count=Count("pk"))
+        .order_by()
+    )
+    for row in users:
+        field = f"total_{row['role']}s"
+        into[PLATFORM][field] += row["count"]
+        if row["department"] is not None:
+            into[row["department"]][field] += row["count"]
+
+    grades = (
+        Grade.objects.values("case__student__department")
+        .annotate(grade_sum=Sum("score"), grade_count=Count("score"))
+        .order_by()
+    )
+    for row in grades:
+        departments = [PLATFORM]
+        if row["case__student__department"] is not None:
+            departments.append(row["case__student__department"])
+        for department in departments:
+            into[department]["grade_sum"] += row["grade_sum"] or 0.0
+            into[department]["grade_count"] += row["grade_count"]
+
+
+def _compute_flows(day: date, into):
+    start, end = local_range(day, day)
+
+    for field, column in (
+        ("cases_created", "created_at"),
+        ("cases_submitted", "submitted_at"),
+    ):
+        rows = (
+            Case.objects.filter(**{f"{column}__gte": start, f"{column}__lt": end})
+            .values("student__department", "repository__department")
+            .annotate(**{field: Count("pk")})
+            .order_by()
+        )
+        _fold_case_rows(rows, (field,), into)
+
+    # Raw events, or their CaseViewDaily rows once the month is compacted
+    raw, daily = view_querysets(day, day)
+    into[PLATFORM]["views"] = view_count(raw, daily)
+    into[PLATFORM]["active_users"] = distinct_viewers(raw, daily)
+
+
+def refresh_days(days: Iterable[date]) -> int:
+    """
+    Recompute the platform and department rows of each day; totals are
+    taken as of now. Returns the number of rows written.
+    """
+    department_ids = list(Department.objects.values_list("pk", flat=True))
+    totals = defaultdict(lambda: dict.fromkeys(TOTAL_FIELDS, 0))
+    _compute_totals(totals)
+
+    written = 0
+    for day in sorted(set(days)):
+        flows = defaultdict(lambda: dict.fromkeys(FLOW_FIELDS, 0))
+        _compute_flows(day, flows)
+        now = timezone.now()
+
+        with transaction.atomic():
+            for department in [PLATFORM, *department_ids]:
+                DashboardRollup.objects.update_or_create(
+                    day=day,
+                    department_id=department,
+                    defaults={
+                        **dict.fromkeys(FLOW_FIELDS, 0),
+                        **dict.fromkeys(TOTAL_FIELDS, 0),
+                        **flows.get(department, {}),
+                        **totals.get(department, {}),
+                        "refreshed_at": now,
+                    },
+                )
+                written += 1
+    return written
+
+
+def refresh_recent(days: int = 2) -> int:
+    """Recompute today's rows and the previous `days - 1` days."""
+    today = timezone.localdate()
+    return refresh_days(today - timedelta(days=n) for n in range(days))
+
+
+def dashboard_rows(
+    start_date: date, end_date: date, department=None
+) -> Dict[Optional[int], Dict[date, DashboardRollup]]:
+    """
+    {department_id or None: {day: row}} for start_date..end_date, platform
+    rows always included. Missing days are computed first.
+    """
+    scopes = Q(department__isnull=True)
+    if department is not None:
+        scopes |= Q(department=department)
+
+    def fetch():
+        rows = defaultdict(dict)
+        for row in DashboardRollup.objects.filter(
+            scopes, day__gte=start_date, day__lte=end_date
+        ):
+            rows[row.department_id][row.day] = row
+        return rows
+
+    rows = fetch()
+    wanted = [
+        start_date + timedelta(days=n) for n in range((end_date - start_date).days + 1)
+    ]
+    missing = [
+        day
+        for day in wanted
+        if day not in rows[PLATFORM]
+        or (department is not None and day not in rows[department.pk])
+    ]
+    if missing:
+        refresh_days(missing)
+        rows = fetch()
+    return rows
+
+
+def _add_deltas(day: date, departments: Iterable, **deltas):
+    """F() increments on existing rows; refresh_days() fills in the rest."""
+    departments = [d for d in departments if d is not None]
+    DashboardRollup.objects.filter(
+        Q(department__isnull=True) | Q(department__in=departments), day=day
+    ).update(**{field: F(field) + value for field, value in deltas.items()})
+
+
+def add_views(views_by_day: Dict[date, int]):
+    """Platform view counts for a batch of flushed view events."""
+    for day, count in views_by_day.items():
+        DashboardRollup.objects.filter(department__isnull=True, day=day).update(
+            views=F("views") + count
+        )
+
+
+@receiver(post_save, sender=Case)
+def case_created(sender, instance, created=False, **kwargs):
+    if not created:
+        return
+    departments = {instance.student.department_id}
+    if instance.repository_id:
+        departments.add(instance.repository.department_id)
+    day = timezone.localdate(instance.created_at)
+    transaction.on_commit(
+        lambda: _add_deltas(day, departments, cases_created=1, total_cases=1)
+    )
@@ -207,3 +207,17 @@ class StudentProgressReportSerializer(serializers.Serializer):
     activity_timeline = serializers.ListField()
     strengths = serializers.ListField()
     areas_for_improvement = serializers.ListField()
+
+
+class RecordViewSerializer(serializers.Serializer):
+    """Body of POST /api/case-analytics/{id}/record_view/"""
+
+    time_spent_seconds = serializers.IntegerField(
+        min_value=0, max_value=2147483647, default=0
+    )
+    completed = serializers.BooleanField(default=False)
+    access_method = serializers.ChoiceField(
+        choices=CaseViewLog._meta.get_field("access_method").choices,
+        default="direct",
+    )
+    device_type = serializers.CharField(max_length=50, allow_blank=True, default="")
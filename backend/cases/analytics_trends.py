@@ -0,0 +1,192 @@
+"""
+Time series for the analytics dashboard (views, cases created, cases
+submitted), bucketed by day, week or month.
+
+Each metric is one TruncDate/TruncWeek/TruncMonth + GROUP BY query over the
+whole range (views add one over CaseViewDaily for compacted months), so any
+period costs four queries; empty buckets are filled in Python. Results are
+cached per (range, bucket, department scope) under a version number that is
+bumped when cases are created or changed and when view events are written,
+with ANALYTICS_TRENDS_CACHE_SECONDS as a backstop for writes that bypass
+signals (queryset.update(), bulk_create()).
+"""
+
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, DateField, F, Q, Sum
+from django.db.models.functions import TruncDate, TruncMonth, TruncWeek
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from cases.analytics import CaseViewDaily, CaseViewLog
+from cases.models import Case
+
+BUCKETS = ("day", "week", "month")
+MAX_PERIOD_DAYS = 730
+VERSION_KEY = "analytics_trends:version"
+
+# Case fields that move a case between buckets or department scopes
+TREND_FIELDS = {"created_at", "submitted_at", "student", "repository"}
+
+
+def local_range(start_date: date, end_date: date) -> Tuple[datetime, datetime]:
+    """[start, end) datetimes covering start_date..end_date in the current zone."""
+    tz = timezone.get_current_timezone()
+    start = timezone.make_aware(datetime.combine(start_date, time.min), tz)
+    end = timezone.make_aware(
+        datetime.combine(end_date + timedelta(days=1), time.min), tz
+    )
+    return start, end
+
+
+def bucket_start(day: date, bucket: str) -> date:
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())  # Monday, like TruncWeek
+    if bucket == "month":
+        return day.replace(day=1)
+    return day
+
+
+def bucket_starts(start_date: date, end_date: date, bucket: str) -> List[date]:
+    starts = []
+    current = bucket_start(start_date, bucket)
+    while current <= end_date:
+        starts.append(current)
+        if bucket == "day":
+            current += timedelta(days=1)
+        elif bucket == "week":
+            current += timedelta(weeks=1)
+        else:
+            current = (current + timedelta(days=32)).replace(day=1)
+    return starts
+
+
+def _trunc(field: str, bucket: str):
+    # Truncated in the current time zone, like the old __date lookups
+    function = {"day": TruncDate, "week": TruncWeek, "month": TruncMonth}[bucket]
+    if bucket == "day":
+        return function(field)
+    return function(field, output_field=DateField())
+
+
+def _counts(queryset, field: str, start: datetime, end: datetime, bucket: str):
+    rows = (
+        queryset.filter(**{f"{field}__gte": start, f"{field}__lt": end})
+        .annotate(bucket=_trunc(field, bucket))
+        .values("bucket")
+        .annotate(count=Count("pk"))
+        .order_by()
+    )
+    return {row["bucket"]: row["count"] for row in rows}
+
+
+def _compacted_views(queryset, start_date: date, end_date: date, bucket: str):
+    """View counts per bucket from CaseViewDaily (months already compacted)."""
+    if bucket == "day":
+        truncated = F("day")
+    else:
+        truncated = _trunc("day", bucket)
+    rows = (
+        queryset.filter(day__gte=start_date, day__lte=end_date)
+        .annotate(bucket=truncated)
+        .values("bucket")
+        .annotate(count=Sum("views"))
+        .order_by()
+    )
+    return {row["bucket"]: row["count"] for row in rows}
+
+
+def trend_series(
+    start_date: date,
+    end_date: date,
+    bucket: str = "day",
+    department=None,
+) -> List[Dict]:
+    """
+    [{"date", "views", "cases_created", "cases_submitted"}, ...] for every
+    bucket touching start_date..end_date (inclusive); "date" is the bucket's
+    first day, counts only cover days inside the range.
+    """
+    start, end = local_range(start_date, end_date)
+
+    cases_qs = Case.objects.all()
+    views_qs = CaseViewLog.objects.all()
+    daily_qs = CaseViewDaily.objects.all()
+    if department is not None:
+        cases_qs = cases_qs.filter(
+            Q(student__department=department) | Q(repository__department=department)
+        )
+        views_qs = views_qs.filter(
+            Q(case__student__department=department)
+            | Q(case__repository__department=department)
+        )
+        daily_qs = daily_qs.filter(
+            Q(case__student__department=department)
+            | Q(case__repository__department=department)
+        )
+
+    views = _counts(views_qs, "viewed_at", start, end, bucket)
+    for day, count in _compacted_views(daily_qs, start_date, end_date, bucket).items():
+        views[day] = views.get(day, 0) + count
+    created = _counts(cases_qs, "created_at", start, end, bucket)
+    submitted = _counts(cases_qs, "submitted_at", start, end, bucket)
+
+    return [
+        {
+            "date": day.isoformat(),
+            "views": views.get(day, 0),
+            "cases_created": created.get(day, 0),
+            "cases_submitted": submitted.get(day, 0),
+        }
+        for day in bucket_starts(start_date, end_date, bucket)
+    ]
+
+
+def cached_trend_series(
+    start_date: date,
+    end_date: date,
+    bucket: str = "day",
+    department=None,
+) -> List[Dict]:
+    scope = f"dept:{department.pk}" if department is not None else "all"
+    version = cache.get(VERSION_KEY, 0)
+    key = (
+        f"analytics_trends:{version}:{scope}:{bucket}:"
+        f"{start_date.isoformat()}:{end_date.isoformat()}"
+    )
+
+    series = cache.get(key)
+    if series is None:
+        series = trend_series(start_date, end_date, bucket, department)
+        cache.set(key, series, settings.ANALYTICS_TRENDS_CACHE_SECONDS)
+    return series
+
+
+def invalidate_trends():
+    """Make cached series stale once the current transaction commits."""
+
+    def bump():
+        try:
+            cache.incr(VERSION_KEY)
+        except ValueError:
+            # Key missing (first use or evicted)
+            cache.add(VERSION_KEY, 0, timeout=None)
+            cache.incr(VERSION_KEY)
+
+    transaction.on_commit(bump)
+
+
+@receiver(post_save, sender=Case)
+def case_saved(sender, instance, created=False, update_fields=None, **kwargs):
+    if created or update_fields is None or TREND_FIELDS & set(update_fields):
+        invalidate_trends()
+
+
+@receiver(post_delete, sender=Case)
+def case_deleted(sender, instance, **kwargs):
+    invalidate_trends()
@@ -24,8 +24,17 @@ from .analytics_serializers import (
     DepartmentAnalyticsSerializer,
     AnalyticsDashboardSerializer,
     StudentProgressReportSerializer,
+    RecordViewSerializer,
+)
+from .analytics_rollups import dashboard_rows
+from .analytics_trends import (
+    BUCKETS,
+    MAX_PERIOD_DAYS,
+    cached_trend_series,
+    local_range,
 )
 from cases.models import Case
+from cases.view_events import record_view_event
 from accounts.models import User
 
 
@@ -62,25 +71,30 @@ class CaseAnalyticsViewSet(viewsets.ReadOnlyModelViewSet):
         POST /api/case-analytics/{id}/record_view/
         Body: {"time_spent_seconds": 120, "completed": true}
         """
-        analytics = self.get_object()
-        time_spent = request.data.get("time_spent_seconds", 0)
-
-        # Create view log
-        CaseViewLog.objects.create(
-            case=analytics.case,
-            user=request.user,
-            time_spent_seconds=time_spent,
-            completed=request.data.get("completed", False),
-            access_method=request.data.get("access_method", "direct"),
-            device_type=request.data.get("device_type", ""),
-            ip_address=request.META.get("REMOTE_ADDR"),
+        # Validated here: a bad value would otherwise only fail at flush time
+        serializer = RecordViewSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        # Only the case id is needed; the aggregates are not read here
+        case_id = (
+            self.get_queryset().filter(pk=pk).values_list("case_id", flat=True).first()
         )
+        if case_id is None:
+            return Response(
+                {"error": "Ca bệnh không tồn tại"}, status=status.HTTP_404_NOT_FOUND
+            )
 
-        # Update analytics
-        analytics.update_view_metrics(request.user, time_spent)
+        # Buffered; CaseViewLog and the aggregates are written in batches, so
+        # counters read now would be stale until the next flush
+        record_view_event(
+            case_id=case_id,
+            user_id=request.user.pk,
+            ip_address=request.META.get("REMOTE_ADDR"),
+            **serializer.validated_data,
+        )
 
         return Response(
-            {"message": "Đã ghi nhận lượt xem", "total_views": analytics.total_views}
+            {"message": "Đã ghi nhận lượt xem"}, status=status.HTTP_202_ACCEPTED
         )
 
     @action(detail=False, methods=["get"])
@@ -267,61 +281,43 @@ class AnalyticsDashboardViewSet(viewsets.ViewSet):
         user = request.user
 
         # Calculate date ranges
-        today = timezone.now().date()
+        today = timezone.localdate()
         week_ago = today - timedelta(days=7)
 
-        # Base querysets
-        cases_qs = Case.objects.all()
-        students_qs = User.objects.filter(role="student")
-        instructors_qs = User.objects.filter(role="instructor")
-
         # Filter by department for instructors
+        department = None
         if user.role == "instructor" and user.department:
-            cases_qs = cases_qs.filter(
-                Q(student__department=user.department)
-                | Q(repository__department=user.department)
-            )
-            students_qs = students_qs.filter(department=user.department)
-            instructors_qs = instructors_qs.filter(department=user.department)
+            department = user.department
+
+        # Precomputed per-day rows (cases.analytics_rollups)
+        rows = dashboard_rows(week_ago, today, department)
+        scoped = rows[department.pk if department else None]
+        platform = rows[None]
+        current = scoped[today]
 
         # Overview metrics
-        total_cases = cases_qs.count()
-        total_students = students_qs.count()
-        total_instructors = instructors_qs.count()
-
-        # Active users today
-        active_today = (
-            CaseViewLog.objects.filter(viewed_at__date=today)
-            .values("user")
-            .distinct()
-            .count()
-        )
+        total_cases = current.total_cases
+        total_students = current.total_students
+        total_instructors = current.total_instructors
 
-        # Recent activity
-        cases_created_this_week = cases_qs.filter(
-            created_at__date__gte=week_ago
-        ).count()
-        cases_submitted_this_week = cases_qs.filter(
-            submitted_at__date__gte=week_ago
-        ).count()
+        # Active users today (platform-wide)
+        active_today = platform[today].active_users
 
-        total_views_this_week = CaseViewLog.objects.filter(
-            viewed_at__date__gte=week_ago
-        ).count()
+        # Recent activity
+        cases_created_this_week = sum(row.cases_created for row in scoped.values())
+        cases_submitted_this_week = sum(
+            row.cases_submitted for row in scoped.values()
+        )
+        total_views_this_week = sum(row.views for row in platform.values())
 
         # Performance metrics
-        from grades.models import Grade
-
-        grades_qs = Grade.objects.all()
-        if user.role == "instructor" and user.department:
-            grades_qs = grades_qs.filter(case__student__department=user.department)
-
-        avg_grade = grades_qs.aggregate(Avg("score"))["score__avg"] or 0.0
+        avg_grade = (
+            current.grade_sum / current.grade_count if current.grade_count else 0.0
+        )
 
         # Completion rate
-        completed_cases = cases_qs.filter(case_status="approved").count()
         avg_completion_rate = (
-            (completed_cases / total_cases * 100) if total_cases > 0 else 0.0
+            (current.approved_cases / total_cases * 100) if total_cases > 0 else 0.0
         )
 
         # Top students
@@ -390,42 +386,42 @@ class AnalyticsDashboardViewSet(viewsets.ViewSet):
     def trends(self, request):
         """
         Get trend data over time
-        GET /api/analytics-dashboard/trends/?period=30
+        GET /api/analytics-dashboard/trends/?period=30&bucket=day
+        bucket: day (default), week or month
+        period: 1 to MAX_PERIOD_DAYS days
         """
-        days = int(request.query_params.get("period", 30))
-        end_date = timezone.now().date()
-        start_date = end_date - timedelta(days=days)
-
-        # Daily statistics
-        daily_stats = []
-        current_date = start_date
+        user = request.user
+        bucket = request.query_params.get("bucket", "day")
+        try:
+            days = int(request.query_params.get("period", 30))
+        except ValueError:
+            days = 0
+        if not 0 < days <= MAX_PERIOD_DAYS or bucket not in BUCKETS:
+            return Response(
+                {"error": "Tham số period hoặc bucket không hợp lệ"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
-        while current_date <= end_date:
-            views = CaseViewLog.objects.filter(viewed_at__date=current_date).count()
-            cases_created = Case.objects.filter(created_at__date=current_date).count()
-            cases_submitted = Case.objects.filter(
-                submitted_at__date=current_date
-            ).count()
+        end_date = timezone.localdate()
+        start_date = end_date - timedelta(days=days)
 
-            daily_stats.append(
-                {
-                    "date": current_date.isoformat(),
-                    "views": views,
-                    "cases_created": cases_created,
-                    "cases_submitted": cases_submitted,
-                }
-            )
+        # Filter by department for instructors
+        department = None
+        if user.role == "instructor" and user.department:
+            department = user.department
 
-            current_date += timedelta(days=1)
+        stats = cached_trend_series(start_date, end_date, bucket, department)
 
-        return Response(
-            {
-                "period_days": days,
-                "start_date": start_date.isoformat(),
-                "end_date": end_date.isoformat(),
-                "daily_stats": daily_stats,
-            }
-        )
+        data = {
+            "period_days": days,
+            "start_date": start_date.isoformat(),
+            "end_date": end_date.isoformat(),
+            "bucket": bucket,
+            "stats": stats,
+        }
+        if bucket == "day":
+            data["daily_stats"] = stats
+        return Response(data)
 
 
 class PlatformStatisticsViewSet(viewsets.ReadOnlyModelViewSet):
@@ -444,7 +440,7 @@ class PlatformStatisticsViewSet(viewsets.ReadOnlyModelViewSet):
         Generate daily statistics
         POST /api/platform-statistics/generate_daily/
         """
-        today = timezone.now().date()
+        today = timezone.localdate()
 
         # Check if already exists
         if PlatformUsageStatistics.objects.filter(
@@ -455,33 +451,29 @@ class PlatformStatisticsViewSet(viewsets.ReadOnlyModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # Calculate metrics
-        active_users = (
-            CaseViewLog.objects.filter(viewed_at__date=today)
-            .values("user")
-            .distinct()
-            .count()
-        )
-
-        active_students = (
-            CaseViewLog.objects.filter(viewed_at__date=today, user__role="student")
-            .values("user")
-            .distinct()
-            .count()
-        )
-
-        active_instructors = (
-            CaseViewLog.objects.filter(viewed_at__date=today, user__role="instructor")
-            .values("user")
-            .distinct()
-            .count()
+        # Calculate metrics (range filter so only today's partition is read)
+        start, end = local_range(today, today)
+        view_stats = CaseViewLog.objects.filter(
+            viewed_at__gte=start, viewed_at__lt=end
+        ).aggregate(
+            case_views=Count("pk"),
+            active_users=Count("user", distinct=True),
+            active_students=Count(
+                "user", distinct=True, filter=Q(user__role="student")
+            ),
+            active_instructors=Count(
+                "user", distinct=True, filter=Q(user__role="instructor")
+            ),
         )
+        active_users = view_stats["active_users"]
+        active_students = view_stats["active_students"]
+        active_instructors = view_stats["active_instructors"]
 
         new_users = User.objects.filter(created_at__date=today).count()
 
         cases_created = Case.objects.filter(created_at__date=today).count()
         cases_submitted = Case.objects.filter(submitted_at__date=today).count()
-        case_views = CaseViewLog.objects.filter(viewed_at__date=today).count()
+        case_views = view_stats["case_views"]
 
         from comments.models import Comment
         from feedback.models import Feedback
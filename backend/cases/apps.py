@@ -9,3 +9,5 @@ class CasesConfig(AppConfig):
 
     def ready(self):
         import cases.search.signals
+        import cases.analytics_trends
+        import cases.analytics_rollups
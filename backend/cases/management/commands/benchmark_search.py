@@ -0,0 +1,148 @@
+"""
+Measure case search latency and relevance on a synthetic corpus.
+
+    python manage.py benchmark_search --cases 20000 --output before.json
+    ... change ranking / indexes ...
+    python manage.py benchmark_search --baseline before.json
+"""
+
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from cases.search import benchmark
+
+
+class Command(BaseCommand):
+    help = "Benchmark rank_cases/search_cases latency (p50/p95/p99) and NDCG/recall"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--cases",
+            type=int,
+            default=5000,
+            help="Benchmark corpus size; missing cases are generated and indexed",
+        )
+        parser.add_argument(
+            "--regenerate",
+            action="store_true",
+            help="Delete the benchmark corpus and generate it again",
+        )
+        parser.add_argument(
+            "--clear",
+            action="store_true",
+            help="Delete the benchmark corpus and exit",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--ranker",
+            action="append",
+            choices=benchmark.RANKERS,
+            help="Ranker to benchmark (repeatable, default: all)",
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=20, help="Timed runs per query"
+        )
+        parser.add_argument(
+            "--depth", type=int, default=100, help="Results scored per query"
+        )
+        parser.add_argument(
+            "--explain",
+            action="store_true",
+            help="Print EXPLAIN ANALYZE for every query",
+        )
+        parser.add_argument("--output", help="Write the JSON report to this file")
+        parser.add_argument(
+            "--baseline",
+            help="JSON report of an earlier run; fail on regressions against it",
+        )
+        parser.add_argument(
+            "--latency-tolerance",
+            type=float,
+            default=0.2,
+            help="Allowed p95 slowdown against --baseline (fraction)",
+        )
+        parser.add_argument(
+            "--quality-tolerance",
+            type=float,
+            default=0.02,
+            help="Allowed NDCG/recall drop against --baseline (absolute)",
+        )
+
+    def handle(self, *args, **options):
+        if options["clear"] or options["regenerate"]:
+            deleted = benchmark.clear_cases()
+            self.stdout.write(f"Deleted {deleted} benchmark rows")
+            if options["clear"]:
+                return
+
+        self.prepare_corpus(options["cases"], options["seed"])
+
+        report = benchmark.run(
+            rankers=options["ranker"] or benchmark.RANKERS,
+            repeat=options["repeat"],
+            depth=options["depth"],
+            explain=options["explain"],
+        )
+        self.print_report(report, options["explain"])
+
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            self.stdout.write(f"Report written to {options['output']}")
+
+        if options["baseline"]:
+            with open(options["baseline"], encoding="utf-8") as f:
+                baseline = json.load(f)
+            regressions = benchmark.compare(
+                report,
+                baseline,
+                latency_tolerance=options["latency_tolerance"],
+                quality_tolerance=options["quality_tolerance"],
+            )
+            if regressions:
+                for line in regressions:
+                    self.stdout.write(self.style.ERROR(f"REGRESSION {line}"))
+                raise CommandError(f"{len(regressions)} regressions against baseline")
+            self.stdout.write(self.style.SUCCESS("No regressions against baseline"))
+
+    def prepare_corpus(self, size, seed):
+        from cases.search.reindex import bulk_reindex
+
+        missing = size - benchmark.benchmark_cases().count()
+        if missing <= 0:
+            return
+
+        self.stdout.write(f"Generating {missing} benchmark cases...")
+        benchmark.generate_cases(
+            missing,
+            seed=seed,
+            progress=lambda n: self.stdout.write(f"Generated {n}/{missing}"),
+        )
+        self.stdout.write("Indexing...")
+        bulk_reindex(workers=1, restart=True)
+
+    def print_report(self, report, explain):
+        self.stdout.write(
+            f"\n{report['cases']} cases, {report['repeat']} runs per query, "
+            f"top {report['depth']} scored"
+        )
+        for name, result in report["rankers"].items():
+            latency = result["latency_ms"]
+            self.stdout.write(
+                self.style.MIGRATE_HEADING(
+                    f"\n{name}: p50 {latency['p50']}ms  p95 {latency['p95']}ms  "
+                    f"p99 {latency['p99']}ms  "
+                    f"ndcg@{benchmark.NDCG_AT} {result[f'ndcg@{benchmark.NDCG_AT}']}  "
+                    f"recall {result['recall']}"
+                )
+            )
+            for query in result["queries"]:
+                self.stdout.write(
+                    f"  {query['kind']:<10} {query['query']:<28} "
+                    f"p95 {query['latency_ms']['p95']:>8}ms  "
+                    f"ndcg {query['ndcg']:.3f}  recall {query['recall']:.3f}  "
+                    f"hits {query['hits']}/{query['relevant']}"
+                )
+                if explain:
+                    self.stdout.write(query["plan"])
@@ -1,23 +1,31 @@
 """
 Management command to generate analytics data
 Usage: python manage.py generate_analytics --period daily
+       python manage.py generate_analytics --incremental
 """
 
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 from django.utils import timezone
-from django.db.models import Avg
+from django.utils.dateparse import parse_datetime
+from django.db.models import Count, Q
+from collections import Counter
 from datetime import timedelta
 
 from cases.analytics import (
-    CaseAnalytics,
-    StudentEngagementMetrics,
+    AnalyticsRun,
     PlatformUsageStatistics,
     DepartmentAnalytics,
-    CaseViewLog,
 )
+from cases import analytics_bulk
+from cases.analytics_trends import local_range
 from cases.models import Case
 from accounts.models import User
 from cases.medical_models import Department
+from cases.view_log_partitions import distinct_viewers, view_count, view_querysets
+
+# AnalyticsRun row holding the --incremental watermark
+RUN_NAME = "generate_analytics"
 
 
 class Command(BaseCommand):
@@ -36,6 +44,22 @@ class Command(BaseCommand):
             type=str,
             help="Specific date (YYYY-MM-DD) for analytics generation",
         )
+        parser.add_argument(
+            "--incremental",
+            action="store_true",
+            help="Only recompute cases/students touched since the last run",
+        )
+        parser.add_argument(
+            "--since",
+            type=str,
+            help="Only recompute cases/students touched since this ISO datetime",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=analytics_bulk.CHUNK_SIZE,
+            help="Cases/students recomputed per batch of queries",
+        )
 
     def handle(self, *args, **options):
         period = options["period"]
@@ -45,66 +69,84 @@ class Command(BaseCommand):
 
             target_date = datetime.strptime(options["date"], "%Y-%m-%d").date()
         else:
-            target_date = timezone.now().date()
+            target_date = timezone.localdate()
+
+        started_at = timezone.now()
+        since = self.get_since(options)
+        chunk_size = options["chunk_size"]
 
         self.stdout.write(f"Generating {period} analytics for {target_date}...")
 
-        # Initialize case analytics
-        self.generate_case_analytics()
+        case_ids = student_ids = None
+        if since:
+            case_ids, student_ids = analytics_bulk.touched_since(since)
+            self.stdout.write(
+                f"Incremental since {since}: {len(case_ids)} cases, "
+                f"{len(student_ids)} students"
+            )
 
-        # Update student engagement metrics
-        self.update_student_engagement()
+        # The watermark only moves if every write below is committed
+        with transaction.atomic():
+            # Initialize case analytics
+            self.generate_case_analytics(case_ids, chunk_size)
 
-        # Generate platform statistics
-        self.generate_platform_statistics(period, target_date)
+            # Update student engagement metrics
+            self.update_student_engagement(student_ids, chunk_size)
 
-        # Generate department analytics
-        self.generate_department_analytics(target_date)
+            # Generate platform statistics
+            self.generate_platform_statistics(period, target_date)
 
-        self.stdout.write(self.style.SUCCESS("Analytics generation completed!"))
+            # Generate department analytics
+            self.generate_department_analytics(target_date)
 
-    def generate_case_analytics(self):
-        """Initialize or update case analytics"""
-        self.stdout.write("Generating case analytics...")
+            AnalyticsRun.objects.update_or_create(
+                name=RUN_NAME, defaults={"last_run_at": started_at}
+            )
 
-        cases = Case.objects.all()
-        created_count = 0
-        updated_count = 0
+        self.stdout.write(self.style.SUCCESS("Analytics generation completed!"))
 
-        for case in cases:
-            analytics, created = CaseAnalytics.objects.get_or_create(case=case)
+    def get_since(self, options):
+        """Start of the incremental window, or None for a full run"""
+        if options["since"]:
+            since = parse_datetime(options["since"])
+            if since is None:
+                raise CommandError(f"Invalid --since value: {options['since']}")
+            if timezone.is_naive(since):
+                since = timezone.make_aware(since)
+            return since
+
+        if options["incremental"]:
+            last_run = (
+                AnalyticsRun.objects.filter(name=RUN_NAME)
+                .values_list("last_run_at", flat=True)
+                .first()
+            )
+            if last_run:
+                return last_run
+            self.stdout.write(
+                self.style.WARNING("  No previous run recorded, running in full")
+            )
+        return None
 
-            if created:
-                created_count += 1
-            else:
-                updated_count += 1
+    def generate_case_analytics(
+        self, case_ids=None, chunk_size=analytics_bulk.CHUNK_SIZE
+    ):
+        """Initialize or update case analytics"""
+        self.stdout.write("Generating case analytics...")
 
-            # Recalculate metrics
-            analytics.recalculate_engagement_metrics()
-            analytics.recalculate_learning_metrics()
+        written = analytics_bulk.recompute_cases(case_ids, chunk_size=chunk_size)
 
-        self.stdout.write(f"  Created: {created_count}, Updated: {updated_count}")
+        self.stdout.write(f"  Updated {written} case analytics")
 
-    def update_student_engagement(self):
+    def update_student_engagement(
+        self, student_ids=None, chunk_size=analytics_bulk.CHUNK_SIZE
+    ):
         """Update student engagement metrics"""
         self.stdout.write("Updating student engagement metrics...")
 
-        students = User.objects.filter(role="student")
-        updated_count = 0
-
-        for student in students:
-            metrics, created = StudentEngagementMetrics.objects.get_or_create(
-                student=student
-            )
-
-            # Update all metrics
-            metrics.update_activity()
-            metrics.update_performance_metrics()
-            metrics.update_streak()
-
-            updated_count += 1
+        written = analytics_bulk.recompute_students(student_ids, chunk_size=chunk_size)
 
-        self.stdout.write(f"  Updated {updated_count} student metrics")
+        self.stdout.write(f"  Updated {written} student metrics")
 
     def generate_platform_statistics(self, period, target_date):
         """Generate platform-wide statistics"""
@@ -135,53 +177,32 @@ class Command(BaseCommand):
             )
             return
 
-        # Calculate metrics
-        active_users = (
-            CaseViewLog.objects.filter(
-                viewed_at__date__gte=period_start, viewed_at__date__lte=period_end
-            )
-            .values("user")
-            .distinct()
-            .count()
-        )
-
-        active_students = (
-            CaseViewLog.objects.filter(
-                viewed_at__date__gte=period_start,
-                viewed_at__date__lte=period_end,
-                user__role="student",
-            )
-            .values("user")
-            .distinct()
-            .count()
+        # Calculate metrics (datetime ranges, so only the period's
+        # CaseViewLog partitions are scanned; compacted months are read
+        # from CaseViewDaily)
+        raw, daily = view_querysets(period_start, period_end)
+        active_users = distinct_viewers(raw, daily)
+        active_students = distinct_viewers(
+            raw.filter(user__role="student"), daily.filter(user__role="student")
         )
-
-        active_instructors = (
-            CaseViewLog.objects.filter(
-                viewed_at__date__gte=period_start,
-                viewed_at__date__lte=period_end,
-                user__role="instructor",
-            )
-            .values("user")
-            .distinct()
-            .count()
+        active_instructors = distinct_viewers(
+            raw.filter(user__role="instructor"), daily.filter(user__role="instructor")
         )
+        case_views = view_count(raw, daily)
 
+        start, end = local_range(period_start, period_end)
         new_users = User.objects.filter(
-            created_at__date__gte=period_start, created_at__date__lte=period_end
-        ).count()
-
-        cases_created = Case.objects.filter(
-            created_at__date__gte=period_start, created_at__date__lte=period_end
-        ).count()
-
-        cases_submitted = Case.objects.filter(
-            submitted_at__date__gte=period_start, submitted_at__date__lte=period_end
+            created_at__gte=start, created_at__lt=end
         ).count()
 
-        case_views = CaseViewLog.objects.filter(
-            viewed_at__date__gte=period_start, viewed_at__date__lte=period_end
-        ).count()
+        case_stats = Case.objects.aggregate(
+            created=Count("pk", filter=Q(created_at__gte=start, created_at__lt=end)),
+            submitted=Count(
+                "pk", filter=Q(submitted_at__gte=start, submitted_at__lt=end)
+            ),
+        )
+        cases_created = case_stats["created"]
+        cases_submitted = case_stats["submitted"]
 
         # Create statistics
         stats = PlatformUsageStatistics.objects.create(
@@ -211,58 +232,73 @@ class Command(BaseCommand):
         period_start = target_date - timedelta(days=target_date.weekday())
         period_end = period_start + timedelta(days=6)
 
-        for department in departments:
-            # Check if already exists
-            existing = DepartmentAnalytics.objects.filter(
-                department=department, period_start=period_start
-            ).first()
-
-            if existing:
-                continue
-
-            # Calculate metrics
-            total_students = User.objects.filter(
-                role="student", department=department
-            ).count()
-
-            total_instructors = User.objects.filter(
-                role="instructor", department=department
-            ).count()
-
-            active_students = (
-                CaseViewLog.objects.filter(
-                    viewed_at__date__gte=period_start,
-                    viewed_at__date__lte=period_end,
-                    user__role="student",
-                    user__department=department,
-                )
-                .values("user")
-                .distinct()
-                .count()
+        # Departments that already have this week's row are skipped
+        existing = set(
+            DepartmentAnalytics.objects.filter(period_start=period_start).values_list(
+                "department_id", flat=True
             )
-
-            total_cases = Case.objects.filter(student__department=department).count()
-
-            cases_submitted = Case.objects.filter(
-                student__department=department,
-                submitted_at__date__gte=period_start,
-                submitted_at__date__lte=period_end,
-            ).count()
-
-            # Create analytics
-            DepartmentAnalytics.objects.create(
-                department=department,
-                period_start=period_start,
-                period_end=period_end,
-                total_students=total_students,
-                total_instructors=total_instructors,
-                active_students=active_students,
-                total_cases=total_cases,
-                cases_submitted=cases_submitted,
+        )
+        department_ids = [d.pk for d in departments if d.pk not in existing]
+
+        # Calculate metrics, one grouped query each
+        start, end = local_range(period_start, period_end)
+        users = {
+            (row["department"], row["role"]): row["count"]
+            for row in User.objects.filter(
+                department__in=department_ids, role__in=["student", "instructor"]
+            )
+            .values("department", "role")
+            .annotate(count=Count("pk"))
+            .order_by()
+        }
+        raw, daily = view_querysets(period_start, period_end)
+        active_students = Counter(
+            department_id
+            for department_id, _ in raw.filter(
+                user__role="student", user__department__in=department_ids
             )
+            .values_list("user__department", "user")
+            .union(
+                daily.filter(
+                    user__role="student", user__department__in=department_ids
+                ).values_list("user__department", "user")
+            )
+        )
+        case_stats = {
+            row["student__department"]: row
+            for row in Case.objects.filter(student__department__in=department_ids)
+            .values("student__department")
+            .annotate(
+                total=Count("pk"),
+                submitted=Count(
+                    "pk", filter=Q(submitted_at__gte=start, submitted_at__lt=end)
+                ),
+            )
+            .order_by()
+        }
+
+        # Create analytics
+        DepartmentAnalytics.objects.bulk_create(
+            [
+                DepartmentAnalytics(
+                    department_id=department_id,
+                    period_start=period_start,
+                    period_end=period_end,
+                    total_students=users.get((department_id, "student"), 0),
+                    total_instructors=users.get((department_id, "instructor"), 0),
+                    active_students=active_students.get(department_id, 0),
+                    total_cases=case_stats.get(department_id, {}).get("total", 0),
+                    cases_submitted=case_stats.get(department_id, {}).get(
+                        "submitted", 0
+                    ),
+                )
+                for department_id in department_ids
+            ],
+            ignore_conflicts=True,
+        )
 
         self.stdout.write(
             self.style.SUCCESS(
-                f"  Created analytics for {departments.count()} departments"
+                f"  Created analytics for {len(department_ids)} departments"
             )
         )
@@ -1,25 +1,51 @@
 from django.core.management.base import BaseCommand
-from django.db import transaction
-from collections import Counter
 
 from cases.models import Case
 from cases.search.signals import update_case_search
-from cases.models import CaseSearchToken
-from cases.search.utils import build_full_segmented_text,unaccent
-from collections import defaultdict
+from cases.models import CaseSearchToken, CaseSearchTokenSet
+from cases.search.suggest import notify_tokens_changed
 
 
 class Command(BaseCommand):
     help = "Rebuild PostgreSQL FTS search_document and search_text for all cases"
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--bulk",
+            action="store_true",
+            help="Segment each case once, write in batches and swap the token "
+            "table in at the end; resumes an interrupted --bulk run",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Segmentation processes for --bulk (1 = in process); each "
+            "worker starts its own VnCoreNLP JVM",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=200,
+            help="Cases per bulk_update / checkpoint for --bulk",
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Discard the checkpoint of an interrupted --bulk run",
+        )
+
     def handle(self, *args, **options):
+        if options["bulk"]:
+            return self.handle_bulk(options)
+
         total = Case.objects.count()
         self.stdout.write(f"Rebuilding search index for {total} cases...")
 
-        # Step 1 — Clear token table
+        # Step 1 — Clear token table (update_case_search re-adds each
+        # case's tokens as frequency deltas against an empty snapshot)
         CaseSearchToken.objects.all().delete()
-
-        token_counter = defaultdict(lambda: {"display": "", "freq": 0})
+        CaseSearchTokenSet.objects.all().delete()
 
         for idx, case in enumerate(
             Case.objects.select_related(
@@ -30,39 +56,38 @@ class Command(BaseCommand):
                 "learning_outcomes",
             ).iterator(),
             start=1,
-        ):  #Rebuild FTS fields
+        ):  #Rebuild FTS fields + tokens
             update_case_search(case)
-            # Collect tokens from segmented text
-            
-            segmented_text = build_full_segmented_text(case)
-            original_tokens = set(segmented_text.split())
 
-            for original in original_tokens:
-                if not original:
-                    continue
+            if idx % 50 == 0:
+                self.stdout.write(f"Processed {idx}/{total}")
 
-                # Display form (restore spacing for UI)
-                display = original.replace("_", " ")
+        notify_tokens_changed()
 
-                # Normalized search key (no accent, lowercase)
-                normalized = unaccent(original)
+        self.stdout.write(self.style.SUCCESS("Search index rebuild complete"))
 
-                entry = token_counter[normalized]
-                entry["display"] = display
-                entry["freq"] += 1
+    def handle_bulk(self, options):
+        from cases.search.reindex import bulk_reindex, load_checkpoint
 
-            if idx % 50 == 0:
-                self.stdout.write(f"Processed {idx}/{total}")
+        last_id, done = (0, 0) if options["restart"] else load_checkpoint()
+        remaining = Case.objects.filter(pk__gt=last_id).count()
+        if last_id:
+            self.stdout.write(f"Resuming after case {last_id} ({done} already indexed)")
+        self.stdout.write(
+            f"Bulk rebuilding search index for {remaining} cases "
+            f"with {options['workers']} workers..."
+        )
+
+        def progress(indexed):
+            self.stdout.write(f"Processed {indexed}/{done + remaining}")
+
+        indexed = bulk_reindex(
+            workers=options["workers"],
+            batch_size=options["batch_size"],
+            restart=options["restart"],
+            progress=progress,
+        )
 
-        # Step 2 — Bulk insert tokens
-        token_objects = [
-            CaseSearchToken(
-                token=normalized,
-                display=data["display"],
-                frequency=data["freq"],
-            )
-            for normalized, data in token_counter.items()
-        ]
-        CaseSearchToken.objects.bulk_create(token_objects)
-
-        self.stdout.write(self.style.SUCCESS("Search index rebuild complete"))
\ No newline at end of file
+        self.stdout.write(
+            self.style.SUCCESS(f"Search index rebuild complete ({indexed} cases)")
+        )
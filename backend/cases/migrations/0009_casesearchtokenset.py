@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cases", "0008_gradeclaim"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CaseSearchTokenSet",
+            fields=[
+                (
+                    "case",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="search_token_set",
+                        serialize=False,
+                        to="cases.case",
+                    ),
+                ),
+                (
+                    "tokens",
+                    models.JSONField(default=list, help_text="Normalized tokens"),
+                ),
+                (
+                    "fingerprint",
+                    models.CharField(
+                        help_text="SHA-256 of the sorted token list", max_length=64
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "db_table": "cases_casesearchtokenset",
+            },
+        ),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:46
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cases", "0009_casesearchtokenset"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="caseviewlog",
+            name="viewed_at",
+            field=models.DateTimeField(
+                default=django.utils.timezone.now, help_text="Thời gian xem"
+            ),
+        ),
+        migrations.CreateModel(
+            name="CaseViewer",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("first_viewed_at", models.DateTimeField(help_text="Lần xem đầu")),
+                ("last_viewed_at", models.DateTimeField(help_text="Lần xem cuối")),
+                (
+                    "view_count",
+                    models.PositiveIntegerField(default=0, help_text="Số lượt xem"),
+                ),
+                (
+                    "case",
+                    models.ForeignKey(
+                        help_text="Ca bệnh được xem",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="viewers",
+                        to="cases.case",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        help_text="Người xem",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="viewed_cases",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Case Viewer",
+                "verbose_name_plural": "Case Viewers",
+                "db_table": "cases_caseviewer",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("case", "user"), name="unique_case_viewer"
+                    )
+                ],
+            },
+        ),
+        # Existing viewers, so unique counts keep growing from the right base
+        migrations.RunSQL(
+            """
+            INSERT INTO cases_caseviewer
+                (case_id, user_id, first_viewed_at, last_viewed_at, view_count)
+            SELECT case_id, user_id, MIN(viewed_at), MAX(viewed_at), COUNT(*)
+            FROM cases_caseviewlog
+            GROUP BY case_id, user_id
+            """,
+            migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,113 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:51
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cases", "0010_caseviewer"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DashboardRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField(help_text="Ngày")),
+                (
+                    "cases_created",
+                    models.PositiveIntegerField(
+                        default=0, help_text="Số ca bệnh tạo mới"
+                    ),
+                ),
+                (
+                    "cases_submitted",
+                    models.PositiveIntegerField(
+                        default=0, help_text="Số ca bệnh đã nộp"
+                    ),
+                ),
+                (
+                    "views",
+                    models.PositiveIntegerField(default=0, help_text="Số lượt xem"),
+                ),
+                (
+                    "active_users",
+                    models.PositiveIntegerField(
+                        default=0, help_text="Số người dùng hoạt động"
+                    ),
+                ),
+                (
+                    "total_cases",
+                    models.PositiveIntegerField(default=0, help_text="Tổng số ca bệnh"),
+                ),
+                (
+                    "approved_cases",
+                    models.PositiveIntegerField(
+                        default=0, help_text="Số ca bệnh đã duyệt"
+                    ),
+                ),
+                (
+                    "total_students",
+                    models.PositiveIntegerField(
+                        default=0, help_text="Tổng số sinh viên"
+                    ),
+                ),
+                (
+                    "total_instructors",
+                    models.PositiveIntegerField(
+                        default=0, help_text="Tổng số giảng viên"
+                    ),
+                ),
+                ("grade_sum", models.FloatField(default=0.0, help_text="Tổng điểm")),
+                (
+                    "grade_count",
+                    models.PositiveIntegerField(default=0, help_text="Số bài chấm"),
+                ),
+                (
+                    "refreshed_at",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now,
+                        help_text="Thời gian tính lại",
+                    ),
+                ),
+                (
+                    "department",
+                    models.ForeignKey(
+                        blank=True,
+                        help_text="Khoa phòng (trống = toàn hệ thống)",
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="dashboard_rollups",
+                        to="cases.department",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Dashboard Rollup",
+                "verbose_name_plural": "Dashboard Rollups",
+                "db_table": "cases_dashboardrollup",
+                "ordering": ["-day"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("department", "day"), name="unique_dashboard_rollup"
+                    ),
+                    models.UniqueConstraint(
+                        condition=models.Q(("department__isnull", True)),
+                        fields=("day",),
+                        name="unique_dashboard_rollup_platform",
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,271 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:53
+
+import django.contrib.postgres.indexes
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from datetime import datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+# CaseViewLog becomes a table range-partitioned by month on viewed_at. The
+# primary key of a partitioned table must contain the partition key, so it
+# is (id, viewed_at) in the database; Django still treats id as the pk.
+# Month bounds are in TIME_ZONE so a local day never spans two partitions.
+# Further months are created by cases.view_log_partitions.
+
+TABLE = "cases_caseviewlog"
+COLUMNS = (
+    "id, viewed_at, time_spent_seconds, completed, access_method, device_type,"
+    " ip_address, case_id, user_id"
+)
+COLUMN_DEFINITIONS = """
+    viewed_at timestamp with time zone NOT NULL,
+    time_spent_seconds integer NOT NULL CHECK (time_spent_seconds >= 0),
+    completed boolean NOT NULL,
+    access_method varchar(50) NOT NULL,
+    device_type varchar(50) NOT NULL,
+    ip_address inet NULL,
+    case_id bigint NOT NULL,
+    user_id bigint NOT NULL
+"""
+FOREIGN_KEYS = f"""
+    ALTER TABLE {TABLE}
+        ADD CONSTRAINT {TABLE}_case_id_fk_cases_case_id FOREIGN KEY (case_id)
+            REFERENCES cases_case (id) DEFERRABLE INITIALLY DEFERRED,
+        ADD CONSTRAINT {TABLE}_user_id_fk_accounts_user_id FOREIGN KEY (user_id)
+            REFERENCES accounts_user (id) DEFERRABLE INITIALLY DEFERRED
+"""
+MONTHS_AHEAD = 3
+
+
+def month_partitions(first, last):
+    """(name, lower, upper) for every month from `first` to `last`."""
+    tz = ZoneInfo(settings.TIME_ZONE)
+    month = first.replace(day=1)
+    while month <= last:
+        following = (month + timedelta(days=32)).replace(day=1)
+        yield (
+            f"{TABLE}_p{month:%Y%m}",
+            datetime.combine(month, time.min, tz).isoformat(),
+            datetime.combine(following, time.min, tz).isoformat(),
+        )
+        month = following
+
+
+def partition_view_log(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    execute = schema_editor.execute
+    tz = ZoneInfo(settings.TIME_ZONE)
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"SELECT MIN(viewed_at) FROM {TABLE}")
+        oldest = cursor.fetchone()[0]
+    today = datetime.now(tz).date()
+    first = oldest.astimezone(tz).date() if oldest else today
+    last = (today.replace(day=1) + timedelta(days=31 * MONTHS_AHEAD)).replace(day=1)
+
+    execute(f"ALTER TABLE {TABLE} RENAME TO {TABLE}_unpartitioned")
+    execute(
+        f"CREATE TABLE {TABLE} (id bigint NOT NULL, {COLUMN_DEFINITIONS})"
+        " PARTITION BY RANGE (viewed_at)"
+    )
+    for name, lower, upper in month_partitions(first, last):
+        execute(
+            f"CREATE TABLE {name} PARTITION OF {TABLE}"
+            f" FOR VALUES FROM ('{lower}') TO ('{upper}')"
+        )
+    execute(f"CREATE TABLE {TABLE}_default PARTITION OF {TABLE} DEFAULT")
+    execute(
+        f"INSERT INTO {TABLE} ({COLUMNS})"
+        f" SELECT {COLUMNS} FROM {TABLE}_unpartitioned"
+    )
+
+    # Index, sequence and constraint names are free once the old table is gone
+    execute(f"DROP TABLE {TABLE}_unpartitioned")
+    execute(f"ALTER TABLE {TABLE} ADD PRIMARY KEY (id, viewed_at)")
+    execute(f"CREATE SEQUENCE {TABLE}_id_seq OWNED BY {TABLE}.id")
+    execute(
+        f"SELECT setval('{TABLE}_id_seq', COALESCE(MAX(id), 0) + 1, false)"
+        f" FROM {TABLE}"
+    )
+    execute(
+        f"ALTER TABLE {TABLE} ALTER COLUMN id SET DEFAULT nextval('{TABLE}_id_seq')"
+    )
+    execute(FOREIGN_KEYS)
+    execute(
+        f"CREATE INDEX cases_caseviewlog_case_viewed ON {TABLE} (case_id, viewed_at)"
+    )
+    execute(
+        f"CREATE INDEX cases_caseviewlog_user_viewed ON {TABLE} (user_id, viewed_at)"
+    )
+    execute(
+        f"CREATE INDEX cases_caseviewlog_viewed_brin ON {TABLE} USING brin (viewed_at)"
+    )
+
+
+def unpartition_view_log(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    execute = schema_editor.execute
+
+    execute(f"ALTER TABLE {TABLE} RENAME TO {TABLE}_partitioned")
+    execute(f"ALTER INDEX {TABLE}_pkey RENAME TO {TABLE}_partitioned_pkey")
+    execute(f"ALTER SEQUENCE {TABLE}_id_seq RENAME TO {TABLE}_partitioned_id_seq")
+    for index in ("case_viewed", "user_viewed", "viewed_brin"):
+        execute(f"DROP INDEX cases_caseviewlog_{index}")
+    execute(
+        f"CREATE TABLE {TABLE} ("
+        f" id bigint GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY, {COLUMN_DEFINITIONS})"
+    )
+    execute(
+        f"INSERT INTO {TABLE} ({COLUMNS})"
+        f" OVERRIDING SYSTEM VALUE SELECT {COLUMNS} FROM {TABLE}_partitioned"
+    )
+    execute(f"DROP TABLE {TABLE}_partitioned")
+    execute(
+        f"SELECT setval(pg_get_serial_sequence('{TABLE}', 'id'),"
+        f" COALESCE(MAX(id), 0) + 1, false) FROM {TABLE}"
+    )
+    execute(FOREIGN_KEYS)
+    execute(f"CREATE INDEX cases_caseviewlog_case_id_idx ON {TABLE} (case_id)")
+    execute(f"CREATE INDEX cases_caseviewlog_user_id_idx ON {TABLE} (user_id)")
+    execute(
+        f"CREATE INDEX cases_casev_case_id_117e71_idx ON {TABLE} (case_id, user_id)"
+    )
+    execute(f"CREATE INDEX cases_casev_viewed__d150d1_idx ON {TABLE} (viewed_at)")
+    execute(
+        f"CREATE INDEX cases_casev_user_id_7aca61_idx ON {TABLE} (user_id, viewed_at)"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cases", "0011_dashboardrollup"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CaseViewDaily",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField(help_text="Ngày xem")),
+                (
+                    "views",
+                    models.PositiveIntegerField(default=0, help_text="Số lượt xem"),
+                ),
+                (
+                    "completed_views",
+                    models.PositiveIntegerField(default=0, help_text="Số lượt xem hết"),
+                ),
+                (
+                    "time_spent_seconds",
+                    models.PositiveIntegerField(
+                        default=0, help_text="Tổng thời gian xem (giây)"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Case View Daily",
+                "verbose_name_plural": "Case View Daily",
+                "db_table": "cases_caseviewdaily",
+            },
+        ),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.RemoveIndex(
+                    model_name="caseviewlog",
+                    name="cases_casev_case_id_117e71_idx",
+                ),
+                migrations.RemoveIndex(
+                    model_name="caseviewlog",
+                    name="cases_casev_viewed__d150d1_idx",
+                ),
+                migrations.RenameIndex(
+                    model_name="caseviewlog",
+                    new_name="cases_caseviewlog_user_viewed",
+                    old_name="cases_casev_user_id_7aca61_idx",
+                ),
+                migrations.AlterField(
+                    model_name="caseviewlog",
+                    name="case",
+                    field=models.ForeignKey(
+                        db_index=False,
+                        help_text="Ca bệnh được xem",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="view_logs",
+                        to="cases.case",
+                    ),
+                ),
+                migrations.AlterField(
+                    model_name="caseviewlog",
+                    name="user",
+                    field=models.ForeignKey(
+                        db_index=False,
+                        help_text="Người xem",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="case_views",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                migrations.AddIndex(
+                    model_name="caseviewlog",
+                    index=models.Index(
+                        fields=["case", "viewed_at"],
+                        name="cases_caseviewlog_case_viewed",
+                    ),
+                ),
+                migrations.AddIndex(
+                    model_name="caseviewlog",
+                    index=django.contrib.postgres.indexes.BrinIndex(
+                        fields=["viewed_at"], name="cases_caseviewlog_viewed_brin"
+                    ),
+                ),
+            ],
+            database_operations=[
+                migrations.RunPython(partition_view_log, unpartition_view_log),
+            ],
+        ),
+        migrations.AddField(
+            model_name="caseviewdaily",
+            name="case",
+            field=models.ForeignKey(
+                help_text="Ca bệnh được xem",
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="daily_views",
+                to="cases.case",
+            ),
+        ),
+        migrations.AddField(
+            model_name="caseviewdaily",
+            name="user",
+            field=models.ForeignKey(
+                help_text="Người xem",
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="daily_case_views",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="caseviewdaily",
+            index=models.Index(
+                fields=["user", "day"], name="cases_casev_user_id_abf813_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="caseviewdaily",
+            constraint=models.UniqueConstraint(
+                fields=("case", "user", "day"), name="unique_case_view_daily"
+            ),
+        ),
+    ]
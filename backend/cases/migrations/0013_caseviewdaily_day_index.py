@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cases", "0012_partition_caseviewlog"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="caseviewdaily",
+            index=models.Index(fields=["day"], name="cases_casev_day_31459b_idx"),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cases", "0013_caseviewdaily_day_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AnalyticsRun",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "name",
+                    models.CharField(
+                        help_text="Tên tác vụ", max_length=100, unique=True
+                    ),
+                ),
+                (
+                    "last_run_at",
+                    models.DateTimeField(
+                        help_text="Thời điểm bắt đầu lần chạy thành công gần nhất"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Analytics Run",
+                "verbose_name_plural": "Analytics Runs",
+                "db_table": "cases_analyticsrun",
+            },
+        ),
+    ]
@@ -726,4 +726,26 @@ class CaseSearchToken(models.Model):
     class Meta:
         indexes = [
             models.Index(fields=["token"], name="idx_token_prefix"),
-        ]
\ No newline at end of file
+        ]
+
+
+class CaseSearchTokenSet(models.Model):
+    """
+    Tokens a case currently contributes to CaseSearchToken frequencies, so an
+    edit only applies the diff against this set (see cases.search.tokens).
+    """
+
+    case = models.OneToOneField(
+        Case,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="search_token_set",
+    )
+    tokens = models.JSONField(default=list, help_text="Normalized tokens")
+    fingerprint = models.CharField(
+        max_length=64, help_text="SHA-256 of the sorted token list"
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "cases_casesearchtokenset"
@@ -0,0 +1,386 @@
+"""
+Relevance and latency benchmark for case search.
+
+Used by `manage.py benchmark_search`:
+
+- Synthetic cases are generated from the templates in
+  scripts/setup/populate_test_data.py and kept in their own repository, so a
+  benchmark corpus can be reused across runs and removed without touching
+  real data. Each case title is "<template title> #<n>", which is what the
+  relevance labels refer to.
+- QUERIES is a fixed query set (accented, unaccented and misspelled) with
+  graded relevance per template title.
+- Every ranker is timed over the same queries; results carry p50/p95/p99
+  latency, NDCG@10, recall and optionally EXPLAIN ANALYZE plans, and can be
+  saved as JSON and compared with an earlier run.
+"""
+
+import logging
+import math
+import random
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+BENCHMARK_REPOSITORY = "Search benchmark"
+BENCHMARK_USERNAME = "search.benchmark"
+NDCG_AT = 10
+
+# query -> graded relevance of cases by template title (2 = exact topic)
+QUERIES: List[Dict[str, Any]] = [
+    # accented
+    {
+        "query": "nhồi máu cơ tim",
+        "kind": "accented",
+        "relevant": {"Nhồi máu cơ tim cấp ST chênh lên": 2},
+    },
+    {"query": "suy tim", "kind": "accented", "relevant": {"Suy tim mạn tính": 2}},
+    {
+        "query": "tăng huyết áp",
+        "kind": "accented",
+        "relevant": {"Tăng huyết áp ác tính": 2, "Tăng huyết áp độ 2": 2},
+    },
+    {
+        "query": "viêm ruột thừa",
+        "kind": "accented",
+        "relevant": {"Viêm ruột thừa cấp": 2},
+    },
+    {
+        "query": "đái tháo đường",
+        "kind": "accented",
+        "relevant": {"Đái tháo đường type 2": 2},
+    },
+    {"query": "đột quỵ não", "kind": "accented", "relevant": {"Đột quỵ não": 2}},
+    {
+        "query": "xuất huyết tiêu hóa",
+        "kind": "accented",
+        "relevant": {"Xuất huyết tiêu hóa": 2},
+    },
+    # unaccented
+    {
+        "query": "nhoi mau co tim",
+        "kind": "unaccented",
+        "relevant": {"Nhồi máu cơ tim cấp ST chênh lên": 2},
+    },
+    {
+        "query": "viem gan virus b",
+        "kind": "unaccented",
+        "relevant": {"Viêm gan virus B": 2},
+    },
+    {"query": "suy than man", "kind": "unaccented", "relevant": {"Suy thận mạn": 2}},
+    {
+        "query": "tran dich mang phoi",
+        "kind": "unaccented",
+        "relevant": {"Tràn dịch màng phổi": 2},
+    },
+    {
+        "query": "ung thu dai truc trang",
+        "kind": "unaccented",
+        "relevant": {"Ung thư đại trực tràng": 2},
+    },
+    {"query": "xo gan", "kind": "unaccented", "relevant": {"Xơ gan": 2}},
+    # typos
+    {
+        "query": "nhồi máu cơ tym",
+        "kind": "typo",
+        "relevant": {"Nhồi máu cơ tim cấp ST chênh lên": 2},
+    },
+    {"query": "parkinsom", "kind": "typo", "relevant": {"Parkinson": 2}},
+    {"query": "viêm tuỵ cấp", "kind": "typo", "relevant": {"Viêm tụy cấp": 2}},
+    {
+        "query": "dau dau migrain",
+        "kind": "typo",
+        "relevant": {"Đau đầu migraine": 2},
+    },
+    {"query": "hen phe quang", "kind": "typo", "relevant": {"Hen phế quản cấp": 2}},
+]
+
+
+def _rankers() -> Dict[str, Callable]:
+    from cases.search.queries import rank_cases, search_cases
+
+    return {"rank_cases": rank_cases, "search_cases": search_cases}
+
+
+RANKERS = ("rank_cases", "search_cases")
+
+
+# --- Corpus ------------------------------------------------------------------
+
+
+def _populate_module():
+    # scripts/ is a namespace package next to manage.py
+    from scripts.setup import populate_test_data
+
+    return populate_test_data
+
+
+def benchmark_repository():
+    """The repository holding benchmark cases (created on first use)."""
+    from repositories.models import Repository
+
+    User = get_user_model()
+    student, _ = User.objects.get_or_create(
+        username=BENCHMARK_USERNAME,
+        defaults={
+            "email": f"{BENCHMARK_USERNAME}@student.com",
+            "role": "student",
+            "first_name": "Benchmark",
+            "last_name": "Search",
+        },
+    )
+    repository, _ = Repository.objects.get_or_create(
+        name=BENCHMARK_REPOSITORY,
+        owner=student,
+        defaults={"description": "Synthetic cases for manage.py benchmark_search"},
+    )
+    return repository
+
+
+def benchmark_cases():
+    from cases.models import Case
+
+    return Case.objects.filter(repository__name=BENCHMARK_REPOSITORY)
+
+
+def clear_cases() -> int:
+    deleted, _ = benchmark_cases().delete()
+    return deleted
+
+
+def generate_cases(
+    count: int,
+    seed: int = 0,
+    batch_size: int = 500,
+    progress: Optional[Callable[[int], None]] = None,
+) -> int:
+    """
+    Add `count` synthetic cases (with all medical sections) to the benchmark
+    repository. Search fields are not built here; run the bulk reindex after.
+    """
+    from cases.models import Case
+    from cases.medical_models import (
+        ClinicalHistory,
+        DiagnosisManagement,
+        Investigations,
+        LearningOutcomes,
+        PhysicalExamination,
+    )
+
+    populate = _populate_module()
+    templates = [
+        template
+        for templates in populate.CASE_TEMPLATES_BY_DEPT.values()
+        for template in templates
+    ]
+    sections = {
+        "clinical_history": ClinicalHistory,
+        "physical_examination": PhysicalExamination,
+        "investigations": Investigations,
+        "diagnosis_management": DiagnosisManagement,
+        "learning_outcomes": LearningOutcomes,
+    }
+    statuses = ["draft", "submitted", "submitted", "reviewed", "reviewed", "approved"]
+
+    random.seed(seed)
+    repository = benchmark_repository()
+    start = benchmark_cases().count()
+    created = 0
+
+    while created < count:
+        size = min(batch_size, count - created)
+        cases = []
+        for n in range(start + created, start + created + size):
+            template = random.choice(templates)
+            cases.append(
+                Case(
+                    title=f"{template['title']} #{n}",
+                    student=repository.owner,
+                    repository=repository,
+                    patient_name=f"Bệnh nhân (ẩn danh - {n})",
+                    patient_age=random.randint(*template["age_range"]),
+                    patient_gender=random.choice(["male", "female"]),
+                    specialty=template["specialty"],
+                    keywords=template["keywords"],
+                    case_status=random.choice(statuses),
+                    medical_record_number=f"BENCH{n:07d}",
+                )
+            )
+
+        with transaction.atomic():
+            cases = Case.objects.bulk_create(cases)
+            rows = {name: [] for name in sections}
+            for case in cases:
+                generated = populate.generate_clinical_sections(
+                    case.title, case.specialty, case.case_status
+                )
+                for name, values in generated.items():
+                    if values:
+                        rows[name].append(sections[name](case=case, **values))
+            for name, model in sections.items():
+                model.objects.bulk_create(rows[name])
+
+        created += size
+        if progress:
+            progress(created)
+
+    return created
+
+
+def relevance_labels(query: Dict[str, Any], titles: Dict[int, str]) -> Dict[int, int]:
+    """case id -> relevance grade for one query, from benchmark case titles."""
+    return {
+        pk: query["relevant"][title]
+        for pk, title in titles.items()
+        if title in query["relevant"]
+    }
+
+
+# --- Metrics -----------------------------------------------------------------
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def ndcg(ranked: Sequence[int], grades: Dict[int, int], k: int = NDCG_AT) -> float:
+    def dcg(gains):
+        return sum((2**g - 1) / math.log2(i + 2) for i, g in enumerate(gains))
+
+    ideal = dcg(sorted(grades.values(), reverse=True)[:k])
+    if not ideal:
+        return 0.0
+    return dcg([grades.get(pk, 0) for pk in ranked[:k]]) / ideal
+
+
+def recall(ranked: Sequence[int], grades: Dict[int, int]) -> float:
+    if not grades:
+        return 0.0
+    return len(set(ranked) & grades.keys()) / len(grades)
+
+
+def _latency(timings: List[float]) -> Dict[str, float]:
+    return {
+        "p50": round(percentile(timings, 50), 2),
+        "p95": round(percentile(timings, 95), 2),
+        "p99": round(percentile(timings, 99), 2),
+    }
+
+
+# --- Run ---------------------------------------------------------------------
+
+
+def run(
+    rankers: Sequence[str] = RANKERS,
+    repeat: int = 20,
+    depth: int = 100,
+    explain: bool = False,
+) -> Dict[str, Any]:
+    """
+    Time every query `repeat` times per ranker (after one warm-up run) over
+    the benchmark cases and score the top `depth` results.
+    """
+    available = _rankers()
+    base_qs = benchmark_cases()
+    titles = {
+        pk: title.rsplit(" #", 1)[0] for pk, title in base_qs.values_list("pk", "title")
+    }
+    report: Dict[str, Any] = {
+        "cases": len(titles),
+        "repeat": repeat,
+        "depth": depth,
+        "rankers": {},
+    }
+
+    for name in rankers:
+        ranker = available[name]
+        all_timings: List[float] = []
+        per_query = []
+
+        for query in QUERIES:
+            grades = relevance_labels(query, titles)
+
+            def execute():
+                qs = ranker(base_qs, query["query"])
+                return list(qs.values_list("pk", flat=True)[:depth])
+
+            ranked = execute()
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                execute()
+                timings.append((time.perf_counter() - started) * 1000)
+            all_timings += timings
+
+            result = {
+                "query": query["query"],
+                "kind": query["kind"],
+                "latency_ms": _latency(timings),
+                "ndcg": round(ndcg(ranked, grades), 4),
+                "recall": round(recall(ranked, grades), 4),
+                "hits": len(ranked),
+                "relevant": len(grades),
+            }
+            if explain:
+                result["plan"] = ranker(base_qs, query["query"])[:depth].explain(
+                    analyze=True, buffers=True
+                )
+            per_query.append(result)
+
+        report["rankers"][name] = {
+            "latency_ms": _latency(all_timings),
+            f"ndcg@{NDCG_AT}": round(
+                sum(q["ndcg"] for q in per_query) / len(per_query), 4
+            ),
+            "recall": round(sum(q["recall"] for q in per_query) / len(per_query), 4),
+            "queries": per_query,
+        }
+
+    return report
+
+
+def compare(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    latency_tolerance: float = 0.2,
+    quality_tolerance: float = 0.02,
+) -> List[str]:
+    """
+    Regressions of `current` against `baseline`: p95 latency more than
+    `latency_tolerance` (fraction) slower, or NDCG/recall more than
+    `quality_tolerance` (absolute) lower.
+    """
+    regressions = []
+    for name, now in current["rankers"].items():
+        before = baseline.get("rankers", {}).get(name)
+        if not before:
+            continue
+
+        p95, old_p95 = now["latency_ms"]["p95"], before["latency_ms"]["p95"]
+        if old_p95 and p95 > old_p95 * (1 + latency_tolerance):
+            regressions.append(f"{name}: p95 latency {old_p95}ms -> {p95}ms")
+
+        for metric in (f"ndcg@{NDCG_AT}", "recall"):
+            if now[metric] < before[metric] - quality_tolerance:
+                regressions.append(
+                    f"{name}: {metric} {before[metric]} -> {now[metric]}"
+                )
+
+        old_queries = {q["query"]: q for q in before.get("queries", [])}
+        for query in now["queries"]:
+            old = old_queries.get(query["query"])
+            if old and query["ndcg"] < old["ndcg"] - quality_tolerance:
+                regressions.append(
+                    f"{name}: '{query['query']}' ndcg {old['ndcg']} -> {query['ndcg']}"
+                )
+
+    return regressions
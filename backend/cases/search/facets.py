@@ -0,0 +1,75 @@
+"""
+Facet counts (specialty, status, priority, complexity) for a set of search
+results, computed in one GROUPING SETS query over the candidate rows and
+cached per (query, visibility scope) for SEARCH_FACET_CACHE_SECONDS.
+"""
+
+import hashlib
+from typing import Dict, List
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+FACET_FIELDS = ("specialty", "case_status", "priority_level", "complexity_level")
+
+Facets = Dict[str, List[Dict]]
+
+
+def facet_counts(queryset) -> Facets:
+    """
+    {field: [{"value", "label", "count"}, ...]} for every FACET_FIELDS column
+    over the rows of `queryset`, most frequent first.
+    """
+    model = queryset.model
+    # pk keeps one row per case when the queryset is .distinct()
+    inner_sql, params = (
+        queryset.order_by().values("pk", *FACET_FIELDS).query.sql_with_params()
+    )
+    columns = ", ".join(FACET_FIELDS)
+    grouping = ", ".join(f"GROUPING({field})" for field in FACET_FIELDS)
+    sets = ", ".join(f"({field})" for field in FACET_FIELDS)
+
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(
+            f"SELECT {columns}, {grouping}, COUNT(*)"
+            f" FROM ({inner_sql}) AS candidates"
+            f" GROUP BY GROUPING SETS ({sets})",
+            params,
+        )
+        rows = cursor.fetchall()
+
+    n = len(FACET_FIELDS)
+    labels = {
+        field: dict(model._meta.get_field(field).flatchoices) for field in FACET_FIELDS
+    }
+    facets: Facets = {field: [] for field in FACET_FIELDS}
+    for row in rows:
+        values, grouped, count = row[:n], row[n : 2 * n], row[2 * n]
+        i = grouped.index(0)
+        field, value = FACET_FIELDS[i], values[i]
+        facets[field].append(
+            {"value": value, "label": labels[field].get(value, value), "count": count}
+        )
+
+    for buckets in facets.values():
+        buckets.sort(key=lambda b: (-b["count"], str(b["value"])))
+    return facets
+
+
+def cached_facet_counts(queryset, query: str, scope: str) -> Facets:
+    """
+    facet_counts() cached under the normalized query and the caller's
+    visibility scope (which decides the candidate rows for that query).
+    """
+    normalized = " ".join(query.lower().split())
+    digest = hashlib.blake2b(
+        f"{scope}\x00{normalized}".encode("utf-8"), digest_size=16
+    ).hexdigest()
+    key = f"search_facets:{digest}"
+
+    facets = cache.get(key)
+    if facets is None:
+        facets = facet_counts(queryset)
+        cache.set(key, facets, settings.SEARCH_FACET_CACHE_SECONDS)
+    return facets
@@ -0,0 +1,144 @@
+"""
+Debounced, coalesced search-index updates.
+
+Saving a full case form fires post_save for the Case and for each of the five
+medical sub-models. Instead of rebuilding search_document / search_text (and
+running VnCoreNLP) on every one of those saves, the signals mark the case
+dirty; on commit the first dirty in a window schedules one Celery rebuild
+SEARCH_INDEX_DEBOUNCE_SECONDS later and every further dirty inside the window
+is absorbed by it.
+
+State lives in the default cache so web and worker processes share it:
+
+    search_index:dirty:<case_id>   time.time() of the first pending dirty
+    search_index:pending           cases waiting for a rebuild
+    search_index:rebuilt / lag_ms_total / lag_ms_max / last_lag_ms
+
+Lag is measured from the first dirty to the end of the rebuild.
+"""
+
+import logging
+import time
+from typing import Any, Dict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+DIRTY_KEY = "search_index:dirty:{}"
+PENDING_KEY = "search_index:pending"
+REBUILT_KEY = "search_index:rebuilt"
+LAG_TOTAL_KEY = "search_index:lag_ms_total"
+LAG_MAX_KEY = "search_index:lag_ms_max"
+LAST_LAG_KEY = "search_index:last_lag_ms"
+
+# A dirty marker outlives its window by a wide margin so a slow worker does
+# not cause a second rebuild to be queued, but a lost task still expires.
+DIRTY_TTL = 60 * 60
+
+
+def _incr(key: str, delta: int = 1):
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        # Key missing (first use or evicted)
+        cache.add(key, 0, timeout=None)
+        cache.incr(key, delta)
+
+
+def mark_case_dirty(case):
+    """
+    Schedule a search-index rebuild for `case` once the current transaction
+    commits. Rebuilds inline when SEARCH_INDEX_ASYNC is off.
+    """
+    if not settings.SEARCH_INDEX_ASYNC:
+        from cases.search.signals import update_case_search
+
+        update_case_search(case)
+        return
+
+    case_id = case.pk
+    transaction.on_commit(lambda: enqueue_rebuild(case_id))
+
+
+def enqueue_rebuild(case_id: int):
+    """Queue a rebuild unless one is already pending for this case."""
+    key = DIRTY_KEY.format(case_id)
+    # add() is False when a rebuild is already pending; None means the cache
+    # backend is down (IGNORE_EXCEPTIONS), in which case queue it anyway.
+    if cache.add(key, time.time(), timeout=DIRTY_TTL) is False:
+        return
+    _incr(PENDING_KEY)
+
+    from cases.tasks import rebuild_case_search_task
+
+    try:
+        rebuild_case_search_task.apply_async(
+            args=[case_id], countdown=settings.SEARCH_INDEX_DEBOUNCE_SECONDS
+        )
+    except Exception as e:
+        # Broker unreachable - don't lose the update
+        logger.warning(f"Search index task not queued, rebuilding inline: {e}")
+        rebuild_case(case_id)
+
+
+def rebuild_case(case_id: int) -> bool:
+    """
+    Rebuild one case's search fields and record the queue lag.
+    Returns False if the case no longer exists.
+    """
+    from cases.models import Case
+    from cases.search.signals import update_case_search
+
+    key = DIRTY_KEY.format(case_id)
+    dirtied_at = cache.get(key)
+    # Clear before reading the case: edits committed from now on queue a
+    # fresh rebuild instead of being absorbed by this one.
+    if cache.delete(key):
+        _incr(PENDING_KEY, -1)
+
+    case = (
+        Case.objects.select_related(
+            "clinical_history",
+            "physical_examination",
+            "investigations_detail",
+            "diagnosis_management",
+            "learning_outcomes",
+        )
+        .filter(pk=case_id)
+        .first()
+    )
+    if case is None:
+        return False
+
+    update_case_search(case)
+
+    if dirtied_at is not None:
+        lag_ms = int((time.time() - dirtied_at) * 1000)
+        _incr(REBUILT_KEY)
+        _incr(LAG_TOTAL_KEY, lag_ms)
+        cache.set(LAST_LAG_KEY, lag_ms, timeout=None)
+        if lag_ms > (cache.get(LAG_MAX_KEY) or 0):
+            cache.set(LAG_MAX_KEY, lag_ms, timeout=None)
+    return True
+
+
+def index_queue_stats() -> Dict[str, Any]:
+    """Pending rebuilds and dirty-to-indexed lag."""
+    values = cache.get_many(
+        [PENDING_KEY, REBUILT_KEY, LAG_TOTAL_KEY, LAG_MAX_KEY, LAST_LAG_KEY]
+    )
+    rebuilt = values.get(REBUILT_KEY, 0)
+    return {
+        "async": settings.SEARCH_INDEX_ASYNC,
+        "debounce_seconds": settings.SEARCH_INDEX_DEBOUNCE_SECONDS,
+        "pending": max(values.get(PENDING_KEY, 0), 0),
+        "rebuilt": rebuilt,
+        "lag_ms": {
+            "avg": round(values.get(LAG_TOTAL_KEY, 0) / rebuilt, 1) if rebuilt else 0,
+            "max": values.get(LAG_MAX_KEY, 0),
+            "last": values.get(LAST_LAG_KEY),
+        },
+    }
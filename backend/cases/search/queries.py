@@ -1,34 +1,26 @@
-import unicodedata
-from typing import List
+from typing import List, Optional
 from django.db import models
 from django.db.models import F, Value
 from django.db.models.functions import Cast
 from django.contrib.postgres.search import SearchQuery, SearchRank
-from django.contrib.postgres.search import TrigramSimilarity
+from django.contrib.postgres.search import TrigramSimilarity, TrigramWordSimilarity
+from django.contrib.postgres.lookups import TrigramWordSimilar
+from django.conf import settings
 from django.db.models import Q
 from cases.models import Case
-from cases.search.utils import build_search_text
+from cases.search.normalize import unaccent
+from cases.search.utils import build_query_text
 
-
-def unaccent(text: str) -> str:
-    """
-    Normalize text for pg_trgm:
-    - Remove Vietnamese diacritics
-    - Lowercase
-    """
-    if not text:
-        return ""
-
-    text = unicodedata.normalize("NFD", text)
-    text = "".join(c for c in text if unicodedata.category(c) != "Mn")
-    return text.lower()
+# django.contrib.postgres is not an installed app, so register the pg_trgm
+# `%>` lookup on the one field that has a gin_trgm_ops index.
+Case._meta.get_field("search_text").register_lookup(TrigramWordSimilar)
 
 
 def rank_cases(
     base_qs: models.QuerySet,
     query: str,
 ):
-    fts_query_text = build_search_text(query)
+    fts_query_text = build_query_text(query)
     if not fts_query_text:
         return base_qs.none()
 
@@ -55,3 +47,50 @@ def rank_cases(
         .annotate(score=(F("fts_rank") * Value(0.7) + F("trigram_score") * Value(0.3)))
         .order_by("-score")
     )
+
+
+def search_cases(
+    base_qs: models.QuerySet,
+    query: str,
+    top_k: Optional[int] = None,
+):
+    """
+    Index-backed hybrid search. Candidates come from the GIN indexes only
+    (`search_document @@ query` and `search_text %> query` on the trigram
+    index); the best `top_k` of each are re-ranked with the combined score,
+    ordered by (score, id) for keyset pagination.
+    """
+    fts_query_text = build_query_text(query)
+    if not fts_query_text:
+        return base_qs.none()
+
+    top_k = top_k or settings.SEARCH_TOP_K
+    trigram_query = unaccent(fts_query_text)
+
+    search_query = SearchQuery(
+        fts_query_text,
+        config="vietnamese",
+        search_type="plain",
+    )
+    fts_rank = SearchRank(F("search_document"), search_query)
+    trigram_score = TrigramWordSimilarity(trigram_query, "search_text")
+
+    fts_top = (
+        base_qs.filter(search_document=search_query)
+        .annotate(fts_rank=fts_rank)
+        .order_by("-fts_rank")
+        .values("pk")[:top_k]
+    )
+    trigram_top = (
+        base_qs.filter(search_text__trigram_word_similar=trigram_query)
+        .annotate(trigram_score=trigram_score)
+        .order_by("-trigram_score")
+        .values("pk")[:top_k]
+    )
+
+    return (
+        base_qs.filter(Q(pk__in=fts_top) | Q(pk__in=trigram_top))
+        .annotate(fts_rank=fts_rank, trigram_score=trigram_score)
+        .annotate(score=(F("fts_rank") * Value(0.7) + F("trigram_score") * Value(0.3)))
+        .order_by("-score", "-pk")
+    )
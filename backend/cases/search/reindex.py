@@ -0,0 +1,247 @@
+"""
+Bulk, resumable rebuild of the case search index.
+
+Used by `manage.py rebuild_case_search --bulk`:
+
+- Each case is segmented once (VnCoreNLP word_segment); the merged form for
+  search_document/search_text and the token table both come from that pass.
+- Segmentation fans out over a spawn process pool; workers get plain field
+  values, not model instances, and never touch the database.
+- search_document/search_text are written with bulk_update, one batch at a time.
+- Token counts accumulate in a shadow table and are swapped into
+  CaseSearchToken in one transaction at the end, so autocomplete keeps serving
+  the old tokens during the rebuild. Each case's CaseSearchTokenSet snapshot
+  is written with its batch, so later edits apply incremental deltas.
+- The last indexed case id is checkpointed in the same transaction as each
+  batch, so an interrupted run resumes where it stopped.
+"""
+
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from django.db import connection, transaction
+
+logger = logging.getLogger(__name__)
+
+SHADOW_TABLE = "cases_casesearchtoken_rebuild"
+STATE_TABLE = "cases_casesearch_rebuild_state"
+
+# (case_id, (parts_A, parts_B, parts_C)) -> (case_id, (seg_A, seg_B, seg_C))
+WorkItem = Tuple[int, Tuple[List[Optional[str]], ...]]
+WorkResult = Tuple[int, Tuple[str, str, str]]
+
+
+def segment_batch(items: List[WorkItem]) -> List[WorkResult]:
+    """
+    Process-pool worker: segment the A/B/C text of a slice of cases in one
+    batched segmenter call.
+    """
+    from cases.search.utils import build_search_texts
+
+    groups = [group for _, parts in items for group in parts]
+    segmented = build_search_texts(groups, merge=False)
+    return [
+        (case_id, tuple(segmented[3 * i : 3 * i + 3]))
+        for i, (case_id, _) in enumerate(items)
+    ]
+
+
+def _ensure_tables():
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {SHADOW_TABLE} ("
+            " token varchar(255) PRIMARY KEY,"
+            " display varchar(255) NOT NULL,"
+            " frequency integer NOT NULL)"
+        )
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {STATE_TABLE} ("
+            " id integer PRIMARY KEY,"
+            " last_case_id bigint NOT NULL,"
+            " indexed integer NOT NULL)"
+        )
+
+
+def load_checkpoint() -> Tuple[int, int]:
+    """(last indexed case id, cases indexed so far) of an unfinished run."""
+    _ensure_tables()
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT last_case_id, indexed FROM {STATE_TABLE} WHERE id = 1")
+        row = cursor.fetchone()
+    return (row[0], row[1]) if row else (0, 0)
+
+
+def reset_checkpoint():
+    """Forget any unfinished run and start from scratch."""
+    _ensure_tables()
+    with connection.cursor() as cursor:
+        cursor.execute(f"TRUNCATE {SHADOW_TABLE}")
+        cursor.execute(f"DELETE FROM {STATE_TABLE}")
+
+
+def _iter_batches(after_id: int, batch_size: int) -> Iterator[List[WorkItem]]:
+    """Keyset-paginate cases by id and extract their raw search fields."""
+    from cases.models import Case
+    from cases.search.utils import case_search_parts
+
+    qs = Case.objects.select_related(
+        "clinical_history",
+        "physical_examination",
+        "investigations_detail",
+        "diagnosis_management",
+        "learning_outcomes",
+    ).order_by("pk")
+
+    while True:
+        cases = list(qs.filter(pk__gt=after_id)[:batch_size])
+        if not cases:
+            return
+        yield [(case.pk, case_search_parts(case)) for case in cases]
+        after_id = cases[-1].pk
+
+
+def _write_batch(results: List[WorkResult], indexed: int) -> int:
+    """
+    Store one batch of search fields + tokens and advance the checkpoint.
+    Cases deleted since they were read are skipped; returns the number of
+    cases written.
+    """
+    from cases.models import Case, CaseSearchTokenSet
+    from cases.search.signals import build_search_document
+    from cases.search.tokens import case_tokens, fingerprint
+    from cases.search.normalize import unaccent
+    from cases.search.utils import merge_segmented
+
+    rows = []
+    for case_id, segmented in results:
+        text_A, text_B, text_C = (merge_segmented(text) for text in segmented)
+        case = Case(
+            pk=case_id,
+            search_text=unaccent(f"{text_A} {text_B} {text_C}"),
+            search_document=build_search_document(text_A, text_B, text_C),
+        )
+        rows.append((case, case_tokens(" ".join(segmented))))
+
+    with transaction.atomic():
+        # Lock the batch's cases: one deleted mid-run would fail the
+        # CaseSearchTokenSet foreign key and abort the whole rebuild.
+        existing = set(
+            Case.objects.select_for_update()
+            .filter(pk__in=[case.pk for case, _ in rows])
+            .values_list("pk", flat=True)
+        )
+        rows = [(case, token_map) for case, token_map in rows if case.pk in existing]
+
+        tokens: Dict[str, List] = {}
+        for _, case_token_map in rows:
+            for normalized, display in case_token_map.items():
+                entry = tokens.setdefault(normalized, [display, 0])
+                entry[0] = display
+                entry[1] += 1
+
+        Case.objects.bulk_update(
+            [case for case, _ in rows], ["search_document", "search_text"]
+        )
+        CaseSearchTokenSet.objects.bulk_create(
+            [
+                CaseSearchTokenSet(
+                    case_id=case.pk,
+                    tokens=sorted(case_token_map),
+                    fingerprint=fingerprint(case_token_map),
+                )
+                for case, case_token_map in rows
+            ],
+            update_conflicts=True,
+            unique_fields=["case"],
+            update_fields=["tokens", "fingerprint", "updated_at"],
+        )
+
+        with connection.cursor() as cursor:
+            if tokens:
+                cursor.executemany(
+                    f"INSERT INTO {SHADOW_TABLE} (token, display, frequency)"
+                    " VALUES (%s, %s, %s)"
+                    " ON CONFLICT (token) DO UPDATE SET"
+                    " display = EXCLUDED.display,"
+                    f" frequency = {SHADOW_TABLE}.frequency + EXCLUDED.frequency",
+                    [(t, d, f) for t, (d, f) in tokens.items()],
+                )
+            cursor.execute(
+                f"INSERT INTO {STATE_TABLE} (id, last_case_id, indexed)"
+                " VALUES (1, %s, %s)"
+                " ON CONFLICT (id) DO UPDATE SET"
+                " last_case_id = EXCLUDED.last_case_id, indexed = EXCLUDED.indexed",
+                [results[-1][0], indexed + len(rows)],
+            )
+    return len(rows)
+
+
+def swap_tokens():
+    """
+    Replace CaseSearchToken with the shadow table in one transaction; readers
+    see either the old or the new token set, never an empty one.
+    """
+    from cases.models import CaseSearchToken
+    from cases.search.suggest import notify_tokens_changed
+
+    table = CaseSearchToken._meta.db_table
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {table}")
+        cursor.execute(
+            f"INSERT INTO {table} (token, display, frequency)"
+            f" SELECT token, display, frequency FROM {SHADOW_TABLE}"
+        )
+        cursor.execute(f"DROP TABLE {SHADOW_TABLE}")
+        cursor.execute(f"DROP TABLE {STATE_TABLE}")
+        transaction.on_commit(notify_tokens_changed)
+
+
+def bulk_reindex(
+    workers: int = 0,
+    batch_size: int = 200,
+    restart: bool = False,
+    progress: Optional[Callable[[int], None]] = None,
+) -> int:
+    """
+    Rebuild search_document/search_text for every case and swap in a fresh
+    CaseSearchToken table. Resumes an interrupted run unless `restart`.
+    Returns the number of cases indexed by the whole run.
+    """
+    if restart:
+        reset_checkpoint()
+    last_id, indexed = load_checkpoint()
+    if last_id:
+        logger.info(f"Resuming search reindex after case {last_id} ({indexed} done)")
+
+    batches = _iter_batches(last_id, batch_size)
+
+    pool = None
+    if workers > 1:
+        # spawn: VnCoreNLP runs a JVM, which does not survive fork()
+        pool = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        )
+    step = max(1, batch_size // (max(workers, 1) * 4))
+
+    try:
+        for items in batches:
+            if pool is not None:
+                slices = [items[i : i + step] for i in range(0, len(items), step)]
+                results = [
+                    result
+                    for part in pool.map(segment_batch, slices)
+                    for result in part
+                ]
+            else:
+                results = segment_batch(items)
+            indexed += _write_batch(results, indexed)
+            if progress:
+                progress(indexed)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    swap_tokens()
+    return indexed
@@ -0,0 +1,261 @@
+"""
+Process-local autocomplete index over CaseSearchToken.
+
+Tokens (already unaccented + lowercased) are kept in a sorted array, so the
+completions of a prefix are one bisect range. The top SUGGEST_LIMIT tokens by
+(frequency desc, display) are precomputed for every prefix of up to
+PRECOMPUTED_PREFIX_LEN characters, where the ranges are large; longer prefixes
+have short ranges and are ranked on the fly.
+
+The index loads lazily on first use. Saves/deletes of CaseSearchToken rows
+and per-case token deltas (cases.search.tokens) update it in place and bump
+a version in the shared cache; bulk writers call `notify_tokens_changed()`.
+Other processes notice the new version within SEARCH_SUGGEST_REFRESH_SECONDS
+and reload.
+
+When a prefix has fewer than SUGGEST_LIMIT completions, completions of
+prefixes one edit away (insert / delete / substitute / transpose) fill the
+rest, which catches most typos in diacritic-free typing.
+"""
+
+import bisect
+import heapq
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+SUGGEST_LIMIT = 10
+PRECOMPUTED_PREFIX_LEN = 3
+# Shortest prefix that also gets 1-edit (fuzzy) completions
+FUZZY_MIN_LENGTH = 3
+
+VERSION_KEY = "search_suggest:version"
+
+# (token, display, frequency)
+Entry = Tuple[str, str, int]
+
+
+def _rank_key(entry: Entry):
+    return (-entry[2], entry[1])
+
+
+class SuggestionIndex:
+    """Sorted token array with precomputed top-k for short prefixes."""
+
+    def __init__(self, entries: List[Entry]):
+        entries = sorted(entries)
+        # Replaced as one tuple (copy-on-write) so readers never see the
+        # token and entry arrays out of step during an update.
+        self.arrays = ([entry[0] for entry in entries], entries)
+        self.alphabet = sorted({c for entry in entries for c in entry[0]})
+        self.top: Dict[str, List[Entry]] = {}
+        for prefix in {
+            e[0][:n] for e in entries for n in range(1, PRECOMPUTED_PREFIX_LEN + 1)
+        }:
+            self.top[prefix] = self._rank(prefix)
+
+    @staticmethod
+    def _range(tokens: List[str], prefix: str) -> Tuple[int, int]:
+        lo = bisect.bisect_left(tokens, prefix)
+        hi = bisect.bisect_left(tokens, prefix + "\U0010ffff", lo)
+        return lo, hi
+
+    def _rank(self, prefix: str, limit: int = SUGGEST_LIMIT) -> List[Entry]:
+        tokens, entries = self.arrays
+        lo, hi = self._range(tokens, prefix)
+        return heapq.nsmallest(limit, entries[lo:hi], key=_rank_key)
+
+    def complete(self, prefix: str, limit: int = SUGGEST_LIMIT) -> List[Entry]:
+        if len(prefix) <= PRECOMPUTED_PREFIX_LEN and limit <= SUGGEST_LIMIT:
+            return self.top.get(prefix, [])[:limit]
+        return self._rank(prefix, limit)
+
+    def _edits(self, prefix: str):
+        """Strings one edit away from `prefix` that are prefixes of some token."""
+        alphabet = self.alphabet
+        variants = set()
+        for i in range(len(prefix) + 1):
+            head, tail = prefix[:i], prefix[i:]
+            if tail:
+                variants.add(head + tail[1:])  # delete
+                if len(tail) > 1:
+                    variants.add(head + tail[1] + tail[0] + tail[2:])  # transpose
+            for c in alphabet:
+                variants.add(head + c + tail)  # insert
+                if tail:
+                    variants.add(head + c + tail[1:])  # substitute
+        variants.discard(prefix)
+        return [v for v in variants if v and self._has_prefix(v)]
+
+    def _has_prefix(self, prefix: str) -> bool:
+        lo, hi = self._range(self.arrays[0], prefix)
+        return hi > lo
+
+    def suggest(self, prefix: str, limit: int = SUGGEST_LIMIT) -> List[Entry]:
+        results = self.complete(prefix, limit)
+        if len(results) >= limit or len(prefix) < FUZZY_MIN_LENGTH:
+            return results
+
+        seen = {entry[0] for entry in results}
+        fuzzy = {}
+        for variant in self._edits(prefix):
+            for entry in self.complete(variant, limit):
+                if entry[0] not in seen:
+                    fuzzy[entry[0]] = entry
+        results += heapq.nsmallest(limit - len(results), fuzzy.values(), key=_rank_key)
+        return results
+
+    def upsert(self, entry: Entry):
+        tokens, entries = list(self.arrays[0]), list(self.arrays[1])
+        i = bisect.bisect_left(tokens, entry[0])
+        if i < len(tokens) and tokens[i] == entry[0]:
+            entries[i] = entry
+        else:
+            tokens.insert(i, entry[0])
+            entries.insert(i, entry)
+            new_chars = set(entry[0]) - set(self.alphabet)
+            if new_chars:
+                self.alphabet = sorted(set(self.alphabet) | new_chars)
+        self.arrays = (tokens, entries)
+        self._refresh_top(entry[0])
+
+    def remove(self, token: str):
+        tokens, entries = self.arrays
+        i = bisect.bisect_left(tokens, token)
+        if i < len(tokens) and tokens[i] == token:
+            self.arrays = (tokens[:i] + tokens[i + 1 :], entries[:i] + entries[i + 1 :])
+            self._refresh_top(token)
+
+    def apply(self, upserts: List[Entry], removals: List[str]):
+        """Upsert/remove many tokens with one copy of the arrays."""
+        changed = {entry[0] for entry in upserts} | set(removals)
+        if not changed:
+            return
+        kept = [entry for entry in self.arrays[1] if entry[0] not in changed]
+        entries = list(heapq.merge(kept, sorted(upserts)))
+        new_chars = {c for entry in upserts for c in entry[0]} - set(self.alphabet)
+        if new_chars:
+            self.alphabet = sorted(set(self.alphabet) | new_chars)
+        self.arrays = ([entry[0] for entry in entries], entries)
+        for prefix in {
+            t[:n] for t in changed for n in range(1, PRECOMPUTED_PREFIX_LEN + 1)
+        }:
+            self._refresh_prefix(prefix)
+
+    def _refresh_top(self, token: str):
+        for n in range(1, min(len(token), PRECOMPUTED_PREFIX_LEN) + 1):
+            self._refresh_prefix(token[:n])
+
+    def _refresh_prefix(self, prefix: str):
+        top = self._rank(prefix)
+        if top:
+            self.top[prefix] = top
+        else:
+            self.top.pop(prefix, None)
+
+    def __len__(self):
+        return len(self.arrays[0])
+
+
+_index: Optional[SuggestionIndex] = None
+_index_version = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+def _load() -> SuggestionIndex:
+    from cases.models import CaseSearchToken
+
+    start = time.perf_counter()
+    index = SuggestionIndex(
+        list(CaseSearchToken.objects.values_list("token", "display", "frequency"))
+    )
+    logger.info(
+        f"Loaded {len(index)} suggestion tokens "
+        f"in {(time.perf_counter() - start) * 1000:.0f}ms"
+    )
+    return index
+
+
+def get_index() -> SuggestionIndex:
+    """The process-local index, reloaded when another process changed tokens."""
+    global _index, _index_version, _checked_at
+
+    now = time.monotonic()
+    if (
+        _index is not None
+        and now - _checked_at < settings.SEARCH_SUGGEST_REFRESH_SECONDS
+    ):
+        return _index
+
+    with _lock:
+        if (
+            _index is None
+            or now - _checked_at >= settings.SEARCH_SUGGEST_REFRESH_SECONDS
+        ):
+            version = cache.get(VERSION_KEY)
+            if _index is None or version != _index_version:
+                _index = _load()
+                _index_version = version
+            _checked_at = now
+    return _index
+
+
+def suggest(query: str, limit: int = SUGGEST_LIMIT) -> List[Entry]:
+    """Completions of an unaccented, lowercased prefix."""
+    return get_index().suggest(query, limit)
+
+
+def _bump_version():
+    version = time.time_ns()
+    cache.set(VERSION_KEY, version, timeout=None)
+    return version
+
+
+def notify_tokens_changed():
+    """Call after bulk writes to CaseSearchToken (no per-row signals)."""
+    global _index, _index_version
+    with _lock:
+        _index = None
+        _index_version = _bump_version()
+
+
+def token_saved(token: str, display: str, frequency: int):
+    """Apply one saved CaseSearchToken row to a loaded index."""
+    global _index_version
+    with _lock:
+        if _index is not None:
+            _index.upsert((token, display, frequency))
+            _index_version = _bump_version()
+        else:
+            _bump_version()
+
+
+def tokens_changed(upserts: List[Entry], removals: List[str]):
+    """Apply a batch of CaseSearchToken deltas (cases.search.tokens)."""
+    global _index_version
+    if not upserts and not removals:
+        return
+    with _lock:
+        if _index is not None:
+            _index.apply(upserts, removals)
+            _index_version = _bump_version()
+        else:
+            _bump_version()
+
+
+def token_deleted(token: str):
+    """Apply one deleted CaseSearchToken row to a loaded index."""
+    global _index_version
+    with _lock:
+        if _index is not None:
+            _index.remove(token)
+            _index_version = _bump_version()
+        else:
+            _bump_version()
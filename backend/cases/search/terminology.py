@@ -0,0 +1,200 @@
+"""
+In-memory trigram autocomplete for MedicalTerm and ICD10Code.
+
+Every searchable name (term, Vietnamese/English names and synonyms; ICD-10
+code and descriptions) is folded (unaccented, lowercased) and split into
+pg_trgm-style word trigrams ("  v", " vi", "vie", "iem", "em "). A query only
+reads the posting lists of its own trigrams, rarest first, so its cost
+depends on the query and on how common its trigrams are, not on table size.
+
+Candidates are ranked by trigram Dice overlap with a bonus for prefix and
+substring matches. MedicalTerm postings are also kept per specialty, so a
+specialty-filtered lookup never touches other specialties' terms.
+
+Indexes load lazily per process and reload when a row changes (signals in
+cases.search.signals bump a version in the shared cache, checked at most
+every SEARCH_SUGGEST_REFRESH_SECONDS).
+"""
+
+import bisect
+import heapq
+import logging
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from cases.search.normalize import search_key
+
+logger = logging.getLogger(__name__)
+
+# Posting lists longer than this are skipped once rarer trigrams have
+# produced candidates (e.g. " th" in Vietnamese)
+MAX_POSTINGS = 5000
+PREFIX_BONUS = 0.5
+SUBSTRING_BONUS = 0.25
+
+# (pk, partition, names)
+Row = Tuple[int, str, Sequence[str]]
+
+
+def fold(text: Optional[str]) -> str:
+    return search_key(text)
+
+
+def trigrams(text: str) -> set:
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class TrigramIndex:
+    """Inverted trigram index over short names, partitioned by a key."""
+
+    def __init__(self, rows: Iterable[Row]):
+        self.slot_pk: List[int] = []
+        self.slot_text: List[str] = []
+        self.slot_size: List[int] = []
+        self.postings: Dict[Optional[str], Dict[str, List[int]]] = defaultdict(
+            lambda: defaultdict(list)
+        )
+
+        for pk, partition, names in rows:
+            for name in {fold(n) for n in names if isinstance(n, str)}:
+                if not name:
+                    continue
+                slot = len(self.slot_pk)
+                grams = trigrams(name)
+                self.slot_pk.append(pk)
+                self.slot_text.append(name)
+                self.slot_size.append(len(grams))
+                for gram in grams:
+                    self.postings[None][gram].append(slot)
+                    if partition:
+                        self.postings[partition][gram].append(slot)
+
+    def search(
+        self, query: str, partition: Optional[str] = None, limit: int = 20
+    ) -> List[int]:
+        """Primary keys of the best matches, best first."""
+        query = fold(query)
+        grams = trigrams(query)
+        postings = self.postings.get(partition.lower() if partition else None)
+        if not grams or not postings:
+            return []
+
+        shared: Dict[int, int] = defaultdict(int)
+        for gram in sorted(grams, key=lambda g: len(postings.get(g, ()))):
+            slots = postings.get(gram, ())
+            if len(slots) > MAX_POSTINGS and shared:
+                continue
+            for slot in slots:
+                shared[slot] += 1
+
+        best: Dict[int, float] = {}
+        for slot, count in shared.items():
+            text = self.slot_text[slot]
+            score = 2 * count / (len(grams) + self.slot_size[slot])
+            if text.startswith(query):
+                score += PREFIX_BONUS
+            elif query in text:
+                score += SUBSTRING_BONUS
+            pk = self.slot_pk[slot]
+            if score > best.get(pk, 0):
+                best[pk] = score
+
+        return [pk for pk, _ in heapq.nlargest(limit, best.items(), key=lambda i: i[1])]
+
+
+class CodeIndex(TrigramIndex):
+    """TrigramIndex plus sorted codes for prefix lookups (ICD-10)."""
+
+    def __init__(self, rows: Iterable[Row], codes: Iterable[Tuple[str, int]]):
+        super().__init__(rows)
+        codes = sorted((code.upper(), pk) for code, pk in codes)
+        self.codes = [code for code, _ in codes]
+        self.code_pks = [pk for _, pk in codes]
+
+    def by_code_prefix(self, prefix: str, limit: int = 200) -> List[int]:
+        prefix = prefix.strip().upper()
+        lo = bisect.bisect_left(self.codes, prefix)
+        hi = bisect.bisect_left(self.codes, prefix + "\U0010ffff", lo)
+        return self.code_pks[lo : min(hi, lo + limit)]
+
+
+class LazyIndex:
+    """Process-local index, rebuilt when the shared version key changes."""
+
+    def __init__(self, name: str, loader: Callable[[], TrigramIndex]):
+        self.name = name
+        self.version_key = f"search_terminology:{name}:version"
+        self.loader = loader
+        self._index: Optional[TrigramIndex] = None
+        self._version = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self) -> TrigramIndex:
+        now = time.monotonic()
+        interval = settings.SEARCH_SUGGEST_REFRESH_SECONDS
+        if self._index is not None and now - self._checked_at < interval:
+            return self._index
+
+        with self._lock:
+            if self._index is None or now - self._checked_at >= interval:
+                version = cache.get(self.version_key)
+                if self._index is None or version != self._version:
+                    start = time.perf_counter()
+                    self._index = self.loader()
+                    self._version = version
+                    logger.info(
+                        f"Loaded {self.name} autocomplete index in "
+                        f"{(time.perf_counter() - start) * 1000:.0f}ms"
+                    )
+                self._checked_at = now
+        return self._index
+
+    def invalidate(self):
+        """Mark the index stale in every process."""
+        with self._lock:
+            self._index = None
+            cache.set(self.version_key, time.time_ns(), timeout=None)
+
+
+def _load_medical_terms() -> TrigramIndex:
+    from cases.medical_models import MedicalTerm
+
+    rows = MedicalTerm.objects.filter(is_active=True).values_list(
+        "pk", "specialty", "term", "vietnamese_term", "english_term", "synonyms"
+    )
+    return TrigramIndex(
+        (
+            pk,
+            (specialty or "").strip().lower(),
+            [term, vietnamese, english, *(synonyms or [])],
+        )
+        for pk, specialty, term, vietnamese, english, synonyms in rows
+    )
+
+
+def _load_icd10_codes() -> CodeIndex:
+    from cases.medical_models import ICD10Code
+
+    rows = list(
+        ICD10Code.objects.filter(is_active=True).values_list(
+            "pk", "code", "description_vi", "description_en"
+        )
+    )
+    return CodeIndex(
+        ((pk, "", [code, vi, en]) for pk, code, vi, en in rows),
+        ((code, pk) for pk, code, _, _ in rows),
+    )
+
+
+medical_term_index = LazyIndex("medical_terms", _load_medical_terms)
+icd10_index = LazyIndex("icd10", _load_icd10_codes)
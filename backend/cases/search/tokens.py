@@ -0,0 +1,149 @@
+"""
+Incremental CaseSearchToken bookkeeping.
+
+CaseSearchToken.frequency is the number of cases whose segmented text
+contains the token. Each case's current token set is stored in
+CaseSearchTokenSet together with a fingerprint. When update_case_search
+re-segments a case, an unchanged fingerprint skips the case entirely;
+otherwise only the added/removed tokens are applied as +1/-1 frequency
+deltas with two bulk statements. Tokens whose frequency drops to zero are
+deleted. The in-process suggestion index gets the same deltas on commit.
+"""
+
+import hashlib
+import logging
+from typing import Dict, Iterable, List, Set, Tuple
+
+from django.db import connection, transaction
+
+from cases.search.normalize import unaccent_many
+
+logger = logging.getLogger(__name__)
+
+# CaseSearchToken.token / display are varchar(255)
+MAX_TOKEN_LENGTH = 255
+
+
+def case_tokens(segmented: str) -> Dict[str, str]:
+    """
+    normalized token -> display form, for build_search_text_normal() output
+    (Đại_học -> "dai_hoc": "đại học").
+    """
+    tokens = {}
+    originals = segmented.split()
+    for original, normalized in zip(originals, unaccent_many(originals)):
+        if normalized and len(normalized) <= MAX_TOKEN_LENGTH:
+            tokens[normalized] = original.replace("_", " ")[:MAX_TOKEN_LENGTH]
+    return tokens
+
+
+def fingerprint(tokens: Iterable[str]) -> str:
+    return hashlib.sha256("\n".join(sorted(tokens)).encode("utf-8")).hexdigest()
+
+
+def apply_token_deltas(
+    added: Dict[str, str], removed: Iterable[str]
+) -> Tuple[List[Tuple[str, str, int]], List[str]]:
+    """
+    +1 for every added token (inserting new ones), -1 for every removed one,
+    deleting tokens that reach zero. Returns (upserted rows, deleted tokens).
+    """
+    from cases.models import CaseSearchToken
+
+    table = CaseSearchToken._meta.db_table
+    # Same lock order in every transaction, so concurrent syncs with
+    # overlapping tokens wait on each other instead of deadlocking.
+    added_rows = sorted(added.items())
+    removed = sorted(removed)
+    upserted: List[Tuple[str, str, int]] = []
+    deleted: List[str] = []
+
+    with connection.cursor() as cursor:
+        if added:
+            cursor.executemany(
+                f"INSERT INTO {table} (token, display, frequency)"
+                " VALUES (%s, %s, 1)"
+                " ON CONFLICT (token) DO UPDATE SET"
+                f" frequency = {table}.frequency + 1, display = EXCLUDED.display",
+                added_rows,
+            )
+        if removed:
+            cursor.execute(
+                f"UPDATE {table} SET frequency = frequency - 1"
+                " WHERE token = ANY(%s)",
+                [removed],
+            )
+            cursor.execute(
+                f"DELETE FROM {table} WHERE token = ANY(%s) AND frequency <= 0"
+                " RETURNING token",
+                [removed],
+            )
+            deleted = [row[0] for row in cursor.fetchall()]
+
+        changed = list(added) + [t for t in removed if t not in set(deleted)]
+        if changed:
+            cursor.execute(
+                f"SELECT token, display, frequency FROM {table}"
+                " WHERE token = ANY(%s)",
+                [changed],
+            )
+            upserted = [tuple(row) for row in cursor.fetchall()]
+
+    return upserted, deleted
+
+
+def _publish(upserted, deleted):
+    from cases.search import suggest
+
+    transaction.on_commit(lambda: suggest.tokens_changed(upserted, deleted))
+
+
+@transaction.atomic
+def sync_case_tokens(case_id: int, segmented: str) -> bool:
+    """
+    Bring CaseSearchToken in line with a case's new segmented text.
+    Returns False when the token set did not change.
+    """
+    from cases.models import Case, CaseSearchTokenSet
+
+    # Lock the case so a concurrent delete (and its remove_case_tokens) runs
+    # either before or after this sync, never in between.
+    if not Case.objects.select_for_update().filter(pk=case_id).exists():
+        return False
+
+    tokens = case_tokens(segmented)
+    new_fingerprint = fingerprint(tokens)
+
+    snapshot = (
+        CaseSearchTokenSet.objects.select_for_update().filter(case_id=case_id).first()
+    )
+    if snapshot is not None and snapshot.fingerprint == new_fingerprint:
+        return False
+
+    previous: Set[str] = set(snapshot.tokens) if snapshot is not None else set()
+    added = {t: display for t, display in tokens.items() if t not in previous}
+    removed = previous - tokens.keys()
+
+    upserted, deleted = apply_token_deltas(added, removed)
+    CaseSearchTokenSet.objects.update_or_create(
+        case_id=case_id,
+        defaults={"tokens": sorted(tokens), "fingerprint": new_fingerprint},
+    )
+    _publish(upserted, deleted)
+    return True
+
+
+@transaction.atomic
+def remove_case_tokens(case_id: int):
+    """Take a case's tokens out of the frequencies (case being deleted)."""
+    from cases.models import CaseSearchTokenSet
+
+    snapshot = (
+        CaseSearchTokenSet.objects.select_for_update().filter(case_id=case_id).first()
+    )
+    if snapshot is None or not snapshot.tokens:
+        return
+
+    upserted, deleted = apply_token_deltas({}, snapshot.tokens)
+    snapshot.delete()
+    _publish(upserted, deleted)
@@ -1,40 +1,16 @@
+import hashlib
 import logging
-import unicodedata
+import os
+import threading
+import time
 import re
-from typing import Optional
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, Optional, Sequence
 from pathlib import Path
 
-logger = logging.getLogger(__name__)
-
-
-def normalize_text(text: Optional[str]) -> str:
-    """
-    Normalize Vietnamese text for search:
-    - Unicode normalization
-    - Lowercasing
-    - Whitespace cleanup
-    """
-    if not text:
-        return ""
-
-    # Normalize unicode
-    text = unicodedata.normalize("NFC", text)
-
-    # Lowercase
-    text = text.lower()
-
-    # Normalize whitespace
-    text = re.sub(r"\s+", " ", text).strip()
+from cases.search.normalize import normalize_text
 
-    return text
-
-def unaccent(text: str) -> str:
-    if not text:
-        return ""
-
-    text = unicodedata.normalize("NFD", text)
-    text = "".join(c for c in text if unicodedata.category(c) != "Mn")
-    return text.lower()
+logger = logging.getLogger(__name__)
 
 
 try:
@@ -78,59 +54,263 @@ def get_vncorenlp():
     return _VNCORENLP
 
 
-def segment_text(text: str) -> str:
+# --- Segmentation -----------------------------------------------------------
+#
+# All segmentation goes through segment_many(): texts are looked up in a
+# bounded LRU keyed by a hash of the normalized text, and the misses are
+# segmented together in as few JVM calls as possible by joining them with a
+# sentinel token. Without Java the dictionary fallback below is used instead.
+
+SEGMENT_CACHE_SIZE = int(os.environ.get("SEARCH_SEGMENT_CACHE_SIZE", "10000"))
+# Upper bound on the text handed to VnCoreNLP in one call
+SEGMENT_BATCH_CHARS = int(os.environ.get("SEARCH_SEGMENT_BATCH_CHARS", "50000"))
+
+# ASCII-only so the word segmenter never glues it to a Vietnamese syllable
+_SENTINEL = "qqsegbreakqq"
+_JVM_LOCK = threading.Lock()
+
+
+class SegmentCache:
+    """Thread-safe LRU of normalized text -> segmented text."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[bytes, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(text: str) -> bytes:
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+    def get(self, text: str) -> Optional[str]:
+        key = self.key(text)
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, text: str, value: str):
+        if self.maxsize <= 0:
+            return
+        key = self.key(text)
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            size = len(self._data)
+        lookups = self.hits + self.misses
+        return {
+            "size": size,
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+_segment_cache = SegmentCache(SEGMENT_CACHE_SIZE)
+
+
+_DICTIONARY: Optional[Dict[str, int]] = None
+_DICTIONARY_LOCK = threading.Lock()
+
+
+def _load_dictionary() -> Dict[str, int]:
     """
-    Segment Vietnamese text using VnCoreNLP word_segment,
-    then merge multi-word tokens so PostgreSQL FTS
-    treats them as a single lexeme.
-    Falls back to plain whitespace tokenization when VnCoreNLP/Java is unavailable.
+    Multi-syllable words for the fallback segmenter: the bundled
+    vietnamese.dict plus every multi-syllable token VnCoreNLP produced for the
+    CaseSearchToken table, so fallback output lines up with indexed documents.
+    Maps first syllable -> longest word length (in syllables) starting with it;
+    the words themselves are stored under their full text with length 0.
     """
-    if not text:
-        return ""
+    words = set()
+    path = Path(__file__).resolve().parent / "vietnamese.dict"
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = normalize_text(line.split("#", 1)[0])
+                if " " in line:
+                    words.add(line)
+    except OSError as exc:
+        logger.warning("Fallback segmenter dictionary unavailable: %s", exc)
+
+    try:
+        from django.apps import apps
+
+        if apps.ready:
+            from cases.models import CaseSearchToken
+
+            for display in CaseSearchToken.objects.filter(
+                display__contains=" "
+            ).values_list("display", flat=True):
+                words.add(normalize_text(display))
+    except Exception as exc:
+        logger.debug("Token table not used for fallback segmenter: %s", exc)
+
+    dictionary: Dict[str, int] = {}
+    for word in words:
+        syllables = word.split()
+        dictionary[word] = 0
+        first = syllables[0]
+        dictionary[first] = max(dictionary.get(first, 0), len(syllables))
+    return dictionary
+
+
+def _get_dictionary() -> Dict[str, int]:
+    global _DICTIONARY
+    if _DICTIONARY is None:
+        with _DICTIONARY_LOCK:
+            if _DICTIONARY is None:
+                _DICTIONARY = _load_dictionary()
+    return _DICTIONARY
+
+
+_SYLLABLE_RE = re.compile(r"\w+|[^\w\s]+")
+
+
+def dictionary_segment(text: str) -> str:
+    """
+    Pure-Python fallback: greedy longest match of multi-syllable dictionary
+    words over the syllables, joined VnCoreNLP-style with underscores
+    (bệnh nhân -> bệnh_nhân). Punctuation is split off as its own token, as
+    the VnCoreNLP tokenizer does.
+    """
+    dictionary = _get_dictionary()
+    syllables = _SYLLABLE_RE.findall(text)
+    tokens = []
+    i = 0
+    while i < len(syllables):
+        longest = dictionary.get(syllables[i], 0)
+        for n in range(min(longest, len(syllables) - i), 1, -1):
+            candidate = " ".join(syllables[i : i + n])
+            if dictionary.get(candidate) == 0:
+                tokens.append("_".join(syllables[i : i + n]))
+                i += n
+                break
+        else:
+            tokens.append(syllables[i])
+            i += 1
+    return " ".join(tokens)
 
-    vncorenlp = get_vncorenlp()
 
+def _vncorenlp_segment(vncorenlp, texts: List[str]) -> List[str]:
+    """Segment texts in one word_segment call, split back on the sentinel."""
+    joined = f" . {_SENTINEL} . ".join(texts)
+    with _JVM_LOCK:
+        sentences = vncorenlp.word_segment(joined)
+
+    outputs: List[List[str]] = [[]]
+    for sentence in sentences:
+        for token in sentence.split():
+            if token == _SENTINEL:
+                outputs.append([])
+            else:
+                outputs[-1].append(token)
+
+    if len(outputs) != len(texts):
+        raise ValueError("sentinel lost in segmentation")
+    # Drop the " . " padding around each sentinel
+    for i, tokens in enumerate(outputs):
+        if i > 0 and tokens[:1] == ["."]:
+            tokens.pop(0)
+        if i < len(outputs) - 1 and tokens[-1:] == ["."]:
+            tokens.pop()
+    return [" ".join(tokens) for tokens in outputs]
+
+
+def _segment_uncached(texts: List[str]) -> List[str]:
+    vncorenlp = get_vncorenlp()
     if vncorenlp is None:
-        # Fallback: return normalized text unchanged (already whitespace-clean)
-        return text
+        return [dictionary_segment(text) for text in texts]
+
+    results: List[str] = []
+    batch: List[str] = []
+    size = 0
+    for text in texts + [None]:
+        if text is None or (batch and size + len(text) > SEGMENT_BATCH_CHARS):
+            if batch:
+                try:
+                    results.extend(_vncorenlp_segment(vncorenlp, batch))
+                except ValueError:
+                    # Segmenter merged or dropped a sentinel: one call per text
+                    results.extend(
+                        _vncorenlp_segment(vncorenlp, [one])[0] for one in batch
+                    )
+            batch, size = [], 0
+        if text is not None:
+            batch.append(text)
+            size += len(text)
+    return results
+
+
+def segment_many(texts: List[str]) -> List[str]:
+    """
+    Segment normalized texts (VnCoreNLP word_segment format, multi-word
+    tokens joined by underscores), using the cache and one batched call for
+    the misses.
+    """
+    results: List[Optional[str]] = []
+    misses: Dict[str, List[int]] = {}
+    for i, text in enumerate(texts):
+        cached = _segment_cache.get(text) if text else ""
+        results.append(cached)
+        if cached is None:
+            misses.setdefault(text, []).append(i)
 
-    # word_segment returns list[str]
-    segmented_sentences = vncorenlp.word_segment(text)
+    if misses:
+        pending = list(misses)
+        for text, segmented in zip(pending, _segment_uncached(pending)):
+            _segment_cache.put(text, segmented)
+            for i in misses[text]:
+                results[i] = segmented
 
-    tokens = []
-    for sentence in segmented_sentences:
-        for token in sentence.split():
-            # Merge multi-word tokens: Đại_học -> ĐạiHọc
-            if "_" in token:
-                token = token.replace("_", "")
-            tokens.append(token)
+    return results  # type: ignore[return-value]
 
-    return " ".join(tokens)
 
+def merge_segmented(text: str) -> str:
+    """
+    Turn segment_text_normal() output into segment_text() output
+    (Đại_học -> ĐạiHọc) without segmenting again.
+    """
+    return text.replace("_", "")
 
-def segment_text_normal(text: str) -> str:
+
+def segment_text(text: str) -> str:
     """
-    Segment Vietnamese text using VnCoreNLP word_segment.
-    Falls back to plain whitespace tokenization when VnCoreNLP/Java is unavailable.
+    Segment Vietnamese text using VnCoreNLP word_segment,
+    then merge multi-word tokens so PostgreSQL FTS
+    treats them as a single lexeme.
+    Falls back to the dictionary segmenter when VnCoreNLP/Java is unavailable.
     """
     if not text:
         return ""
 
-    vncorenlp = get_vncorenlp()
+    return merge_segmented(segment_many([text])[0])
 
-    if vncorenlp is None:
-        return text
 
-    # word_segment returns list[str]
-    segmented_sentences = vncorenlp.word_segment(text)
-
-    tokens = []
-    for sentence in segmented_sentences:
-        for token in sentence.split():
-            tokens.append(token)
-
-    return " ".join(tokens)
+def segment_text_normal(text: str) -> str:
+    """
+    Segment Vietnamese text using VnCoreNLP word_segment.
+    Falls back to the dictionary segmenter when VnCoreNLP/Java is unavailable.
+    """
+    if not text:
+        return ""
 
+    return segment_many([text])[0]
 
 
 def build_search_text(*parts: Optional[str]) -> str:
@@ -138,12 +318,7 @@ def build_search_text(*parts: Optional[str]) -> str:
     Combine multiple text fields into a single
     normalized + segmented search string.
     """
-    combined = " ".join(p for p in parts if p)
-
-    normalized = normalize_text(combined)
-    segmented = segment_text(normalized)
-
-    return segmented
+    return build_search_texts([parts])[0]
 
 
 def build_search_text_normal(*parts: Optional[str]) -> str:
@@ -151,31 +326,85 @@ def build_search_text_normal(*parts: Optional[str]) -> str:
     Combine multiple text fields into a single
     normalized + segmented search string.
     """
-    combined = " ".join(p for p in parts if p)
+    return build_search_texts([parts], merge=False)[0]
 
-    normalized = normalize_text(combined)
-    segmented = segment_text_normal(normalized)
 
-    return segmented
+def build_search_texts(
+    groups: List[Sequence[Optional[str]]], merge: bool = True
+) -> List[str]:
+    """
+    build_search_text() for several groups of fields at once, segmented in a
+    single batched call. merge=False keeps the underscores
+    (build_search_text_normal()).
+    """
+    normalized = [normalize_text(" ".join(p for p in parts if p)) for parts in groups]
+    segmented = segment_many(normalized)
+    return [merge_segmented(text) for text in segmented] if merge else segmented
 
 
+# --- Query-time segmentation latency -----------------------------------------
 
-def build_full_segmented_text(case):
+_QUERY_LATENCIES: Deque[float] = deque(maxlen=1000)
+_QUERY_COUNT = 0
+
+
+def build_query_text(query: str) -> str:
+    """build_search_text() for a search query, recording its latency."""
+    global _QUERY_COUNT
+
+    start = time.perf_counter()
+    text = build_search_text(query)
+    _QUERY_LATENCIES.append((time.perf_counter() - start) * 1000)
+    _QUERY_COUNT += 1
+    return text
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    return round(values[min(len(values) - 1, int(len(values) * pct / 100))], 2)
+
+
+def segmentation_stats() -> Dict[str, Any]:
+    """Segmenter backend, cache hit rate and query latency (this process)."""
+    latencies = sorted(_QUERY_LATENCIES)
+    return {
+        "backend": (
+            "vncorenlp"
+            if _VNCORENLP is not None
+            else "dictionary" if _VNCORENLP_UNAVAILABLE else "not loaded"
+        ),
+        "cache": _segment_cache.stats(),
+        "queries": _QUERY_COUNT,
+        "query_latency_ms": {
+            "p50": _percentile(latencies, 50),
+            "p95": _percentile(latencies, 95),
+            "p99": _percentile(latencies, 99),
+            "max": round(latencies[-1], 2) if latencies else 0.0,
+        },
+    }
+
+
+def case_search_parts(case):
+    """
+    Raw field values feeding the A/B/C weights of a case's search document,
+    as three lists (None for missing sections).
+    """
     ch = getattr(case, "clinical_history", None)
     pe = getattr(case, "physical_examination", None)
     inv = getattr(case, "investigations_detail", None)
     dm = getattr(case, "diagnosis_management", None)
     lo = getattr(case, "learning_outcomes", None)
 
-    text_A = build_search_text_normal(
+    parts_A = [
         case.title,
         case.case_summary,
         case.chief_complaint_brief,
         getattr(dm, "primary_diagnosis", None),
         getattr(dm, "differential_diagnosis", None),
-    )
+    ]
 
-    text_B = build_search_text_normal(
+    parts_B = [
         case.keywords,
         case.learning_tags,
         getattr(ch, "chief_complaint", None),
@@ -184,9 +413,9 @@ def build_full_segmented_text(case):
         getattr(dm, "prognosis", None),
         getattr(lo, "learning_objectives", None),
         getattr(lo, "key_concepts", None),
-    )
+    ]
 
-    text_C = build_search_text_normal(
+    parts_C = [
         getattr(ch, "past_medical_history", None),
         getattr(ch, "family_history", None),
         getattr(ch, "social_history", None),
@@ -208,6 +437,13 @@ def build_full_segmented_text(case):
         getattr(inv, "microbiology_results", None),
         getattr(lo, "clinical_pearls", None),
         getattr(lo, "discussion_points", None),
-    )
+    ]
+
+    return parts_A, parts_B, parts_C
+
+
+def build_full_segmented_text(case):
+    text_A, text_B, text_C = build_search_texts(case_search_parts(case), merge=False)
+
+    return f"{text_A} {text_B} {text_C}"
 
-    return f"{text_A} {text_B} {text_C}"
\ No newline at end of file
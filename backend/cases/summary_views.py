@@ -17,6 +17,7 @@ from rest_framework.response import Response
 
 from cases.medical_models import Department
 from cases.models import Case
+from cases.search.facets import facet_counts
 from cases.serializers import CaseDetailSerializer
 
 logger = logging.getLogger(__name__)
@@ -89,36 +90,22 @@ def case_summary_statistics(request):
         if student_id:
             queryset = queryset.filter(student_id=student_id)
 
-        # Calculate statistics
-        total_cases = queryset.count()
-
-        # Status distribution
-        status_stats = (
-            queryset.values("case_status")
-            .annotate(count=Count("id"))
-            .order_by("case_status")
-        )
-
-        # Specialty distribution
-        specialty_stats = (
-            queryset.values("specialty")
-            .annotate(count=Count("id"))
-            .order_by("-count")[:10]
-        )  # Top 10 specialties
-
-        # Priority distribution
-        priority_stats = (
-            queryset.values("priority_level")
-            .annotate(count=Count("id"))
-            .order_by("priority_level")
-        )
-
-        # Complexity distribution
-        complexity_stats = (
-            queryset.values("complexity_level")
-            .annotate(count=Count("id"))
-            .order_by("complexity_level")
-        )
+        # Status / specialty / priority / complexity distributions in one
+        # grouped query
+        facets = facet_counts(queryset)
+        total_cases = sum(bucket["count"] for bucket in facets["case_status"])
+
+        def distribution(field, order_by_count=False):
+            buckets = facets[field]
+            if not order_by_count:
+                buckets = sorted(buckets, key=lambda b: b["value"])
+            return [{field: b["value"], "count": b["count"]} for b in buckets]
+
+        status_stats = distribution("case_status")
+        # Top 10 specialties
+        specialty_stats = distribution("specialty", order_by_count=True)[:10]
+        priority_stats = distribution("priority_level")
+        complexity_stats = distribution("complexity_level")
 
         # Department distribution
         department_stats = (
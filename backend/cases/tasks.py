@@ -263,3 +263,83 @@ def send_bulk_notifications(self, notification_data_list):
     except Exception as exc:
         logger.error(f"Error sending bulk notifications: {exc}")
         raise self.retry(exc=exc, countdown=30)
+
+
+@shared_task(bind=True, max_retries=3)
+def rebuild_case_search_task(self, case_id):
+    """
+    Rebuild search_document / search_text for one case
+
+    Queued (debounced) by cases.search.indexing when a case or one of its
+    medical sections is saved.
+
+    Args:
+        case_id: Case ID
+    """
+    try:
+        from cases.search.indexing import rebuild_case
+
+        found = rebuild_case(case_id)
+        return {"status": "completed" if found else "missing", "case_id": case_id}
+
+    except Exception as exc:
+        logger.error(f"Error rebuilding search index for case {case_id}: {exc}")
+        raise self.retry(exc=exc, countdown=30)
+
+
+@shared_task(bind=True, max_retries=3)
+def flush_view_events_task(self):
+    """
+    Write buffered case view events to the database
+
+    Run by Celery beat every VIEW_EVENTS_FLUSH_INTERVAL_SECONDS and queued by
+    cases.view_events when a full batch is waiting.
+    """
+    try:
+        from cases.view_events import flush_view_events
+
+        applied = flush_view_events()
+        return {"status": "completed", "count": applied}
+
+    except Exception as exc:
+        logger.error(f"Error flushing view events: {exc}")
+        raise self.retry(exc=exc, countdown=10)
+
+
+@shared_task(bind=True, max_retries=3)
+def refresh_dashboard_rollups_task(self, days=2):
+    """
+    Recompute dashboard rollup rows for today and the previous days
+
+    Run by Celery beat every ANALYTICS_ROLLUP_INTERVAL_SECONDS.
+
+    Args:
+        days: Number of days to recompute, ending today
+    """
+    try:
+        from cases.analytics_rollups import refresh_recent
+
+        written = refresh_recent(days)
+        return {"status": "completed", "rows": written}
+
+    except Exception as exc:
+        logger.error(f"Error refreshing dashboard rollups: {exc}")
+        raise self.retry(exc=exc, countdown=60)
+
+
+@shared_task(bind=True, max_retries=3)
+def maintain_view_log_task(self):
+    """
+    Create upcoming CaseViewLog partitions, compact old ones into
+    CaseViewDaily and apply the retention policy
+    """
+    try:
+        from cases.view_log_partitions import maintain_view_log
+
+        result = maintain_view_log()
+        logger.info(f"View log maintenance: {result}")
+        return {"status": "completed", **result}
+
+    except Exception as exc:
+        logger.error(f"Error maintaining view log partitions: {exc}")
+        raise self.retry(exc=exc, countdown=300)
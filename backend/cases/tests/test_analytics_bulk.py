@@ -0,0 +1,127 @@
+"""
+Tests for bulk analytics recomputation (cases.analytics_bulk) and the
+generate_analytics command.
+"""
+
+import pytest
+from datetime import date, timedelta
+from django.core.management import call_command
+from django.utils import timezone
+from cases.analytics import (
+    AnalyticsRun,
+    CaseAnalytics,
+    CaseViewer,
+    CaseViewLog,
+    DepartmentAnalytics,
+    PlatformUsageStatistics,
+    StudentEngagementMetrics,
+)
+from cases.analytics_bulk import (
+    current_streak,
+    improvement_rate,
+    recompute_cases,
+    recompute_students,
+    touched_since,
+)
+from comments.models import Comment
+from grades.models import Grade
+
+
+def test_current_streak():
+    today = date(2025, 3, 10)
+
+    assert current_streak([], today) == 0
+    assert current_streak([today, date(2025, 3, 9), date(2025, 3, 8)], today) == 3
+    # A streak may end yesterday
+    assert current_streak([date(2025, 3, 9), date(2025, 3, 8)], today) == 2
+    assert current_streak([date(2025, 3, 9), date(2025, 3, 6)], today) == 1
+    assert current_streak([date(2025, 3, 7)], today) == 0
+
+
+def test_improvement_rate():
+    assert improvement_rate([50, 60, 70]) is None
+    assert improvement_rate([50, 50, 75, 75]) == 50.0
+    assert improvement_rate([0, 0, 80, 90]) is None
+
+
+@pytest.mark.django_db
+class TestBulkAnalytics:
+    @pytest.fixture
+    def case(self, make_case):
+        return make_case(case_status="submitted", submitted_at=timezone.now())
+
+    def test_recompute_cases(self, case, instructor_user):
+        Comment.objects.create(case=case, author=instructor_user, content="Comment 1")
+        Comment.objects.create(case=case, author=instructor_user, content="Comment 2")
+        Grade.objects.create(case=case, graded_by=instructor_user, score=40)
+
+        assert recompute_cases(chunk_size=1) == 1
+
+        analytics = CaseAnalytics.objects.get(case=case)
+        assert analytics.total_comments == 2
+        assert analytics.average_grade == 40
+        assert analytics.pass_rate == 0.0
+
+    def test_view_counters_are_kept(self, case):
+        CaseAnalytics.objects.create(case=case, total_views=7, unique_viewers=3)
+
+        recompute_cases([case.pk])
+
+        analytics = CaseAnalytics.objects.get(case=case)
+        assert analytics.total_views == 7
+        assert analytics.unique_viewers == 3
+
+    def test_recompute_students(self, case, student_user, instructor_user):
+        now = timezone.now()
+        CaseViewer.objects.create(
+            case=case,
+            user=student_user,
+            first_viewed_at=now,
+            last_viewed_at=now,
+            view_count=2,
+        )
+        CaseViewLog.objects.create(case=case, user=student_user)
+        CaseViewLog.objects.create(
+            case=case, user=student_user, viewed_at=now - timedelta(days=1)
+        )
+        Grade.objects.create(case=case, graded_by=instructor_user, score=80)
+        StudentEngagementMetrics.objects.create(
+            student=student_user, longest_streak_days=5
+        )
+
+        assert recompute_students([student_user.pk]) == 1
+
+        metrics = StudentEngagementMetrics.objects.get(student=student_user)
+        assert metrics.total_cases_viewed == 1
+        assert metrics.total_cases_submitted == 1
+        assert metrics.last_active_at == now
+        assert metrics.average_grade == 80
+        assert metrics.current_streak_days == 2
+        assert metrics.longest_streak_days == 5
+
+    def test_touched_since(self, case, student_user, instructor_user):
+        since = timezone.now()
+        assert touched_since(since) == (set(), set())
+
+        Comment.objects.create(case=case, author=instructor_user, content="New")
+
+        assert touched_since(since) == ({case.pk}, {student_user.pk})
+
+    def test_command(self, case, student_user, cardiology_department):
+        call_command("generate_analytics", "--incremental")
+
+        assert CaseAnalytics.objects.filter(case=case).exists()
+        assert StudentEngagementMetrics.objects.filter(student=student_user).exists()
+        stats = PlatformUsageStatistics.objects.get(period_type="daily")
+        assert stats.total_cases_created == 1
+        assert stats.total_cases_submitted == 1
+        department = DepartmentAnalytics.objects.get(department=cardiology_department)
+        assert department.total_students == 1
+        assert department.total_cases == 1
+        assert AnalyticsRun.objects.filter(name="generate_analytics").exists()
+
+        CaseAnalytics.objects.all().delete()
+        call_command("generate_analytics", "--incremental")
+
+        # Nothing changed since the last run
+        assert not CaseAnalytics.objects.exists()
@@ -0,0 +1,89 @@
+"""
+Tests for dashboard rollup rows (cases.analytics_rollups).
+"""
+
+import pytest
+from datetime import timedelta
+from django.utils import timezone
+from cases.analytics import CaseViewLog, DashboardRollup
+from cases.analytics_rollups import add_views, dashboard_rows, refresh_days
+
+
+@pytest.mark.django_db
+class TestDashboardRollups:
+    @pytest.fixture
+    def case(self, make_case):
+        return make_case(case_status="approved", submitted_at=timezone.now())
+
+    def test_refresh_day(self, case, student_user, instructor_user):
+        CaseViewLog.objects.create(case=case, user=student_user)
+        CaseViewLog.objects.create(case=case, user=student_user)
+        CaseViewLog.objects.create(case=case, user=instructor_user)
+        today = timezone.localdate()
+
+        refresh_days([today])
+
+        platform = DashboardRollup.objects.get(day=today, department=None)
+        assert platform.cases_created == 1
+        assert platform.cases_submitted == 1
+        assert platform.views == 3
+        assert platform.active_users == 2
+        assert platform.total_cases == 1
+        assert platform.approved_cases == 1
+
+        department = DashboardRollup.objects.get(
+            day=today, department=student_user.department
+        )
+        # A case counts once even when student and repository share a department
+        assert department.total_cases == 1
+        assert department.total_students == 1
+        assert department.total_instructors == 1
+        assert department.views == 0
+
+    def test_refresh_is_idempotent(self, case):
+        today = timezone.localdate()
+        refresh_days([today])
+        refresh_days([today])
+
+        assert DashboardRollup.objects.filter(day=today, department=None).count() == 1
+
+    def test_missing_days_are_computed(self, case, cardiology_department):
+        today = timezone.localdate()
+
+        rows = dashboard_rows(today - timedelta(days=7), today, cardiology_department)
+
+        assert len(rows[None]) == 8
+        assert len(rows[cardiology_department.pk]) == 8
+        assert rows[cardiology_department.pk][today].cases_created == 1
+
+    def test_deltas(
+        self, case, make_case, student_user, django_capture_on_commit_callbacks
+    ):
+        today = timezone.localdate()
+        refresh_days([today])
+
+        with django_capture_on_commit_callbacks(execute=True):
+            make_case(title="Second case")
+        add_views({today: 5})
+
+        platform = DashboardRollup.objects.get(day=today, department=None)
+        assert platform.cases_created == 2
+        assert platform.total_cases == 2
+        assert platform.views == 5
+        department = DashboardRollup.objects.get(
+            day=today, department=student_user.department
+        )
+        assert department.cases_created == 2
+
+    def test_overview_reads_rollups(self, api_client, instructor_user, case):
+        api_client.force_authenticate(user=instructor_user)
+
+        response = api_client.get("/api/analytics-dashboard/overview/")
+
+        assert response.status_code == 200
+        assert response.data["total_cases"] == 1
+        assert response.data["cases_created_this_week"] == 1
+        assert response.data["average_completion_rate"] == 100.0
+        assert DashboardRollup.objects.filter(
+            department=instructor_user.department
+        ).exists()
@@ -0,0 +1,108 @@
+"""
+Tests for analytics dashboard trends (cases.analytics_trends).
+"""
+
+import pytest
+from datetime import date, timedelta
+from django.utils import timezone
+from cases.analytics import CaseViewLog
+from cases.analytics_trends import bucket_starts, cached_trend_series, trend_series
+
+
+def test_bucket_starts():
+    start, end = date(2025, 1, 30), date(2025, 3, 2)
+
+    assert len(bucket_starts(start, end, "day")) == 32
+    weeks = bucket_starts(start, end, "week")
+    assert weeks[0] == date(2025, 1, 27)
+    assert all(week.weekday() == 0 for week in weeks)
+    assert bucket_starts(start, end, "month") == [
+        date(2025, 1, 1),
+        date(2025, 2, 1),
+        date(2025, 3, 1),
+    ]
+
+
+@pytest.mark.django_db
+class TestTrendSeries:
+    @pytest.fixture
+    def case(self, make_case):
+        return make_case(submitted_at=timezone.now())
+
+    def test_daily_counts(self, case, student_user):
+        CaseViewLog.objects.create(case=case, user=student_user)
+        CaseViewLog.objects.create(
+            case=case,
+            user=student_user,
+            viewed_at=timezone.now() - timedelta(days=3),
+        )
+        today = timezone.localdate()
+
+        series = trend_series(today - timedelta(days=7), today)
+
+        assert len(series) == 8
+        assert series[-1] == {
+            "date": today.isoformat(),
+            "views": 1,
+            "cases_created": 1,
+            "cases_submitted": 1,
+        }
+        assert series[-4]["views"] == 1
+        assert sum(row["views"] for row in series) == 2
+
+    def test_constant_query_count(self, case, django_assert_num_queries):
+        today = timezone.localdate()
+        with django_assert_num_queries(4):
+            trend_series(today - timedelta(days=365), today)
+        with django_assert_num_queries(4):
+            trend_series(today - timedelta(days=365), today, bucket="month")
+
+    def test_department_scope(self, case, student_user, cardiology_department):
+        CaseViewLog.objects.create(case=case, user=student_user)
+        today = timezone.localdate()
+
+        series = trend_series(today, today, department=cardiology_department)
+        assert series[0]["views"] == 1
+
+        other = type(cardiology_department).objects.create(
+            code="TK",
+            name="Neurology",
+            vietnamese_name="Khoa Thần Kinh",
+            department_type="clinical",
+        )
+        assert trend_series(today, today, department=other)[0]["views"] == 0
+
+    def test_cache_invalidated_by_new_case(
+        self,
+        case,
+        make_case,
+        settings,
+        django_capture_on_commit_callbacks,
+    ):
+        settings.ANALYTICS_TRENDS_CACHE_SECONDS = 300
+        today = timezone.localdate()
+        assert cached_trend_series(today, today)[0]["cases_created"] == 1
+
+        with django_capture_on_commit_callbacks(execute=True):
+            make_case(title="Second case")
+
+        assert cached_trend_series(today, today)[0]["cases_created"] == 2
+
+    def test_trends_endpoint(self, api_client, instructor_user, case):
+        api_client.force_authenticate(user=instructor_user)
+
+        response = api_client.get(
+            "/api/analytics-dashboard/trends/?period=90&bucket=week"
+        )
+        assert response.status_code == 200
+        assert response.data["bucket"] == "week"
+        assert sum(row["cases_created"] for row in response.data["stats"]) == 1
+        assert "daily_stats" not in response.data
+
+        response = api_client.get("/api/analytics-dashboard/trends/?bucket=year")
+        assert response.status_code == 400
+        for period in ("0", "-5", "731", "100000000", "abc"):
+            response = api_client.get(
+                f"/api/analytics-dashboard/trends/?period={period}"
+            )
+            assert response.status_code == 400
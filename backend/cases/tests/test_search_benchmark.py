@@ -0,0 +1,73 @@
+"""
+Tests for the search benchmark metrics and baseline comparison.
+"""
+
+import pytest
+from cases.search import benchmark
+
+
+def report(p95, ndcg, recall=1.0, query_ndcg=None):
+    return {
+        "rankers": {
+            "search_cases": {
+                "latency_ms": {"p50": p95 / 2, "p95": p95, "p99": p95},
+                "ndcg@10": ndcg,
+                "recall": recall,
+                "queries": [
+                    {
+                        "query": "suy tim",
+                        "ndcg": ndcg if query_ndcg is None else query_ndcg,
+                    }
+                ],
+            }
+        }
+    }
+
+
+class TestMetrics:
+    def test_percentile(self):
+        values = list(range(1, 101))
+        assert benchmark.percentile(values, 50) == 50
+        assert benchmark.percentile(values, 99) == 99
+        assert benchmark.percentile([], 95) == 0.0
+
+    def test_ndcg(self):
+        grades = {1: 2, 2: 2, 3: 1}
+        assert benchmark.ndcg([1, 2, 3], grades) == pytest.approx(1.0)
+        assert benchmark.ndcg([3, 2, 1], grades) < 1.0
+        assert benchmark.ndcg([4, 5], grades) == 0.0
+        assert benchmark.ndcg([1], {}) == 0.0
+
+    def test_recall(self):
+        assert benchmark.recall([1, 2, 9], {1: 2, 2: 2, 3: 2, 4: 2}) == 0.5
+
+    def test_relevance_labels(self):
+        query = {"query": "suy tim", "relevant": {"Suy tim mạn tính": 2}}
+        titles = {1: "Suy tim mạn tính", 2: "Rung nhĩ"}
+        assert benchmark.relevance_labels(query, titles) == {1: 2}
+
+    def test_queries_reference_template_titles(self):
+        populate = pytest.importorskip("scripts.setup.populate_test_data")
+        titles = {
+            template["title"]
+            for templates in populate.CASE_TEMPLATES_BY_DEPT.values()
+            for template in templates
+        }
+        for query in benchmark.QUERIES:
+            assert set(query["relevant"]) <= titles, query["query"]
+
+
+class TestCompare:
+    def test_no_regression(self):
+        assert benchmark.compare(report(11, 0.9), report(10, 0.9)) == []
+
+    def test_latency_regression(self):
+        regressions = benchmark.compare(report(13, 0.9), report(10, 0.9))
+        assert regressions == ["search_cases: p95 latency 10ms -> 13ms"]
+
+    def test_quality_regression(self):
+        regressions = benchmark.compare(
+            report(10, 0.8, query_ndcg=0.5), report(10, 0.9)
+        )
+        assert "search_cases: ndcg@10 0.9 -> 0.8" in regressions
+        assert "search_cases: 'suy tim' ndcg 0.9 -> 0.5" in regressions
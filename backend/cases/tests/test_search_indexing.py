@@ -0,0 +1,89 @@
+"""
+Tests for debounced search-index updates (cases.search.indexing).
+"""
+
+import pytest
+from unittest.mock import patch
+from django.core.cache import cache
+from django.test import override_settings
+from cases.models import Case
+from cases.medical_models import ClinicalHistory, LearningOutcomes
+from cases.search import indexing
+
+
+@pytest.fixture
+def case(make_case):
+    with override_settings(SEARCH_INDEX_ASYNC=False):
+        return make_case(title="Nhồi máu cơ tim cấp")
+
+
+@pytest.fixture(autouse=True)
+def clear_index_state(db, locmem_cache):
+    cache.delete_many(
+        [indexing.PENDING_KEY, indexing.REBUILT_KEY, indexing.LAG_TOTAL_KEY]
+    )
+    yield
+
+
+@pytest.mark.django_db
+class TestSearchIndexQueue:
+    """Saves of one case are coalesced into a single queued rebuild."""
+
+    @pytest.fixture(autouse=True)
+    def async_indexing(self, settings):
+        settings.SEARCH_INDEX_ASYNC = True
+        settings.SEARCH_INDEX_DEBOUNCE_SECONDS = 5
+
+    def test_saves_are_coalesced(self, case, django_capture_on_commit_callbacks):
+        cache.delete(indexing.DIRTY_KEY.format(case.pk))
+
+        with patch("cases.tasks.rebuild_case_search_task.apply_async") as apply:
+            with django_capture_on_commit_callbacks(execute=True):
+                case.title = "Nhồi máu cơ tim cấp thành dưới"
+                case.save()
+                ClinicalHistory.objects.create(
+                    case=case,
+                    chief_complaint="Đau ngực",
+                    history_present_illness="Đau ngực trái 2 giờ",
+                )
+                LearningOutcomes.objects.create(
+                    case=case, learning_objectives="Chẩn đoán NMCT"
+                )
+
+        apply.assert_called_once_with(args=[case.pk], countdown=5)
+        assert indexing.index_queue_stats()["pending"] == 1
+
+    def test_nothing_queued_before_commit(self, case):
+        with patch("cases.tasks.rebuild_case_search_task.apply_async") as apply:
+            case.save()
+        apply.assert_not_called()
+
+    def test_rebuild_clears_dirty_and_records_lag(self, case):
+        cache.delete(indexing.DIRTY_KEY.format(case.pk))
+        with patch("cases.tasks.rebuild_case_search_task.apply_async"):
+            indexing.enqueue_rebuild(case.pk)
+
+        assert indexing.rebuild_case(case.pk)
+
+        assert cache.get(indexing.DIRTY_KEY.format(case.pk)) is None
+        stats = indexing.index_queue_stats()
+        assert stats["pending"] == 0
+        assert stats["rebuilt"] == 1
+        case.refresh_from_db()
+        assert case.search_text
+
+    def test_broker_failure_rebuilds_inline(self, case):
+        cache.delete(indexing.DIRTY_KEY.format(case.pk))
+        Case.objects.filter(pk=case.pk).update(search_text="")
+
+        with patch(
+            "cases.tasks.rebuild_case_search_task.apply_async",
+            side_effect=ConnectionError("broker down"),
+        ):
+            indexing.enqueue_rebuild(case.pk)
+
+        case.refresh_from_db()
+        assert case.search_text
+
+    def test_missing_case(self, db):
+        assert indexing.rebuild_case(999999) is False
@@ -0,0 +1,45 @@
+"""
+Tests for the shared Vietnamese normalization module.
+"""
+
+import unicodedata
+from cases.search import normalize
+
+SAMPLES = [
+    "Nhồi máu cơ tim cấp ST chênh lên",
+    "ĐÁI THÁO ĐƯỜNG type 2",
+    "Viêm tụy cấp – Ñandú Ωμέγα Ёлка",
+]
+
+
+class TestUnaccent:
+    def test_matches_nfd_folding_except_d_stroke(self):
+        for sample in SAMPLES:
+            for form in ("NFC", "NFD"):
+                text = unicodedata.normalize(form, sample)
+                expected = normalize._legacy_unaccent(text)
+                assert normalize.unaccent(text) == expected.replace("đ", "d")
+
+    def test_d_stroke(self):
+        assert normalize.unaccent("Đột quỵ đầu") == "dot quy dau"
+        assert normalize.strip_diacritics("Đặng Thị Ánh") == "Dang Thi Anh"
+
+    def test_empty(self):
+        assert normalize.unaccent(None) == ""
+        assert normalize.unaccent_many([]) == []
+
+    def test_batch(self):
+        texts = ["Đau ngực", None, "Khó THỞ", "a\x00b"]
+        assert normalize.unaccent_many(texts) == [
+            normalize.unaccent(text) for text in texts
+        ]
+
+    def test_search_key(self):
+        assert normalize.search_key("  Viêm   Gan\tB ") == "viem gan b"
+
+
+def test_to_nfc():
+    decomposed = unicodedata.normalize("NFD", "Suy hô hấp cấp")
+    assert normalize.to_nfc(decomposed) == "Suy hô hấp cấp"
+    assert normalize.to_nfc(None) == ""
+    assert normalize.to_nfc(42) == "42"
@@ -0,0 +1,124 @@
+"""
+Tests for the bulk search reindex (cases.search.reindex).
+"""
+
+import pytest
+from io import StringIO
+from unittest.mock import patch
+from django.core.management import call_command
+from django.db import ProgrammingError, connection
+from cases.models import Case, CaseSearchToken, CaseSearchTokenSet
+from cases.search import reindex, utils
+
+
+@pytest.fixture(autouse=True)
+def inline_search_index(settings):
+    settings.SEARCH_INDEX_ASYNC = False
+    with patch("cases.search.utils.get_vncorenlp", return_value=None):
+        yield
+
+
+def index_snapshot():
+    return (
+        sorted(CaseSearchToken.objects.values_list("token", "display", "frequency")),
+        sorted(Case.objects.values_list("pk", "search_text")),
+        sorted(CaseSearchTokenSet.objects.values_list("case_id", "tokens")),
+    )
+
+
+def segmented_ids(segment):
+    return [case_id for call in segment.call_args_list for case_id, _ in call.args[0]]
+
+
+@pytest.mark.django_db
+class TestBulkReindex:
+    @pytest.fixture
+    def cases(self, make_case):
+        return [make_case(title=title) for title in ("Nhồi máu cơ tim", "Viêm phổi")]
+
+    def test_case_deleted_mid_run_is_skipped(self, cases):
+        reindex.reset_checkpoint()
+        CaseSearchTokenSet.objects.all().delete()
+        (items,) = list(reindex._iter_batches(0, batch_size=10))
+        results = reindex.segment_batch(items)
+        deleted_pk = cases[1].pk
+        cases[1].delete()
+
+        assert reindex._write_batch(results, 0) == 1
+
+        assert list(CaseSearchTokenSet.objects.values_list("case_id", flat=True)) == [
+            cases[0].pk
+        ]
+        assert reindex.load_checkpoint() == (deleted_pk, 1)
+
+    def test_resume_from_checkpoint(self, cases):
+        reindex.reset_checkpoint()
+        # Interrupted after the first batch
+        items = next(reindex._iter_batches(0, batch_size=1))
+        reindex._write_batch(reindex.segment_batch(items), 0)
+
+        with patch.object(
+            reindex, "segment_batch", wraps=reindex.segment_batch
+        ) as segment:
+            assert reindex.bulk_reindex(batch_size=1) == 2
+
+        assert segmented_ids(segment) == [cases[1].pk]
+        resumed = index_snapshot()
+        reindex.bulk_reindex(restart=True)
+        assert index_snapshot() == resumed
+
+    def test_restart_discards_checkpoint(self, cases):
+        reindex.reset_checkpoint()
+        items = next(reindex._iter_batches(0, batch_size=1))
+        reindex._write_batch(reindex.segment_batch(items), 0)
+
+        with patch.object(
+            reindex, "segment_batch", wraps=reindex.segment_batch
+        ) as segment:
+            assert reindex.bulk_reindex(batch_size=1, restart=True) == 2
+
+        assert segmented_ids(segment) == [case.pk for case in cases]
+
+    def test_swap_tokens(self, cases):
+        before = index_snapshot()[0]
+        reindex.reset_checkpoint()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {reindex.SHADOW_TABLE} VALUES ('nhoi', 'nhồi', 3)"
+            )
+            cursor.execute(f"DROP TABLE {reindex.STATE_TABLE}")
+
+        # A failing step rolls the whole swap back
+        with pytest.raises(ProgrammingError):
+            reindex.swap_tokens()
+        assert index_snapshot()[0] == before
+
+        reindex.load_checkpoint()  # Recreates the state table
+        reindex.swap_tokens()
+
+        assert index_snapshot()[0] == [("nhoi", "nhồi", 3)]
+        tables = connection.introspection.table_names()
+        assert reindex.SHADOW_TABLE not in tables
+        assert reindex.STATE_TABLE not in tables
+
+    def test_workers_match_in_process(self, cases):
+        if utils.py_vncorenlp is not None:
+            pytest.skip("spawned workers would segment with VnCoreNLP")
+
+        reindex.bulk_reindex(workers=1, restart=True)
+        expected = index_snapshot()
+        CaseSearchToken.objects.all().delete()
+        CaseSearchTokenSet.objects.all().delete()
+        Case.objects.update(search_text="")
+
+        assert reindex.bulk_reindex(workers=2, batch_size=1, restart=True) == 2
+
+        assert index_snapshot() == expected
+
+    def test_command(self, cases):
+        out = StringIO()
+
+        call_command("rebuild_case_search", "--bulk", "--restart", stdout=out)
+
+        assert "with 1 workers" in out.getvalue()
+        assert "complete (2 cases)" in out.getvalue()
@@ -0,0 +1,73 @@
+"""
+Tests for the batched, cached segmentation layer in cases.search.utils.
+"""
+
+import pytest
+from unittest.mock import patch
+from cases.search import utils
+
+
+class FakeVnCoreNLP:
+    """Splits sentences on " . " and joins a couple of known words."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def word_segment(self, text):
+        self.calls += 1
+        sentences = []
+        for sentence in text.split(" . "):
+            for word in ("đau ngực", "khó thở"):
+                sentence = sentence.replace(word, word.replace(" ", "_"))
+            sentences.append(sentence)
+        return sentences
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    utils._segment_cache.clear()
+    yield
+    utils._segment_cache.clear()
+
+
+class TestDictionarySegmenter:
+    """Fallback used when Java / py_vncorenlp is unavailable."""
+
+    def test_joins_longest_dictionary_word(self):
+        with patch("cases.search.utils.get_vncorenlp", return_value=None):
+            assert (
+                utils.build_search_text_normal("Bệnh nhân nhồi máu cơ tim cấp")
+                == "bệnh_nhân nhồi_máu_cơ_tim cấp"
+            )
+
+    def test_splits_punctuation(self):
+        with patch("cases.search.utils.get_vncorenlp", return_value=None):
+            assert utils.build_search_text("tăng huyết áp, sốt") == "tănghuyếtáp , sốt"
+
+
+class TestBatchedSegmentation:
+    def test_one_jvm_call_for_all_groups(self):
+        fake = FakeVnCoreNLP()
+        with patch("cases.search.utils.get_vncorenlp", return_value=fake):
+            texts = utils.build_search_texts(
+                [["Đau ngực trái"], ["khó thở"], [None], ["sốt", "ho"]], merge=False
+            )
+
+        assert texts == ["đau_ngực trái", "khó_thở", "", "sốt ho"]
+        assert fake.calls == 1
+
+    def test_cached_text_is_not_segmented_again(self):
+        fake = FakeVnCoreNLP()
+        with patch("cases.search.utils.get_vncorenlp", return_value=fake):
+            utils.build_search_text("đau ngực")
+            assert utils.build_search_text("Đau  ngực") == "đaungực"
+
+        assert fake.calls == 1
+        assert utils._segment_cache.stats()["hits"] >= 1
+
+    def test_query_latency_is_recorded(self):
+        with patch("cases.search.utils.get_vncorenlp", return_value=None):
+            before = utils.segmentation_stats()["queries"]
+            utils.build_query_text("đau ngực")
+
+        assert utils.segmentation_stats()["queries"] == before + 1
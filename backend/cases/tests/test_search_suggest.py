@@ -0,0 +1,74 @@
+"""
+Tests for the in-memory autocomplete index (cases.search.suggest).
+"""
+
+from cases.search.suggest import SuggestionIndex
+
+ENTRIES = [
+    ("dai trang", "đại tràng", 50),
+    ("dai thao duong", "đái tháo đường", 80),
+    ("dau nguc", "đau ngực", 30),
+    ("dau dau", "đau đầu", 30),
+    ("dau bung", "đau bụng", 10),
+    ("sot", "sốt", 99),
+]
+
+
+class TestSuggestionIndex:
+    def test_prefix_ranked_by_frequency_then_display(self):
+        index = SuggestionIndex(ENTRIES)
+        assert [e[1] for e in index.complete("dau")] == [
+            "đau ngực",
+            "đau đầu",
+            "đau bụng",
+        ]
+
+    def test_long_prefix(self):
+        index = SuggestionIndex(ENTRIES)
+        assert [e[0] for e in index.complete("dai tr")] == ["dai trang"]
+
+    def test_exact_completions_come_first(self):
+        index = SuggestionIndex(ENTRIES)
+        # Fewer than the limit: 1-edit completions (dai ...) fill in after
+        assert [e[0] for e in index.suggest("dau")][:3] == [
+            "dau nguc",
+            "dau dau",
+            "dau bung",
+        ]
+
+    def test_limit(self):
+        index = SuggestionIndex(ENTRIES)
+        assert len(index.suggest("da", limit=2)) == 2
+
+    def test_one_edit_typo(self):
+        index = SuggestionIndex(ENTRIES)
+        # transposed letters
+        assert "dau nguc" in [e[0] for e in index.suggest("dua ng")]
+        # missing letter
+        assert "dai trang" in [e[0] for e in index.suggest("dai tang")]
+
+    def test_no_fuzzy_for_short_prefix(self):
+        index = SuggestionIndex(ENTRIES)
+        assert index.suggest("xo") == []
+
+    def test_incremental_updates(self):
+        index = SuggestionIndex(ENTRIES)
+        index.upsert(("dau lung", "đau lưng", 100))
+        assert index.complete("d")[0][0] == "dau lung"
+
+        index.upsert(("dau lung", "đau lưng", 1))
+        assert index.complete("dau")[-1][0] == "dau lung"
+
+        index.remove("dau lung")
+        assert "dau lung" not in [e[0] for e in index.complete("dau")]
+        assert len(index) == len(ENTRIES)
+
+    def test_batch_apply(self):
+        index = SuggestionIndex(ENTRIES)
+        index.apply([("dau lung", "đau lưng", 100), ("sot", "sốt", 1)], ["dau nguc"])
+
+        assert index.complete("d")[0][0] == "dau lung"
+        assert "dau nguc" not in [e[0] for e in index.complete("dau")]
+        assert index.complete("s") == [("sot", "sốt", 1)]
+        assert index.arrays[0] == sorted(index.arrays[0])
+        assert len(index) == len(ENTRIES)
@@ -0,0 +1,72 @@
+"""
+Tests for incremental CaseSearchToken maintenance (cases.search.tokens).
+"""
+
+import pytest
+from unittest.mock import patch
+from cases.medical_models import ClinicalHistory
+from cases.models import CaseSearchToken, CaseSearchTokenSet
+from cases.search import tokens
+
+
+@pytest.fixture(autouse=True)
+def inline_search_index(settings):
+    settings.SEARCH_INDEX_ASYNC = False
+    with patch("cases.search.utils.get_vncorenlp", return_value=None):
+        yield
+
+
+def frequencies():
+    return dict(CaseSearchToken.objects.values_list("token", "frequency"))
+
+
+def test_case_tokens():
+    assert tokens.case_tokens("Hà_Nội y y") == {"ha_noi": "Hà Nội", "y": "y"}
+    assert tokens.fingerprint(["b", "a"]) == tokens.fingerprint(["a", "b"])
+
+
+@pytest.mark.django_db
+class TestCaseTokenSync:
+    def test_case_rebuild_creates_snapshot(self, case):
+        snapshot = CaseSearchTokenSet.objects.get(case=case)
+        assert snapshot.tokens
+        assert set(snapshot.tokens) <= set(frequencies())
+
+    def test_diff_against_snapshot(self, case):
+        CaseSearchToken.objects.all().delete()
+        CaseSearchTokenSet.objects.all().delete()
+
+        tokens.sync_case_tokens(case.pk, "sot ho")
+        CaseSearchToken.objects.create(token="dau", display="đau", frequency=1)
+
+        assert tokens.sync_case_tokens(case.pk, "sot dau")
+        assert frequencies() == {"sot": 1, "dau": 2}
+        assert CaseSearchTokenSet.objects.get(case=case).tokens == ["dau", "sot"]
+
+    def test_unchanged_case_is_skipped(self, case):
+        tokens.sync_case_tokens(case.pk, "sot ho")
+        before = frequencies()
+
+        assert tokens.sync_case_tokens(case.pk, "ho sot ho") is False
+        assert frequencies() == before
+
+    def test_delete_removes_tokens(self, case):
+        CaseSearchToken.objects.all().delete()
+        CaseSearchTokenSet.objects.all().delete()
+        tokens.sync_case_tokens(case.pk, "sot ho")
+        CaseSearchToken.objects.filter(token="ho").update(frequency=2)
+
+        case.delete()
+
+        assert frequencies() == {"ho": 1}
+
+    def test_delete_with_sections(self, case, make_case):
+        before = frequencies()
+        other = make_case(title="Viêm phổi", specialty="Respiratory")
+        ClinicalHistory.objects.create(case=other, chief_complaint="Ho khan, sốt")
+        other_pk = other.pk
+
+        other.delete()
+
+        assert not CaseSearchTokenSet.objects.filter(case_id=other_pk).exists()
+        assert frequencies() == before
@@ -0,0 +1,110 @@
+"""
+Tests for the case search endpoint: visibility and keyset pagination.
+"""
+
+import pytest
+from unittest.mock import patch
+from rest_framework import status
+from django.contrib.auth import get_user_model
+
+User = get_user_model()
+
+SEARCH_URL = "/api/cases/search/"
+
+
+@pytest.fixture(autouse=True)
+def inline_search_index(settings):
+    settings.SEARCH_INDEX_ASYNC = False
+    with patch("cases.search.utils.get_vncorenlp", return_value=None):
+        yield
+
+
+@pytest.fixture
+def other_student(db, cardiology_department):
+    return User.objects.create_user(
+        username="le.van.nam",
+        email="le.van.nam@student.com",
+        password="testpass123",
+        role="student",
+        first_name="Nam",
+        last_name="Lê Văn",
+        department=cardiology_department,
+    )
+
+
+@pytest.mark.django_db
+class TestCaseSearchView:
+    def test_query_required(self, api_client, student_user):
+        api_client.force_authenticate(user=student_user)
+        response = api_client.get(SEARCH_URL)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_only_visible_cases(
+        self, api_client, student_user, other_student, make_case
+    ):
+        own = make_case(title="Nhồi máu cơ tim cấp")
+        make_case(title="Nhồi máu cơ tim thành dưới", student=other_student)
+
+        api_client.force_authenticate(user=student_user)
+        response = api_client.get(SEARCH_URL, {"q": "nhồi máu cơ tim"})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [row["id"] for row in response.data["results"]] == [own.id]
+
+    def test_cursor_pages_cover_all_results_once(
+        self, api_client, student_user, make_case
+    ):
+        ids = {make_case(title=f"Suy tim mạn tính {i}").id for i in range(5)}
+
+        api_client.force_authenticate(user=student_user)
+        seen = []
+        scores = []
+        response = api_client.get(SEARCH_URL, {"q": "suy tim", "page_size": 2})
+        while True:
+            assert response.status_code == status.HTTP_200_OK
+            assert len(response.data["results"]) <= 2
+            seen += [row["id"] for row in response.data["results"]]
+            scores += [(row["score"], row["id"]) for row in response.data["results"]]
+            if not response.data["next"]:
+                break
+            response = api_client.get(response.data["next"])
+
+        assert len(seen) == len(set(seen))
+        assert set(seen) == ids
+        assert scores == sorted(scores, reverse=True)
+
+    def test_invalid_cursor(self, api_client, student_user):
+        api_client.force_authenticate(user=student_user)
+        response = api_client.get(SEARCH_URL, {"q": "suy tim", "cursor": "%%%"})
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_facets(self, api_client, student_user, other_student, make_case):
+        make_case(title="Suy tim mạn tính")
+        urgent = make_case(title="Suy tim cấp")
+        urgent.priority_level = "urgent"
+        urgent.save()
+        make_case(title="Suy tim mất bù", student=other_student)
+
+        api_client.force_authenticate(user=student_user)
+        response = api_client.get(
+            SEARCH_URL, {"q": "suy tim", "facets": "true", "page_size": 1}
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        facets = response.data["facets"]
+        # counts cover every visible result, not just the first page
+        assert facets["specialty"] == [
+            {"value": "Cardiology", "label": "Cardiology", "count": 2}
+        ]
+        assert {b["value"]: b["count"] for b in facets["priority_level"]} == {
+            "medium": 1,
+            "urgent": 1,
+        }
+        assert facets["case_status"] == [
+            {"value": "draft", "label": "Bản nháp", "count": 2}
+        ]
+
+    def test_no_facets_by_default(self, api_client, student_user):
+        api_client.force_authenticate(user=student_user)
+        response = api_client.get(SEARCH_URL, {"q": "suy tim"})
+        assert "facets" not in response.data
@@ -0,0 +1,49 @@
+"""
+Tests for the in-memory terminology autocomplete (cases.search.terminology).
+"""
+
+from cases.search.terminology import CodeIndex, TrigramIndex
+
+TERMS = [
+    (1, "ho hap", ["Viêm phổi", "Viêm phổi", "Pneumonia", "pneumonia"]),
+    (2, "", ["Sốt xuất huyết", "Sốt xuất huyết", "Dengue fever", "dengue"]),
+    (3, "tim mach", ["Suy tim", "Suy tim", "Heart failure"]),
+    (4, "ho hap", ["Viêm phế quản", "Viêm phế quản", "Bronchitis"]),
+]
+
+
+class TestTrigramIndex:
+    def test_diacritic_insensitive(self):
+        index = TrigramIndex(TERMS)
+        assert index.search("viem phoi")[0] == 1
+        assert index.search("Viêm phổi")[0] == 1
+
+    def test_prefix_ranks_first(self):
+        index = TrigramIndex(TERMS)
+        assert set(index.search("viem")[:2]) == {1, 4}
+
+    def test_typo_and_synonym(self):
+        index = TrigramIndex(TERMS)
+        assert index.search("pneumona")[0] == 1
+        assert index.search("dengue")[0] == 2
+
+    def test_specialty_partition(self):
+        index = TrigramIndex(TERMS)
+        assert index.search("suy tim", partition="Tim mach") == [3]
+        assert index.search("viem", partition="tim mach") == []
+        assert index.search("viem", partition="khong co") == []
+
+    def test_limit(self):
+        index = TrigramIndex(TERMS)
+        assert len(index.search("viem", limit=1)) == 1
+
+
+class TestCodeIndex:
+    def test_code_prefix(self):
+        index = CodeIndex(
+            [(5, "", ["J18", "Viêm phổi không rõ tác nhân", "Pneumonia"])],
+            [("J18", 5), ("J180", 6), ("A90", 7)],
+        )
+        assert index.by_code_prefix("j18") == [5, 6]
+        assert index.by_code_prefix("J", limit=1) == [5]
+        assert index.search("pneumonia") == [5]
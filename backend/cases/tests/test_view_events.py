@@ -0,0 +1,161 @@
+"""
+Tests for buffered case view ingestion (cases.view_events).
+"""
+
+import pytest
+from unittest.mock import patch
+from django.db import OperationalError
+from rest_framework.test import APIRequestFactory, force_authenticate
+from cases import view_events
+from cases.analytics_views import CaseAnalyticsViewSet
+from cases.analytics import CaseAnalytics, CaseViewer, CaseViewLog
+
+
+@pytest.fixture(autouse=True)
+def fresh_buffers(monkeypatch, locmem_cache):
+    # No Redis in tests -> in-process buffer
+    monkeypatch.setattr(view_events, "_redis_buffer", None)
+    monkeypatch.setattr(view_events, "_redis_checked", True)
+    monkeypatch.setattr(view_events, "_local_buffer", None)
+
+
+def test_local_buffer_drops_oldest():
+    buffer = view_events.LocalBuffer(maxlen=3)
+    for n in range(5):
+        buffer.push({"n": n})
+
+    assert buffer.dropped == 2
+    assert [e["n"] for e in buffer.pop(2)] == [2, 3]
+    buffer.requeue([{"n": 0}, {"n": 1}])
+    assert [e["n"] for e in buffer.pop(10)] == [0, 1, 4]
+
+
+@pytest.mark.django_db
+class TestViewEvents:
+    def test_inline_event_updates_aggregates(self, case, student_user, settings):
+        settings.VIEW_EVENTS_ASYNC = False
+
+        view_events.record_view_event(case.pk, student_user.pk, time_spent_seconds=60)
+        view_events.record_view_event(case.pk, student_user.pk, time_spent_seconds=120)
+
+        analytics = CaseAnalytics.objects.get(case=case)
+        assert analytics.total_views == 2
+        assert analytics.unique_viewers == 1
+        assert analytics.average_time_spent_seconds == 90
+        assert analytics.last_viewed_at is not None
+        assert CaseViewLog.objects.filter(case=case).count() == 2
+        viewer = CaseViewer.objects.get(case=case, user=student_user)
+        assert viewer.view_count == 2
+        assert viewer.first_viewed_at <= viewer.last_viewed_at
+
+    def test_buffered_until_flush(self, case, student_user, instructor_user, settings):
+        settings.VIEW_EVENTS_ASYNC = True
+        settings.VIEW_EVENTS_FLUSH_SIZE = 3
+        settings.VIEW_EVENTS_FLUSH_INTERVAL_SECONDS = 3600
+
+        view_events.record_view_event(case.pk, student_user.pk)
+        view_events.record_view_event(case.pk, instructor_user.pk)
+        assert not CaseViewLog.objects.filter(case=case).exists()
+
+        # Third event fills the batch
+        view_events.record_view_event(case.pk, student_user.pk)
+        analytics = CaseAnalytics.objects.get(case=case)
+        assert analytics.total_views == 3
+        assert analytics.unique_viewers == 2
+
+        view_events.record_view_event(case.pk, instructor_user.pk)
+        assert view_events.flush_view_events() == 1
+        analytics.refresh_from_db()
+        assert analytics.total_views == 4
+        assert analytics.unique_viewers == 2
+        assert CaseViewer.objects.get(case=case, user=instructor_user).view_count == 2
+
+    def test_events_for_deleted_cases_are_skipped(self, case, student_user):
+        event = {
+            "case_id": case.pk,
+            "user_id": student_user.pk,
+            "time_spent_seconds": 0,
+            "completed": False,
+            "access_method": "direct",
+            "device_type": "",
+            "ip_address": None,
+            "viewed_at": "2025-01-01T08:00:00+00:00",
+        }
+        missing = {**event, "case_id": case.pk + 1000}
+
+        assert view_events.apply_events([event, missing]) == 1
+        assert CaseViewLog.objects.count() == 1
+
+    def test_failed_flush_keeps_events(self, case, student_user, settings):
+        settings.VIEW_EVENTS_ASYNC = True
+        settings.VIEW_EVENTS_FLUSH_INTERVAL_SECONDS = 3600
+        view_events.record_view_event(case.pk, student_user.pk)
+
+        with patch.object(view_events, "apply_events", side_effect=OperationalError):
+            with pytest.raises(OperationalError):
+                view_events.flush_view_events()
+
+        assert view_events.flush_view_events() == 1
+        assert CaseAnalytics.objects.get(case=case).total_views == 1
+
+    def test_idle_buffer_flushed_by_timer(self, case, student_user, settings):
+        settings.VIEW_EVENTS_ASYNC = True
+        settings.VIEW_EVENTS_FLUSH_INTERVAL_SECONDS = 3600
+        view_events.record_view_event(case.pk, student_user.pk)
+
+        assert view_events._flush_local_if_due() == 0
+
+        view_events._local_buffer.flushed_at -= 3600
+        assert view_events._flush_local_if_due() == 1
+        assert CaseAnalytics.objects.get(case=case).total_views == 1
+
+    def test_bad_event_is_dropped(self, case, student_user, settings):
+        settings.VIEW_EVENTS_ASYNC = True
+        settings.VIEW_EVENTS_FLUSH_SIZE = 10
+        settings.VIEW_EVENTS_FLUSH_INTERVAL_SECONDS = 3600
+        view_events.record_view_event(case.pk, student_user.pk, device_type="x" * 60)
+        for _ in range(3):
+            view_events.record_view_event(case.pk, student_user.pk)
+
+        assert view_events.flush_view_events() == 3
+        assert len(view_events._local_buffer) == 0
+        assert CaseViewLog.objects.filter(case=case).count() == 3
+        assert CaseAnalytics.objects.get(case=case).total_views == 3
+
+    def test_record_view_action(self, case, student_user, settings):
+        settings.VIEW_EVENTS_ASYNC = False
+        analytics = CaseAnalytics.objects.create(case=case)
+        view = CaseAnalyticsViewSet.as_view({"post": "record_view"})
+
+        def post(pk):
+            request = APIRequestFactory().post(
+                "/record_view/", {"time_spent_seconds": 30}, format="json"
+            )
+            force_authenticate(request, user=student_user)
+            return view(request, pk=pk)
+
+        response = post(analytics.pk)
+
+        assert response.status_code == 202
+        assert "total_views" not in response.data
+        analytics.refresh_from_db()
+        assert analytics.total_views == 1
+        assert post(analytics.pk + 1000).status_code == 404
+
+    def test_record_view_rejects_bad_payload(self, case, student_user, settings):
+        settings.VIEW_EVENTS_ASYNC = True
+        analytics = CaseAnalytics.objects.create(case=case)
+        view = CaseAnalyticsViewSet.as_view({"post": "record_view"})
+
+        for data in (
+            {"device_type": "x" * 60},
+            {"access_method": "unknown"},
+            {"time_spent_seconds": 2**31},
+            {"time_spent_seconds": -1},
+        ):
+            request = APIRequestFactory().post("/record_view/", data, format="json")
+            force_authenticate(request, user=student_user)
+            assert view(request, pk=analytics.pk).status_code == 400
+
+        # Nothing was buffered
+        assert view_events._local_buffer is None
@@ -0,0 +1,114 @@
+"""
+Tests for CaseViewLog partition maintenance (cases.view_log_partitions).
+"""
+
+import pytest
+from datetime import date, timedelta
+from django.db import connection
+from django.utils import timezone
+from cases.analytics import (
+    CaseViewDaily,
+    CaseViewLog,
+    DashboardRollup,
+    StudentEngagementMetrics,
+)
+from cases.analytics_bulk import recompute_students
+from cases.analytics_rollups import refresh_days
+from cases.analytics_trends import trend_series
+from cases import view_log_partitions as partitions
+
+
+def default_partition_rows():
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT COUNT(*) FROM {partitions.DEFAULT_PARTITION}")
+        return cursor.fetchone()[0]
+
+
+def test_add_months():
+    assert partitions.add_months(date(2025, 11, 1), 3) == date(2026, 2, 1)
+    assert partitions.add_months(date(2025, 1, 1), -1) == date(2024, 12, 1)
+
+
+@pytest.mark.django_db
+class TestViewLogPartitions:
+    def test_upcoming_partitions_exist(self):
+        current = timezone.localdate().replace(day=1)
+
+        partitions.ensure_partitions(months_ahead=3)
+
+        months = partitions.partitions()
+        for n in range(4):
+            assert partitions.add_months(current, n) in months
+
+    def test_partition_takes_rows_from_default(self, case, student_user):
+        far = partitions.add_months(timezone.localdate().replace(day=1), 12)
+        lower, _ = partitions.month_bounds(far)
+        CaseViewLog.objects.create(case=case, user=student_user, viewed_at=lower)
+        assert default_partition_rows() == 1
+
+        created = partitions.ensure_partitions(months_ahead=12)
+
+        assert far in created
+        assert default_partition_rows() == 0
+        assert CaseViewLog.objects.filter(viewed_at=lower).count() == 1
+
+    def test_compaction(self, case, student_user):
+        old = timezone.now() - timedelta(days=400)
+        CaseViewLog.objects.create(
+            case=case, user=student_user, viewed_at=old, time_spent_seconds=30
+        )
+        CaseViewLog.objects.create(
+            case=case,
+            user=student_user,
+            viewed_at=old,
+            time_spent_seconds=90,
+            completed=True,
+        )
+        CaseViewLog.objects.create(case=case, user=student_user)
+
+        partitions.compact_partitions(keep_months=6)
+
+        assert CaseViewLog.objects.count() == 1
+        daily = CaseViewDaily.objects.get(case=case, user=student_user)
+        assert daily.day == timezone.localdate(old)
+        assert daily.views == 2
+        assert daily.completed_views == 1
+        assert daily.time_spent_seconds == 120
+
+    def test_daily_retention(self, case, student_user):
+        today = timezone.localdate()
+        CaseViewDaily.objects.create(
+            case=case, user=student_user, day=today - timedelta(days=1000), views=1
+        )
+        CaseViewDaily.objects.create(case=case, user=student_user, day=today, views=1)
+
+        assert partitions.drop_expired_daily(days=730) == 1
+        assert partitions.drop_expired_daily(days=0) == 0
+        assert CaseViewDaily.objects.count() == 1
+
+    def test_compacted_views_are_still_counted(self, case, student_user):
+        old = timezone.now() - timedelta(days=400)
+        day = timezone.localdate(old)
+        CaseViewLog.objects.create(case=case, user=student_user, viewed_at=old)
+        CaseViewLog.objects.create(case=case, user=student_user, viewed_at=old)
+
+        partitions.compact_partitions(keep_months=6)
+        refresh_days([day])
+
+        platform = DashboardRollup.objects.get(day=day, department=None)
+        assert platform.views == 2
+        assert platform.active_users == 1
+        series = trend_series(day, day, "month")
+        assert series[0]["views"] == 2
+
+    def test_streak_spans_compacted_days(self, case, student_user):
+        today = timezone.localdate()
+        CaseViewLog.objects.create(case=case, user=student_user)
+        CaseViewDaily.objects.create(
+            case=case, user=student_user, day=today - timedelta(days=1), views=3
+        )
+
+        recompute_students([student_user.pk])
+
+        metrics = StudentEngagementMetrics.objects.get(student=student_user)
+        assert metrics.current_streak_days == 2
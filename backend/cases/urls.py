@@ -67,6 +67,7 @@ from .views import (
     submit_case_for_review,
     CaseSearchAPIView,
     CaseSuggestionAPIView,
+    search_index_status,
 )
 
 # Router for ViewSets
@@ -260,6 +261,9 @@ urlpatterns = [
     path("search/", CaseSearchAPIView.as_view(), name="case-search"),
     # Include router URLs for specialties (at the end to avoid conflicts)
     path("search/suggestion/", CaseSuggestionAPIView.as_view(), name="case-search"),
+    path(
+        "search/index-status/", search_index_status, name="case-search-index-status"
+    ),
 
     path("", include(router.urls)),
 ]
@@ -0,0 +1,403 @@
+"""
+Buffered, batched ingestion of case view events.
+
+POST /api/case-analytics/{id}/record_view/ only appends an event to a buffer;
+it no longer inserts a CaseViewLog row, counts distinct viewers over the
+case's whole log and saves the CaseAnalytics row on every view.
+
+The buffer is a Redis list shared by all processes when the default cache is
+django_redis, otherwise an in-process ring buffer; either holds at most
+VIEW_EVENTS_BUFFER_MAX events (oldest dropped first). A flush takes up to
+VIEW_EVENTS_FLUSH_SIZE events and, in one transaction:
+
+- bulk_creates their CaseViewLog rows,
+- upserts their (case, user) pairs into CaseViewer; inserted pairs are the
+  new unique viewers,
+- applies one F()-expression UPDATE per case to CaseAnalytics.
+
+The Redis buffer is flushed by the Celery beat task every
+VIEW_EVENTS_FLUSH_INTERVAL_SECONDS and as soon as a batch is full. The beat
+task cannot reach another process's memory, so the in-process buffer is
+flushed by its own process: when a batch is full and by a daemon timer
+thread every interval. With VIEW_EVENTS_ASYNC off every event is applied
+immediately.
+
+A batch that fails is retried event by event and the events that still fail
+are logged and dropped, so one bad event cannot block the buffer. Only a
+lost database connection puts the batch back for the next flush.
+"""
+
+import atexit
+import json
+import logging
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import InterfaceError, OperationalError, connection, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+BUFFER_KEY = "view_events:buffer"
+FLUSH_QUEUED_KEY = "view_events:flush_queued"
+
+
+class RedisBuffer:
+    """Events as JSON in one capped Redis list (RPUSH + LTRIM / LRANGE + LTRIM)."""
+
+    def __init__(self, client, maxlen: int):
+        self.client = client
+        self.maxlen = maxlen
+        self.dropped = 0
+        # Share the cache's key prefix
+        self.key = cache.make_key(BUFFER_KEY)
+
+    def push(self, event: Dict) -> int:
+        pipe = self.client.pipeline()
+        pipe.rpush(self.key, json.dumps(event))
+        pipe.ltrim(self.key, -self.maxlen, -1)
+        size, _ = pipe.execute()
+        if size > self.maxlen:
+            self.dropped += size - self.maxlen
+        return min(size, self.maxlen)
+
+    def pop(self, count: int) -> List[Dict]:
+        pipe = self.client.pipeline()  # MULTI/EXEC
+        pipe.lrange(self.key, 0, count - 1)
+        pipe.ltrim(self.key, count, -1)
+        raw, _ = pipe.execute()
+        return [json.loads(item) for item in raw]
+
+    def requeue(self, events: List[Dict]):
+        if events:
+            pipe = self.client.pipeline()
+            pipe.lpush(self.key, *[json.dumps(e) for e in reversed(events)])
+            pipe.ltrim(self.key, -self.maxlen, -1)
+            pipe.execute()
+
+    def __len__(self):
+        return self.client.llen(self.key)
+
+
+class LocalBuffer:
+    """Bounded in-process ring buffer."""
+
+    def __init__(self, maxlen: int):
+        self.events = deque(maxlen=maxlen)
+        self.lock = threading.Lock()
+        self.dropped = 0
+        self.flushed_at = time.monotonic()
+
+    def push(self, event: Dict) -> int:
+        with self.lock:
+            if len(self.events) == self.events.maxlen:
+                self.dropped += 1
+            self.events.append(event)
+            return len(self.events)
+
+    def pop(self, count: int) -> List[Dict]:
+        with self.lock:
+            return [self.events.popleft() for _ in range(min(count, len(self.events)))]
+
+    def requeue(self, events: List[Dict]):
+        with self.lock:
+            room = self.events.maxlen - len(self.events)
+            self.events.extendleft(reversed(events[:room]))
+
+    def __len__(self):
+        return len(self.events)
+
+
+_redis_buffer: Optional[RedisBuffer] = None
+_redis_checked = False
+_local_buffer: Optional[LocalBuffer] = None
+_buffer_lock = threading.Lock()
+
+
+def _get_local_buffer() -> LocalBuffer:
+    global _local_buffer
+    with _buffer_lock:
+        if _local_buffer is None:
+            _local_buffer = LocalBuffer(settings.VIEW_EVENTS_BUFFER_MAX)
+            atexit.register(_flush_local_at_exit)
+            threading.Thread(
+                target=_flush_local_periodically, name="view-events-flush", daemon=True
+            ).start()
+    return _local_buffer
+
+
+def _get_redis_buffer() -> Optional[RedisBuffer]:
+    """The shared buffer, or None when the cache is not django_redis."""
+    global _redis_buffer, _redis_checked
+    if not _redis_checked:
+        try:
+            from django_redis import get_redis_connection
+
+            _redis_buffer = RedisBuffer(
+                get_redis_connection("default"), settings.VIEW_EVENTS_BUFFER_MAX
+            )
+        except (ImportError, NotImplementedError):
+            _redis_buffer = None
+        _redis_checked = True
+    return _redis_buffer
+
+
+def record_view_event(
+    case_id: int,
+    user_id: int,
+    time_spent_seconds: int = 0,
+    completed: bool = False,
+    access_method: str = "direct",
+    device_type: str = "",
+    ip_address: Optional[str] = None,
+):
+    """Buffer one view of a case (applied to the database on the next flush)."""
+    event = {
+        "case_id": case_id,
+        "user_id": user_id,
+        "time_spent_seconds": max(0, int(time_spent_seconds or 0)),
+        "completed": bool(completed),
+        "access_method": access_method or "direct",
+        "device_type": device_type or "",
+        "ip_address": ip_address,
+        "viewed_at": timezone.now().isoformat(),
+    }
+
+    if not settings.VIEW_EVENTS_ASYNC:
+        apply_events([event])
+        return
+
+    buffer = _get_redis_buffer()
+    if buffer is not None:
+        try:
+            if buffer.push(event) >= settings.VIEW_EVENTS_FLUSH_SIZE:
+                _queue_flush()
+            return
+        except Exception as e:
+            # Redis down - keep the event in this process instead
+            logger.warning(f"View event buffered in process, Redis unavailable: {e}")
+
+    local = _get_local_buffer()
+    size = local.push(event)
+    due = (
+        time.monotonic() - local.flushed_at
+        >= settings.VIEW_EVENTS_FLUSH_INTERVAL_SECONDS
+    )
+    if size >= settings.VIEW_EVENTS_FLUSH_SIZE or due:
+        flush_buffer(local)
+
+
+def _queue_flush():
+    """Ask a worker to flush the Redis buffer unless a flush is already queued."""
+    if cache.add(FLUSH_QUEUED_KEY, 1, timeout=60) is False:
+        return
+
+    from cases.tasks import flush_view_events_task
+
+    try:
+        flush_view_events_task.delay()
+    except Exception as e:
+        logger.warning(f"View event flush not queued, flushing inline: {e}")
+        flush_view_events()
+
+
+def flush_buffer(buffer, max_batches: Optional[int] = None) -> int:
+    """Apply buffered events batch by batch; returns the number applied."""
+    applied = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        events = buffer.pop(settings.VIEW_EVENTS_FLUSH_SIZE)
+        if not events:
+            break
+        try:
+            applied += apply_events(events)
+        except (InterfaceError, OperationalError):
+            # Database unreachable - put the batch back for the next flush
+            buffer.requeue(events)
+            raise
+        except Exception as e:
+            logger.warning(f"View event batch failed, applying one by one: {e}")
+            applied += _apply_one_by_one(buffer, events)
+        batches += 1
+    if isinstance(buffer, LocalBuffer):
+        buffer.flushed_at = time.monotonic()
+    return applied
+
+
+def _apply_one_by_one(buffer, events: List[Dict]) -> int:
+    """Apply a failed batch event by event, dropping the events that fail."""
+    applied = 0
+    for index, event in enumerate(events):
+        try:
+            applied += apply_events([event])
+        except (InterfaceError, OperationalError):
+            buffer.requeue(events[index:])
+            raise
+        except Exception as e:
+            logger.error(f"Dropped view event {event}: {e}")
+    return applied
+
+
+def flush_view_events(max_batches: Optional[int] = None) -> int:
+    """Flush the shared buffer and this process's local buffer."""
+    cache.delete(FLUSH_QUEUED_KEY)
+    applied = 0
+    buffer = _get_redis_buffer()
+    if buffer is not None:
+        applied += flush_buffer(buffer, max_batches)
+    if _local_buffer is not None:
+        applied += flush_buffer(_local_buffer, max_batches)
+    return applied
+
+
+def _flush_local_if_due() -> int:
+    """Flush this process's buffer if no flush ran for a whole interval."""
+    buffer = _local_buffer
+    if buffer is None or not len(buffer):
+        return 0
+    if (
+        time.monotonic() - buffer.flushed_at
+        < settings.VIEW_EVENTS_FLUSH_INTERVAL_SECONDS
+    ):
+        return 0
+    return flush_buffer(buffer)
+
+
+def _flush_local_periodically():
+    while True:
+        time.sleep(settings.VIEW_EVENTS_FLUSH_INTERVAL_SECONDS)
+        try:
+            _flush_local_if_due()
+        except Exception as e:
+            logger.error(f"Error flushing buffered view events: {e}")
+        finally:
+            # Don't hold this thread's connection open between flushes
+            connection.close()
+
+
+def _flush_local_at_exit():
+    if _local_buffer is not None and len(_local_buffer):
+        try:
+            flush_buffer(_local_buffer)
+        except Exception as e:
+            logger.error(f"Lost {len(_local_buffer)} buffered view events: {e}")
+
+
+def _upsert_viewers(events: List[Dict]) -> Counter:
+    """
+    Upsert (case, user) pairs into CaseViewer.
+    Returns case_id -> number of pairs that did not exist yet.
+    """
+    pairs: Dict[tuple, List] = {}
+    for event in events:
+        key = (event["case_id"], event["user_id"])
+        at = event["viewed_at"]
+        if key in pairs:
+            first, last, count = pairs[key]
+            pairs[key] = [min(first, at), max(last, at), count + 1]
+        else:
+            pairs[key] = [at, at, 1]
+
+    # Sorted so concurrent flushes lock rows in the same order
+    rows = [(*key, *pairs[key]) for key in sorted(pairs)]
+    placeholders = ", ".join(["(%s, %s, %s, %s, %s)"] * len(rows))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO cases_caseviewer"
+            " (case_id, user_id, first_viewed_at, last_viewed_at, view_count)"
+            f" VALUES {placeholders}"
+            " ON CONFLICT (case_id, user_id) DO UPDATE SET"
+            " last_viewed_at = GREATEST(cases_caseviewer.last_viewed_at,"
+            " EXCLUDED.last_viewed_at),"
+            " view_count = cases_caseviewer.view_count + EXCLUDED.view_count"
+            " RETURNING case_id, (xmax = 0)",
+            [value for row in rows for value in row],
+        )
+        return Counter(case_id for case_id, inserted in cursor.fetchall() if inserted)
+
+
+def apply_events(events: List[Dict]) -> int:
+    """Write one batch of view events; returns the number applied."""
+    from accounts.models import User
+    from cases.analytics import CaseAnalytics, CaseViewLog
+    from cases.analytics_rollups import add_views
+    from cases.analytics_trends import invalidate_trends
+    from cases.models import Case
+
+    events = [
+        {**event, "viewed_at": datetime.fromisoformat(event["viewed_at"])}
+        for event in events
+    ]
+
+    # Cases / users deleted since the view was buffered
+    case_ids = set(
+        Case.objects.filter(pk__in={e["case_id"] for e in events}).values_list(
+            "pk", flat=True
+        )
+    )
+    user_ids = set(
+        User.objects.filter(pk__in={e["user_id"] for e in events}).values_list(
+            "pk", flat=True
+        )
+    )
+    events = [
+        e for e in events if e["case_id"] in case_ids and e["user_id"] in user_ids
+    ]
+    if not events:
+        return 0
+
+    per_case: Dict[int, Dict] = {}
+    for event in events:
+        stats = per_case.setdefault(
+            event["case_id"], {"views": 0, "time": 0, "last": event["viewed_at"]}
+        )
+        stats["views"] += 1
+        stats["time"] += event["time_spent_seconds"]
+        stats["last"] = max(stats["last"], event["viewed_at"])
+
+    with transaction.atomic():
+        CaseViewLog.objects.bulk_create(
+            [
+                CaseViewLog(
+                    case_id=e["case_id"],
+                    user_id=e["user_id"],
+                    viewed_at=e["viewed_at"],
+                    time_spent_seconds=e["time_spent_seconds"],
+                    completed=e["completed"],
+                    access_method=e["access_method"],
+                    device_type=e["device_type"],
+                    ip_address=e["ip_address"],
+                )
+                for e in events
+            ]
+        )
+        new_viewers = _upsert_viewers(events)
+
+        CaseAnalytics.objects.bulk_create(
+            [CaseAnalytics(case_id=case_id) for case_id in per_case],
+            ignore_conflicts=True,
+        )
+        now = timezone.now()
+        for case_id in sorted(per_case):
+            stats = per_case[case_id]
+            CaseAnalytics.objects.filter(case_id=case_id).update(
+                average_time_spent_seconds=(
+                    F("average_time_spent_seconds") * F("total_views") + stats["time"]
+                )
+                / (F("total_views") + stats["views"]),
+                total_views=F("total_views") + stats["views"],
+                unique_viewers=F("unique_viewers") + new_viewers[case_id],
+                last_viewed_at=Greatest("last_viewed_at", Value(stats["last"])),
+                last_updated_at=now,
+            )
+        add_views(Counter(timezone.localdate(e["viewed_at"]) for e in events))
+        invalidate_trends()
+
+    return len(events)
@@ -0,0 +1,214 @@
+"""
+Partition maintenance, compaction and retention for CaseViewLog.
+
+cases_caseviewlog is range-partitioned by month on viewed_at (see migration
+0012), with month bounds in TIME_ZONE and a DEFAULT partition catching rows
+outside every month. maintain_view_log(), run daily by Celery beat:
+
+- creates the partitions for the current and next
+  VIEW_LOG_PARTITION_MONTHS_AHEAD months (moving any rows for them out of
+  the DEFAULT partition first),
+- compacts raw events older than VIEW_LOG_RAW_RETENTION_MONTHS whole
+  months into CaseViewDaily rows and drops their partitions,
+- deletes CaseViewDaily rows older than VIEW_LOG_DAILY_RETENTION_DAYS
+  (0 keeps them).
+
+CaseViewer and CaseAnalytics keep their all-time figures; only raw events
+are removed. Anything that counts views over past dates reads both sources
+through view_querysets(): each day's views are either still raw or already
+compacted, never both.
+"""
+
+import logging
+import re
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+TABLE = "cases_caseviewlog"
+DEFAULT_PARTITION = f"{TABLE}_default"
+PARTITION_RE = re.compile(rf"^{TABLE}_p(\d{{4}})(\d{{2}})$")
+COLUMNS = (
+    "id, viewed_at, time_spent_seconds, completed, access_method, device_type,"
+    " ip_address, case_id, user_id"
+)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_bounds(month: date) -> Tuple[datetime, datetime]:
+    """[start, end) of a month in TIME_ZONE."""
+    tz = ZoneInfo(settings.TIME_ZONE)
+    return (
+        datetime.combine(month, time.min, tz),
+        datetime.combine(add_months(month, 1), time.min, tz),
+    )
+
+
+def partition_name(month: date) -> str:
+    return f"{TABLE}_p{month:%Y%m}"
+
+
+def partitions() -> List[date]:
+    """Months that have a partition, oldest first."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits"
+            " JOIN pg_class parent ON parent.oid = pg_inherits.inhparent"
+            " JOIN pg_class child ON child.oid = pg_inherits.inhrelid"
+            " WHERE parent.relname = %s",
+            [TABLE],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+
+    months = []
+    for name in names:
+        match = PARTITION_RE.match(name)
+        if match:
+            months.append(date(int(match.group(1)), int(match.group(2)), 1))
+    return sorted(months)
+
+
+def view_querysets(start_date: date, end_date: date):
+    """
+    (CaseViewLog, CaseViewDaily) querysets for the local dates
+    start_date..end_date: raw events plus the days compacted out of them.
+    """
+    from cases.analytics import CaseViewDaily, CaseViewLog
+    from cases.analytics_trends import local_range
+
+    start, end = local_range(start_date, end_date)
+    return (
+        CaseViewLog.objects.filter(viewed_at__gte=start, viewed_at__lt=end),
+        CaseViewDaily.objects.filter(day__gte=start_date, day__lte=end_date),
+    )
+
+
+def view_count(raw, daily) -> int:
+    return raw.count() + (daily.aggregate(views=Sum("views"))["views"] or 0)
+
+
+def distinct_viewers(raw, daily) -> int:
+    return raw.values("user").union(daily.values("user")).count()
+
+
+def create_partition(month: date):
+    """
+    Create the partition for `month`. Rows for that month already in the
+    DEFAULT partition are moved into it before it is attached.
+    """
+    name = partition_name(month)
+    lower, upper = month_bounds(month)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TABLE {name}"
+            f" (LIKE {TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+        )
+        cursor.execute(
+            f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION}"
+            " WHERE viewed_at >= %s AND viewed_at < %s RETURNING *)"
+            f" INSERT INTO {name} ({COLUMNS}) SELECT {COLUMNS} FROM moved",
+            [lower, upper],
+        )
+        cursor.execute(
+            f"ALTER TABLE {TABLE} ATTACH PARTITION {name}"
+            f" FOR VALUES FROM ('{lower.isoformat()}') TO ('{upper.isoformat()}')"
+        )
+
+
+def ensure_partitions(months_ahead: Optional[int] = None) -> List[date]:
+    """Create missing partitions up to `months_ahead` months from now."""
+    if months_ahead is None:
+        months_ahead = settings.VIEW_LOG_PARTITION_MONTHS_AHEAD
+    current = timezone.localdate().replace(day=1)
+    existing = set(partitions())
+
+    created = []
+    for n in range(months_ahead + 1):
+        month = add_months(current, n)
+        if month not in existing:
+            create_partition(month)
+            created.append(month)
+    return created
+
+
+def _compact(cursor, source: str, where: str, params: list) -> int:
+    """Add the raw events of `source` matching `where` to CaseViewDaily."""
+    cursor.execute(
+        "INSERT INTO cases_caseviewdaily"
+        " (case_id, user_id, day, views, completed_views, time_spent_seconds)"
+        " SELECT case_id, user_id, (viewed_at AT TIME ZONE %s)::date, COUNT(*),"
+        " COUNT(*) FILTER (WHERE completed), SUM(time_spent_seconds)"
+        f" FROM {source} WHERE {where} GROUP BY 1, 2, 3"
+        " ON CONFLICT (case_id, user_id, day) DO UPDATE SET"
+        " views = cases_caseviewdaily.views + EXCLUDED.views,"
+        " completed_views = cases_caseviewdaily.completed_views"
+        " + EXCLUDED.completed_views,"
+        " time_spent_seconds = cases_caseviewdaily.time_spent_seconds"
+        " + EXCLUDED.time_spent_seconds",
+        [settings.TIME_ZONE, *params],
+    )
+    return cursor.rowcount
+
+
+def compact_partitions(keep_months: Optional[int] = None) -> Dict[str, int]:
+    """
+    Roll raw events older than `keep_months` whole months (plus the current
+    one) into CaseViewDaily and drop their partitions.
+    """
+    if keep_months is None:
+        keep_months = settings.VIEW_LOG_RAW_RETENTION_MONTHS
+    cutoff = add_months(timezone.localdate().replace(day=1), -keep_months)
+    result = {"partitions_dropped": 0, "daily_rows": 0}
+
+    for month in partitions():
+        if month >= cutoff:
+            break
+        with transaction.atomic(), connection.cursor() as cursor:
+            result["daily_rows"] += _compact(cursor, partition_name(month), "TRUE", [])
+            cursor.execute(f"DROP TABLE {partition_name(month)}")
+        result["partitions_dropped"] += 1
+        logger.info(f"Compacted view log partition {partition_name(month)}")
+
+    # Stray old rows in the DEFAULT partition
+    cutoff_at, _ = month_bounds(cutoff)
+    with transaction.atomic(), connection.cursor() as cursor:
+        result["daily_rows"] += _compact(
+            cursor, DEFAULT_PARTITION, "viewed_at < %s", [cutoff_at]
+        )
+        cursor.execute(
+            f"DELETE FROM {DEFAULT_PARTITION} WHERE viewed_at < %s", [cutoff_at]
+        )
+
+    return result
+
+
+def drop_expired_daily(days: Optional[int] = None) -> int:
+    """Delete CaseViewDaily rows older than `days` (0 keeps everything)."""
+    from cases.analytics import CaseViewDaily
+
+    if days is None:
+        days = settings.VIEW_LOG_DAILY_RETENTION_DAYS
+    if not days:
+        return 0
+    cutoff = timezone.localdate() - timedelta(days=days)
+    deleted, _ = CaseViewDaily.objects.filter(day__lt=cutoff).delete()
+    return deleted
+
+
+def maintain_view_log() -> Dict[str, int]:
+    created = ensure_partitions()
+    result = compact_partitions()
+    result["partitions_created"] = len(created)
+    result["daily_rows_deleted"] = drop_expired_daily()
+    return result
@@ -2,7 +2,6 @@
 
 import secrets
 from datetime import timedelta
-from difflib import SequenceMatcher
 
 # Type hints to help Pylance
 from typing import TYPE_CHECKING
@@ -17,9 +16,14 @@ from rest_framework import filters, generics, parsers, permissions, status, view
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.response import Response
-from cases.search.queries import rank_cases
-from cases.pagination import CaseSearchPagination
-from cases.search.utils import unaccent
+from cases.search.queries import rank_cases, search_cases
+from cases.pagination import CaseSearchCursorPagination
+from cases.search.suggest import suggest
+from cases.search.facets import cached_facet_counts
+from cases.search.terminology import icd10_index, medical_term_index
+from cases.search.normalize import unaccent
+from cases.search.utils import segmentation_stats
+from cases.search.indexing import index_queue_stats
 
 if TYPE_CHECKING:
     from accounts.models import User
@@ -547,7 +551,10 @@ class MedicalTermRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView
 
 
 class MedicalTermAutocompleteView(generics.ListAPIView):
-    """Autocomplete endpoint for medical terms with fuzzy matching and caching"""
+    """
+    Autocomplete endpoint for medical terms with diacritic-insensitive
+    fuzzy (trigram) matching, served from an in-memory index
+    """
 
     serializer_class = MedicalTermSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -557,47 +564,17 @@ class MedicalTermAutocompleteView(generics.ListAPIView):
         specialty = request.query_params.get("specialty")
         limit = int(request.query_params.get("limit", 20))
 
-        cache_key = f"term_autocomplete:{q}:{specialty}:{limit}"
-        cached = cache.get(cache_key)
-        if cached is not None:
-            return Response(cached)
-
-        # Basic exact / icontains matches first
-        qs = MedicalTerm.objects.filter(is_active=True)
-        if specialty:
-            qs = qs.filter(specialty__iexact=specialty)
-
         if q.strip() == "":
+            qs = MedicalTerm.objects.filter(is_active=True)
+            if specialty:
+                qs = qs.filter(specialty__iexact=specialty)
             results = qs.order_by("vietnamese_term")[:limit]
-            serialized = self.get_serializer(results, many=True).data
-            cache.set(cache_key, serialized, 60 * 5)
-            return Response(serialized)
-
-        # Narrow by simple icontains
-        icontains_qs = qs.filter(
-            Q(vietnamese_term__icontains=q)
-            | Q(term__icontains=q)
-            | Q(english_term__icontains=q)
-        )[:100]
-
-        # Score remaining candidates using SequenceMatcher
-        candidates = list(icontains_qs)
-        # If too few candidates, expand search by all terms in specialty (limit 500)
-        if len(candidates) < 10:
-            extra_qs = qs.exclude(id__in=[c.id for c in candidates])[:500]  # type: ignore[attr-defined]
-            candidates.extend(list(extra_qs))
-
-        scored = []
-        for term in candidates:
-            name = (term.vietnamese_term or term.term or term.english_term).lower()
-            score = SequenceMatcher(None, q.lower(), name).ratio()
-            scored.append((score, term))
-
-        scored.sort(key=lambda s: s[0], reverse=True)
-        top = [t for _, t in scored[:limit]]
-        serialized = self.get_serializer(top, many=True).data
-        cache.set(cache_key, serialized, 60 * 5)
-        return Response(serialized)
+            return Response(self.get_serializer(results, many=True).data)
+
+        ids = medical_term_index.get().search(q, partition=specialty, limit=limit)
+        terms = MedicalTerm.objects.in_bulk(ids)
+        top = [terms[pk] for pk in ids if pk in terms]
+        return Response(self.get_serializer(top, many=True).data)
 
 
 class ICD10ListView(generics.ListAPIView):
@@ -605,18 +582,17 @@ class ICD10ListView(generics.ListAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        qs = ICD10Code.objects.filter(is_active=True)
         q = self.request.query_params.get("q")
         code = self.request.query_params.get("code")
         if code:
-            qs = qs.filter(code__istartswith=code)
+            ids = icd10_index.get().by_code_prefix(code, limit=200)
         elif q:
-            qs = qs.filter(
-                Q(description_vi__icontains=q)
-                | Q(description_en__icontains=q)
-                | Q(code__icontains=q)
-            )
-        return qs.order_by("code")[:200]
+            ids = icd10_index.get().search(q, limit=200)
+        else:
+            return ICD10Code.objects.filter(is_active=True).order_by("code")[:200]
+
+        codes = ICD10Code.objects.in_bulk(ids)
+        return [codes[pk] for pk in ids if pk in codes]
 
 
 class AbbreviationListCreateView(generics.ListCreateAPIView):
@@ -1928,6 +1904,79 @@ def case_summary_view(request):
     return Response(serializer.data)
 
 
+def visible_cases(queryset, user):
+    """
+    Role & permission-based visibility filtering, shared by the case list and
+    search.
+
+    Instructors: see cases from their department, public cases, or cases shared to them (individual),
+    department-shared (target_department), or public-share_type permissions; never drafts.
+    Students: only their own cases, or cases shared to them/department/public.
+    """
+    if user.is_authenticated and getattr(user, "is_instructor", False):
+        department_id = user.department_id  # type: ignore[attr-defined]
+        # Active (and not expired) permission-based access
+        permission_active_q = Q(permissions__is_active=True) & (
+            Q(permissions__expires_at__isnull=True)
+            | Q(permissions__expires_at__gte=timezone.now())
+        )
+        if department_id is not None:
+            perm_dept_q = Q(
+                permissions__share_type="department",
+                permissions__target_department_id=department_id,
+            )
+        else:
+            perm_dept_q = Q(pk__in=[])
+        permission_q = permission_active_q & (
+            Q(permissions__user=user)  # individual share
+            | perm_dept_q
+            | Q(permissions__share_type="public")
+        )
+
+        if department_id is not None:
+            dept_filter = Q(student__department_id=department_id) | Q(
+                repository__department_id=department_id
+            )
+        else:
+            dept_filter = Q(pk__in=[])
+        queryset = queryset.filter(
+            dept_filter | Q(is_public=True) | permission_q
+        ).distinct()
+
+        # Instructors should not see draft cases (only students see their own drafts)
+        queryset = queryset.exclude(case_status="draft")
+
+    elif user.is_authenticated and getattr(user, "is_student", False):
+        department_id = user.department_id  # type: ignore[attr-defined]
+        permission_active_q = Q(permissions__is_active=True) & (
+            Q(permissions__expires_at__isnull=True)
+            | Q(permissions__expires_at__gte=timezone.now())
+        )
+        if department_id is not None:
+            perm_dept_q = Q(
+                permissions__share_type="department",
+                permissions__target_department_id=department_id,
+            )
+        else:
+            perm_dept_q = Q(pk__in=[])
+        permission_q = permission_active_q & (
+            Q(permissions__user=user)
+            | perm_dept_q
+            | Q(permissions__share_type="public")
+        )
+
+        queryset = queryset.filter(Q(student=user) | permission_q).distinct()
+
+    return queryset
+
+
+def visibility_scope(user):
+    """Cache-key scope of visible_cases(): everything, or per user."""
+    if getattr(user, "is_instructor", False) or getattr(user, "is_student", False):
+        return f"user:{user.pk}"
+    return "all"
+
+
 class CaseListCreateView(generics.ListCreateAPIView):
     """
     List cases with advanced filtering and create new cases
@@ -2016,42 +2065,10 @@ class CaseListCreateView(generics.ListCreateAPIView):
 
         user = self.request.user
 
-        # Role & permission-based visibility filtering
-        # Instructors: see cases from their department, public cases, or cases shared to them (individual),
-        # department-shared (target_department), or public-share_type permissions.
-        # Students: only their own, public, or shared cases
+        queryset = visible_cases(queryset, user)
+
         if user.is_authenticated and getattr(user, "is_instructor", False):
             department_id = user.department_id  # type: ignore[attr-defined]
-            # Active (and not expired) permission-based access
-            permission_active_q = Q(permissions__is_active=True) & (
-                Q(permissions__expires_at__isnull=True)
-                | Q(permissions__expires_at__gte=timezone.now())
-            )
-            if department_id is not None:
-                perm_dept_q = Q(
-                    permissions__share_type="department",
-                    permissions__target_department_id=department_id,
-                )
-            else:
-                perm_dept_q = Q(pk__in=[])
-            permission_q = permission_active_q & (
-                Q(permissions__user=user)  # individual share
-                | perm_dept_q
-                | Q(permissions__share_type="public")
-            )
-
-            if department_id is not None:
-                dept_filter = Q(student__department_id=department_id) | Q(
-                    repository__department_id=department_id
-                )
-            else:
-                dept_filter = Q(pk__in=[])
-            queryset = queryset.filter(
-                dept_filter | Q(is_public=True) | permission_q
-            ).distinct()
-
-            # Instructors should not see draft cases (only students see their own drafts)
-            queryset = queryset.exclude(case_status="draft")
 
             # Dedicated grading pool mode:
             # only ungraded submitted cases from instructor's own department,
@@ -2082,28 +2099,6 @@ class CaseListCreateView(generics.ListCreateAPIView):
                     .distinct()
                 )
 
-        # Students: only their own cases, public cases, or cases shared to them/department/public
-        elif user.is_authenticated and getattr(user, "is_student", False):
-            department_id = user.department_id  # type: ignore[attr-defined]
-            permission_active_q = Q(permissions__is_active=True) & (
-                Q(permissions__expires_at__isnull=True)
-                | Q(permissions__expires_at__gte=timezone.now())
-            )
-            if department_id is not None:
-                perm_dept_q = Q(
-                    permissions__share_type="department",
-                    permissions__target_department_id=department_id,
-                )
-            else:
-                perm_dept_q = Q(pk__in=[])
-            permission_q = permission_active_q & (
-                Q(permissions__user=user)
-                | perm_dept_q
-                | Q(permissions__share_type="public")
-            )
-
-            queryset = queryset.filter(Q(student=user) | permission_q).distinct()
-
         # Date range filtering
         date_from = self.request.query_params.get("date_from")
         date_to = self.request.query_params.get("date_to")
@@ -2389,19 +2384,39 @@ class CaseSearchAPIView(generics.ListAPIView):
     """
     Hybrid Vietnamese search (FTS + trigram):
     - VnCoreNLP segmentation
-    - Weighted ranking
+    - Only cases the user can see in the case list
+    - Index-backed candidates, top-K weighted re-ranking
+    - Keyset (cursor) pages on (score, id)
+    - `facets=true`: specialty/status/priority/complexity counts over all
+      results, one grouped query, cached per (query, visibility scope)
     """
 
     serializer_class = CaseSearchSerializer
-    pagination_class = CaseSearchPagination
+    pagination_class = CaseSearchCursorPagination
 
     def get_queryset(self):
         query = self.request.query_params.get("q", "").strip()
         if not query:
             raise ValidationError({"q": "Query parameter `q` is required"})
 
-        base_qs = Case.objects.all()  # or public-only, depending on intent
-        return rank_cases(base_qs, query)
+        visible_ids = visible_cases(Case.objects.all(), self.request.user).values("pk")
+        base_qs = Case.objects.filter(pk__in=visible_ids)
+        return search_cases(base_qs, query)
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.get_queryset()
+        page = self.paginate_queryset(queryset)
+        response = self.get_paginated_response(
+            self.get_serializer(page, many=True).data
+        )
+
+        if request.query_params.get("facets", "").lower() in ("1", "true", "yes"):
+            response.data["facets"] = cached_facet_counts(
+                queryset,
+                request.query_params["q"],
+                visibility_scope(request.user),
+            )
+        return response
 
 
 # dummy
@@ -2420,6 +2435,23 @@ class CaseSuggestionAPIView(generics.ListAPIView):
         if len(normalized) < 2:
             return CaseSearchToken.objects.none()
 
-        return CaseSearchToken.objects.filter(token__startswith=normalized).order_by(
-            "-frequency", "display"
-        )[:10]
+        # Served from the in-memory index, no DB round trip per keystroke
+        return [
+            CaseSearchToken(token=token, display=display, frequency=frequency)
+            for token, display, frequency in suggest(normalized)
+        ]
+
+
+@api_view(["GET"])
+@permission_classes([permissions.IsAuthenticated])
+def search_index_status(request):
+    """
+    Search-index queue depth and lag, plus segmenter cache and query
+    segmentation latency of this process (Admin only)
+
+    GET /api/cases/search/index-status/
+    """
+    if not request.user.is_admin_user:
+        raise PermissionDenied("Only admins can view search index status")
+
+    return Response({**index_queue_stats(), "segmentation": segmentation_stats()})
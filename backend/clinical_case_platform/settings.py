@@ -315,6 +315,57 @@ CELERY_TIMEZONE = "Asia/Ho_Chi_Minh"
 CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 30 * 60  # 30 minutes
 
+# Search indexing: rebuild case search fields in Celery, coalescing the
+# saves of one case that land within the debounce window
+SEARCH_INDEX_ASYNC = config("SEARCH_INDEX_ASYNC", default=True, cast=bool)
+SEARCH_INDEX_DEBOUNCE_SECONDS = config(
+    "SEARCH_INDEX_DEBOUNCE_SECONDS", default=5, cast=float
+)
+
+# Case search: candidates kept per index (FTS / trigram) for re-ranking
+SEARCH_TOP_K = config("SEARCH_TOP_K", default=500, cast=int)
+
+# Autocomplete: how often each process checks for token table changes
+SEARCH_SUGGEST_REFRESH_SECONDS = config(
+    "SEARCH_SUGGEST_REFRESH_SECONDS", default=30, cast=float
+)
+
+# Search facet counts: cached per (query, visibility scope)
+SEARCH_FACET_CACHE_SECONDS = config("SEARCH_FACET_CACHE_SECONDS", default=60, cast=int)
+
+# Case view events: buffered (Redis list or in-process ring buffer) and
+# written in batches instead of per request
+VIEW_EVENTS_ASYNC = config("VIEW_EVENTS_ASYNC", default=True, cast=bool)
+VIEW_EVENTS_FLUSH_SIZE = config("VIEW_EVENTS_FLUSH_SIZE", default=500, cast=int)
+VIEW_EVENTS_FLUSH_INTERVAL_SECONDS = config(
+    "VIEW_EVENTS_FLUSH_INTERVAL_SECONDS", default=10, cast=float
+)
+VIEW_EVENTS_BUFFER_MAX = config("VIEW_EVENTS_BUFFER_MAX", default=100000, cast=int)
+
+# Analytics dashboard trends: cached per (period, bucket, department scope),
+# invalidated on new cases / view events
+ANALYTICS_TRENDS_CACHE_SECONDS = config(
+    "ANALYTICS_TRENDS_CACHE_SECONDS", default=300, cast=int
+)
+
+# Dashboard overview rollups: full recompute of today/yesterday this often,
+# F() deltas for new cases and view events in between
+ANALYTICS_ROLLUP_INTERVAL_SECONDS = config(
+    "ANALYTICS_ROLLUP_INTERVAL_SECONDS", default=300, cast=float
+)
+
+# CaseViewLog monthly partitions: created ahead of time; raw events older
+# than the retention are compacted into daily rows (0 = keep daily rows)
+VIEW_LOG_PARTITION_MONTHS_AHEAD = config(
+    "VIEW_LOG_PARTITION_MONTHS_AHEAD", default=3, cast=int
+)
+VIEW_LOG_RAW_RETENTION_MONTHS = config(
+    "VIEW_LOG_RAW_RETENTION_MONTHS", default=6, cast=int
+)
+VIEW_LOG_DAILY_RETENTION_DAYS = config(
+    "VIEW_LOG_DAILY_RETENTION_DAYS", default=730, cast=int
+)
+
 # Celery Beat Schedule (for periodic tasks)
 try:
     from celery.schedules import crontab
@@ -333,6 +384,18 @@ try:
             "task": "cases.views.cleanup_expired_permissions",
             "schedule": crontab(hour=4, minute=0),  # Run daily at 4 AM
         },
+        "flush-view-events": {
+            "task": "cases.tasks.flush_view_events_task",
+            "schedule": VIEW_EVENTS_FLUSH_INTERVAL_SECONDS,  # seconds
+        },
+        "maintain-view-log": {
+            "task": "cases.tasks.maintain_view_log_task",
+            "schedule": crontab(hour=1, minute=30),  # Run daily at 1:30 AM
+        },
+        "refresh-dashboard-rollups": {
+            "task": "cases.tasks.refresh_dashboard_rollups_task",
+            "schedule": ANALYTICS_ROLLUP_INTERVAL_SECONDS,  # seconds
+        },
     }
 except ImportError:
     # Celery not installed, skip beat schedule
@@ -371,6 +371,29 @@ CELERY_TIMEZONE = TIME_ZONE
 CELERY_TASK_TIME_LIMIT = 30 * 60  # 30 minutes for testing
 CELERY_TASK_SOFT_TIME_LIMIT = 25 * 60  # 25 minutes soft limit
 
+# Search indexing runs inline in tests (no Celery worker)
+SEARCH_INDEX_ASYNC = False
+SEARCH_INDEX_DEBOUNCE_SECONDS = 0
+
+SEARCH_TOP_K = 500
+
+SEARCH_SUGGEST_REFRESH_SECONDS = 0
+
+SEARCH_FACET_CACHE_SECONDS = 0
+
+# View events are written per request in tests
+VIEW_EVENTS_ASYNC = False
+VIEW_EVENTS_FLUSH_SIZE = 500
+VIEW_EVENTS_FLUSH_INTERVAL_SECONDS = 10
+VIEW_EVENTS_BUFFER_MAX = 100000
+
+ANALYTICS_TRENDS_CACHE_SECONDS = 0
+ANALYTICS_ROLLUP_INTERVAL_SECONDS = 300
+
+VIEW_LOG_PARTITION_MONTHS_AHEAD = 3
+VIEW_LOG_RAW_RETENTION_MONTHS = 6
+VIEW_LOG_DAILY_RETENTION_DAYS = 730
+
 # Celery Beat Schedule - Test environment (optional, can be disabled)
 from celery.schedules import crontab
 
@@ -7,6 +7,7 @@ from django.contrib.auth import get_user_model
 from rest_framework.test import APIClient
 from unittest.mock import patch
 from cases.medical_models import Department
+from cases.models import Case
 from repositories.models import Repository
 
 User = get_user_model()
@@ -19,6 +20,15 @@ def mock_notifications():
         yield
 
 
+@pytest.fixture
+def locmem_cache(settings):
+    """In-process cache for tests that read back what they cache (no Redis)"""
+    settings.CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    }
+    yield
+
+
 @pytest.fixture(scope="session")
 def django_db_setup(django_db_setup, django_db_blocker):
     """
@@ -115,6 +125,36 @@ def test_repository(db, instructor_user, cardiology_department):
     )
 
 
+@pytest.fixture
+def make_case(student_user, test_repository):
+    """
+    Factory for test cases; keyword arguments override the defaults
+    (a draft by student_user in test_repository).
+    """
+
+    def make(**fields):
+        defaults = {
+            "title": "Test case",
+            "student": student_user,
+            "repository": test_repository,
+            "patient_name": "Test Patient",
+            "patient_age": 55,
+            "patient_gender": "male",
+            "specialty": "Cardiology",
+        }
+        return Case.objects.create(**{**defaults, **fields})
+
+    return make
+
+
+@pytest.fixture
+def case(make_case):
+    """
+    Create a test case owned by student_user.
+    """
+    return make_case()
+
+
 @pytest.fixture
 def authenticated_client(api_client, student_user):
     """
@@ -25,13 +25,13 @@ Last Updated: November 3, 2025
 
 import io
 import json
-import unicodedata
 from datetime import datetime
 from typing import Dict, Any, Optional
 from django.conf import settings
 from django.core.files.base import ContentFile
 from django.utils import timezone
 from cases.models import Case
+from cases.search.normalize import to_nfc
 
 # PDF generation imports
 try:
@@ -97,12 +97,7 @@ def normalize_vietnamese_text(text: str) -> str:
         >>> normalize_vietnamese_text("Suy hô hấp cấp")
         'Suy hô hấp cấp'  # All characters in precomposed form
     """
-    if text is None:
-        return ""
-    if not isinstance(text, str):
-        text = str(text)
-    # Normalize to NFC (Canonical Decomposition, followed by Canonical Composition)
-    return unicodedata.normalize("NFC", text)
+    return to_nfc(text)
 
 
 class ExportUtils:
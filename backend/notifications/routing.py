@@ -1,9 +1,14 @@
 from django.urls import re_path
 from . import consumers
 
-# Import OCR routing
+# Import OCR / ASR routing
 from ai.ocr.routing import websocket_urlpatterns as ocr_websocket_urlpatterns
+from ai.asr.routing import websocket_urlpatterns as asr_websocket_urlpatterns
 
-websocket_urlpatterns = [
-    re_path(r"ws/notifications/$", consumers.NotificationConsumer.as_asgi()),
-] + ocr_websocket_urlpatterns
+websocket_urlpatterns = (
+    [
+        re_path(r"ws/notifications/$", consumers.NotificationConsumer.as_asgi()),
+    ]
+    + ocr_websocket_urlpatterns
+    + asr_websocket_urlpatterns
+)
@@ -75,6 +75,7 @@ from grades.models import Grade  # noqa: E402
 from comments.models import Comment  # noqa: E402
 from feedback.models import Feedback  # noqa: E402
 from notifications.models import Notification  # noqa: E402
+from cases.search.normalize import strip_diacritics  # noqa: E402
 import random
 from datetime import timedelta
 from django.utils import timezone
@@ -82,146 +83,405 @@ from django.utils import timezone
 
 def remove_vietnamese_diacritics(text):
     """Remove Vietnamese diacritics from text for username generation."""
-    vietnamese_map = {
-        "à": "a",
-        "á": "a",
-        "ả": "a",
-        "ã": "a",
-        "ạ": "a",
-        "ă": "a",
-        "ằ": "a",
-        "ắ": "a",
-        "ẳ": "a",
-        "ẵ": "a",
-        "ặ": "a",
-        "â": "a",
-        "ầ": "a",
-        "ấ": "a",
-        "ẩ": "a",
-        "ẫ": "a",
-        "ậ": "a",
-        "è": "e",
-        "é": "e",
-        "ẻ": "e",
-        "ẽ": "e",
-        "ẹ": "e",
-        "ê": "e",
-        "ề": "e",
-        "ế": "e",
-        "ể": "e",
-        "ễ": "e",
-        "ệ": "e",
-        "ì": "i",
-        "í": "i",
-        "ỉ": "i",
-        "ĩ": "i",
-        "ị": "i",
-        "ò": "o",
-        "ó": "o",
-        "ỏ": "o",
-        "õ": "o",
-        "ọ": "o",
-        "ô": "o",
-        "ồ": "o",
-        "ố": "o",
-        "ổ": "o",
-        "ỗ": "o",
-        "ộ": "o",
-        "ơ": "o",
-        "ờ": "o",
-        "ớ": "o",
-        "ở": "o",
-        "ỡ": "o",
-        "ợ": "o",
-        "ù": "u",
-        "ú": "u",
-        "ủ": "u",
-        "ũ": "u",
-        "ụ": "u",
-        "ư": "u",
-        "ừ": "u",
-        "ứ": "u",
-        "ử": "u",
-        "ữ": "u",
-        "ự": "u",
-        "ỳ": "y",
-        "ý": "y",
-        "ỷ": "y",
-        "ỹ": "y",
-        "ỵ": "y",
-        "đ": "d",
-        "À": "A",
-        "Á": "A",
-        "Ả": "A",
-        "Ã": "A",
-        "Ạ": "A",
-        "Ă": "A",
-        "Ằ": "A",
-        "Ắ": "A",
-        "Ẳ": "A",
-        "Ẵ": "A",
-        "Ặ": "A",
-        "Â": "A",
-        "Ầ": "A",
-        "Ấ": "A",
-        "Ẩ": "A",
-        "Ẫ": "A",
-        "Ậ": "A",
-        "È": "E",
-        "É": "E",
-        "Ẻ": "E",
-        "Ẽ": "E",
-        "Ẹ": "E",
-        "Ê": "E",
-        "Ề": "E",
-        "Ế": "E",
-        "Ể": "E",
-        "Ễ": "E",
-        "Ệ": "E",
-        "Ì": "I",
-        "Í": "I",
-        "Ỉ": "I",
-        "Ĩ": "I",
-        "Ị": "I",
-        "Ò": "O",
-        "Ó": "O",
-        "Ỏ": "O",
-        "Õ": "O",
-        "Ọ": "O",
-        "Ô": "O",
-        "Ồ": "O",
-        "Ố": "O",
-        "Ổ": "O",
-        "Ỗ": "O",
-        "Ộ": "O",
-        "Ơ": "O",
-        "Ờ": "O",
-        "Ớ": "O",
-        "Ở": "O",
-        "Ỡ": "O",
-        "Ợ": "O",
-        "Ù": "U",
-        "Ú": "U",
-        "Ủ": "U",
-        "Ũ": "U",
-        "Ụ": "U",
-        "Ư": "U",
-        "Ừ": "U",
-        "Ứ": "U",
-        "Ử": "U",
-        "Ữ": "U",
-        "Ự": "U",
-        "Ỳ": "Y",
-        "Ý": "Y",
-        "Ỷ": "Y",
-        "Ỹ": "Y",
-        "Ỵ": "Y",
-        "Đ": "D",
+    return strip_diacritics(text)
+
+
+# Case templates by specialty (specialty is the specific medical field, different from department)
+CASE_TEMPLATES_BY_DEPT = {
+    "Tim mạch": [
+        {
+            "title": "Nhồi máu cơ tim cấp ST chênh lên",
+            "specialty": "Tim mạch can thiệp",
+            "keywords": "tim mạch, đau ngực, nhồi máu cơ tim, STEMI",
+            "age_range": (45, 75),
+        },
+        {
+            "title": "Suy tim mạn tính",
+            "specialty": "Suy tim - Tăng huyết áp",
+            "keywords": "suy tim, phù, khó thở",
+            "age_range": (55, 80),
+        },
+        {
+            "title": "Rung nhĩ",
+            "specialty": "Điện sinh lý tim",
+            "keywords": "rung nhĩ, loạn nhịp tim",
+            "age_range": (50, 85),
+        },
+        {
+            "title": "Hẹp van tim",
+            "specialty": "Tim mạch cấu trúc",
+            "keywords": "van tim, hở van, hẹp van",
+            "age_range": (40, 70),
+        },
+        {
+            "title": "Tăng huyết áp ác tính",
+            "specialty": "Cấp cứu tim mạch",
+            "keywords": "tăng huyết áp, cấp cứu",
+            "age_range": (35, 65),
+        },
+    ],
+    "Nội khoa": [
+        {
+            "title": "Đái tháo đường type 2",
+            "specialty": "Nội tiết - Chuyển hóa",
+            "keywords": "đái tháo đường, tăng đường huyết",
+            "age_range": (40, 70),
+        },
+        {
+            "title": "Viêm gan virus B",
+            "specialty": "Gan mật",
+            "keywords": "viêm gan B, gan, virus",
+            "age_range": (30, 60),
+        },
+        {
+            "title": "Tăng huyết áp độ 2",
+            "specialty": "Nội tổng hợp",
+            "keywords": "tăng huyết áp, tim mạch",
+            "age_range": (45, 75),
+        },
+        {
+            "title": "Sốt cao không rõ nguyên nhân",
+            "specialty": "Nhiễm khuẩn",
+            "keywords": "sốt, nhiễm khuẩn",
+            "age_range": (20, 50),
+        },
+        {
+            "title": "Suy thận mạn",
+            "specialty": "Thận - Lọc máu",
+            "keywords": "suy thận, lọc máu",
+            "age_range": (50, 80),
+        },
+    ],
+    "Ngoại khoa": [
+        {
+            "title": "Viêm ruột thừa cấp",
+            "specialty": "Ngoại tiêu hóa",
+            "keywords": "viêm ruột thừa, đau bụng, phẫu thuật",
+            "age_range": (15, 45),
+        },
+        {
+            "title": "Sỏi mật",
+            "specialty": "Ngoại gan mật tụy",
+            "keywords": "sỏi mật, đau bụng",
+            "age_range": (30, 65),
+        },
+        {
+            "title": "Thoát vị",
+            "specialty": "Ngoại tổng hợp",
+            "keywords": "thoát vị, phẫu thuật",
+            "age_range": (25, 70),
+        },
+        {
+            "title": "Chấn thương đa khoa",
+            "specialty": "Phẫu thuật chấn thương",
+            "keywords": "chấn thương, tai nạn",
+            "age_range": (18, 50),
+        },
+        {
+            "title": "Ung thư đại trực tràng",
+            "specialty": "Ngoại ung bướu",
+            "keywords": "ung thư, đại tràng",
+            "age_range": (45, 75),
+        },
+    ],
+    "Hô hấp": [
+        {
+            "title": "Hen phế quản cấp",
+            "specialty": "Bệnh phổi tắc nghẽn",
+            "keywords": "hen, khó thở",
+            "age_range": (20, 60),
+        },
+        {
+            "title": "Viêm phổi",
+            "specialty": "Nhiễm khuẩn hô hấp",
+            "keywords": "viêm phổi, ho, sốt",
+            "age_range": (25, 75),
+        },
+        {
+            "title": "COPD cấp",
+            "specialty": "Bệnh phổi mạn tính",
+            "keywords": "COPD, khó thở",
+            "age_range": (50, 80),
+        },
+        {
+            "title": "Lao phổi",
+            "specialty": "Bệnh lao",
+            "keywords": "lao, ho ra máu",
+            "age_range": (20, 70),
+        },
+        {
+            "title": "Tràn dịch màng phổi",
+            "specialty": "Bệnh màng phổi",
+            "keywords": "màng phổi, khó thở",
+            "age_range": (35, 75),
+        },
+    ],
+    "Tiêu hóa": [
+        {
+            "title": "Viêm tụy cấp",
+            "specialty": "Bệnh tụy",
+            "keywords": "viêm tụy, đau bụng",
+            "age_range": (30, 65),
+        },
+        {
+            "title": "Xuất huyết tiêu hóa",
+            "specialty": "Cấp cứu tiêu hóa",
+            "keywords": "xuất huyết, tiêu hóa",
+            "age_range": (40, 75),
+        },
+        {
+            "title": "Viêm loét dạ dày",
+            "specialty": "Bệnh dạ dày - tá tràng",
+            "keywords": "dạ dày, loét",
+            "age_range": (25, 65),
+        },
+        {
+            "title": "Xơ gan",
+            "specialty": "Gan mật - Xơ gan",
+            "keywords": "xơ gan, cổ trướng",
+            "age_range": (45, 75),
+        },
+        {
+            "title": "Viêm ruột",
+            "specialty": "Bệnh ruột",
+            "keywords": "viêm ruột, tiêu chảy",
+            "age_range": (20, 60),
+        },
+    ],
+    "Thần kinh": [
+        {
+            "title": "Đột quỵ não",
+            "specialty": "Tai biến mạch máu não",
+            "keywords": "đột quỵ, liệt",
+            "age_range": (50, 85),
+        },
+        {
+            "title": "Động kinh",
+            "specialty": "Thần kinh cơ",
+            "keywords": "động kinh, co giật",
+            "age_range": (15, 60),
+        },
+        {
+            "title": "Viêm màng não",
+            "specialty": "Nhiễm khuẩn thần kinh",
+            "keywords": "viêm màng não, đau đầu",
+            "age_range": (20, 50),
+        },
+        {
+            "title": "Parkinson",
+            "specialty": "Rối loạn vận động",
+            "keywords": "Parkinson, run",
+            "age_range": (55, 85),
+        },
+        {
+            "title": "Đau đầu migraine",
+            "specialty": "Đau đầu - Rối loạn cảm giác",
+            "keywords": "đau đầu, migraine",
+            "age_range": (20, 55),
+        },
+    ],
+}
+
+CLINICAL_DATA_TEMPLATES = {
+    "Tim mạch": {
+        "chief_complaints": [
+            "Đau ngực cấp tính",
+            "Khó thở",
+            "Hồi hộp đánh trống ngực",
+            "Phù chân",
+        ],
+        "histories": [
+            "Đau ngực xuất hiện đột ngột, lan ra cánh tay trái, kèm vã mồ hôi",
+            "Khó thở khi gắng sức, ho ra đờm hồng, phù chân tăng dần",
+            "Hồi hộp không đều, choáng váng, khó thở nhẹ",
+        ],
+        "vitals": [
+            "T: 36.8°C, P: 110/min, BP: 160/95 mmHg",
+            "T: 37.2°C, P: 95/min, BP: 145/90 mmHg",
+        ],
+        "labs": [
+            "Troponin tăng, CK-MB tăng, D-dimer bình thường",
+            "BNP tăng cao, Creatinine nhẹ tăng",
+        ],
+        "imaging": [
+            "X-quang ngực: Phù phổi",
+            "Echo tim: EF 35%, phì đại thất trái",
+        ],
+    },
+    "Nội khoa": {
+        "chief_complaints": ["Đau bụng", "Sốt cao", "Mệt mỏi", "Vàng da"],
+        "histories": [
+            "Đau bụng vùng thượng vị, buồn nôn, ăn uống kém",
+            "Sốt cao liên tục 3 ngày, đau đầu, mệt mỏi",
+            "Tiểu nhiều, uống nhiều nước, gầy sút cân",
+        ],
+        "vitals": [
+            "T: 38.5°C, P: 88/min, BP: 120/75 mmHg",
+            "T: 37°C, P: 72/min, BP: 130/80 mmHg",
+        ],
+        "labs": [
+            "Đường huyết: 350 mg/dL, HbA1c: 9.5%",
+            "ALT/AST tăng, Bilirubin tăng",
+        ],
+        "imaging": [
+            "Siêu âm bụng: Gan to, mật độ tăng",
+            "X-quang ngực bình thường",
+        ],
+    },
+    "Ngoại khoa": {
+        "chief_complaints": ["Đau bụng hạ vị phải", "Khối u", "Đau khi đi tiêu"],
+        "histories": [
+            "Đau bụng hạ vị phải xuất hiện 6 tiếng, buồn nôn, sốt nhẹ",
+            "Phát hiện khối u vùng bẹn, có thể đẩy lại được",
+            "Đau khi đi tiêu, táo bón, đi ngoài ra máu",
+        ],
+        "vitals": [
+            "T: 38°C, P: 95/min, BP: 125/78 mmHg",
+            "T: 36.9°C, P: 80/min, BP: 118/72 mmHg",
+        ],
+        "labs": ["BC tăng: 15000/mm3, CRP tăng", "Hb: 10.5 g/dL, CEA tăng"],
+        "imaging": [
+            "Siêu âm: Ruột thừa to, dịch quanh ruột",
+            "CT scan: Khối ở đại tràng sigma",
+        ],
+    },
+}
+
+
+def clinical_category(specialty):
+    """Map a case specialty to a CLINICAL_DATA_TEMPLATES key."""
+    if "Tim mạch" in specialty or "Cardio" in specialty:
+        return "Tim mạch"
+    if "Ngoại" in specialty or "Surgery" in specialty:
+        return "Ngoại khoa"
+    return "Nội khoa"
+
+
+def generate_clinical_sections(title, specialty, case_status):
+    """
+    Random field values for each medical section of a case, keyed by section
+    ("learning_outcomes" is None unless the case is reviewed/approved).
+    Also used by the search benchmark (manage.py benchmark_search).
+    """
+    category = clinical_category(specialty)
+    templates = CLINICAL_DATA_TEMPLATES.get(
+        category, CLINICAL_DATA_TEMPLATES["Nội khoa"]
+    )
+
+    return {
+        "clinical_history": {
+            "chief_complaint": random.choice(templates["chief_complaints"]),
+            "history_present_illness": random.choice(templates["histories"]),
+            "past_medical_history": random.choice(
+                [
+                    "Tăng huyết áp 5 năm",
+                    "Đái tháo đường type 2",
+                    "Không có bệnh lý đặc biệt",
+                    "Hen phế quản",
+                ]
+            ),
+            "family_history": random.choice(
+                [
+                    "Cha mẹ có tiền sử bệnh tim mạch",
+                    "Không có tiền sử gia đình đáng chú ý",
+                    "Ông ngoại mắc đái tháo đường",
+                ]
+            ),
+            "social_history": random.choice(
+                [
+                    "Không hút thuốc, uống rượu",
+                    "Hút thuốc 10 điếu/ngày, 15 năm",
+                    "Văn phòng, ít vận động",
+                ]
+            ),
+            "medications": random.choice(
+                [
+                    "Đang dùng thuốc hạ áp: Amlodipine 5mg/ngày",
+                    "Metformin 500mg x 2 lần/ngày",
+                    "Chưa dùng thuốc thường xuyên",
+                ]
+            ),
+        },
+        "physical_examination": {
+            "vital_signs": random.choice(templates["vitals"]),
+            "general_appearance": "Tỉnh táo, tiếp xúc tốt",
+            "cardiovascular": random.choice(
+                [
+                    "Tim đều, không tiếng thổi",
+                    "Nhịp nhanh, tiếng tim I mờ",
+                    "Nhịp không đều, tiếng thổi tâm thu",
+                ]
+            ),
+            "respiratory": random.choice(
+                [
+                    "Phổi trong, không ran",
+                    "Ran ẩm hai đáy phổi",
+                    "Phế âm giảm bên phải",
+                ]
+            ),
+            "abdominal": random.choice(
+                [
+                    "Bụng mềm, không đau ấn",
+                    "Đau ấn vùng hạ vị phải, Mc Burney (+)",
+                    "Gan to 2cm dưới bờ sườn",
+                ]
+            ),
+        },
+        "investigations": {
+            "laboratory_results": random.choice(templates["labs"]),
+            "imaging_studies": random.choice(templates["imaging"]),
+            "ecg_findings": (
+                random.choice(
+                    [
+                        "Nhịp xoang, không bất thường",
+                        "ST chênh lên V2-V5",
+                        "Rung nhĩ, tần số thất 120/phút",
+                    ]
+                )
+                if category == "Tim mạch"
+                else ""
+            ),
+        },
+        "diagnosis_management": {
+            "primary_diagnosis": title.split(" - ")[0] if " - " in title else title,
+            "differential_diagnosis": random.choice(
+                [
+                    "Cơn đau thắt ngực không ổn định",
+                    "Viêm phổi",
+                    "Viêm dạ dày cấp",
+                ]
+            ),
+            "treatment_plan": random.choice(
+                [
+                    "Điều trị nội khoa theo phác đồ",
+                    "Chỉ định phẫu thuật cấp",
+                    "Theo dõi tại bệnh viện 24-48h",
+                ]
+            ),
+            "medications_prescribed": random.choice(
+                [
+                    "Aspirin 300mg, Clopidogrel 300mg, Atorvastatin 40mg",
+                    "Ceftriaxone 2g/ngày, Metronidazole 500mg x3",
+                    "Insulin NPH + Regular, Metformin",
+                ]
+            ),
+        },
+        "learning_outcomes": (
+            {
+                "learning_objectives": "Nhận biết triệu chứng cơ bản, chẩn đoán phân biệt, xử trí ban đầu",
+                "clinical_pearls": random.choice(
+                    [
+                        "Luôn kiểm tra ECG trong vòng 10 phút khi bệnh nhân đau ngực",
+                        "Chỉ số Alvarado giúp đánh giá nguy cơ viêm ruột thừa",
+                        "Kiểm soát đường huyết là then chốt trong điều trị",
+                    ]
+                ),
+                "references": "ESC Guidelines 2023, AHA/ACC 2024",
+            }
+            if case_status in ["approved", "reviewed"]
+            else None
+        ),
     }
-    result = text
-    for viet_char, latin_char in vietnamese_map.items():
-        result = result.replace(viet_char, latin_char)
-    return result
 
 
 def enforce_department_scoping():
@@ -903,202 +1163,6 @@ def create_test_data(clear_existing: bool = False, per_dept_cases: int = 5):
         than_kinh_dept: [s for s in students if s.department == than_kinh_dept],
     }
 
-    # Case templates by specialty (specialty is the specific medical field, different from department)
-    case_templates_by_dept = {
-        "Tim mạch": [
-            {
-                "title": "Nhồi máu cơ tim cấp ST chênh lên",
-                "specialty": "Tim mạch can thiệp",
-                "keywords": "tim mạch, đau ngực, nhồi máu cơ tim, STEMI",
-                "age_range": (45, 75),
-            },
-            {
-                "title": "Suy tim mạn tính",
-                "specialty": "Suy tim - Tăng huyết áp",
-                "keywords": "suy tim, phù, khó thở",
-                "age_range": (55, 80),
-            },
-            {
-                "title": "Rung nhĩ",
-                "specialty": "Điện sinh lý tim",
-                "keywords": "rung nhĩ, loạn nhịp tim",
-                "age_range": (50, 85),
-            },
-            {
-                "title": "Hẹp van tim",
-                "specialty": "Tim mạch cấu trúc",
-                "keywords": "van tim, hở van, hẹp van",
-                "age_range": (40, 70),
-            },
-            {
-                "title": "Tăng huyết áp ác tính",
-                "specialty": "Cấp cứu tim mạch",
-                "keywords": "tăng huyết áp, cấp cứu",
-                "age_range": (35, 65),
-            },
-        ],
-        "Nội khoa": [
-            {
-                "title": "Đái tháo đường type 2",
-                "specialty": "Nội tiết - Chuyển hóa",
-                "keywords": "đái tháo đường, tăng đường huyết",
-                "age_range": (40, 70),
-            },
-            {
-                "title": "Viêm gan virus B",
-                "specialty": "Gan mật",
-                "keywords": "viêm gan B, gan, virus",
-                "age_range": (30, 60),
-            },
-            {
-                "title": "Tăng huyết áp độ 2",
-                "specialty": "Nội tổng hợp",
-                "keywords": "tăng huyết áp, tim mạch",
-                "age_range": (45, 75),
-            },
-            {
-                "title": "Sốt cao không rõ nguyên nhân",
-                "specialty": "Nhiễm khuẩn",
-                "keywords": "sốt, nhiễm khuẩn",
-                "age_range": (20, 50),
-            },
-            {
-                "title": "Suy thận mạn",
-                "specialty": "Thận - Lọc máu",
-                "keywords": "suy thận, lọc máu",
-                "age_range": (50, 80),
-            },
-        ],
-        "Ngoại khoa": [
-            {
-                "title": "Viêm ruột thừa cấp",
-                "specialty": "Ngoại tiêu hóa",
-                "keywords": "viêm ruột thừa, đau bụng, phẫu thuật",
-                "age_range": (15, 45),
-            },
-            {
-                "title": "Sỏi mật",
-                "specialty": "Ngoại gan mật tụy",
-                "keywords": "sỏi mật, đau bụng",
-                "age_range": (30, 65),
-            },
-            {
-                "title": "Thoát vị",
-                "specialty": "Ngoại tổng hợp",
-                "keywords": "thoát vị, phẫu thuật",
-                "age_range": (25, 70),
-            },
-            {
-                "title": "Chấn thương đa khoa",
-                "specialty": "Phẫu thuật chấn thương",
-                "keywords": "chấn thương, tai nạn",
-                "age_range": (18, 50),
-            },
-            {
-                "title": "Ung thư đại trực tràng",
-                "specialty": "Ngoại ung bướu",
-                "keywords": "ung thư, đại tràng",
-                "age_range": (45, 75),
-            },
-        ],
-        "Hô hấp": [
-            {
-                "title": "Hen phế quản cấp",
-                "specialty": "Bệnh phổi tắc nghẽn",
-                "keywords": "hen, khó thở",
-                "age_range": (20, 60),
-            },
-            {
-                "title": "Viêm phổi",
-                "specialty": "Nhiễm khuẩn hô hấp",
-                "keywords": "viêm phổi, ho, sốt",
-                "age_range": (25, 75),
-            },
-            {
-                "title": "COPD cấp",
-                "specialty": "Bệnh phổi mạn tính",
-                "keywords": "COPD, khó thở",
-                "age_range": (50, 80),
-            },
-            {
-                "title": "Lao phổi",
-                "specialty": "Bệnh lao",
-                "keywords": "lao, ho ra máu",
-                "age_range": (20, 70),
-            },
-            {
-                "title": "Tràn dịch màng phổi",
-                "specialty": "Bệnh màng phổi",
-                "keywords": "màng phổi, khó thở",
-                "age_range": (35, 75),
-            },
-        ],
-        "Tiêu hóa": [
-            {
-                "title": "Viêm tụy cấp",
-                "specialty": "Bệnh tụy",
-                "keywords": "viêm tụy, đau bụng",
-                "age_range": (30, 65),
-            },
-            {
-                "title": "Xuất huyết tiêu hóa",
-                "specialty": "Cấp cứu tiêu hóa",
-                "keywords": "xuất huyết, tiêu hóa",
-                "age_range": (40, 75),
-            },
-            {
-                "title": "Viêm loét dạ dày",
-                "specialty": "Bệnh dạ dày - tá tràng",
-                "keywords": "dạ dày, loét",
-                "age_range": (25, 65),
-            },
-            {
-                "title": "Xơ gan",
-                "specialty": "Gan mật - Xơ gan",
-                "keywords": "xơ gan, cổ trướng",
-                "age_range": (45, 75),
-            },
-            {
-                "title": "Viêm ruột",
-                "specialty": "Bệnh ruột",
-                "keywords": "viêm ruột, tiêu chảy",
-                "age_range": (20, 60),
-            },
-        ],
-        "Thần kinh": [
-            {
-                "title": "Đột quỵ não",
-                "specialty": "Tai biến mạch máu não",
-                "keywords": "đột quỵ, liệt",
-                "age_range": (50, 85),
-            },
-            {
-                "title": "Động kinh",
-                "specialty": "Thần kinh cơ",
-                "keywords": "động kinh, co giật",
-                "age_range": (15, 60),
-            },
-            {
-                "title": "Viêm màng não",
-                "specialty": "Nhiễm khuẩn thần kinh",
-                "keywords": "viêm màng não, đau đầu",
-                "age_range": (20, 50),
-            },
-            {
-                "title": "Parkinson",
-                "specialty": "Rối loạn vận động",
-                "keywords": "Parkinson, run",
-                "age_range": (55, 85),
-            },
-            {
-                "title": "Đau đầu migraine",
-                "specialty": "Đau đầu - Rối loạn cảm giác",
-                "keywords": "đau đầu, migraine",
-                "age_range": (20, 55),
-            },
-        ],
-    }
-
     created_cases = []
     # Weight statuses to have more graded cases (submitted, reviewed, approved)
     case_statuses = [
@@ -1121,27 +1185,27 @@ def create_test_data(clear_existing: bool = False, per_dept_cases: int = 5):
         dept_name_en = dept.name
         # Map department to case templates
         if "Cardiology" in dept_name_en or "Tim" in dept.vietnamese_name:
-            templates_list = case_templates_by_dept["Tim mạch"]
+            templates_list = CASE_TEMPLATES_BY_DEPT["Tim mạch"]
             repo_idx = 0
             template_idx = 0
         elif "Surgery" in dept_name_en or "Ngoại" in dept.vietnamese_name:
-            templates_list = case_templates_by_dept["Ngoại khoa"]
+            templates_list = CASE_TEMPLATES_BY_DEPT["Ngoại khoa"]
             repo_idx = 2
             template_idx = 2
         elif "Respiratory" in dept_name_en or "Hô Hấp" in dept.vietnamese_name:
-            templates_list = case_templates_by_dept["Hô hấp"]
+            templates_list = CASE_TEMPLATES_BY_DEPT["Hô hấp"]
             repo_idx = 1
             template_idx = 1
         elif "Gastro" in dept_name_en or "Tiêu Hóa" in dept.vietnamese_name:
-            templates_list = case_templates_by_dept["Tiêu hóa"]
+            templates_list = CASE_TEMPLATES_BY_DEPT["Tiêu hóa"]
             repo_idx = 1
             template_idx = 1
         elif "Neuro" in dept_name_en or "Thần Kinh" in dept.vietnamese_name:
-            templates_list = case_templates_by_dept["Thần kinh"]
+            templates_list = CASE_TEMPLATES_BY_DEPT["Thần kinh"]
             repo_idx = 1
             template_idx = 1
         else:  # Internal Medicine and others
-            templates_list = case_templates_by_dept["Nội khoa"]
+            templates_list = CASE_TEMPLATES_BY_DEPT["Nội khoa"]
             repo_idx = 1
             template_idx = 1
 
@@ -1199,219 +1263,30 @@ def create_test_data(clear_existing: bool = False, per_dept_cases: int = 5):
 
     # Add detailed clinical data to ALL cases
     print("\n📋 Adding comprehensive clinical data to all cases...")
-    clinical_data_templates = {
-        "Tim mạch": {
-            "chief_complaints": [
-                "Đau ngực cấp tính",
-                "Khó thở",
-                "Hồi hộp đánh trống ngực",
-                "Phù chân",
-            ],
-            "histories": [
-                "Đau ngực xuất hiện đột ngột, lan ra cánh tay trái, kèm vã mồ hôi",
-                "Khó thở khi gắng sức, ho ra đờm hồng, phù chân tăng dần",
-                "Hồi hộp không đều, choáng váng, khó thở nhẹ",
-            ],
-            "vitals": [
-                "T: 36.8°C, P: 110/min, BP: 160/95 mmHg",
-                "T: 37.2°C, P: 95/min, BP: 145/90 mmHg",
-            ],
-            "labs": [
-                "Troponin tăng, CK-MB tăng, D-dimer bình thường",
-                "BNP tăng cao, Creatinine nhẹ tăng",
-            ],
-            "imaging": [
-                "X-quang ngực: Phù phổi",
-                "Echo tim: EF 35%, phì đại thất trái",
-            ],
-        },
-        "Nội khoa": {
-            "chief_complaints": ["Đau bụng", "Sốt cao", "Mệt mỏi", "Vàng da"],
-            "histories": [
-                "Đau bụng vùng thượng vị, buồn nôn, ăn uống kém",
-                "Sốt cao liên tục 3 ngày, đau đầu, mệt mỏi",
-                "Tiểu nhiều, uống nhiều nước, gầy sút cân",
-            ],
-            "vitals": [
-                "T: 38.5°C, P: 88/min, BP: 120/75 mmHg",
-                "T: 37°C, P: 72/min, BP: 130/80 mmHg",
-            ],
-            "labs": [
-                "Đường huyết: 350 mg/dL, HbA1c: 9.5%",
-                "ALT/AST tăng, Bilirubin tăng",
-            ],
-            "imaging": [
-                "Siêu âm bụng: Gan to, mật độ tăng",
-                "X-quang ngực bình thường",
-            ],
-        },
-        "Ngoại khoa": {
-            "chief_complaints": ["Đau bụng hạ vị phải", "Khối u", "Đau khi đi tiêu"],
-            "histories": [
-                "Đau bụng hạ vị phải xuất hiện 6 tiếng, buồn nôn, sốt nhẹ",
-                "Phát hiện khối u vùng bẹn, có thể đẩy lại được",
-                "Đau khi đi tiêu, táo bón, đi ngoài ra máu",
-            ],
-            "vitals": [
-                "T: 38°C, P: 95/min, BP: 125/78 mmHg",
-                "T: 36.9°C, P: 80/min, BP: 118/72 mmHg",
-            ],
-            "labs": ["BC tăng: 15000/mm3, CRP tăng", "Hb: 10.5 g/dL, CEA tăng"],
-            "imaging": [
-                "Siêu âm: Ruột thừa to, dịch quanh ruột",
-                "CT scan: Khối ở đại tràng sigma",
-            ],
-        },
-    }
 
     for case in created_cases:
-        # Determine category
-        category = "Nội khoa"
-        if "Tim mạch" in case.specialty or "Cardio" in case.specialty:
-            category = "Tim mạch"
-        elif "Ngoại" in case.specialty or "Surgery" in case.specialty:
-            category = "Ngoại khoa"
-
-        templates = clinical_data_templates.get(
-            category, clinical_data_templates["Nội khoa"]
+        sections = generate_clinical_sections(
+            case.title, case.specialty, case.case_status
         )
 
-        # Clinical History
         ClinicalHistory.objects.get_or_create(
-            case=case,
-            defaults={
-                "chief_complaint": random.choice(templates["chief_complaints"]),
-                "history_present_illness": random.choice(templates["histories"]),
-                "past_medical_history": random.choice(
-                    [
-                        "Tăng huyết áp 5 năm",
-                        "Đái tháo đường type 2",
-                        "Không có bệnh lý đặc biệt",
-                        "Hen phế quản",
-                    ]
-                ),
-                "family_history": random.choice(
-                    [
-                        "Cha mẹ có tiền sử bệnh tim mạch",
-                        "Không có tiền sử gia đình đáng chú ý",
-                        "Ông ngoại mắc đái tháo đường",
-                    ]
-                ),
-                "social_history": random.choice(
-                    [
-                        "Không hút thuốc, uống rượu",
-                        "Hút thuốc 10 điếu/ngày, 15 năm",
-                        "Văn phòng, ít vận động",
-                    ]
-                ),
-                "medications": random.choice(
-                    [
-                        "Đang dùng thuốc hạ áp: Amlodipine 5mg/ngày",
-                        "Metformin 500mg x 2 lần/ngày",
-                        "Chưa dùng thuốc thường xuyên",
-                    ]
-                ),
-            },
+            case=case, defaults=sections["clinical_history"]
         )
-
-        # Physical Examination
         PhysicalExamination.objects.get_or_create(
-            case=case,
-            defaults={
-                "vital_signs": random.choice(templates["vitals"]),
-                "general_appearance": "Tỉnh táo, tiếp xúc tốt",
-                "cardiovascular": random.choice(
-                    [
-                        "Tim đều, không tiếng thổi",
-                        "Nhịp nhanh, tiếng tim I mờ",
-                        "Nhịp không đều, tiếng thổi tâm thu",
-                    ]
-                ),
-                "respiratory": random.choice(
-                    [
-                        "Phổi trong, không ran",
-                        "Ran ẩm hai đáy phổi",
-                        "Phế âm giảm bên phải",
-                    ]
-                ),
-                "abdominal": random.choice(
-                    [
-                        "Bụng mềm, không đau ấn",
-                        "Đau ấn vùng hạ vị phải, Mc Burney (+)",
-                        "Gan to 2cm dưới bờ sườn",
-                    ]
-                ),
-            },
+            case=case, defaults=sections["physical_examination"]
         )
-
-        # Investigations
         Investigations.objects.get_or_create(
-            case=case,
-            defaults={
-                "laboratory_results": random.choice(templates["labs"]),
-                "imaging_studies": random.choice(templates["imaging"]),
-                "ecg_findings": (
-                    random.choice(
-                        [
-                            "Nhịp xoang, không bất thường",
-                            "ST chênh lên V2-V5",
-                            "Rung nhĩ, tần số thất 120/phút",
-                        ]
-                    )
-                    if category == "Tim mạch"
-                    else ""
-                ),
-            },
+            case=case, defaults=sections["investigations"]
         )
-
-        # Diagnosis & Management
         DiagnosisManagement.objects.get_or_create(
-            case=case,
-            defaults={
-                "primary_diagnosis": (
-                    case.title.split(" - ")[0] if " - " in case.title else case.title
-                ),
-                "differential_diagnosis": random.choice(
-                    [
-                        "Cơn đau thắt ngực không ổn định",
-                        "Viêm phổi",
-                        "Viêm dạ dày cấp",
-                    ]
-                ),
-                "treatment_plan": random.choice(
-                    [
-                        "Điều trị nội khoa theo phác đồ",
-                        "Chỉ định phẫu thuật cấp",
-                        "Theo dõi tại bệnh viện 24-48h",
-                    ]
-                ),
-                "medications_prescribed": random.choice(
-                    [
-                        "Aspirin 300mg, Clopidogrel 300mg, Atorvastatin 40mg",
-                        "Ceftriaxone 2g/ngày, Metronidazole 500mg x3",
-                        "Insulin NPH + Regular, Metformin",
-                    ]
-                ),
-            },
+            case=case, defaults=sections["diagnosis_management"]
         )
 
         # Learning Outcomes (for educational cases)
-        if case.case_status in ["approved", "reviewed"]:
+        if sections["learning_outcomes"]:
             LearningOutcomes.objects.get_or_create(
-                case=case,
-                defaults={
-                    "learning_objectives": "Nhận biết triệu chứng cơ bản, chẩn đoán phân biệt, xử trí ban đầu",
-                    "clinical_pearls": random.choice(
-                        [
-                            "Luôn kiểm tra ECG trong vòng 10 phút khi bệnh nhân đau ngực",
-                            "Chỉ số Alvarado giúp đánh giá nguy cơ viêm ruột thừa",
-                            "Kiểm soát đường huyết là then chốt trong điều trị",
-                        ]
-                    ),
-                    "references": "ESC Guidelines 2023, AHA/ACC 2024",
-                },
+                case=case, defaults=sections["learning_outcomes"]
             )
-
     print(f"✅ Added clinical data to all {len(created_cases)} cases")
 
     # Create Grades for submitted/reviewed/approved cases
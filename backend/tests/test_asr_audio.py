@@ -0,0 +1,45 @@
+"""
+Tests for in-memory audio decoding (ai.asr.audio).
+"""
+
+import io
+import subprocess
+import sys
+import types
+
+import numpy as np
+import pytest
+
+from ai.asr import audio
+
+
+@pytest.fixture
+def fake_decoders(monkeypatch):
+    """
+    soundfile that rejects every container after reading its header, and an
+    "ffmpeg" that copies stdin to stdout unchanged.
+    """
+
+    def info(source):
+        source.read(12)
+        raise RuntimeError("Format not recognised")
+
+    monkeypatch.setitem(sys.modules, "soundfile", types.SimpleNamespace(info=info))
+
+    popen = subprocess.Popen
+    copy = "import shutil, sys; shutil.copyfileobj(sys.stdin.buffer, sys.stdout.buffer)"
+    monkeypatch.setattr(
+        audio.subprocess,
+        "Popen",
+        lambda args, **kwargs: popen([sys.executable, "-c", copy], **kwargs),
+    )
+
+
+def test_file_like_source_falls_back_to_ffmpeg_from_the_start(fake_decoders):
+    samples = np.arange(1000, dtype=np.float32)
+    # e.g. a browser webm recording passed as an InMemoryUploadedFile
+    upload = io.BytesIO(samples.tobytes())
+
+    blocks = list(audio.iter_audio_blocks(upload, block_seconds=0.01))
+
+    np.testing.assert_array_equal(np.concatenate(blocks), samples)
@@ -0,0 +1,22 @@
+"""
+Tests for the on-disk heading embedding cache (ai.ocr.heading_matcher).
+"""
+
+import numpy as np
+
+from ai.ocr.heading_matcher import HeadingEmbeddingCache
+
+
+def test_flush_same_key_twice(tmp_path):
+    cache = HeadingEmbeddingCache(str(tmp_path / "headings"))
+    vector = np.ones(4, dtype=np.float32) / 2
+
+    cache.put_many({"tien su": vector})
+    cache.flush()
+    # e.g. two threads missed the same heading
+    cache.put_many({"tien su": vector})
+    cache.flush()
+
+    reloaded = HeadingEmbeddingCache(str(tmp_path / "headings"))
+    assert list(reloaded.get_many(["tien su"])) == ["tien su"]
+    assert reloaded.stats()["on_disk"] == 1
@@ -0,0 +1,41 @@
+"""
+Tests for startup model preloading (ai.model_registry).
+"""
+
+import pytest
+
+from ai import model_registry as registry_module
+from ai.model_registry import ModelRegistry, is_server_process
+
+
+def test_fork_unsafe_models_not_preloaded_before_fork():
+    registry = ModelRegistry()
+    loaded = []
+    registry.register("ocr.vietocr", lambda: loaded.append("ocr.vietocr"))
+    registry.register(
+        "ocr.process_pool", lambda: loaded.append("ocr.process_pool"), fork_safe=False
+    )
+
+    registry.preload(["ocr"], before_fork=False)
+    assert loaded == ["ocr.vietocr", "ocr.process_pool"]
+
+    loaded.clear()
+    registry.preload(["all"])
+    assert loaded == ["ocr.vietocr"]
+
+
+@pytest.mark.parametrize(
+    "argv, expected",
+    [
+        (["/venv/bin/gunicorn", "--preload", "clinical_case_platform.wsgi"], True),
+        (["/venv/bin/celery", "-A", "clinical_case_platform", "worker"], True),
+        (["/venv/lib/celery/__main__.py", "-A", "x", "worker", "-l", "info"], True),
+        (["/venv/bin/celery", "-A", "clinical_case_platform", "beat"], False),
+        (["manage.py", "migrate"], False),
+        (["manage.py", "rebuild_case_search", "--bulk"], False),
+        (["-c"], False),
+    ],
+)
+def test_is_server_process(monkeypatch, argv, expected):
+    monkeypatch.setattr(registry_module.sys, "argv", argv)
+    assert is_server_process() is expected
@@ -36,7 +36,7 @@ def mock_vncorenlp():
     Prevent VnCoreNLP / JVM initialization during tests.
     The JVM causes a fatal Windows access violation the first time it is loaded
     inside a pytest process.  We mock at the utils level so segment_text()
-    always hits the plain-text fallback branch.
+    always hits the dictionary fallback segmenter.
     """
     with patch("cases.search.utils.get_vncorenlp", return_value=None):
         yield